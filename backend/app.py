@@ -3,10 +3,8 @@ from flask import Flask, request, jsonify, send_file
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
 from werkzeug.exceptions import BadRequest
-import pandas as pd
 import json
 from datetime import datetime, timedelta
-import boto3
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -15,6 +13,10 @@ load_dotenv()
 app = Flask(__name__)
 CORS(app)
 
+# Per-request deadline that AI calls check before going out
+from services.circuit_breaker import install_request_deadline
+install_request_deadline(app)
+
 # Database configuration
 basedir = os.path.abspath(os.path.dirname(__file__))
 app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{os.path.join(basedir, "migration_tool.db")}'
@@ -23,6 +25,11 @@ app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret-key')
 
 db = SQLAlchemy(app)
 
+# Statements per request, slow-query plans and repeated statements (SQL_SLOW_QUERY_MS)
+from services.sql_instrumentation import install_sql_tracking, instrument_sqlalchemy
+instrument_sqlalchemy()
+install_sql_tracking(app)
+
 # Initialize models
 from models_new import init_models
 models = init_models(db)
@@ -33,20 +40,10 @@ CloudPreference = models['CloudPreference']
 BusinessConstraint = models['BusinessConstraint']
 ResourceRate = models['ResourceRate']
 MigrationPlan = models['MigrationPlan']
-# Import services - these will be updated to work with the models
-from services.cost_calculator import CostCalculator
-from services.migration_advisor import MigrationAdvisor
+# Services are imported inside the routes that use them: they pull in boto3, numpy and the
+# export libraries, which inventory endpoints never need and which would slow down startup
 # Temporarily comment out timeline generator to test
 # from services.timeline_generator import TimelineGenerator
-from services.export_service_new import ExportService
-
-# AWS Bedrock configuration
-bedrock_client = boto3.client(
-    'bedrock-runtime',
-    region_name=os.environ.get('AWS_REGION', 'us-east-1'),
-    aws_access_key_id=os.environ.get('AWS_ACCESS_KEY_ID'),
-    aws_secret_access_key=os.environ.get('AWS_SECRET_ACCESS_KEY')
-)
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
@@ -91,7 +88,7 @@ def handle_servers():
         'current_hosting': s.current_hosting,
         'technology': s.technology,
         'technology_version': s.technology_version,
-        'created_at': s.created_at.isoformat()
+        'created_at': s.created_at.isoformat() if s.created_at else None
     } for s in servers])
 
 @app.route('/api/databases', methods=['GET', 'POST'])
@@ -132,7 +129,7 @@ def handle_databases():
         'write_frequency': d.write_frequency,
         'downtime_tolerance': d.downtime_tolerance,
         'real_time_sync': d.real_time_sync,
-        'created_at': d.created_at.isoformat()
+        'created_at': d.created_at.isoformat() if d.created_at else None
     } for d in databases])
 
 @app.route('/api/file-shares', methods=['GET', 'POST'])
@@ -171,7 +168,7 @@ def handle_file_shares():
         'write_frequency': f.write_frequency,
         'downtime_tolerance': f.downtime_tolerance,
         'real_time_sync': f.real_time_sync,
-        'created_at': f.created_at.isoformat()
+        'created_at': f.created_at.isoformat() if f.created_at else None
     } for f in file_shares])
 
 @app.route('/api/cloud-preferences', methods=['GET', 'POST'])
@@ -278,13 +275,14 @@ def handle_resource_rates():
         'duration_weeks': r.duration_weeks,
         'hours_per_week': r.hours_per_week,
         'rate_per_hour': r.rate_per_hour,
-        'created_at': r.created_at.isoformat()
+        'created_at': r.created_at.isoformat() if r.created_at else None
     } for r in rates])
 
 @app.route('/api/cost-estimation', methods=['GET', 'POST'])
 def calculate_costs():
     """Generate comprehensive cost estimation"""
     try:
+        from services.cost_calculator import CostCalculator
         calculator = CostCalculator(db, models, bedrock_client=None)
         result = calculator.calculate_total_costs()
         return jsonify(result)
@@ -296,12 +294,28 @@ def generate_migration_strategy():
     """Generate AI-powered migration strategy"""
     try:
         data = request.get_json() or {}
-        advisor = MigrationAdvisor(db, models, bedrock_client=bedrock_client)
+        from services.migration_advisor import MigrationAdvisor
+        advisor = MigrationAdvisor(db, models)
         result = advisor.generate_comprehensive_migration_strategy()
         return jsonify(result)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/migration-strategy/components', methods=['POST'])
+def generate_component_strategies():
+    """Per-component strategies for {"servers": [server_id], "components": [{"id", "type"}]}, fetched in batches"""
+    try:
+        data = request.get_json() or {}
+        from services.migration_advisor import MigrationAdvisor
+        advisor = MigrationAdvisor(db, models)
+        return jsonify({
+            'servers': advisor.generate_server_migration_strategies(data.get('servers', [])),
+            'components': advisor.generate_data_migration_strategies(
+                [(component.get('id'), component.get('type')) for component in data.get('components', [])])
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/timeline', methods=['POST'])
 def generate_timeline():
     """Generate migration timeline"""
@@ -319,13 +333,26 @@ def generate_timeline():
         else:
             start_date = datetime(2024, 1, 1)
         
-        # Get inventory counts
-        servers_count = Server.query.count()
-        databases_count = Database.query.count()
-        file_shares_count = FileShare.query.count()
+        from services.model_loader import load_server_graph
+        from services.transfer_planner import TransferPlanner, timeline_sizing
+        
+        # Get inventory; counts and the transfer plan come from the same rows
+        servers, databases, file_shares = load_server_graph(models)
+        servers_count = len(servers)
+        databases_count = len(databases)
+        file_shares_count = len(file_shares)
+        
+        # Databases and shares take at least as long as their data needs to cross the migration link
+        planner = TransferPlanner(
+            bandwidth_mbps=request_data.get('bandwidth_mbps'),
+            max_concurrent_transfers=request_data.get('max_concurrent_transfers')
+        )
+        sizing = timeline_sizing(planner.plan(servers, databases, file_shares))
+        server_weeks = max(servers_count, sizing['infrastructure_weeks'])
+        data_weeks = max(databases_count * 2 + file_shares_count, sizing['data_migration_weeks'])
         
         # Dynamic timeline based on actual inventory
-        total_weeks = 8 + (databases_count * 2) + (servers_count * 1) + (file_shares_count * 1)
+        total_weeks = 8 + data_weeks + server_weeks
         
         # Calculate end date
         end_date = start_date + timedelta(weeks=total_weeks)
@@ -353,9 +380,25 @@ def generate_timeline():
                     "risks": ["Incomplete inventory", "Resource availability"],
                     "resources_required": ["Cloud Architect", "Database Expert", "Network Engineer"],
                     "status": "pending"
+                },
+                {
+                    "phase": 2,
+                    "title": "Data Migration",
+                    "description": f"Transfer and validation of {databases_count} databases and {file_shares_count} file shares",
+                    "duration_weeks": data_weeks,
+                    "start_week": 5,
+                    "end_week": 4 + data_weeks,
+                    "dependencies": ["Phase 1"],
+                    "milestones": ["Data Sync Established", "Data Validation Complete"],
+                    "components": ["Database Migration", "File Share Migration", "Data Validation"],
+                    "risks": ["Data corruption", "Extended sync time"],
+                    "resources_required": ["Database Administrator", "Data Engineer"],
+                    "data_transfer": sizing['data_transfer'],
+                    "status": "pending"
                 }
             ],
-            "critical_path": ["Phase 1"],
+            "critical_path": ["Phase 1", "Phase 2"],
+            "cutover_window": sizing['cutover_window'],
             "resource_allocation": [
                 {
                     "role": "Cloud Architect",
@@ -406,6 +449,7 @@ def export_data():
         export_format = data.get('format', 'excel')  # excel, pdf, word
         
         # Initialize export service
+        from services.export_service_new import ExportService
         exporter = ExportService(db, models)
         
         # Export based on format
@@ -480,6 +524,7 @@ def get_dashboard_data():
 def get_ai_insights():
     """Get AI-powered migration insights"""
     try:
+        from services.cost_calculator import CostCalculator
         calculator = CostCalculator(db, models, bedrock_client=None)
         ai_analysis = calculator.get_ai_comprehensive_analysis()
         return jsonify(ai_analysis)
@@ -490,14 +535,17 @@ def get_ai_insights():
 def get_ai_status():
     """Get AI service status"""
     try:
-        from services.ai_recommendations import AIRecommendationService
-        ai_service = AIRecommendationService()
+        from services.ai_registry import get_ai_service
+        ai_service = get_ai_service()
         
         status = {
             'ai_enabled': ai_service.bedrock_client is not None,
             'region': ai_service.region_name if hasattr(ai_service, 'region_name') else 'unknown',
             'model_id': ai_service.model_id if hasattr(ai_service, 'model_id') else 'unknown',
             'fallback_mode': ai_service.bedrock_client is None,
+            'circuit_breaker': ai_service.circuit_breaker.status() if ai_service.bedrock_client else None,
+            'model_usage': ai_service.model_usage.summary(),
+            'recommendation_reuse': ai_service.recommendation_index.stats(),
             'message': 'AI recommendations active' if ai_service.bedrock_client else 'Using rule-based recommendations'
         }
         
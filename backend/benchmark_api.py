@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""End-to-end API benchmark: latency percentiles, throughput and peak RSS per endpoint and inventory scale
+
+Each scale runs in its own process against a generated SQLite inventory,
+with Bedrock replaced by the local emulator, so runs are offline and
+repeatable. Results are written as JSON; with a baseline file, endpoints
+whose p95 latency or peak RSS regressed beyond the tolerance fail the run.
+
+--startup also times each Flask backend's cold start: importing the app
+and serving its first inventory request in a fresh interpreter, with an
+-X importtime breakdown of what the import spent its time on.
+
+Examples:
+    python benchmark_api.py --scales 100,1000 --out benchmark_results.json
+    python benchmark_api.py --scales 100 --startup
+    python benchmark_api.py --scales 100,1000 --save-baseline
+    python benchmark_api.py --scales 100,1000,10000,100000 --iterations 5 --baseline benchmark_baseline.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DB = os.path.join(BACKEND_DIR, 'migration_tool.db')
+DEFAULT_BASELINE = os.path.join(BACKEND_DIR, 'benchmark_baseline.json')
+DEFAULT_SCALES = (100, 1000, 10000, 100000)
+
+# name -> (method, path, json body); ordered light to heavy since peak RSS only grows
+ENDPOINTS = [
+    ('servers', 'GET', '/api/servers', None),
+    ('dashboard', 'GET', '/api/dashboard', None),
+    ('timeline', 'POST', '/api/timeline', {}),
+    ('cost_estimation', 'POST', '/api/cost-estimation', {'cloud_provider': 'AWS', 'target_region': 'us-east-1'}),
+    ('migration_strategy', 'POST', '/api/migration-strategy', {'cloud_provider': 'AWS', 'target_region': 'us-east-1'}),
+    ('export_excel', 'POST', '/api/export', {'format': 'excel'}),
+    ('export_word', 'POST', '/api/export', {'format': 'word'}),
+    ('export_pdf', 'POST', '/api/export', {'format': 'pdf'}),
+]
+
+# Backends timed by --startup, each with the inventory endpoint used as its first request
+STARTUP_TARGETS = [
+    ('real_data_backend', '/api/servers'),
+    ('app', '/api/servers'),
+    ('simple_app', '/api/servers'),
+]
+# Libraries inventory endpoints never need; the report lists any the import pulled in
+HEAVY_MODULES = ('pandas', 'numpy', 'boto3', 'reportlab', 'docx', 'openpyxl')
+STARTUP_BUDGET_MS = 300.0
+
+# Runs in a fresh interpreter so nothing (numpy from this script, say) is preloaded
+STARTUP_SNIPPET = """
+import json, sys, time
+started = time.perf_counter()
+module = __import__(sys.argv[1])
+imported = time.perf_counter()
+status = module.app.test_client().get(sys.argv[2]).status_code
+served = time.perf_counter()
+print(json.dumps({'import_ms': (imported - started) * 1000, 'first_request_ms': (served - imported) * 1000,
+                  'status': status, 'modules': len(sys.modules),
+                  'heavy_modules': [name for name in sys.argv[3].split(',') if name in sys.modules]}))
+"""
+
+# Environment for the app under test: emulated Bedrock, no shared caches between requests
+WORKER_ENV = {
+    'BEDROCK_EMULATOR': 'replay',
+    'BEDROCK_EMULATOR_SEED': '42',
+    'SINGLE_FLIGHT_RESULT_TTL': '0',
+    'SIZING_LOG_ENABLED': 'false',
+}
+
+
+def peak_rss_mb() -> Optional[float]:
+    """High-water resident set size of this process"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def summarize_latencies(latencies: List[float], wall_seconds: float) -> Dict[str, Any]:
+    values = np.array(latencies) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        'requests': len(latencies),
+        'p50_ms': round(float(p50), 2),
+        'p95_ms': round(float(p95), 2),
+        'p99_ms': round(float(p99), 2),
+        'max_ms': round(float(values.max()), 2),
+        'throughput_rps': round(len(latencies) / wall_seconds, 2) if wall_seconds else 0.0
+    }
+
+
+def run_worker(iterations: int, concurrency: int, warmup: int, only: Optional[List[str]]) -> Dict[str, Any]:
+    """Benchmark every endpoint in this process; the environment already points at the scale's database"""
+    import logging
+    logging.disable(logging.CRITICAL)
+    import real_data_backend
+
+    client = real_data_backend.app.test_client()
+    results = {}
+    for name, method, path, body in ENDPOINTS:
+        if only and name not in only:
+            continue
+
+        def call(_=None):
+            start = time.perf_counter()
+            response = client.open(path, method=method, json=body)
+            elapsed = time.perf_counter() - start
+            payload = response.get_json(silent=True)
+            # Exports land in backend/exports; don't let the benchmark fill it up
+            if isinstance(payload, dict) and payload.get('filepath') and os.path.exists(payload['filepath']):
+                os.remove(payload['filepath'])
+            return elapsed, response.status_code
+
+        for _ in range(warmup):
+            call()
+        wall_start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            outcomes = list(pool.map(call, range(iterations)))
+        wall = time.perf_counter() - wall_start
+
+        stats = summarize_latencies([elapsed for elapsed, _ in outcomes], wall)
+        stats['errors'] = sum(1 for _, status in outcomes if status >= 400)
+        stats['peak_rss_mb'] = peak_rss_mb()
+        results[name] = stats
+    return results
+
+
+def run_scale(scale: int, args) -> Dict[str, Any]:
+    """Generate the scale's inventory and benchmark it in a fresh process"""
+    from services.inventory_generator import generate_inventory, load_into_sqlite
+
+    work_dir = tempfile.mkdtemp(prefix=f'benchmark_{scale}_')
+    try:
+        db_path = os.path.join(work_dir, 'inventory.db')
+        # Keep the app's preferences, constraints and rates; replace only the inventory
+        shutil.copyfile(APP_DB, db_path)
+        load_into_sqlite(db_path, generate_inventory(scale, seed=args.seed))
+
+        env = dict(os.environ, **WORKER_ENV, INVENTORY_DB_PATH=db_path,
+                   SINGLE_FLIGHT_DB=os.path.join(work_dir, 'single_flight.db'),
+                   BEDROCK_EMULATOR_RECORDINGS=args.recordings or os.path.join(work_dir, 'recordings.json'))
+        command = [sys.executable, os.path.abspath(__file__), '--worker', '--iterations', str(args.iterations),
+                   '--concurrency', str(args.concurrency), '--warmup', str(args.warmup)]
+        if args.endpoints:
+            command += ['--endpoints', args.endpoints]
+        completed = subprocess.run(command, cwd=BACKEND_DIR, env=env, capture_output=True, text=True,
+                                   timeout=args.timeout)
+        if completed.returncode != 0:
+            raise RuntimeError(f"Benchmark worker for scale {scale} failed:\n{completed.stderr[-2000:]}")
+        # The worker prints its JSON result as the last line; the app may print before it
+        return json.loads(completed.stdout.strip().splitlines()[-1])
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def top_imports(importtime_log: str, module: str, limit: int = 10) -> List[Dict[str, Any]]:
+    """Direct imports of `module` by cumulative time, parsed from -X importtime output"""
+    children = []
+    for line in importtime_log.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        name = name.strip()
+        if depth == 0:
+            if name == module:
+                return sorted(children, key=lambda c: -c['cumulative_ms'])[:limit]
+            children = []
+        elif depth == 1:
+            children.append({'module': name, 'cumulative_ms': round(int(cumulative) / 1000, 1)})
+    return []
+
+
+def measure_startup(module: str, path: str, repeats: int = 3) -> Dict[str, Any]:
+    """Best-of-`repeats` cold start of one backend, plus the import breakdown of a separate run"""
+    env = dict(os.environ, **WORKER_ENV)
+    command = [sys.executable, '-c', STARTUP_SNIPPET, module, path, ','.join(HEAVY_MODULES)]
+    runs = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        completed = subprocess.run(command, cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=120)
+        process_ms = (time.perf_counter() - started) * 1000
+        if completed.returncode != 0:
+            raise RuntimeError(f"Startup run of {module} failed:\n{completed.stderr[-2000:]}")
+        run = json.loads(completed.stdout.strip().splitlines()[-1])
+        run['process_ms'] = process_ms
+        runs.append(run)
+    best = min(runs, key=lambda r: r['import_ms'] + r['first_request_ms'])
+
+    # Import timing inflates the numbers a little, so it only feeds the breakdown
+    traced = subprocess.run([sys.executable, '-X', 'importtime'] + command[1:], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True, timeout=120)
+    return {
+        'path': path,
+        'status': best['status'],
+        'import_ms': round(best['import_ms'], 1),
+        'first_request_ms': round(best['first_request_ms'], 1),
+        'time_to_first_request_ms': round(best['import_ms'] + best['first_request_ms'], 1),
+        'process_ms': round(best['process_ms'], 1),
+        'modules_loaded': best['modules'],
+        'heavy_modules': best['heavy_modules'],
+        'top_imports': top_imports(traced.stderr, module)
+    }
+
+
+def compare_to_baseline(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float,
+                        min_delta_ms: float) -> List[str]:
+    """Regressions of errors, p95 latency or peak RSS against the baseline, as messages"""
+    regressions = []
+    for scale, endpoints in results['scales'].items():
+        for name, stats in endpoints.items():
+            reference = baseline.get('scales', {}).get(scale, {}).get(name)
+            if not reference:
+                continue
+            limit = max(reference['p95_ms'] * (1 + tolerance), reference['p95_ms'] + min_delta_ms)
+            if stats.get('errors', 0) > reference.get('errors', 0):
+                regressions.append(f"{name}@{scale}: {stats['errors']} errors (baseline {reference.get('errors', 0)})")
+            if stats['p95_ms'] > limit:
+                regressions.append(f"{name}@{scale}: p95 {stats['p95_ms']}ms > {limit:.1f}ms "
+                                   f"(baseline {reference['p95_ms']}ms)")
+            if stats.get('peak_rss_mb') and reference.get('peak_rss_mb'):
+                rss_limit = reference['peak_rss_mb'] * (1 + tolerance)
+                if stats['peak_rss_mb'] > rss_limit:
+                    regressions.append(f"{name}@{scale}: peak RSS {stats['peak_rss_mb']}MB > {rss_limit:.1f}MB "
+                                       f"(baseline {reference['peak_rss_mb']}MB)")
+    for module, stats in results.get('startup', {}).items():
+        reference = baseline.get('startup', {}).get(module)
+        if not reference:
+            continue
+        limit = max(reference['time_to_first_request_ms'] * (1 + tolerance),
+                    reference['time_to_first_request_ms'] + min_delta_ms)
+        if stats['time_to_first_request_ms'] > limit:
+            regressions.append(f"{module} startup: {stats['time_to_first_request_ms']}ms to first request > "
+                               f"{limit:.1f}ms (baseline {reference['time_to_first_request_ms']}ms)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', default=','.join(str(s) for s in DEFAULT_SCALES),
+                        help='comma-separated server counts (default 100,1000,10000,100000)')
+    parser.add_argument('--iterations', type=int, default=20, help='timed requests per endpoint')
+    parser.add_argument('--warmup', type=int, default=2, help='untimed requests per endpoint')
+    parser.add_argument('--concurrency', type=int, default=1, help='requests in flight at once')
+    parser.add_argument('--endpoints', help=f"comma-separated subset of: {', '.join(e[0] for e in ENDPOINTS)}")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--recordings', help='Bedrock emulator recordings to replay (default: synthetic answers)')
+    parser.add_argument('--out', default='benchmark_results.json')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='baseline JSON to compare against')
+    parser.add_argument('--save-baseline', action='store_true', help='write the results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed relative regression (default 25%%)')
+    parser.add_argument('--min-delta-ms', type=float, default=5.0, help='ignore p95 changes smaller than this')
+    parser.add_argument('--timeout', type=int, default=3600, help='seconds allowed per scale')
+    parser.add_argument('--startup', action='store_true', help='also time cold start of each Flask backend')
+    parser.add_argument('--startup-budget-ms', type=float, default=STARTUP_BUDGET_MS,
+                        help='fail when import plus first request takes longer (default 300)')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    only = args.endpoints.split(',') if args.endpoints else None
+    if args.worker:
+        print(json.dumps(run_worker(args.iterations, args.concurrency, args.warmup, only)))
+        return 0
+
+    results = {
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': {'iterations': args.iterations, 'concurrency': args.concurrency, 'seed': args.seed},
+        'scales': {}
+    }
+    for scale in (int(s) for s in args.scales.split(',')):
+        print(f"⏱️  Benchmarking {scale:,} servers...")
+        results['scales'][str(scale)] = run_scale(scale, args)
+        for name, stats in results['scales'][str(scale)].items():
+            print(f"   {name:<20} p50 {stats['p50_ms']:>9.1f}ms  p95 {stats['p95_ms']:>9.1f}ms  "
+                  f"{stats['throughput_rps']:>8.1f} req/s  rss {stats['peak_rss_mb']}MB  errors {stats['errors']}")
+
+    over_budget = []
+    if args.startup:
+        print("⏱️  Timing cold starts...")
+        results['startup'] = {}
+        for module, path in STARTUP_TARGETS:
+            stats = results['startup'][module] = measure_startup(module, path)
+            slowest = ', '.join(f"{i['module']} {i['cumulative_ms']}ms" for i in stats['top_imports'][:3])
+            print(f"   {module:<20} import {stats['import_ms']:>7.1f}ms  "
+                  f"first request {stats['first_request_ms']:>6.1f}ms  ({slowest})")
+            if stats['time_to_first_request_ms'] > args.startup_budget_ms:
+                over_budget.append(f"{module} startup: {stats['time_to_first_request_ms']}ms to first request "
+                                   f"exceeds the {args.startup_budget_ms:.0f}ms budget")
+
+    with open(args.out, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"✅ Results written to {args.out}")
+    for message in over_budget:
+        print(f"❌ {message}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Baseline saved to {args.baseline}")
+        return 1 if over_budget else 0
+
+    if not os.path.exists(args.baseline):
+        print(f"ℹ️  No baseline at {args.baseline}; run with --save-baseline to create one")
+        return 1 if over_budget else 0
+    with open(args.baseline) as f:
+        regressions = compare_to_baseline(results, json.load(f), args.tolerance, args.min_delta_ms)
+    for message in regressions:
+        print(f"❌ {message}")
+    if regressions or over_budget:
+        return 1
+    print("✅ No regressions against the baseline")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -9,31 +9,82 @@ import sqlite3
 import logging
 import traceback
 import os
+import time
 from datetime import datetime
-from services.ai_recommendations import AIRecommendationService
+from services.ai_registry import get_ai_service
+from services.circuit_breaker import install_request_deadline
+from services.scenario_engine import ScenarioComparisonEngine
+from services.rightsizing import RightSizingOptimizer, get_instance_catalog
+from services.transfer_planner import TransferPlanner, timeline_sizing
+from services.dependency_graph import DependencyGraph, DEFAULT_MAX_GROUP_SIZE
+from services.cost_model import UptimeCostModel, COMMITMENT_OPTIONS
+from services.swr_cache import StaleWhileRevalidateCache, cache_key
+from services.single_flight import SingleFlight
+from services.sizing_model import train_sizing_model, save_sizing_model
+from services.model_cascade import confidence_score
+from services.metrics import install_request_metrics, EXPORT_RENDER_SECONDS, EXPORT_ARTIFACT_BYTES
+from services.sql_instrumentation import InstrumentedConnection, install_sql_tracking
+from services.profiling import install_request_profiling
+from services.structured_logging import configure_logging, install_request_logging, log_payload
+from services.inventory_snapshot import InventorySnapshotLoader, request_inventory
 
-# Setup logging
-logging.basicConfig(level=logging.DEBUG)
+# Setup logging: JSON records written off the request thread (LOG_LEVEL, LOG_FORMAT, LOG_PAYLOAD_*)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 CORS(app)
 
+# Per-request deadline that AI calls check before going out
+install_request_deadline(app)
+
+# Per-route latency histograms; everything recorded is served at /metrics
+install_request_metrics(app)
+
+# Request ids (X-Request-Id) on every log record, plus one access record per request with its duration
+install_request_logging(app)
+
+# Statements per request, slow-query plans and repeated statements (SQL_SLOW_QUERY_MS)
+install_sql_tracking(app)
+
+# On-demand (X-Profile + X-Profile-Token) or sampled request profiles, served under /api/debug/profiles
+install_request_profiling(app)
+
 # Initialize AI service
-ai_service = AIRecommendationService()
+ai_service = get_ai_service()
+
+# Uptime-aware cost model (profiles are precomputed once per process)
+cost_model = UptimeCostModel()
 
-DATABASE_PATH = 'migration_tool.db'
+# Last AI answers for stale-while-revalidate requests
+swr_cache = StaleWhileRevalidateCache()
+
+# Identical concurrent AI requests (threads or workers) share one Bedrock call
+single_flight = SingleFlight()
+
+DATABASE_PATH = os.getenv('INVENTORY_DB_PATH', 'migration_tool.db')
 
 def get_db_connection():
     """Get database connection"""
-    conn = sqlite3.connect(DATABASE_PATH)
+    conn = sqlite3.connect(DATABASE_PATH, factory=InstrumentedConnection)
     conn.row_factory = sqlite3.Row
     return conn
 
+# Inventory tables are read once per request (per file revision with INVENTORY_SNAPSHOT_REUSE=true)
+inventory_loader = InventorySnapshotLoader(DATABASE_PATH, get_db_connection)
+
+def get_inventory():
+    """This request's inventory snapshot, shared by every section that needs the same tables"""
+    return request_inventory(inventory_loader.load)
+
 def dict_from_row(row):
     """Convert sqlite3.Row to dict"""
     return dict(row) if row else None
 
+def swr_requested(data):
+    """Whether the caller asked for an instant answer upgraded in the background"""
+    return request.args.get('mode') == 'swr' or (data or {}).get('mode') == 'swr'
+
 @app.route('/api/servers', methods=['GET', 'POST'])
 def handle_servers():
     try:
@@ -59,7 +110,7 @@ def handle_servers():
         servers = [dict_from_row(row) for row in rows]
         conn.close()
         
-        logger.info(f"Retrieved {len(servers)} servers from database")
+        logger.info("Retrieved %s servers from database", len(servers))
         return jsonify({'servers': servers})
         
     except Exception as e:
@@ -125,7 +176,7 @@ def handle_databases():
         databases = [dict_from_row(row) for row in rows]
         conn.close()
         
-        logger.info(f"Retrieved {len(databases)} databases from database")
+        logger.info("Retrieved %s databases from database", len(databases))
         return jsonify({'databases': databases})
         
     except Exception as e:
@@ -193,7 +244,7 @@ def handle_file_shares():
         file_shares = [dict_from_row(row) for row in rows]
         conn.close()
         
-        logger.info(f"Retrieved {len(file_shares)} file shares from database")
+        logger.info("Retrieved %s file shares from database", len(file_shares))
         return jsonify({'file_shares': file_shares})
         
     except Exception as e:
@@ -257,7 +308,7 @@ def handle_resource_rates():
         resource_rates = [dict_from_row(row) for row in rows]
         conn.close()
         
-        logger.info(f"Retrieved {len(resource_rates)} resource rates from database")
+        logger.info("Retrieved %s resource rates from database", len(resource_rates))
         return jsonify({'resource_rates': resource_rates})
         
     except Exception as e:
@@ -295,7 +346,7 @@ def handle_resource_rate_by_id(rate_id):
         resource_rates = [dict_from_row(row) for row in rows]
         conn.close()
         
-        logger.info(f"Retrieved {len(resource_rates)} resource rates from database")
+        logger.info("Retrieved %s resource rates from database", len(resource_rates))
         return jsonify({'resource_rates': resource_rates})
         
     except Exception as e:
@@ -306,37 +357,24 @@ def handle_resource_rate_by_id(rate_id):
 @app.route('/api/dashboard', methods=['GET'])
 def get_dashboard():
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Get counts and basic stats from real database
-        cursor.execute('SELECT COUNT(*) FROM servers')
-        total_servers = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT COUNT(*) FROM databases')
-        total_databases = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT COUNT(*) FROM file_shares')
-        total_file_shares = cursor.fetchone()[0]
-        
-        # Calculate total data size from databases and file shares
-        cursor.execute('SELECT COALESCE(SUM(size_gb), 0) FROM databases')
-        database_size = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT COALESCE(SUM(total_size_gb), 0) FROM file_shares')
-        file_share_size = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT COALESCE(SUM(disk_size), 0) FROM servers')
-        server_storage_size = cursor.fetchone()[0]
-        
-        total_data_gb = database_size + file_share_size + server_storage_size
-        
-        # Get estimated costs (placeholder calculation from real data)
-        cursor.execute('SELECT SUM(ram * 0.1 + vcpu * 0.05 + disk_size * 0.02) FROM servers')
-        result = cursor.fetchone()[0]
-        estimated_monthly_cost = round(result * 730, 2) if result else 0  # rough estimate
-        
-        conn.close()
+        # Counts and sizes come from one read of each table
+        inventory = get_inventory()
+        summary = inventory.summary()
+        total_servers = summary['servers_count']
+        total_databases = summary['databases_count']
+        total_file_shares = summary['file_shares_count']
+        total_data_gb = summary['total_data_gb']
+        
+        # Get estimated costs (placeholder hourly rate from real data, weighted by uptime profile)
+        servers = inventory.servers
+        hourly_rates = [
+            s['ram'] * 0.1 + s['vcpu'] * 0.05 + s['disk_size'] * 0.02
+            if s['ram'] is not None and s['vcpu'] is not None and s['disk_size'] is not None else 0
+            for s in servers
+        ]
+        fleet = cost_model.price_fleet(hourly_rates, [s['uptime_pattern'] for s in servers])
+        on_demand_costs = fleet['option_costs'][:, COMMITMENT_OPTIONS.index('on-demand')]
+        estimated_monthly_cost = round(float(on_demand_costs.sum()), 2)
         
         dashboard_data = {
             'infrastructure_summary': {
@@ -359,7 +397,7 @@ def get_dashboard():
             }
         }
         
-        logger.info(f"Dashboard data: {dashboard_data}")
+        log_payload(logger, 'Dashboard data', dashboard_data)
         return jsonify(dashboard_data)
         
     except Exception as e:
@@ -379,49 +417,46 @@ def cost_estimation():
         
     try:
         data = request.json
-        logger.info(f"AI Cost estimation request: {data}")
+        log_payload(logger, 'AI Cost estimation request', data)
         
         cloud_provider = data.get('cloud_provider', 'AWS')
         target_region = data.get('target_region', 'us-east-1')
         
-        # Get real infrastructure data from database
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Get servers
-        cursor.execute('SELECT * FROM servers')
-        servers_rows = cursor.fetchall()
-        servers = [dict_from_row(row) for row in servers_rows]
-        
-        # Get databases
-        cursor.execute('SELECT * FROM databases')
-        databases_rows = cursor.fetchall()
-        databases = [dict_from_row(row) for row in databases_rows]
-        
-        # Get file shares
-        cursor.execute('SELECT * FROM file_shares')
-        file_shares_rows = cursor.fetchall()
-        file_shares = [dict_from_row(row) for row in file_shares_rows]
-        
-        conn.close()
-        
-        # Prepare infrastructure data for AI analysis
-        infrastructure_data = {
-            'servers': servers,
-            'databases': databases,
-            'file_shares': file_shares
-        }
-        
-        logger.info(f"Using AI for cost estimation with {len(servers)} servers, {len(databases)} databases, {len(file_shares)} file shares")
+        # Get real infrastructure data from the request's inventory snapshot
+        inventory = get_inventory()
+        infrastructure_data = inventory.infrastructure_data()
+        servers = infrastructure_data['servers']
+        databases = infrastructure_data['databases']
+        file_shares = infrastructure_data['file_shares']
+        
+        logger.info("Using AI for cost estimation with %s servers, %s databases, %s file shares",
+                    len(servers), len(databases), len(file_shares))
+        
+        key = cache_key('cost-estimation', {'cloud_provider': cloud_provider, 'target_region': target_region},
+                        inventory.revision())
+        
+        def estimate():
+            return single_flight.do(key, lambda: ai_service.get_ai_cost_estimation(
+                infrastructure_data, 
+                cloud_provider, 
+                target_region
+            ))
+        
+        if swr_requested(data):
+            # Answer now from the last AI result or the rule-based estimate; refresh with AI in the background
+            cost_data = swr_cache.get_or_refresh(
+                key,
+                lambda: ai_service._fallback_cost_estimation(infrastructure_data, cloud_provider, target_region),
+                estimate
+            )
+            response = jsonify(cost_data)
+            response.headers.add("Access-Control-Allow-Origin", "*")
+            return response
         
-        # Get AI-powered cost estimation
-        cost_data = ai_service.get_ai_cost_estimation(
-            infrastructure_data, 
-            cloud_provider, 
-            target_region
-        )
+        # Get AI-powered cost estimation, shared with identical requests already in flight
+        cost_data = estimate()
         
-        logger.info(f"Cost estimation completed - AI used: {not cost_data.get('ai_insights', {}).get('fallback_used', True)}")
+        logger.info("Cost estimation completed - AI used: %s", not cost_data.get('ai_insights', {}).get('fallback_used', True))
         
         response = jsonify(cost_data)
         response.headers.add("Access-Control-Allow-Origin", "*")
@@ -439,7 +474,7 @@ def cost_estimation():
             }
         }
         
-        logger.info(f"Cost estimation: {result}")
+        log_payload(logger, 'Cost estimation', result)
         return jsonify(result)
         
     except Exception as e:
@@ -447,6 +482,181 @@ def cost_estimation():
         logger.error(traceback.format_exc())
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/cost-scenarios', methods=['POST', 'OPTIONS'])
+def cost_scenarios():
+    """Price the inventory against a matrix of provider/region/pricing/uptime scenarios"""
+    # Handle preflight request
+    if request.method == 'OPTIONS':
+        response = make_response()
+        response.headers.add("Access-Control-Allow-Origin", "*")
+        response.headers.add('Access-Control-Allow-Headers', "*")
+        response.headers.add('Access-Control-Allow-Methods', "*")
+        return response
+        
+    try:
+        data = request.json or {}
+        log_payload(logger, 'Cost scenario comparison request', data)
+        
+        engine = ScenarioComparisonEngine()
+        try:
+            scenarios = engine.build_scenarios(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # The snapshot's tables as held (columnar by default), so large inventories can be priced on the process pool
+        inventory = get_inventory()
+        infrastructure_data = {name: inventory.table(name) for name in ('servers', 'databases', 'file_shares')}
+        servers = infrastructure_data['servers']
+        databases = infrastructure_data['databases']
+        file_shares = infrastructure_data['file_shares']
+        
+        try:
+            comparison = engine.compare(infrastructure_data, scenarios)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        logger.info("Priced %s scenarios for %s servers, %s databases, %s file shares",
+                    comparison['scenario_count'], len(servers), len(databases), len(file_shares))
+        
+        response = jsonify(comparison)
+        response.headers.add("Access-Control-Allow-Origin", "*")
+        return response
+        
+    except Exception as e:
+        logger.error(f"Error in /api/cost-scenarios: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/cost-model', methods=['GET', 'POST'])
+def uptime_cost_model():
+    """Uptime-aware server costs and the cheapest commitment mix across the fleet"""
+    try:
+        data = request.get_json(silent=True) or {}
+        include_details = data.get('include_details', request.args.get('include_details', 'true') != 'false')
+        
+        servers = get_inventory().servers
+        
+        result = cost_model.analyze_servers(servers, include_details=include_details)
+        logger.info("Uptime cost model: %s servers, savings %s%%",
+                    result['fleet_summary']['server_count'], result['fleet_summary']['savings_percent'])
+        return jsonify(result)
+        
+    except Exception as e:
+        logger.error(f"Error in /api/cost-model: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/rightsizing', methods=['GET', 'POST'])
+def rightsizing():
+    """Cheapest instance per server across families, with optional consolidation onto shared hosts"""
+    try:
+        data = request.get_json(silent=True) or {}
+        mode = data.get('mode', request.args.get('mode', 'greedy'))
+        
+        optimizer = RightSizingOptimizer(
+            catalog=get_instance_catalog(),
+            cpu_headroom=float(data.get('cpu_headroom', request.args.get('cpu_headroom', 0))),
+            ram_headroom=float(data.get('ram_headroom', request.args.get('ram_headroom', 0))),
+            families=data.get('families')
+        )
+        
+        servers = get_inventory().servers
+        
+        result = optimizer.optimize(servers, mode=mode, consolidation_limits=data.get('consolidation_limits'))
+        logger.info("Right-sizing: %s servers, savings vs rehost %s%%",
+                    result['summary']['server_count'], result['summary']['savings_percent_vs_rehost'])
+        return jsonify(result)
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error in /api/rightsizing: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/transfer-plan', methods=['GET', 'POST'])
+def transfer_plan():
+    """Initial/delta sync durations and a transfer schedule across the migration link"""
+    try:
+        data = request.get_json(silent=True) or {}
+        planner = TransferPlanner(
+            bandwidth_mbps=data.get('bandwidth_mbps', request.args.get('bandwidth_mbps', type=float)),
+            max_concurrent_transfers=data.get('max_concurrent_transfers', request.args.get('max_concurrent_transfers', type=int)),
+            per_stream_mbps=data.get('per_stream_mbps', request.args.get('per_stream_mbps', type=float))
+        )
+        include_items = data.get('include_items', request.args.get('include_items', 'true') != 'false')
+        
+        inventory = get_inventory()
+        
+        result = planner.plan(inventory.servers, inventory.databases, inventory.file_shares)
+        if not include_items:
+            result.pop('items')
+        logger.info("Transfer plan: %s GB, %s transfer hours", result['summary']['total_gb'], result['summary']['total_transfer_hours'])
+        return jsonify(result)
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error in /api/transfer-plan: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({'error': str(e)}), 500
+
+def _load_dependency_graph(dependencies=None):
+    """Dependency graph over the stored inventory plus any user-declared dependencies"""
+    inventory = get_inventory()
+    return DependencyGraph(inventory.servers, inventory.databases, inventory.file_shares, dependencies)
+
+@app.route('/api/dependency-graph', methods=['GET', 'POST'])
+def dependency_graph():
+    """Move groups and waves derived from hosting links and declared dependencies"""
+    try:
+        data = request.get_json(silent=True) or {}
+        max_group_size = int(data.get('max_group_size', request.args.get('max_group_size', DEFAULT_MAX_GROUP_SIZE)))
+        
+        graph = _load_dependency_graph(data.get('dependencies'))
+        
+        result = graph.move_groups(max_group_size)
+        logger.info("Dependency graph: %s nodes in %s move groups", result['summary']['nodes'], result['summary']['move_groups'])
+        return jsonify(result)
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error in /api/dependency-graph: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/sizing-model', methods=['GET', 'POST'])
+def sizing_model():
+    """Status of the local sizing model; POST retrains it from the logged AI recommendations"""
+    try:
+        if request.method == 'POST':
+            data = request.get_json(silent=True) or {}
+            model = train_sizing_model(
+                ai_service.sizing_log.read(),
+                max_depth=int(data.get('max_depth', 8)),
+                min_samples=int(data.get('min_samples', 20))
+            )
+            if not model.components:
+                return jsonify({'error': 'Not enough logged AI recommendations to train on yet'}), 400
+            path = save_sizing_model(model)
+            ai_service.reload_sizing_model(model.version)
+            logger.info("Sizing model v%s trained and saved to %s", model.version, path)
+        
+        model = ai_service.sizing_model
+        return jsonify({
+            'model': model.summary() if model else None,
+            'logged_recommendations': len(ai_service.sizing_log.read()),
+            'primary_confidence': ai_service.sizing_primary_confidence
+        })
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error in /api/sizing-model: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/migration-strategy', methods=['POST', 'OPTIONS'])
 def migration_strategy():
     # Handle preflight request
@@ -459,51 +669,56 @@ def migration_strategy():
         
     try:
         data = request.json
-        logger.info(f"AI Migration strategy request: {data}")
+        log_payload(logger, 'AI Migration strategy request', data)
         
         cloud_provider = data.get('cloud_provider', 'AWS')
         target_region = data.get('target_region', 'us-east-1')
         complexity = data.get('migration_complexity', 'medium')
         
-        # Get real infrastructure data from database
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Get servers
-        cursor.execute('SELECT * FROM servers')
-        servers_rows = cursor.fetchall()
-        servers = [dict_from_row(row) for row in servers_rows]
-        
-        # Get databases
-        cursor.execute('SELECT * FROM databases')
-        databases_rows = cursor.fetchall()
-        databases = [dict_from_row(row) for row in databases_rows]
-        
-        # Get file shares
-        cursor.execute('SELECT * FROM file_shares')
-        file_shares_rows = cursor.fetchall()
-        file_shares = [dict_from_row(row) for row in file_shares_rows]
-        
-        conn.close()
+        # Get real infrastructure data from the request's inventory snapshot
+        inventory = get_inventory()
+        infrastructure_data = inventory.infrastructure_data()
+        servers = infrastructure_data['servers']
+        databases = infrastructure_data['databases']
+        file_shares = infrastructure_data['file_shares']
         
-        # Prepare infrastructure data for AI analysis
-        infrastructure_data = {
-            'servers': servers,
-            'databases': databases,
-            'file_shares': file_shares
-        }
+        # Components that have to move together
+        move_groups = DependencyGraph(servers, databases, file_shares, data.get('dependencies')).move_groups(
+            int(data.get('max_group_size', DEFAULT_MAX_GROUP_SIZE))
+        )
         
-        logger.info(f"Using AI for migration strategy with {len(servers)} servers, {len(databases)} databases, {len(file_shares)} file shares")
+        logger.info("Using AI for migration strategy with %s servers, %s databases, %s file shares",
+                    len(servers), len(databases), len(file_shares))
+        
+        key = cache_key('migration-strategy',
+                        {'cloud_provider': cloud_provider, 'target_region': target_region, 'complexity': complexity},
+                        inventory.revision())
+        
+        def plan_strategy():
+            return single_flight.do(key, lambda: ai_service.get_ai_migration_strategy(
+                infrastructure_data, 
+                cloud_provider, 
+                target_region,
+                complexity
+            ))
+        
+        if swr_requested(data):
+            # Answer now from the last AI result or the rule-based strategy; refresh with AI in the background
+            strategy_data = swr_cache.get_or_refresh(
+                key,
+                lambda: ai_service._fallback_migration_strategy(infrastructure_data, cloud_provider, complexity),
+                plan_strategy
+            )
+            strategy_data['move_groups'] = move_groups
+            response = jsonify(strategy_data)
+            response.headers.add("Access-Control-Allow-Origin", "*")
+            return response
         
-        # Get AI-powered migration strategy
-        strategy_data = ai_service.get_ai_migration_strategy(
-            infrastructure_data, 
-            cloud_provider, 
-            target_region,
-            complexity
-        )
+        # Get AI-powered migration strategy, shared with identical requests already in flight
+        strategy_data = plan_strategy()
         
-        logger.info(f"AI Migration strategy completed - AI used: {not strategy_data.get('ai_insights', {}).get('fallback_used', True)}")
+        logger.info("AI Migration strategy completed - AI used: %s", not strategy_data.get('ai_insights', {}).get('fallback_used', True))
+        strategy_data['move_groups'] = move_groups
         
         response = jsonify(strategy_data)
         response.headers.add("Access-Control-Allow-Origin", "*")
@@ -514,44 +729,52 @@ def migration_strategy():
         logger.error(traceback.format_exc())
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/ai-results/<result_key>', methods=['GET'])
+def ai_result(result_key):
+    """Poll a stale-while-revalidate answer; ?wait=N blocks until a newer version than ?version= lands"""
+    try:
+        wait_seconds = min(float(request.args.get('wait', 0)), 30.0)
+        known_version = int(request.args.get('version', 0))
+        result = swr_cache.get(result_key, wait_seconds, known_version)
+        if result is None:
+            return jsonify({'error': 'Unknown or expired result key'}), 404
+        return jsonify(result)
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error in /api/ai-results: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/timeline', methods=['POST'])
 def generate_timeline():
     """Generate migration timeline based on project data"""
     try:
         data = request.get_json()
-        logger.info(f"Timeline generation request: {data}")
+        log_payload(logger, 'Timeline generation request', data)
         
-        # Get infrastructure data to calculate duration
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        # Get counts for duration calculation; the dependency graph and transfer plan reuse the same snapshot
+        inventory = get_inventory()
+        summary = inventory.summary()
+        server_count = summary['servers_count']
+        database_count = summary['databases_count']
+        file_share_count = summary['file_shares_count']
         
-        # Get counts for duration calculation
-        cursor.execute('SELECT COUNT(*) FROM servers')
-        server_count = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT COUNT(*) FROM databases')
-        database_count = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT COUNT(*) FROM file_shares')
-        file_share_count = cursor.fetchone()[0]
+        move_groups = _load_dependency_graph(data.get('dependencies') if data else None).move_groups(
+            int(data.get('max_group_size', DEFAULT_MAX_GROUP_SIZE)) if data else DEFAULT_MAX_GROUP_SIZE
+        )
         
-        conn.close()
+        # Server disks, databases and shares have to cross the migration link before their phases can finish
+        planner = TransferPlanner(
+            bandwidth_mbps=data.get('bandwidth_mbps') if data else None,
+            max_concurrent_transfers=data.get('max_concurrent_transfers') if data else None
+        )
+        sizing = timeline_sizing(planner.plan(inventory.servers, inventory.databases, inventory.file_shares))
         
         # Calculate duration based on infrastructure size (same logic as migration strategy)
         total_components = server_count + database_count + file_share_count
         duration_weeks = max(8, total_components * 2)
-        duration_months = round(duration_weeks / 4.3, 1)  # More accurate weeks to months conversion
-        
-        # Get custom start date from request or use default
-        start_date = data.get('start_date', '2025-09-01') if data else '2025-09-01'
-        
-        # Calculate end date based on calculated duration
-        from datetime import timedelta
-        start_dt = datetime.strptime(start_date, '%Y-%m-%d')
-        end_dt = start_dt + timedelta(weeks=duration_weeks)
-        end_date = end_dt.strftime('%Y-%m-%d')
-        
-        logger.info(f"Timeline dates: {start_date} to {end_date} ({duration_weeks} weeks, {total_components} components)")
         
         # Calculate phase durations that add up to total duration
         phase1_duration = max(3, round(duration_weeks * 0.25))
@@ -565,7 +788,25 @@ def generate_timeline():
             # Adjust the largest phase to match
             phase2_duration += (duration_weeks - total_calculated)
         
-        logger.info(f"Phase durations: P1={phase1_duration}, P2={phase2_duration}, P3={phase3_duration}, P4={phase4_duration}, Total={phase1_duration + phase2_duration + phase3_duration + phase4_duration}")
+        # Phases stretch to what the transfer plan needs; the project grows with them
+        phase2_duration = max(phase2_duration, sizing['infrastructure_weeks'])
+        phase3_duration = max(phase3_duration, sizing['data_migration_weeks'])
+        duration_weeks = phase1_duration + phase2_duration + phase3_duration + phase4_duration
+        duration_months = round(duration_weeks / 4.3, 1)  # More accurate weeks to months conversion
+        
+        logger.info("Phase durations: P1=%s, P2=%s, P3=%s, P4=%s, Total=%s", phase1_duration, phase2_duration,
+                    phase3_duration, phase4_duration, duration_weeks)
+        
+        # Get custom start date from request or use default
+        start_date = data.get('start_date', '2025-09-01') if data else '2025-09-01'
+        
+        # Calculate end date based on calculated duration
+        from datetime import timedelta
+        start_dt = datetime.strptime(start_date, '%Y-%m-%d')
+        end_dt = start_dt + timedelta(weeks=duration_weeks)
+        end_date = end_dt.strftime('%Y-%m-%d')
+        
+        logger.info("Timeline dates: %s to %s (%s weeks, %s components)", start_date, end_date, duration_weeks, total_components)
         
         # Timeline data with dynamic dates and duration
         timeline_data = {
@@ -618,6 +859,7 @@ def generate_timeline():
                     "components": ["Database Migration", "File Share Migration", "Data Validation"],
                     "risks": ["Data corruption", "Extended sync time"],
                     "resources_required": ["Database Administrator", "Data Engineer"],
+                    "data_transfer": sizing['data_transfer'],
                     "status": "pending"
                 },
                 {
@@ -632,10 +874,14 @@ def generate_timeline():
                     "components": ["Application Deployment", "DNS Cutover", "Monitoring Setup"],
                     "risks": ["Application compatibility", "User acceptance"],
                     "resources_required": ["Application Developer", "System Administrator"],
+                    "cutover_window": sizing['cutover_window'],
                     "status": "pending"
                 }
             ],
             "critical_path": ["Phase 1", "Phase 2", "Phase 3", "Phase 4"],
+            "cutover_window": sizing['cutover_window'],
+            "migration_waves": move_groups['waves'],
+            "move_groups": move_groups['groups'],
             "resource_allocation": [
                 {
                     "role": "Cloud Architect",
@@ -706,20 +952,20 @@ def generate_timeline():
 def ai_status():
     try:
         # Simple AI status - would integrate with actual AI service
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT COUNT(*) FROM servers')
-        server_count = cursor.fetchone()[0]
-        conn.close()
+        server_count = len(get_inventory().servers)
         
         status = {
             'ai_enabled': server_count > 0,  # AI enabled if we have data to analyze
             'models_available': ['Claude 3.5 Sonnet', 'Claude 3 Sonnet', 'Titan Text G1 - Express'] if server_count > 0 else [],
             'last_analysis': '2024-01-15T10:00:00Z' if server_count > 0 else None,
-            'recommendations_count': server_count if server_count > 0 else 0
+            'recommendations_count': server_count if server_count > 0 else 0,
+            'circuit_breaker': ai_service.circuit_breaker.status() if ai_service.bedrock_client else None,
+            'single_flight': single_flight.stats(),
+            'model_usage': ai_service.model_usage.summary(),
+            'recommendation_reuse': ai_service.recommendation_index.stats()
         }
         
-        logger.info(f"AI status: {status}")
+        logger.info("AI status: %s", status)
         return jsonify(status)
         
     except Exception as e:
@@ -734,41 +980,14 @@ def export_report():
         export_format = data.get('format', 'excel')
         report_types = data.get('types', ['cost_estimation', 'migration_strategy', 'timeline'])
         
-        logger.info(f"Export request - Format: {export_format}, Types: {report_types}")
-        
-        # Get all data from database
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Get servers
-        cursor.execute('SELECT * FROM servers')
-        servers_rows = cursor.fetchall()
-        servers = [dict_from_row(row) for row in servers_rows]
+        logger.info("Export request - Format: %s, Types: %s", export_format, report_types)
         
-        # Get databases
-        cursor.execute('SELECT * FROM databases')
-        databases_rows = cursor.fetchall()
-        databases = [dict_from_row(row) for row in databases_rows]
-        
-        # Get file shares
-        cursor.execute('SELECT * FROM file_shares')
-        file_shares_rows = cursor.fetchall()
-        file_shares = [dict_from_row(row) for row in file_shares_rows]
-        
-        # Get resource rates
-        cursor.execute('SELECT * FROM resource_rates')
-        resource_rates_rows = cursor.fetchall()
-        resource_rates = [dict_from_row(row) for row in resource_rates_rows]
-        
-        conn.close()
-        
-        # Prepare infrastructure data
-        infrastructure_data = {
-            'servers': servers,
-            'databases': databases,
-            'file_shares': file_shares,
-            'resource_rates': resource_rates
-        }
+        # One read of each table serves every section of the report
+        infrastructure_data = get_inventory().infrastructure_data(include_resource_rates=True)
+        servers = infrastructure_data['servers']
+        databases = infrastructure_data['databases']
+        file_shares = infrastructure_data['file_shares']
+        resource_rates = infrastructure_data['resource_rates']
         
         # Initialize export data
         export_data = {
@@ -786,13 +1005,13 @@ def export_report():
             try:
                 if ai_service and ai_service.bedrock_client:
                     cost_data = ai_service.get_ai_cost_estimation(
-                        infrastructure_data, 'AWS', 'us-east-1', 'medium'
+                        infrastructure_data, 'AWS', 'us-east-1'
                     )
                 else:
                     raise Exception("AI service unavailable")
             except Exception as e:
-                logger.warning(f"AI cost estimation failed: {e}, using fallback data")
-                cost_data = _generate_fallback_cost_data(servers, databases, file_shares)
+                logger.warning("AI cost estimation failed: %s, using fallback data", e)
+                cost_data = ai_service._fallback_cost_estimation(infrastructure_data, 'AWS', 'us-east-1')
             export_data['cost_estimation'] = cost_data
         
         if 'migration_strategy' in report_types:
@@ -805,8 +1024,8 @@ def export_report():
                 else:
                     raise Exception("AI service unavailable")
             except Exception as e:
-                logger.warning(f"AI migration strategy failed: {e}, using fallback data")
-                strategy_data = _generate_fallback_strategy_data(servers, databases, file_shares)
+                logger.warning("AI migration strategy failed: %s, using fallback data", e)
+                strategy_data = ai_service._fallback_migration_strategy(infrastructure_data, 'AWS', 'medium')
             export_data['migration_strategy'] = strategy_data
         
         if 'timeline' in report_types:
@@ -866,6 +1085,7 @@ def export_report():
         
         # Generate file based on format
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        render_started = time.perf_counter()
         
         if export_format == 'excel':
             filename = f'migration_report_{timestamp}.xlsx'
@@ -880,6 +1100,8 @@ def export_report():
             return jsonify({'error': 'Invalid export format'}), 400
         
         file_size = os.path.getsize(filepath) if os.path.exists(filepath) else 0
+        EXPORT_RENDER_SECONDS.observe(time.perf_counter() - render_started, format=export_format)
+        EXPORT_ARTIFACT_BYTES.observe(file_size, format=export_format)
         
         result = {
             'message': f'{export_format.upper()} export completed successfully',
@@ -892,7 +1114,7 @@ def export_report():
             'download_url': f'/api/download/{filename}'
         }
         
-        logger.info(f"Export completed: {filename} ({file_size} bytes)")
+        logger.info("Export completed: %s (%s bytes)", filename, file_size)
         return jsonify(result)
         
     except Exception as e:
@@ -982,7 +1204,8 @@ def _generate_excel_report(export_data, filename):
             ai_insights = cost_data.get('ai_insights', {})
             if ai_insights:
                 ws_cost.append(["AI Analysis"])
-                ws_cost.append(["Confidence Level:", f"{ai_insights.get('confidence_level', 0) * 100:.0f}%"])
+                confidence = confidence_score(ai_insights.get('confidence_level'))
+                ws_cost.append(["Confidence Level:", f"{confidence * 100:.0f}%" if confidence is not None else "N/A"])
                 ws_cost.append(["AI Model:", ai_insights.get('ai_model_used', 'N/A')])
                 ws_cost.append(["Fallback Used:", "Yes" if ai_insights.get('fallback_used') else "No"])
                 ws_cost.append([])
@@ -1247,7 +1470,7 @@ def handle_cloud_preferences():
     try:
         if request.method == 'POST':
             data = request.json
-            logger.info(f"Creating/updating cloud preferences: {data}")
+            logger.info("Creating/updating cloud preferences: %s", data)
             
             conn = get_db_connection()
             cursor = conn.cursor()
@@ -1295,7 +1518,7 @@ def handle_cloud_preferences():
             }
         
         conn.close()
-        logger.info(f"Retrieved cloud preferences: {cloud_preference}")
+        logger.info("Retrieved cloud preferences: %s", cloud_preference)
         return jsonify(cloud_preference)
         
     except Exception as e:
@@ -1308,7 +1531,7 @@ def handle_cloud_preference_by_id(pref_id):
     try:
         if request.method == 'PUT':
             data = request.json
-            logger.info(f"Updating cloud preference {pref_id}: {data}")
+            logger.info("Updating cloud preference %s: %s", pref_id, data)
             
             conn = get_db_connection()
             cursor = conn.cursor()
@@ -1324,7 +1547,7 @@ def handle_cloud_preference_by_id(pref_id):
             return jsonify({'success': True, 'message': 'Cloud preference updated successfully'})
             
         elif request.method == 'DELETE':
-            logger.info(f"Deleting cloud preference {pref_id}")
+            logger.info("Deleting cloud preference %s", pref_id)
             
             conn = get_db_connection()
             cursor = conn.cursor()
@@ -1344,7 +1567,7 @@ def handle_business_constraints():
     try:
         if request.method == 'POST':
             data = request.json
-            logger.info(f"Creating/updating business constraints: {data}")
+            logger.info("Creating/updating business constraints: %s", data)
             
             conn = get_db_connection()
             cursor = conn.cursor()
@@ -1392,7 +1615,7 @@ def handle_business_constraints():
             }
         
         conn.close()
-        logger.info(f"Retrieved business constraints: {business_constraint}")
+        logger.info("Retrieved business constraints: %s", business_constraint)
         return jsonify(business_constraint)
         
     except Exception as e:
@@ -1405,7 +1628,7 @@ def handle_business_constraint_by_id(constraint_id):
     try:
         if request.method == 'PUT':
             data = request.json
-            logger.info(f"Updating business constraint {constraint_id}: {data}")
+            logger.info("Updating business constraint %s: %s", constraint_id, data)
             
             conn = get_db_connection()
             cursor = conn.cursor()
@@ -1421,7 +1644,7 @@ def handle_business_constraint_by_id(constraint_id):
             return jsonify({'success': True, 'message': 'Business constraint updated successfully'})
             
         elif request.method == 'DELETE':
-            logger.info(f"Deleting business constraint {constraint_id}")
+            logger.info("Deleting business constraint %s", constraint_id)
             
             conn = get_db_connection()
             cursor = conn.cursor()
@@ -1,9 +1,20 @@
-import boto3
 import json
 import logging
 import os
+import time
 from typing import Dict, List, Any
+from botocore.exceptions import BotoCoreError, ClientError
 from dotenv import load_dotenv
+from .ai_registry import get_bedrock_client, get_circuit_breaker
+from .circuit_breaker import time_remaining
+from .model_cascade import CascadePolicy, ModelUsageTracker, estimate_tokens, is_complex_component
+from .metrics import BEDROCK_CALL_SECONDS, BEDROCK_ERRORS, BEDROCK_TOKENS
+from .recommendation_index import RecommendationIndex
+from .sizing_model import RecommendationLog, load_sizing_model
+from .response_schemas import (COST_ESTIMATION_SCHEMA, DATABASE_SCHEMA, MIGRATION_STRATEGY_SCHEMA, SERVER_SCHEMA,
+                               STORAGE_SCHEMA, assemble_cost_estimation, assemble_migration_strategy,
+                               compact_inventory, component_count, expand_component_answer,
+                               migration_services_cost, output_token_budget)
 
 # Load environment variables
 load_dotenv()
@@ -12,20 +23,28 @@ class AIRecommendationService:
     """AI-powered recommendation service using AWS Bedrock"""
     
     def __init__(self, region_name=None):
+        self.logger = logging.getLogger(__name__)
+        self.model_id = os.getenv('BEDROCK_MODEL_ID', "anthropic.claude-3-sonnet-20240229-v1:0")
+        # Component sizing tries the fast model first; usage is tracked per model for tuning
+        self.cascade = CascadePolicy()
+        self.model_usage = ModelUsageTracker()
+        # Near-identical components reuse an earlier validated answer instead of a new call
+        self.recommendation_index = RecommendationIndex()
+        # Validated AI sizing answers are logged to train the local model that backs the fallbacks
+        self.sizing_log = RecommendationLog()
+        self.sizing_model = load_sizing_model()
+        # Local predictions at least this confident skip Bedrock entirely (0 disables)
+        self.sizing_primary_confidence = float(os.getenv('SIZING_MODEL_PRIMARY_CONFIDENCE', 0))
         try:
             # Use environment variables for AWS configuration
             self.region_name = region_name or os.getenv('AWS_REGION', 'us-east-1')
             
-            # Initialize Bedrock client with credentials from environment
-            self.bedrock_client = boto3.client(
-                'bedrock-runtime',
-                region_name=self.region_name,
-                aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
-                aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY')
-            )
+            # Shared, pooled Bedrock client from the process-wide registry
+            self.bedrock_client = get_bedrock_client(self.region_name)
+            self.circuit_breaker = get_circuit_breaker(self.region_name)
             
-            self.model_id = os.getenv('BEDROCK_MODEL_ID', "anthropic.claude-3-sonnet-20240229-v1:0")
-            self.logger = logging.getLogger(__name__)
+            # Calls are skipped when less than this is left of the request deadline
+            self.min_call_seconds = float(os.getenv('AI_MIN_CALL_SECONDS', 2))
             
             # Skip connection test to avoid hanging
             # self._test_bedrock_connection()
@@ -87,13 +106,45 @@ class AIRecommendationService:
         self.bedrock_client = None
         return False
     
+    def ai_available(self) -> bool:
+        """Whether an AI call is worth attempting now; otherwise callers go straight to the rule-based path"""
+        if not self.bedrock_client:
+            return False
+        remaining = time_remaining()
+        if remaining is not None and remaining < self.min_call_seconds:
+            return False
+        return self.circuit_breaker.allow_request()
+    
+    def _reusable(self, component_type: str):
+        """Validator for answers worth indexing: AI-generated, complete and confident"""
+        return lambda result: not result.get('fallback_used') and \
+            self.cascade.escalation_reason(result, component_type) is None
+    
     def get_server_recommendation(self, server_specs: Dict[str, Any]) -> Dict[str, Any]:
+        """Get AI-powered EC2 instance recommendation, reusing a near-identical server's when available"""
+        return self.recommendation_index.reuse_or_recommend(
+            'server', server_specs, self._ai_server_recommendation, self._reusable('server'))
+    
+    def get_database_recommendation(self, db_specs: Dict[str, Any]) -> Dict[str, Any]:
+        """Get AI-powered RDS instance recommendation, reusing a near-identical database's when available"""
+        return self.recommendation_index.reuse_or_recommend(
+            'database', db_specs, self._ai_database_recommendation, self._reusable('database'))
+    
+    def get_storage_recommendation(self, storage_specs: Dict[str, Any]) -> Dict[str, Any]:
+        """Get AI-powered storage recommendation, reusing a near-identical share's when available"""
+        return self.recommendation_index.reuse_or_recommend(
+            'storage', storage_specs, self._ai_storage_recommendation, self._reusable('storage'))
+    
+    def _ai_server_recommendation(self, server_specs: Dict[str, Any]) -> Dict[str, Any]:
         """Get AI-powered EC2 instance recommendation"""
-        if not self.bedrock_client:
+        local = self._local_sizing('server', server_specs, primary=True)
+        if local is not None:
+            return local
+        if not self.ai_available():
             return self._fallback_server_recommendation(server_specs)
         
         prompt = f"""
-        You are an AWS cloud migration expert. Based on the following server specifications, recommend the most suitable EC2 instance type and provide detailed reasoning.
+        You are an AWS cloud migration expert. Based on the following server specifications, recommend the most suitable EC2 instance type.
 
         Server Details:
         - Server ID: {server_specs.get('server_id', 'N/A')}
@@ -114,37 +165,28 @@ class AIRecommendationService:
         5. Storage performance needs
         6. Potential for spot instances or reserved instances
 
-        Provide your response in the following JSON format:
-        {{
-            "recommended_instance": "instance_type",
-            "instance_family": "family_name",
-            "reasoning": "detailed explanation",
-            "cost_optimization_tips": ["tip1", "tip2"],
-            "alternative_options": [
-                {{"instance": "alternative1", "use_case": "description"}},
-                {{"instance": "alternative2", "use_case": "description"}}
-            ],
-            "confidence_level": "high/medium/low"
-        }}
+        Keep the note short and respond with JSON only, in this format:
+        {SERVER_SCHEMA}
         """
         
         try:
-            response = self._call_bedrock(prompt)
-            result = self._parse_ai_response(response, 'server')
+            result = self._cascade_recommendation(prompt, 'server', server_specs)
             
             # Mark as AI-generated response
             if result and not result.get('fallback_used'):
                 result['fallback_used'] = False
-                result['ai_model'] = self.model_id
             
             return result
         except Exception as e:
             self.logger.error(f"AI recommendation failed for server: {e}")
             return self._fallback_server_recommendation(server_specs)
     
-    def get_database_recommendation(self, db_specs: Dict[str, Any]) -> Dict[str, Any]:
+    def _ai_database_recommendation(self, db_specs: Dict[str, Any]) -> Dict[str, Any]:
         """Get AI-powered RDS instance recommendation"""
-        if not self.bedrock_client:
+        local = self._local_sizing('database', db_specs, primary=True)
+        if local is not None:
+            return local
+        if not self.ai_available():
             return self._fallback_database_recommendation(db_specs)
         
         prompt = f"""
@@ -167,30 +209,19 @@ class AIRecommendationService:
         6. Security and compliance requirements
         7. Read replica needs
 
-        Provide your response in the following JSON format:
-        {{
-            "recommended_instance": "instance_type",
-            "engine_recommendation": "recommended_engine",
-            "storage_type": "recommended_storage",
-            "multi_az": true/false,
-            "reasoning": "detailed explanation",
-            "performance_insights": "recommendations",
-            "cost_optimization_tips": ["tip1", "tip2"],
-            "migration_complexity": "low/medium/high",
-            "confidence_level": "high/medium/low"
-        }}
+        Keep the note short and respond with JSON only, in this format:
+        {DATABASE_SCHEMA}
         """
         
         try:
-            response = self._call_bedrock(prompt)
-            return self._parse_ai_response(response, 'database')
+            return self._cascade_recommendation(prompt, 'database', db_specs)
         except Exception as e:
             self.logger.error(f"AI recommendation failed for database: {e}")
             return self._fallback_database_recommendation(db_specs)
     
-    def get_storage_recommendation(self, storage_specs: Dict[str, Any]) -> Dict[str, Any]:
+    def _ai_storage_recommendation(self, storage_specs: Dict[str, Any]) -> Dict[str, Any]:
         """Get AI-powered storage recommendation"""
-        if not self.bedrock_client:
+        if not self.ai_available():
             return self._fallback_storage_recommendation(storage_specs)
         
         prompt = f"""
@@ -215,32 +246,19 @@ class AIRecommendationService:
 
         Recommend from these options: S3 Standard, S3 IA, S3 One Zone-IA, S3 Glacier Instant Retrieval, S3 Glacier Flexible Retrieval, S3 Glacier Deep Archive, EFS, FSx
 
-        Provide your response in the following JSON format:
-        {{
-            "recommended_storage": "storage_type",
-            "storage_class": "specific_class",
-            "reasoning": "detailed explanation",
-            "lifecycle_policy": "recommended_policy",
-            "cost_optimization_tips": ["tip1", "tip2"],
-            "performance_considerations": "recommendations",
-            "alternative_options": [
-                {{"storage": "alternative1", "use_case": "description"}},
-                {{"storage": "alternative2", "use_case": "description"}}
-            ],
-            "confidence_level": "high/medium/low"
-        }}
+        Keep the note short and respond with JSON only, in this format:
+        {STORAGE_SCHEMA}
         """
         
         try:
-            response = self._call_bedrock(prompt)
-            return self._parse_ai_response(response, 'storage')
+            return self._cascade_recommendation(prompt, 'storage', storage_specs)
         except Exception as e:
             self.logger.error(f"AI recommendation failed for storage: {e}")
             return self._fallback_storage_recommendation(storage_specs)
     
     def get_comprehensive_analysis(self, infrastructure_summary: Dict[str, Any]) -> Dict[str, Any]:
         """Get comprehensive migration strategy recommendations"""
-        if not self.bedrock_client:
+        if not self.ai_available():
             return {"analysis": "AI analysis not available", "recommendations": []}
         
         prompt = f"""
@@ -275,7 +293,7 @@ class AIRecommendationService:
         """
         
         try:
-            response = self._call_bedrock(prompt)
+            response = self._call_bedrock(prompt, max_tokens=output_token_budget('analysis'))
             return self._parse_ai_response(response, 'analysis')
         except Exception as e:
             self.logger.error(f"AI comprehensive analysis failed: {e}")
@@ -283,7 +301,7 @@ class AIRecommendationService:
     
     def get_cost_optimization_recommendations(self, inventory_data: Dict[str, Any]) -> Dict[str, Any]:
         """Get AI-powered cost optimization recommendations"""
-        if not self.bedrock_client:
+        if not self.ai_available():
             return self._fallback_cost_optimization(inventory_data)
         
         servers_count = len(inventory_data.get('servers', []))
@@ -299,7 +317,7 @@ class AIRecommendationService:
         - File Shares: {file_shares_count} file shares
         
         Detailed inventory:
-        {json.dumps(inventory_data, indent=2)}
+        {compact_inventory(inventory_data)}
 
         Provide specific, actionable cost optimization recommendations. Focus on:
         1. EC2 instance right-sizing and reserved instance opportunities
@@ -329,7 +347,7 @@ class AIRecommendationService:
         """
         
         try:
-            response = self._call_bedrock(prompt)
+            response = self._call_bedrock(prompt, max_tokens=output_token_budget('cost_optimization'))
             result = self._parse_ai_response(response, 'cost_optimization')
             
             # Ensure we have the required fields
@@ -348,7 +366,7 @@ class AIRecommendationService:
     
     def get_ai_cost_estimation(self, infrastructure_data: Dict[str, Any], cloud_provider: str = "AWS", target_region: str = "us-east-1") -> Dict[str, Any]:
         """Get AI-powered comprehensive cost estimation"""
-        if not self.bedrock_client:
+        if not self.ai_available():
             return self._fallback_cost_estimation(infrastructure_data, cloud_provider, target_region)
 
         servers = infrastructure_data.get('servers', [])
@@ -356,118 +374,32 @@ class AIRecommendationService:
         file_shares = infrastructure_data.get('file_shares', [])
 
         prompt = f"""
-        You are a senior cloud cost optimization specialist with expertise in {cloud_provider} pricing models. Provide a comprehensive cost estimation for migrating the following infrastructure to {cloud_provider} in the {target_region} region.
-
-        Infrastructure to Migrate:
-        Servers ({len(servers)} total):
-        {json.dumps(servers, indent=2)}
-
-        Databases ({len(databases)} total):
-        {json.dumps(databases, indent=2)}
+        You are a senior cloud cost optimization specialist with expertise in {cloud_provider} pricing models. Choose target sizing for migrating the following infrastructure to {cloud_provider} in the {target_region} region.
 
-        File Shares ({len(file_shares)} total):
-        {json.dumps(file_shares, indent=2)}
+        Infrastructure to Migrate ({len(servers)} servers, {len(databases)} databases, {len(file_shares)} file shares):
+        {compact_inventory(infrastructure_data)}
 
-        Consider these factors in your cost analysis:
+        Consider these factors in your choices:
         1. Current usage patterns and peak hours
         2. Reserved instance vs on-demand pricing
         3. Storage optimization opportunities
-        4. Network transfer costs
-        5. Backup and disaster recovery costs
-        6. Management and monitoring costs
-        7. Migration service costs
-        8. Professional services required
+        4. Backup and disaster recovery needs
 
-        Provide your response in this exact JSON format:
-        {{
-            "grand_total": {{
-                "annual_cloud_cost": <number>,
-                "one_time_migration_cost": <number>,
-                "total_first_year_cost": <number>
-            }},
-            "cloud_infrastructure": {{
-                "servers": {{
-                    "total_monthly_cost": <number>,
-                    "total_annual_cost": <number>,
-                    "server_recommendations": [
-                        {{
-                            "server_id": "string",
-                            "current_specs": "string",
-                            "recommended_instance": "string",
-                            "monthly_cost": <number>,
-                            "annual_cost": <number>,
-                            "optimization_notes": "string"
-                        }}
-                    ]
-                }},
-                "databases": {{
-                    "total_monthly_cost": <number>,
-                    "total_annual_cost": <number>,
-                    "database_recommendations": [
-                        {{
-                            "db_name": "string",
-                            "db_type": "string",
-                            "recommended_instance": "string",
-                            "size_gb": <number>,
-                            "monthly_cost": <number>,
-                            "annual_cost": <number>,
-                            "optimization_notes": "string"
-                        }}
-                    ]
-                }},
-                "storage": {{
-                    "total_monthly_cost": <number>,
-                    "total_annual_cost": <number>,
-                    "storage_recommendations": [
-                        {{
-                            "share_name": "string",
-                            "size_gb": <number>,
-                            "recommended_storage": "string",
-                            "access_pattern": "string",
-                            "monthly_cost": <number>,
-                            "annual_cost": <number>,
-                            "optimization_notes": "string"
-                        }}
-                    ]
-                }},
-                "total_monthly_cost": <number>,
-                "total_annual_cost": <number>
-            }},
-            "migration_services": {{
-                "total_professional_services_cost": <number>,
-                "resource_breakdown": [
-                    {{
-                        "role": "string",
-                        "rate_per_hour": <number>,
-                        "hours_per_week": <number>,
-                        "duration_weeks": <number>,
-                        "total_hours": <number>,
-                        "total_cost": <number>
-                    }}
-                ]
-            }},
-            "ai_insights": {{
-                "confidence_level": <number>,
-                "cost_optimization_tips": ["string"],
-                "potential_savings": {{
-                    "percentage": <number>,
-                    "annual_amount": <number>
-                }},
-                "recommendations": ["string"],
-                "ai_model_used": "{self.model_id}",
-                "fallback_used": false
-            }}
-        }}
+        Pricing, totals and specs are computed by the caller; return only your choices, one entry per
+        inventory row, keyed by its id. Keep notes short. Respond with JSON only, in this format:
+        {COST_ESTIMATION_SCHEMA}
         """
 
         try:
-            response = self._call_bedrock(prompt)
-            result = self._parse_ai_response(response, 'cost_estimation')
-            
-            if result and not result.get('fallback_used'):
-                result['ai_insights']['ai_model_used'] = self.model_id
-                result['ai_insights']['fallback_used'] = False
+            response = self._call_bedrock(
+                prompt, max_tokens=output_token_budget('cost_estimation', component_count(infrastructure_data)))
+            answer = self._parse_ai_response(response, 'cost_estimation')
+            if 'error' in answer:
+                raise ValueError(answer['error'])
             
+            result = assemble_cost_estimation(answer, infrastructure_data, cloud_provider, target_region)
+            result['ai_insights']['ai_model_used'] = self.model_id
+            result['ai_insights']['fallback_used'] = False
             return result
         except Exception as e:
             self.logger.error(f"AI cost estimation failed: {e}")
@@ -476,7 +408,7 @@ class AIRecommendationService:
     def get_ai_migration_strategy(self, infrastructure_data: Dict[str, Any], cloud_provider: str = "AWS", 
                                 target_region: str = "us-east-1", complexity: str = "medium") -> Dict[str, Any]:
         """Get AI-powered comprehensive migration strategy"""
-        if not self.bedrock_client:
+        if not self.ai_available():
             return self._fallback_migration_strategy(infrastructure_data, cloud_provider, complexity)
 
         servers = infrastructure_data.get('servers', [])
@@ -487,15 +419,8 @@ class AIRecommendationService:
         prompt = f"""
         You are a senior cloud migration architect with expertise in {cloud_provider} migration strategies. Create a comprehensive migration strategy for the following infrastructure with {complexity} complexity level.
 
-        Infrastructure to Migrate:
-        Servers ({len(servers)} total):
-        {json.dumps(servers, indent=2)}
-
-        Databases ({len(databases)} total):
-        {json.dumps(databases, indent=2)}
-
-        File Shares ({len(file_shares)} total):
-        {json.dumps(file_shares, indent=2)}
+        Infrastructure to Migrate ({len(servers)} servers, {len(databases)} databases, {len(file_shares)} file shares):
+        {compact_inventory(infrastructure_data)}
 
         Migration Context:
         - Target Cloud: {cloud_provider}
@@ -510,106 +435,122 @@ class AIRecommendationService:
         4. Replace - Move to SaaS solutions
         5. Hybrid approaches for different components
 
-        Provide your response in this exact JSON format:
-        {{
-            "migration_approach": {{
-                "overall_strategy": "string",
-                "estimated_duration": "string",
-                "complexity_level": "Low/Medium/High",
-                "rationale": "string"
-            }},
-            "component_strategies": {{
-                "servers": [
-                    {{
-                        "server_id": "string",
-                        "migration_type": "string",
-                        "current_state": "string",
-                        "target_state": "string",
-                        "complexity": "string",
-                        "estimated_effort": "string",
-                        "rationale": "string"
-                    }}
-                ],
-                "databases": [
-                    {{
-                        "db_name": "string",
-                        "current_engine": "string",
-                        "target_engine": "string",
-                        "migration_type": "string",
-                        "approach": "string",
-                        "complexity": "string",
-                        "data_migration_strategy": "string",
-                        "downtime_estimate": "string"
-                    }}
-                ],
-                "storage": [
-                    {{
-                        "share_name": "string",
-                        "current_type": "string",
-                        "target_type": "string",
-                        "migration_method": "string",
-                        "sync_strategy": "string",
-                        "cutover_approach": "string"
-                    }}
-                ]
-            }},
-            "migration_phases": [
-                {{
-                    "phase": <number>,
-                    "name": "string",
-                    "duration": "string",
-                    "components": ["string"],
-                    "dependencies": ["string"],
-                    "risks": ["string"],
-                    "success_criteria": ["string"]
-                }}
-            ],
-            "recommendations": {{
-                "quick_wins": ["string"],
-                "cost_optimization": ["string"],
-                "performance_improvements": ["string"],
-                "modernization_opportunities": ["string"]
-            }},
-            "risk_assessment": {{
-                "high_risks": ["string"],
-                "medium_risks": ["string"],
-                "low_risks": ["string"],
-                "mitigation_strategies": {{
-                    "risk_name": "mitigation_strategy"
-                }}
-            }},
-            "ai_insights": {{
-                "confidence_level": <number>,
-                "ai_model_used": "{self.model_id}",
-                "fallback_used": false,
-                "strategic_recommendations": ["string"]
-            }}
-        }}
+        Current state is taken from the inventory by the caller; do not repeat it. Give one entry per
+        inventory row keyed by its id, keep every string to one short sentence, and respond with JSON only
+        in this format:
+        {MIGRATION_STRATEGY_SCHEMA}
         """
 
         try:
-            response = self._call_bedrock(prompt)
-            result = self._parse_ai_response(response, 'migration_strategy')
-            
-            if result and not result.get('fallback_used'):
-                if 'ai_insights' not in result:
-                    result['ai_insights'] = {}
-                result['ai_insights']['ai_model_used'] = self.model_id
-                result['ai_insights']['fallback_used'] = False
+            response = self._call_bedrock(
+                prompt, max_tokens=output_token_budget('migration_strategy', component_count(infrastructure_data)))
+            answer = self._parse_ai_response(response, 'migration_strategy')
+            if 'error' in answer:
+                raise ValueError(answer['error'])
             
+            result = assemble_migration_strategy(answer, infrastructure_data)
+            result['ai_insights']['ai_model_used'] = self.model_id
+            result['ai_insights']['fallback_used'] = False
             return result
         except Exception as e:
             self.logger.error(f"AI migration strategy failed: {e}")
             return self._fallback_migration_strategy(infrastructure_data, cloud_provider, complexity)
 
-    def _call_bedrock(self, prompt: str) -> str:
-        """Call AWS Bedrock with the given prompt"""
+    def _cascade_recommendation(self, prompt: str, component_type: str, specs: Dict[str, Any]) -> Dict[str, Any]:
+        """Ask the fast model first; escalate to the main model on low confidence, bad JSON or complex components"""
+        if self.cascade.enabled and self.cascade.fast_model_id != self.model_id:
+            if is_complex_component(component_type, specs):
+                reason = 'complex_component'
+            else:
+                try:
+                    # A fast model that isn't enabled or is throttled must not open the breaker for the main model
+                    response = self._call_bedrock(prompt, max_tokens=output_token_budget(component_type),
+                                                  model_id=self.cascade.fast_model_id, count_client_errors=False)
+                    result = expand_component_answer(self._parse_ai_response(response, component_type),
+                                                     component_type)
+                    reason = self.cascade.escalation_reason(result, component_type)
+                except (ClientError, BotoCoreError, ValueError, KeyError) as e:
+                    # Rejections, timeouts, dropped connections and malformed bodies all deserve a main-model try
+                    self.logger.warning(f"Fast model failed on {component_type} request, escalating: {e}")
+                    reason = 'fast_model_error'
+                if reason is None:
+                    result['ai_model'] = self.cascade.fast_model_id
+                    self.sizing_log.record(component_type, specs, result)
+                    return result
+            self.model_usage.record_escalation(reason)
+            if not self.ai_available():
+                # The fast call may have opened the breaker or spent the request's deadline
+                raise RuntimeError(f"Main model unavailable after fast-model escalation ({reason})")
+        
+        response = self._call_bedrock(prompt, max_tokens=output_token_budget(component_type))
+        result = expand_component_answer(self._parse_ai_response(response, component_type), component_type)
+        result['ai_model'] = self.model_id
+        if self.cascade.escalation_reason(result, component_type) is None:
+            self.sizing_log.record(component_type, specs, result)
+        return result
+    
+    def _local_sizing(self, component_type: str, specs: Dict[str, Any], primary: bool = False) -> Dict[str, Any]:
+        """Answer from the distilled sizing model; as primary only above the configured confidence"""
+        if self.sizing_model is None:
+            return None
+        if primary and not (self.sizing_primary_confidence > 0):
+            return None
+        prediction = self.sizing_model.predict(component_type, specs)
+        if prediction is None or (primary and prediction['confidence'] < self.sizing_primary_confidence):
+            return None
+        
+        return {
+            "recommended_instance": prediction['recommended_instance'],
+            "reasoning": f"Local sizing model v{self.sizing_model.version} trained on past AI recommendations "
+                         f"({prediction['support']} similar cases)",
+            "confidence_level": round(prediction['confidence'], 3),
+            "ai_model": f"local-sizing-model-v{self.sizing_model.version}",
+            "fallback_used": not primary,
+            "fallback_reason": None if primary else "AI service not available - using local sizing model"
+        }
+    
+    def reload_sizing_model(self, version: int = None):
+        """Swap in the latest (or a given) trained sizing model"""
+        self.sizing_model = load_sizing_model(version=version)
+        return self.sizing_model
+    
+    def _call_bedrock(self, prompt: str, max_tokens: int = 4000, model_id: str = None,
+                      count_client_errors: bool = True) -> str:
+        """Call AWS Bedrock with the given prompt, recording the outcome on the circuit breaker"""
+        model_id = model_id or self.model_id
+        started = time.monotonic()
         try:
-            if "anthropic" in self.model_id:
+            text = self._invoke_model(prompt, max_tokens, model_id)
+        except Exception as e:
+            elapsed = time.monotonic() - started
+            if count_client_errors or not isinstance(e, ClientError):
+                self.circuit_breaker.record(False, elapsed)
+            else:
+                # A half-open trial must not stay taken by a call that isn't counted
+                self.circuit_breaker.release()
+            self.model_usage.record(model_id, elapsed, prompt, success=False)
+            error = e.response['Error'].get('Code', 'ClientError') if isinstance(e, ClientError) else type(e).__name__
+            BEDROCK_CALL_SECONDS.observe(elapsed, model=model_id, outcome='error')
+            BEDROCK_ERRORS.inc(model=model_id, error=error)
+            BEDROCK_TOKENS.inc(estimate_tokens(prompt), model=model_id, direction='in')
+            raise
+        elapsed = time.monotonic() - started
+        self.circuit_breaker.record(True, elapsed)
+        self.model_usage.record(model_id, elapsed, prompt, text)
+        BEDROCK_CALL_SECONDS.observe(elapsed, model=model_id, outcome='success')
+        BEDROCK_TOKENS.inc(estimate_tokens(prompt), model=model_id, direction='in')
+        BEDROCK_TOKENS.inc(estimate_tokens(text), model=model_id, direction='out')
+        return text
+    
+    def _invoke_model(self, prompt: str, max_tokens: int, model_id: str = None) -> str:
+        """Send the prompt in the request format of the model family"""
+        model_id = model_id or self.model_id
+        try:
+            if "anthropic" in model_id:
                 # Anthropic models (Claude) use messages format
                 body = {
                     "anthropic_version": "bedrock-2023-05-31",
-                    "max_tokens": 4000,
+                    "max_tokens": max_tokens,
                     "messages": [
                         {
                             "role": "user",
@@ -621,33 +562,33 @@ class AIRecommendationService:
                 }
                 
                 response = self.bedrock_client.invoke_model(
-                    modelId=self.model_id,
+                    modelId=model_id,
                     body=json.dumps(body)
                 )
                 
                 response_body = json.loads(response['body'].read())
                 return response_body['content'][0]['text']
                 
-            elif "titan" in self.model_id:
+            elif "titan" in model_id:
                 # Amazon Titan models use different format
                 body = {
                     "inputText": prompt,
                     "textGenerationConfig": {
-                        "maxTokenCount": 4000,
+                        "maxTokenCount": max_tokens,
                         "temperature": 0.1,
                         "topP": 0.9
                     }
                 }
                 
                 response = self.bedrock_client.invoke_model(
-                    modelId=self.model_id,
+                    modelId=model_id,
                     body=json.dumps(body)
                 )
                 
                 response_body = json.loads(response['body'].read())
                 return response_body['results'][0]['outputText']
                 
-            elif "nova" in self.model_id:
+            elif "nova" in model_id:
                 # Amazon Nova models use messages format but different structure
                 body = {
                     "messages": [
@@ -657,14 +598,14 @@ class AIRecommendationService:
                         }
                     ],
                     "inferenceConfig": {
-                        "maxTokens": 4000,
+                        "maxTokens": max_tokens,
                         "temperature": 0.1,
                         "topP": 0.9
                     }
                 }
                 
                 response = self.bedrock_client.invoke_model(
-                    modelId=self.model_id,
+                    modelId=model_id,
                     body=json.dumps(body)
                 )
                 
@@ -675,7 +616,7 @@ class AIRecommendationService:
                 # Generic fallback - try Anthropic format
                 body = {
                     "anthropic_version": "bedrock-2023-05-31",
-                    "max_tokens": 4000,
+                    "max_tokens": max_tokens,
                     "messages": [
                         {
                             "role": "user",
@@ -687,7 +628,7 @@ class AIRecommendationService:
                 }
                 
                 response = self.bedrock_client.invoke_model(
-                    modelId=self.model_id,
+                    modelId=model_id,
                     body=json.dumps(body)
                 )
                 
@@ -725,6 +666,10 @@ class AIRecommendationService:
     # Fallback methods for when AI is not available
     def _fallback_server_recommendation(self, server_specs: Dict[str, Any]) -> Dict[str, Any]:
         """Fallback server recommendation logic"""
+        local = self._local_sizing('server', server_specs)
+        if local is not None:
+            return local
+        
         vcpu = server_specs.get('vcpu', 2)
         ram = server_specs.get('ram', 4)
         
@@ -751,6 +696,10 @@ class AIRecommendationService:
     
     def _fallback_database_recommendation(self, db_specs: Dict[str, Any]) -> Dict[str, Any]:
         """Fallback database recommendation logic"""
+        local = self._local_sizing('database', db_specs)
+        if local is not None:
+            return local
+        
         size_gb = db_specs.get('size_gb', 100)
         ha_required = db_specs.get('ha_dr_required', False)
         
@@ -768,7 +717,8 @@ class AIRecommendationService:
         return {
             "recommended_instance": instance,
             "reasoning": "Basic sizing based on database size and HA requirements",
-            "confidence_level": "medium"
+            "confidence_level": "medium",
+            "fallback_used": True
         }
     
     def _fallback_storage_recommendation(self, storage_specs: Dict[str, Any]) -> Dict[str, Any]:
@@ -785,7 +735,8 @@ class AIRecommendationService:
         return {
             "recommended_storage": storage,
             "reasoning": f"Basic recommendation based on {access_pattern} access pattern",
-            "confidence_level": "medium"
+            "confidence_level": "medium",
+            "fallback_used": True
         }
     
     def _fallback_cost_optimization(self, inventory_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -887,27 +838,7 @@ class AIRecommendationService:
                 "total_monthly_cost": total_monthly,
                 "total_annual_cost": total_annual
             },
-            "migration_services": {
-                "total_professional_services_cost": migration_cost,
-                "resource_breakdown": [
-                    {
-                        "role": "Cloud Architect",
-                        "rate_per_hour": 150,
-                        "hours_per_week": 20,
-                        "duration_weeks": 4,
-                        "total_hours": 80,
-                        "total_cost": migration_cost * 0.6
-                    },
-                    {
-                        "role": "Migration Specialist",
-                        "rate_per_hour": 125,
-                        "hours_per_week": 20,
-                        "duration_weeks": 4,
-                        "total_hours": 80,
-                        "total_cost": migration_cost * 0.4
-                    }
-                ]
-            },
+            "migration_services": migration_services_cost(len(servers), len(databases)),
             "ai_insights": {
                 "confidence_level": 0.65,
                 "cost_optimization_tips": [
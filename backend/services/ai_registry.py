@@ -0,0 +1,109 @@
+"""Process-wide registry for the Bedrock client and the shared AI recommendation service"""
+
+import logging
+import os
+import threading
+from typing import Dict, Optional
+
+from dotenv import load_dotenv
+
+from .circuit_breaker import CircuitBreaker
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Re-entrant: building the shared service builds the client under the same lock
+_lock = threading.RLock()
+_clients: Dict[str, object] = {}
+_breakers: Dict[str, CircuitBreaker] = {}
+_service = None
+
+
+def bedrock_client_config():
+    """botocore config for Bedrock: bounded timeouts, adaptive retries, pool sized to the workers"""
+    # boto3/botocore take a noticeable share of startup; import them only when a real client is built
+    from botocore.config import Config
+
+    return Config(
+        connect_timeout=float(os.getenv('BEDROCK_CONNECT_TIMEOUT', 5)),
+        read_timeout=float(os.getenv('BEDROCK_READ_TIMEOUT', 60)),
+        retries={
+            'max_attempts': int(os.getenv('BEDROCK_MAX_ATTEMPTS', 3)),
+            'mode': 'adaptive'
+        },
+        max_pool_connections=int(os.getenv('BEDROCK_MAX_POOL_CONNECTIONS', os.getenv('WORKER_THREADS', 16)))
+    )
+
+
+def get_bedrock_client(region_name: Optional[str] = None):
+    """Shared bedrock-runtime client for a region, created on first use
+
+    boto3 clients are thread-safe once built; only construction (credential
+    resolution, endpoint setup) is serialized here, so it happens once per
+    process instead of once per service instance.
+    """
+    region_name = region_name or os.getenv('AWS_REGION', 'us-east-1')
+    client = _clients.get(region_name)
+    if client is not None:
+        return client
+
+    with _lock:
+        if region_name not in _clients:
+            emulator_mode = os.getenv('BEDROCK_EMULATOR', '').lower()
+            if emulator_mode in ('replay', 'record'):
+                # Offline stand-in; record mode still needs the real client to capture answers
+                from .bedrock_emulator import BedrockEmulator
+                _clients[region_name] = BedrockEmulator.from_env(lambda: _create_bedrock_client(region_name))
+                logger.info(f"Bedrock emulator ({emulator_mode}) in use for {region_name}")
+            else:
+                _clients[region_name] = _create_bedrock_client(region_name)
+                logger.info(f"Bedrock client created for {region_name}")
+        return _clients[region_name]
+
+
+def _create_bedrock_client(region_name: str):
+    # Sessions are not thread-safe, so each client gets its own
+    import boto3
+
+    session = boto3.session.Session(
+        aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID') or None,
+        aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY') or None,
+        region_name=region_name
+    )
+    return session.client('bedrock-runtime', config=bedrock_client_config())
+
+
+def get_circuit_breaker(region_name: Optional[str] = None) -> CircuitBreaker:
+    """Shared circuit breaker guarding Bedrock calls in a region"""
+    region_name = region_name or os.getenv('AWS_REGION', 'us-east-1')
+    breaker = _breakers.get(region_name)
+    if breaker is not None:
+        return breaker
+
+    with _lock:
+        if region_name not in _breakers:
+            _breakers[region_name] = CircuitBreaker(name=f'bedrock-{region_name}')
+        return _breakers[region_name]
+
+
+def get_ai_service():
+    """Shared AIRecommendationService, created on first use"""
+    global _service
+    if _service is not None:
+        return _service
+
+    with _lock:
+        if _service is None:
+            from .ai_recommendations import AIRecommendationService
+            _service = AIRecommendationService()
+        return _service
+
+
+def reset_registry():
+    """Drop cached clients, breakers and the shared service so the next call rebuilds them from the environment"""
+    global _service
+    with _lock:
+        _clients.clear()
+        _breakers.clear()
+        _service = None
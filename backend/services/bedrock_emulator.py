@@ -0,0 +1,248 @@
+"""Local stand-in for the bedrock-runtime client: record/replay, latency and fault injection"""
+
+import hashlib
+import io
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, Optional
+
+import numpy as np
+from botocore.exceptions import ClientError, EndpointConnectionError
+
+DEFAULT_RECORDINGS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                  'bedrock_recordings.json')
+
+# Answer used in replay mode when a prompt was never recorded; flagged so it is never
+# kept as training data or reused as a real answer
+DEFAULT_SYNTHETIC_TEXT = json.dumps({
+    "recommended_instance": "m5.large",
+    "recommended_storage": "S3 Standard",
+    "reasoning": "Synthetic emulator response",
+    "confidence_level": "medium",
+    "synthetic": True
+})
+
+
+def model_family(model_id: str) -> str:
+    """Request/response format family of a Bedrock model id"""
+    if 'titan' in model_id:
+        return 'titan'
+    if 'nova' in model_id:
+        return 'nova'
+    return 'anthropic'
+
+
+def prompt_from_body(model_id: str, body: Dict[str, Any]) -> str:
+    """Prompt text out of a request body in any supported format"""
+    if model_family(model_id) == 'titan':
+        return body.get('inputText', '')
+    content = (body.get('messages') or [{}])[-1].get('content', '')
+    if isinstance(content, list):
+        content = ''.join(part.get('text', '') for part in content if isinstance(part, dict))
+    return content
+
+
+def max_tokens_from_body(model_id: str, body: Dict[str, Any]) -> int:
+    family = model_family(model_id)
+    if family == 'titan':
+        return body.get('textGenerationConfig', {}).get('maxTokenCount', 4000)
+    if family == 'nova':
+        return body.get('inferenceConfig', {}).get('maxTokens', 4000)
+    return body.get('max_tokens', 4000)
+
+
+def recording_key(model_id: str, prompt: str) -> str:
+    return hashlib.sha256(f'{model_id}\n{prompt}'.encode('utf-8')).hexdigest()[:24]
+
+
+def response_body(model_id: str, text: str, input_tokens: int, output_tokens: int) -> Dict[str, Any]:
+    """invoke_model response body in the model family's shape"""
+    family = model_family(model_id)
+    if family == 'titan':
+        return {'inputTextTokenCount': input_tokens,
+                'results': [{'tokenCount': output_tokens, 'outputText': text, 'completionReason': 'FINISH'}]}
+    if family == 'nova':
+        return {'output': {'message': {'role': 'assistant', 'content': [{'text': text}]}},
+                'stopReason': 'end_turn', 'usage': {'inputTokens': input_tokens, 'outputTokens': output_tokens}}
+    return {'id': 'msg_emulated', 'type': 'message', 'role': 'assistant', 'model': model_id,
+            'content': [{'type': 'text', 'text': text}], 'stop_reason': 'end_turn',
+            'usage': {'input_tokens': input_tokens, 'output_tokens': output_tokens}}
+
+
+def stream_events(model_id: str, chunks, input_tokens: int, output_tokens: int) -> Iterator[Dict[str, Any]]:
+    """invoke_model_with_response_stream events in the model family's shape"""
+    family = model_family(model_id)
+
+    def event(payload):
+        return {'chunk': {'bytes': json.dumps(payload).encode('utf-8')}}
+
+    if family == 'anthropic':
+        yield event({'type': 'message_start', 'message': {'usage': {'input_tokens': input_tokens}}})
+        yield event({'type': 'content_block_start', 'index': 0, 'content_block': {'type': 'text', 'text': ''}})
+    for chunk in chunks:
+        if family == 'titan':
+            yield event({'outputText': chunk, 'index': 0})
+        elif family == 'nova':
+            yield event({'contentBlockDelta': {'delta': {'text': chunk}, 'contentBlockIndex': 0}})
+        else:
+            yield event({'type': 'content_block_delta', 'index': 0, 'delta': {'type': 'text_delta', 'text': chunk}})
+    if family == 'anthropic':
+        yield event({'type': 'message_delta', 'delta': {'stop_reason': 'end_turn'},
+                     'usage': {'output_tokens': output_tokens}})
+        yield event({'type': 'message_stop'})
+    elif family == 'nova':
+        yield event({'messageStop': {'stopReason': 'end_turn'}})
+
+
+class BedrockEmulator:
+    """Drop-in for a bedrock-runtime client that replays recorded answers offline
+
+    In 'replay' mode answers come from the recordings file, keyed by a hash
+    of model id and prompt; unrecorded prompts get `synthesize(model_id,
+    prompt)`. In 'record' mode calls go to `client` (a real bedrock-runtime
+    client) and its answers are added to the recordings file.
+
+    Latency is a log-normal time to first token around `latency_ms` plus
+    output tokens at `tokens_per_second`, so shorter answers finish sooner.
+    `throttle_rate` and `error_rate` inject ThrottlingException and
+    connection errors. Everything random comes from one seeded generator,
+    so runs are reproducible.
+    """
+
+    def __init__(self, mode: str = 'replay', recordings_path: Optional[str] = None, client=None,
+                 latency_ms: float = 0.0, latency_sigma: float = 0.3, tokens_per_second: float = 0.0,
+                 throttle_rate: float = 0.0, error_rate: float = 0.0, seed: Optional[int] = None,
+                 synthesize: Optional[Callable[[str, str], str]] = None, sleep: Callable[[float], None] = time.sleep):
+        if mode not in ('replay', 'record'):
+            raise ValueError(f"Unsupported emulator mode: {mode}")
+        if mode == 'record' and client is None:
+            raise ValueError("Record mode needs a real bedrock-runtime client")
+        self.mode = mode
+        self.recordings_path = recordings_path or DEFAULT_RECORDINGS
+        self.client = client
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.tokens_per_second = tokens_per_second
+        self.throttle_rate = throttle_rate
+        self.error_rate = error_rate
+        self.synthesize = synthesize or (lambda model_id, prompt: DEFAULT_SYNTHETIC_TEXT)
+        self.sleep = sleep
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._rng = np.random.default_rng(seed)
+        self.recordings: Dict[str, Dict[str, Any]] = self._load_recordings()
+        self.stats = {'calls': 0, 'replayed': 0, 'synthesized': 0, 'recorded': 0, 'throttled': 0, 'errors': 0}
+
+    @classmethod
+    def from_env(cls, client_factory: Optional[Callable[[], Any]] = None) -> 'BedrockEmulator':
+        """Emulator configured from BEDROCK_EMULATOR_* variables"""
+        mode = os.getenv('BEDROCK_EMULATOR', 'replay').lower()
+        seed = os.getenv('BEDROCK_EMULATOR_SEED')
+        return cls(
+            mode=mode,
+            recordings_path=os.getenv('BEDROCK_EMULATOR_RECORDINGS') or None,
+            client=client_factory() if mode == 'record' and client_factory else None,
+            latency_ms=float(os.getenv('BEDROCK_EMULATOR_LATENCY_MS', 0)),
+            latency_sigma=float(os.getenv('BEDROCK_EMULATOR_LATENCY_SIGMA', 0.3)),
+            tokens_per_second=float(os.getenv('BEDROCK_EMULATOR_TOKENS_PER_SECOND', 0)),
+            throttle_rate=float(os.getenv('BEDROCK_EMULATOR_THROTTLE_RATE', 0)),
+            error_rate=float(os.getenv('BEDROCK_EMULATOR_ERROR_RATE', 0)),
+            seed=int(seed) if seed else None
+        )
+
+    def invoke_model(self, modelId: str, body, **kwargs) -> Dict[str, Any]:
+        text, input_tokens, output_tokens, delay = self._answer(modelId, body)
+        self.sleep(delay)
+        payload = json.dumps(response_body(modelId, text, input_tokens, output_tokens)).encode('utf-8')
+        return {'body': io.BytesIO(payload), 'contentType': 'application/json',
+                'ResponseMetadata': {'HTTPStatusCode': 200}}
+
+    def invoke_model_with_response_stream(self, modelId: str, body, **kwargs) -> Dict[str, Any]:
+        text, input_tokens, output_tokens, delay = self._answer(modelId, body)
+        chunk_size = 64
+        chunks = [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)] or ['']
+        first_token, per_chunk = self._split_delay(delay, output_tokens, len(chunks))
+
+        def paced():
+            self.sleep(first_token)
+            for chunk in chunks:
+                yield chunk
+                self.sleep(per_chunk)
+
+        return {'body': stream_events(modelId, paced(), input_tokens, output_tokens),
+                'contentType': 'application/json', 'ResponseMetadata': {'HTTPStatusCode': 200}}
+
+    def _answer(self, model_id: str, body):
+        request = json.loads(body) if isinstance(body, (str, bytes)) else body
+        prompt = prompt_from_body(model_id, request)
+        key = recording_key(model_id, prompt)
+
+        with self._lock:
+            self.stats['calls'] += 1
+            throttled = self._rng.random() < self.throttle_rate
+            failed = not throttled and self._rng.random() < self.error_rate
+            first_token = self.latency_ms / 1000 * float(self._rng.lognormal(0.0, self.latency_sigma)) \
+                if self.latency_ms else 0.0
+            if throttled:
+                self.stats['throttled'] += 1
+            elif failed:
+                self.stats['errors'] += 1
+
+        if throttled:
+            raise ClientError({'Error': {'Code': 'ThrottlingException', 'Message': 'Rate exceeded (emulated)'},
+                               'ResponseMetadata': {'HTTPStatusCode': 429}}, 'InvokeModel')
+        if failed:
+            raise EndpointConnectionError(endpoint_url='https://bedrock-runtime.emulated')
+
+        if self.mode == 'record':
+            text = self._record(model_id, request, prompt, key)
+        else:
+            recording = self.recordings.get(key)
+            with self._lock:
+                self.stats['replayed' if recording else 'synthesized'] += 1
+            text = recording['text'] if recording else self.synthesize(model_id, prompt)
+
+        input_tokens = max(1, len(prompt) // 4)
+        output_tokens = min(max(1, len(text) // 4), max_tokens_from_body(model_id, request))
+        generation = output_tokens / self.tokens_per_second if self.tokens_per_second else 0.0
+        return text, input_tokens, output_tokens, first_token + generation
+
+    def _split_delay(self, delay: float, output_tokens: int, n_chunks: int):
+        generation = output_tokens / self.tokens_per_second if self.tokens_per_second else 0.0
+        return delay - generation, generation / n_chunks
+
+    def _record(self, model_id: str, request: Dict[str, Any], prompt: str, key: str) -> str:
+        response = self.client.invoke_model(modelId=model_id, body=json.dumps(request))
+        raw = json.loads(response['body'].read())
+        family = model_family(model_id)
+        if family == 'titan':
+            text = raw['results'][0]['outputText']
+        elif family == 'nova':
+            text = raw['output']['message']['content'][0]['text']
+        else:
+            text = raw['content'][0]['text']
+        with self._lock:
+            self.recordings[key] = {'model_id': model_id, 'prompt_preview': prompt.strip()[:120], 'text': text}
+            self.stats['recorded'] += 1
+            self._save_recordings()
+        return text
+
+    def _load_recordings(self) -> Dict[str, Dict[str, Any]]:
+        if not os.path.exists(self.recordings_path):
+            return {}
+        try:
+            with open(self.recordings_path) as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Could not read Bedrock recordings {self.recordings_path}: {e}")
+            return {}
+
+    def _save_recordings(self):
+        tmp_path = self.recordings_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.recordings, f, indent=1)
+        os.replace(tmp_path, self.recordings_path)
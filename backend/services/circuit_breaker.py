@@ -0,0 +1,173 @@
+"""Circuit breaker and per-request deadlines for calls to external AI services"""
+
+import contextvars
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# Absolute time.monotonic() deadline for the current request, if any
+_deadline: contextvars.ContextVar = contextvars.ContextVar('ai_request_deadline', default=None)
+
+
+def set_request_deadline(seconds: Optional[float]):
+    """Start a deadline `seconds` from now for the current request; returns a token for reset"""
+    return _deadline.set(time.monotonic() + seconds if seconds else None)
+
+
+def clear_request_deadline(token=None):
+    """Drop the current request's deadline"""
+    if token is not None:
+        _deadline.reset(token)
+    else:
+        _deadline.set(None)
+
+
+@contextmanager
+def request_deadline(seconds: Optional[float]):
+    """Context manager form of set_request_deadline"""
+    token = set_request_deadline(seconds)
+    try:
+        yield
+    finally:
+        clear_request_deadline(token)
+
+
+def time_remaining() -> Optional[float]:
+    """Seconds left before the current request's deadline (None when no deadline is set)"""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def install_request_deadline(app, header: str = 'X-Request-Timeout'):
+    """Give every request of a Flask app a deadline from a header, query param or REQUEST_DEADLINE_SECONDS"""
+    from flask import g, request
+
+    default_seconds = float(os.getenv('REQUEST_DEADLINE_SECONDS', 30))
+
+    @app.before_request
+    def _start_request_deadline():
+        seconds = request.headers.get(header) or request.args.get('deadline_seconds')
+        try:
+            seconds = float(seconds) if seconds else default_seconds
+        except ValueError:
+            seconds = default_seconds
+        g.ai_deadline_token = set_request_deadline(seconds)
+
+    @app.teardown_request
+    def _clear_request_deadline(exc=None):
+        token = g.pop('ai_deadline_token', None)
+        if token is not None:
+            try:
+                clear_request_deadline(token)
+            except ValueError:
+                # Token was created in a different context
+                clear_request_deadline()
+
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker over a rolling window of call outcomes
+
+    Calls slower than `slow_call_seconds` count as failures. Once the failure
+    rate over the window reaches `failure_rate_threshold` the breaker opens
+    and rejects calls for `open_seconds`, then lets a single trial call
+    through (half-open) to decide whether to close again.
+    """
+
+    def __init__(self, name: str = 'bedrock', window_size: Optional[int] = None, minimum_calls: Optional[int] = None,
+                 failure_rate_threshold: Optional[float] = None, slow_call_seconds: Optional[float] = None,
+                 open_seconds: Optional[float] = None, clock=time.monotonic):
+        self.name = name
+        self.window_size = window_size or int(os.getenv('AI_BREAKER_WINDOW', 20))
+        self.minimum_calls = minimum_calls or int(os.getenv('AI_BREAKER_MIN_CALLS', 5))
+        self.failure_rate_threshold = failure_rate_threshold or float(os.getenv('AI_BREAKER_FAILURE_RATE', 0.5))
+        self.slow_call_seconds = slow_call_seconds or float(os.getenv('AI_BREAKER_SLOW_CALL_SECONDS', 20))
+        self.open_seconds = open_seconds or float(os.getenv('AI_BREAKER_OPEN_SECONDS', 30))
+        self.clock = clock
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._outcomes = deque(maxlen=self.window_size)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._trial_started = 0.0
+        self.rejected_calls = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and self.clock() - self._opened_at >= self.open_seconds:
+            return HALF_OPEN
+        return self._state
+
+    def allow_request(self) -> bool:
+        """Whether a call may go out now; rejections are lock-free while the breaker is open"""
+        if self._state == CLOSED:
+            return True
+        if self._state == OPEN and self.clock() - self._opened_at < self.open_seconds:
+            self.rejected_calls += 1
+            return False
+        with self._lock:
+            if self._state == OPEN:
+                self._state = HALF_OPEN
+                self._trial_in_flight = False
+            # A trial whose outcome never got recorded is given up after open_seconds
+            trial_stale = self.clock() - self._trial_started >= self.open_seconds
+            if self._state == HALF_OPEN and (not self._trial_in_flight or trial_stale):
+                self._trial_in_flight = True
+                self._trial_started = self.clock()
+                return True
+            if self._state == CLOSED:
+                return True
+        self.rejected_calls += 1
+        return False
+
+    def record(self, success: bool, latency_seconds: float = 0.0):
+        """Record a call outcome and move between states"""
+        failed = not success or latency_seconds > self.slow_call_seconds
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._trial_in_flight = False
+                if failed:
+                    self._trip()
+                else:
+                    self._state = CLOSED
+                    self._outcomes.clear()
+                    self.logger.info(f"Circuit '{self.name}' closed after successful trial call")
+                return
+
+            self._outcomes.append(failed)
+            if self._state == CLOSED and len(self._outcomes) >= self.minimum_calls:
+                failure_rate = sum(self._outcomes) / len(self._outcomes)
+                if failure_rate >= self.failure_rate_threshold:
+                    self._trip()
+
+    def release(self):
+        """Give back a half-open trial slot for a call that says nothing about the service's health"""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._trial_in_flight = False
+
+    def _trip(self):
+        self._state = OPEN
+        self._opened_at = self.clock()
+        self._outcomes.clear()
+        self.logger.warning(f"Circuit '{self.name}' opened for {self.open_seconds}s")
+
+    def status(self) -> Dict[str, Any]:
+        """Snapshot for status endpoints"""
+        outcomes = list(self._outcomes)
+        return {
+            'name': self.name,
+            'state': self.state,
+            'recent_calls': len(outcomes),
+            'recent_failure_rate': round(sum(outcomes) / len(outcomes), 3) if outcomes else 0.0,
+            'rejected_calls': self.rejected_calls
+        }
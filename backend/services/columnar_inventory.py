@@ -0,0 +1,353 @@
+"""Columnar inventory tables: typed NumPy arrays, dictionary-encoded categoricals and slotted row views"""
+
+import sqlite3
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+# Column kinds per inventory table. Anything a query returns that isn't listed
+# is typed from its first non-NULL value (integers, floats, otherwise text).
+SCHEMAS = {
+    'servers': {
+        'id': 'int32', 'server_id': 'str', 'os_type': 'category', 'vcpu': 'int32', 'ram': 'int32',
+        'disk_size': 'int32', 'disk_type': 'category', 'uptime_pattern': 'category',
+        'current_hosting': 'category', 'technology': 'category', 'technology_version': 'category',
+    },
+    'databases': {
+        'id': 'int32', 'db_name': 'str', 'db_type': 'category', 'size_gb': 'int32', 'ha_dr_required': 'bool',
+        'backup_frequency': 'category', 'licensing_model': 'category', 'server_id': 'category',
+        'write_frequency': 'category', 'downtime_tolerance': 'category', 'real_time_sync': 'bool',
+    },
+    'file_shares': {
+        'id': 'int32', 'share_name': 'str', 'total_size_gb': 'int32', 'access_pattern': 'category',
+        'snapshot_required': 'bool', 'retention_days': 'int32', 'server_id': 'category',
+        'write_frequency': 'category', 'downtime_tolerance': 'category', 'real_time_sync': 'bool',
+    },
+    'resource_rates': {
+        'id': 'int32', 'role': 'category', 'duration_weeks': 'int32', 'hours_per_week': 'int32',
+        'rate_per_hour': 'float64',
+    },
+}
+
+# Audit timestamps are unique per row and no computation reads them
+DEFAULT_EXCLUDED_COLUMNS = ('created_at', 'updated_at')
+
+NUMERIC_KINDS = {'int32': np.int32, 'int64': np.int64, 'float64': np.float64, 'bool': np.bool_}
+
+# Text spellings accepted in boolean columns (compared lower-cased and stripped)
+TRUE_TEXT = {'1', 'true', 't', 'yes', 'y'}
+FALSE_TEXT = {'0', 'false', 'f', 'no', 'n', ''}
+
+
+def _coerce_bools(values: Sequence[Any]) -> Optional[List[Optional[bool]]]:
+    """Booleans from 0/1, true/false or yes/no; None when some text is none of those"""
+    coerced = []
+    for value in values:
+        if value is None or isinstance(value, (bool, int, float)):
+            coerced.append(None if value is None else bool(value))
+            continue
+        text = str(value).strip().lower()
+        if text in TRUE_TEXT:
+            coerced.append(True)
+        elif text in FALSE_TEXT:
+            coerced.append(False)
+        else:
+            return None
+    return coerced
+
+
+def _to_number(value: Any, fill: Optional[float]) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return fill
+
+
+def _infer_kind(values: Sequence[Any]) -> str:
+    for value in values:
+        if value is None:
+            continue
+        if isinstance(value, bool):
+            return 'bool'
+        if isinstance(value, int):
+            return 'int64'
+        if isinstance(value, float):
+            return 'float64'
+        return 'str'
+    return 'str'
+
+
+class CategoricalColumn:
+    """Dictionary-encoded text column: one small integer code per row, each distinct value stored once
+
+    NULL is code -1. Filters are evaluated once per distinct value and then
+    broadcast through the codes.
+    """
+
+    def __init__(self, codes: np.ndarray, categories: List[str]):
+        self.codes = codes
+        self.categories = categories
+
+    @classmethod
+    def encode(cls, values: Iterable[Optional[str]]) -> 'CategoricalColumn':
+        lookup: Dict[str, int] = {}
+        codes = np.fromiter((-1 if value is None else lookup.setdefault(value, len(lookup)) for value in values),
+                            dtype=np.int32)
+        for dtype in (np.int8, np.int16):
+            if len(lookup) < np.iinfo(dtype).max:
+                codes = codes.astype(dtype)
+                break
+        return cls(codes, list(lookup))
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, index: int) -> Optional[str]:
+        code = self.codes[index]
+        return None if code < 0 else self.categories[code]
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + sum(len(c) for c in self.categories)
+
+    def take(self, indices: np.ndarray) -> 'CategoricalColumn':
+        return CategoricalColumn(self.codes[indices], self.categories)
+
+    def decode(self) -> List[Optional[str]]:
+        return [self.categories[code] if code >= 0 else None for code in self.codes.tolist()]
+
+    def map(self, function: Callable[[Optional[str]], Any], dtype=object) -> np.ndarray:
+        """`function` applied to each distinct value (and NULL) once, broadcast to every row"""
+        mapped = np.array([function(c) for c in self.categories] + [function(None)], dtype=dtype)
+        # Code -1 indexes the trailing NULL entry
+        return mapped[self.codes]
+
+    def isin(self, values: Iterable[Optional[str]]) -> np.ndarray:
+        wanted = set(values)
+        return self.map(lambda c: c in wanted, dtype=bool)
+
+    def eq(self, value: Optional[str]) -> np.ndarray:
+        return self.isin([value])
+
+    def contains(self, substring: str) -> np.ndarray:
+        return self.map(lambda c: c is not None and substring in c, dtype=bool)
+
+    def value_counts(self) -> Dict[Optional[str], int]:
+        counts = np.bincount(self.codes.astype(np.intp) + 1, minlength=len(self.categories) + 1)
+        result = {category: int(count) for category, count in zip(self.categories, counts[1:]) if count}
+        if counts[0]:
+            result[None] = int(counts[0])
+        return result
+
+
+class RowView:
+    """One row of a ColumnarTable, read through attributes (`server.vcpu`) or keys (`server['vcpu']`)
+
+    Holds only the table and the row number; values are materialized on access.
+    """
+
+    __slots__ = ('_table', '_index')
+
+    def __init__(self, table: 'ColumnarTable', index: int):
+        self._table = table
+        self._index = index
+
+    def __getattr__(self, name):
+        getter = self._table._getters.get(name)
+        if getter is None:
+            raise AttributeError(name)
+        return getter(self._index)
+
+    def __getitem__(self, name):
+        getter = self._table._getters.get(name)
+        if getter is None:
+            raise KeyError(name)
+        return getter(self._index)
+
+    def get(self, name, default=None):
+        getter = self._table._getters.get(name)
+        if getter is None:
+            return default
+        return getter(self._index)
+
+    def keys(self):
+        return self._table.column_names
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getter(self._index) for name, getter in self._table._getters.items()}
+
+    def __repr__(self):
+        return f'RowView({self._table.name}[{self._index}])'
+
+
+class ColumnarTable(Sequence):
+    """An inventory table stored column by column
+
+    Numeric and boolean columns are typed arrays (NULLs kept in a separate
+    mask), low-cardinality text is dictionary-encoded and unique text such
+    as names is a fixed-width UTF-8 array. Indexing yields RowViews, so code
+    written against dict rows or ORM instances keeps working, while hot
+    paths can use `column()`/`numeric()` and boolean masks directly.
+    """
+
+    def __init__(self, name: str, columns: Dict[str, Any], nulls: Optional[Dict[str, np.ndarray]] = None):
+        self.name = name
+        self.columns = columns
+        self.nulls = nulls or {}
+        self.column_names = list(columns)
+        self._length = len(next(iter(columns.values()))) if columns else 0
+        self._getters = {column: self._getter(column) for column in self.column_names}
+
+    @classmethod
+    def from_cursor(cls, cursor, name: str = '', schema: Optional[Dict[str, str]] = None,
+                    batch_size: int = 10000) -> 'ColumnarTable':
+        """Build from an executed cursor, fetching in batches so rows never exist as objects all at once"""
+        schema = SCHEMAS.get(name, {}) if schema is None else schema
+        names = [description[0] for description in cursor.description]
+        values: List[List[Any]] = [[] for _ in names]
+        while True:
+            batch = cursor.fetchmany(batch_size)
+            if not batch:
+                break
+            for column, column_values in zip(values, zip(*batch)):
+                column.extend(column_values)
+
+        columns, nulls = {}, {}
+        for column, column_values in zip(names, values):
+            kind = schema.get(column) or _infer_kind(column_values)
+            if kind == 'category':
+                columns[column] = CategoricalColumn.encode(column_values)
+                continue
+            if None in column_values:
+                nulls[column] = np.fromiter((value is None for value in column_values), dtype=bool,
+                                            count=len(column_values))
+            if kind == 'bool':
+                coerced = _coerce_bools(column_values)
+                if coerced is None:
+                    kind = 'str'
+                else:
+                    column_values = coerced
+            elif kind in NUMERIC_KINDS and any(isinstance(value, (str, bytes)) for value in column_values):
+                parsed = [None if value is None else _to_number(value, None) for value in column_values]
+                if any(number is None and value is not None for number, value in zip(parsed, column_values)):
+                    # Text such as '16GB' keeps the column as text rather than failing the whole table
+                    kind = 'str'
+                else:
+                    column_values, kind = parsed, 'float64'
+            if kind in NUMERIC_KINDS:
+                if kind.startswith('int') and any(isinstance(value, float) for value in column_values):
+                    # SQLite doesn't enforce INTEGER affinity on every write; don't truncate what was stored
+                    kind = 'float64'
+                fill = False if kind == 'bool' else 0
+                if column in nulls:
+                    column_values = [fill if value is None else value for value in column_values]
+                columns[column] = np.array(column_values, dtype=NUMERIC_KINDS[kind])
+            else:
+                columns[column] = np.array([b'' if value is None else str(value).encode('utf-8')
+                                            for value in column_values], dtype=bytes)
+        return cls(name, columns, nulls)
+
+    @classmethod
+    def from_sqlite(cls, conn: sqlite3.Connection, table: str, columns: Optional[Sequence[str]] = None,
+                    exclude: Sequence[str] = DEFAULT_EXCLUDED_COLUMNS) -> 'ColumnarTable':
+        """One `SELECT` of an inventory table, ordered by id, without the audit timestamps by default"""
+        if columns is None and exclude:
+            columns = [row[1] for row in conn.execute(f'PRAGMA table_info({table})') if row[1] not in exclude]
+        # A plain tuple cursor: sqlite3.Row objects would only be built to be taken apart again
+        cursor = conn.cursor()
+        cursor.row_factory = None
+        try:
+            cursor.execute(f'SELECT {", ".join(columns) if columns else "*"} FROM {table} ORDER BY id')
+            return cls.from_cursor(cursor, table)
+        finally:
+            cursor.close()
+
+    def _getter(self, column: str) -> Callable[[int], Any]:
+        values = self.columns[column]
+        null = self.nulls.get(column)
+        if isinstance(values, CategoricalColumn):
+            codes, categories = values.codes, values.categories
+
+            def get_category(i):
+                code = codes[i]
+                return None if code < 0 else categories[code]
+            return get_category
+        if values.dtype.kind == 'S':
+            def convert(i):
+                return values[i].decode('utf-8')
+        else:
+            # .item() hands back plain int/float/bool, which JSON and the services expect
+            def convert(i):
+                return values[i].item()
+        if null is None:
+            return convert
+        return lambda i: None if null[i] else convert(i)
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.take(np.arange(self._length)[index])
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError(index)
+        return RowView(self, index)
+
+    def __iter__(self) -> Iterator[RowView]:
+        for i in range(self._length):
+            yield RowView(self, i)
+
+    def column(self, name: str):
+        """The stored column: an ndarray or a CategoricalColumn"""
+        return self.columns[name]
+
+    def numeric(self, name: str, fill: float = 0) -> np.ndarray:
+        """A numeric column as float64 with NULLs, missing columns and non-numeric text replaced by `fill`"""
+        if name not in self.columns:
+            return np.full(self._length, fill, dtype=float)
+        values = self.columns[name]
+        if isinstance(values, CategoricalColumn) or values.dtype.kind == 'S':
+            # Text kept from a numeric column: numbers parse, anything else counts as `fill`
+            return np.array([_to_number(value, fill) for value in self.values(name)], dtype=float)
+        values = values.astype(float)
+        null = self.nulls.get(name)
+        if null is not None:
+            values[null] = fill
+        return values
+
+    def values(self, name: str) -> List[Any]:
+        """A column as a list of Python values, NULLs as None"""
+        getter = self._getters[name]
+        return [getter(i) for i in range(self._length)]
+
+    def map(self, name: str, function: Callable[[Any], Any], dtype=object) -> np.ndarray:
+        """`function` applied per row; categorical columns call it once per distinct value"""
+        values = self.columns[name]
+        if isinstance(values, CategoricalColumn):
+            return values.map(function, dtype)
+        return np.array([function(value) for value in self.values(name)], dtype=dtype)
+
+    def sum(self, name: str) -> float:
+        """Column total, NULLs counted as zero"""
+        return float(self.numeric(name).sum()) if self._length else 0
+
+    def take(self, indices) -> 'ColumnarTable':
+        """A new table holding the given rows, sharing category dictionaries"""
+        columns = {name: values.take(indices) if isinstance(values, CategoricalColumn) else values[indices]
+                   for name, values in self.columns.items()}
+        nulls = {name: null[indices] for name, null in self.nulls.items()}
+        return ColumnarTable(self.name, columns, nulls)
+
+    def where(self, mask: np.ndarray) -> 'ColumnarTable':
+        """Rows where a boolean mask (e.g. `table.column('vcpu') >= 8`) is true"""
+        return self.take(np.flatnonzero(mask))
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        return [row.to_dict() for row in self]
+
+    @property
+    def nbytes(self) -> int:
+        return (sum(values.nbytes for values in self.columns.values())
+                + sum(null.nbytes for null in self.nulls.values()))
@@ -0,0 +1,211 @@
+"""Process pool for CPU-heavy inventory work, fed from columnar tables published once in shared memory"""
+
+import atexit
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import weakref
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+
+from .columnar_inventory import CategoricalColumn, ColumnarTable
+from .metrics import COMPUTE_TASK_SECONDS, SHARED_INVENTORY_BYTES
+
+# Arrays start on 8-byte boundaries inside a segment
+_ALIGNMENT = 8
+# Segments a worker keeps mapped; older ones are dropped when new snapshots arrive
+_WORKER_ATTACHMENTS = 8
+
+
+class SharedTable:
+    """A ColumnarTable copied once into a shared memory segment
+
+    `descriptor` is all a worker needs to map it again: the segment name plus
+    each array's dtype, shape and offset (and category lists, which are
+    small). The segment is unlinked by `release()`.
+    """
+
+    def __init__(self, table: ColumnarTable):
+        arrays = []
+        for name, values in table.columns.items():
+            if isinstance(values, CategoricalColumn):
+                arrays.append(('category', name, values.codes, values.categories))
+            else:
+                arrays.append(('column', name, values, None))
+        for name, null in table.nulls.items():
+            arrays.append(('null', name, null, None))
+
+        offset, layout = 0, []
+        for kind, name, array, categories in arrays:
+            layout.append((kind, name, array.dtype.str, array.shape, offset, categories))
+            offset += -(-array.nbytes // _ALIGNMENT) * _ALIGNMENT
+        self.nbytes = offset
+        self.segment = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        for (kind, name, dtype, shape, start, _), (_, _, array, _) in zip(layout, arrays):
+            np.ndarray(shape, dtype=dtype, buffer=self.segment.buf, offset=start)[...] = array
+        self.descriptor = {'segment': self.segment.name, 'table': table.name, 'layout': layout}
+        SHARED_INVENTORY_BYTES.observe(self.nbytes, table=table.name or 'unnamed')
+
+    def release(self):
+        # Workers that still have it mapped keep their view; the name goes away now
+        try:
+            self.segment.close()
+            self.segment.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def attach_table(descriptor: Dict[str, Any]) -> Tuple[shared_memory.SharedMemory, ColumnarTable]:
+    """Map a published table without copying; its arrays are read-only views of the segment"""
+    segment = shared_memory.SharedMemory(name=descriptor['segment'])
+    columns, nulls = {}, {}
+    for kind, name, dtype, shape, offset, categories in descriptor['layout']:
+        array = np.ndarray(shape, dtype=dtype, buffer=segment.buf, offset=offset)
+        array.flags.writeable = False
+        if kind == 'category':
+            columns[name] = CategoricalColumn(array, categories)
+        elif kind == 'null':
+            nulls[name] = array
+        else:
+            columns[name] = array
+    return segment, ColumnarTable(descriptor['table'], columns, nulls)
+
+
+# Worker-side: segment name -> (segment, table), oldest first
+_attached: Dict[str, Tuple[shared_memory.SharedMemory, ColumnarTable]] = {}
+
+
+def _worker_table(descriptor: Dict[str, Any]) -> ColumnarTable:
+    entry = _attached.get(descriptor['segment'])
+    if entry is None:
+        entry = _attached[descriptor['segment']] = attach_table(descriptor)
+        while len(_attached) > _WORKER_ATTACHMENTS:
+            segment, _ = _attached.pop(next(iter(_attached)))
+            try:
+                segment.close()
+            except BufferError:
+                # A result still references the arrays; the mapping goes when they do
+                pass
+    return entry[1]
+
+
+def _run_task(function: Callable, descriptors: Dict[str, Dict[str, Any]], args: Tuple) -> Any:
+    tables = {name: _worker_table(descriptor) for name, descriptor in descriptors.items()}
+    return function(tables, *args)
+
+
+class ComputePool:
+    """Worker processes that run functions over shared inventory tables
+
+    Tables are published to shared memory once (per table object, so a
+    snapshot reused across requests is published once) and unlinked when the
+    table is garbage collected. Each task ships only the function, the table
+    descriptors and its own small arguments; workers map the segments
+    zero-copy and keep them mapped for later tasks. Functions must be
+    importable module-level callables taking `(tables, *args)`.
+
+    COMPUTE_POOL_WORKERS sets the number of processes (0 runs everything
+    in-process) and COMPUTE_POOL_MIN_ROWS the table size below which
+    offloading isn't worth the round trip.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, min_rows: Optional[int] = None,
+                 start_method: Optional[str] = None):
+        self.max_workers = (max_workers if max_workers is not None else
+                            int(os.getenv('COMPUTE_POOL_WORKERS', min(4, os.cpu_count() or 1))))
+        self.min_rows = min_rows if min_rows is not None else int(os.getenv('COMPUTE_POOL_MIN_ROWS', 50000))
+        # Forked children would inherit the request threads' locks and the log writer's queue
+        self.start_method = start_method or ('forkserver' if 'forkserver' in multiprocessing.get_all_start_methods()
+                                             else 'spawn')
+        self.logger = logging.getLogger(__name__)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._shared: Dict[int, SharedTable] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_workers > 0
+
+    def offload(self, rows: int) -> bool:
+        """Whether work over `rows` rows should go to the workers"""
+        return self.enabled and rows >= self.min_rows
+
+    def executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(self.max_workers,
+                                                     mp_context=multiprocessing.get_context(self.start_method))
+            return self._executor
+
+    def share(self, table: ColumnarTable) -> Dict[str, Any]:
+        """Descriptor of `table` in shared memory, publishing it on first use"""
+        with self._lock:
+            shared = self._shared.get(id(table))
+            if shared is None:
+                shared = self._shared[id(table)] = SharedTable(table)
+                weakref.finalize(table, self._release, id(table))
+            return shared.descriptor
+
+    def _release(self, key: int):
+        with self._lock:
+            shared = self._shared.pop(key, None)
+        if shared is not None:
+            shared.release()
+
+    def stream(self, function: Callable, tables: Dict[str, ColumnarTable],
+               tasks: Iterable[Tuple]) -> Iterator[Tuple[Tuple, Any]]:
+        """Run `function(tables, *task)` for every task, yielding `(task, result)` as each finishes"""
+        label = getattr(function, '__name__', 'task')
+        if not self.enabled:
+            for task in tasks:
+                yield task, function(tables, *task)
+            return
+
+        descriptors = {name: self.share(table) for name, table in tables.items()}
+        executor = self.executor()
+        submitted = {}
+        for task in tasks:
+            submitted[executor.submit(_run_task, function, descriptors, task)] = (task, time.perf_counter())
+        try:
+            for future in as_completed(submitted):
+                task, started = submitted[future]
+                try:
+                    result = future.result()
+                except Exception:
+                    COMPUTE_TASK_SECONDS.observe(time.perf_counter() - started, function=label, outcome='error')
+                    raise
+                COMPUTE_TASK_SECONDS.observe(time.perf_counter() - started, function=label, outcome='ok')
+                yield task, result
+        finally:
+            # A consumer that stops early (or an error) shouldn't leave queued work behind
+            for future in submitted:
+                future.cancel()
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+            shared, self._shared = list(self._shared.values()), {}
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+        for table in shared:
+            table.release()
+
+
+_pool: Optional[ComputePool] = None
+_pool_lock = threading.Lock()
+
+
+def get_compute_pool() -> ComputePool:
+    """Shared ComputePool; worker processes start on the first offloaded task and serve every request after"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ComputePool()
+                atexit.register(_pool.shutdown)
+    return _pool
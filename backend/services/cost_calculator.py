@@ -1,15 +1,21 @@
 import json
-from .ai_recommendations import AIRecommendationService
+from .ai_registry import get_ai_service
+from .pricing_catalog import EC2_PRICING, RDS_PRICING, S3_PRICING, EBS_PRICING
+from .cost_model import monthly_running_hours
+from .rightsizing import get_rightsizing_optimizer
+from .inventory_snapshot import model_inventory
 
 class CostCalculator:
     """Cost calculation service for cloud migration with AI-powered recommendations"""
     
-    def __init__(self, db, models, bedrock_client=None):
+    def __init__(self, db, models, bedrock_client=None, inventory=None):
         self.db = db
         self.bedrock_client = bedrock_client
+        # Tables read once and shared with the other services of this request
+        self.inventory = inventory or model_inventory(models)
         
-        # Initialize AI recommendation service
-        self.ai_service = AIRecommendationService()
+        # Shared AI recommendation service
+        self.ai_service = get_ai_service()
         
         # Model classes
         self.Server = models['Server']
@@ -20,42 +26,16 @@ class CostCalculator:
         
         # AWS Pricing (simplified - would typically use AWS Pricing API)
         self.aws_pricing = {
-            'ec2': {
-                't3.micro': {'cpu': 2, 'ram': 1, 'cost_per_hour': 0.0104},
-                't3.small': {'cpu': 2, 'ram': 2, 'cost_per_hour': 0.0208},
-                't3.medium': {'cpu': 2, 'ram': 4, 'cost_per_hour': 0.0416},
-                't3.large': {'cpu': 2, 'ram': 8, 'cost_per_hour': 0.0832},
-                't3.xlarge': {'cpu': 4, 'ram': 16, 'cost_per_hour': 0.1664},
-                't3.2xlarge': {'cpu': 8, 'ram': 32, 'cost_per_hour': 0.3328},
-                'm5.large': {'cpu': 2, 'ram': 8, 'cost_per_hour': 0.096},
-                'm5.xlarge': {'cpu': 4, 'ram': 16, 'cost_per_hour': 0.192},
-                'm5.2xlarge': {'cpu': 8, 'ram': 32, 'cost_per_hour': 0.384},
-                'm5.4xlarge': {'cpu': 16, 'ram': 64, 'cost_per_hour': 0.768}
-            },
-            'rds': {
-                'db.t3.micro': 0.017,
-                'db.t3.small': 0.034,
-                'db.t3.medium': 0.068,
-                'db.t3.large': 0.136,
-                'db.t3.xlarge': 0.272,
-                'db.m5.large': 0.180,
-                'db.m5.xlarge': 0.360,
-                'db.m5.2xlarge': 0.720
-            },
-            's3': {
-                'standard': 0.023,  # per GB/month
-                'ia': 0.0125,       # Infrequent Access
-                'glacier': 0.004   # Glacier
-            },
-            'ebs': {
-                'gp3': 0.08,       # per GB/month
-                'io2': 0.125       # per GB/month
-            }
+            'ec2': EC2_PRICING,
+            'rds': RDS_PRICING,
+            's3': S3_PRICING,
+            'ebs': EBS_PRICING
         }
+        self.rightsizing = get_rightsizing_optimizer()
     
     def calculate_server_costs(self):
         """Calculate costs for server migration with AI-powered recommendations"""
-        servers = self.Server.query.all()
+        servers = self.inventory.servers
         total_monthly_cost = 0
         server_recommendations = []
         
@@ -75,13 +55,14 @@ class CostCalculator:
             
             # Get AI-powered recommendation
             ai_recommendation = self.ai_service.get_server_recommendation(server_specs)
-            recommended_instance = ai_recommendation.get('recommended_instance', 't3.medium')
+            recommended_instance = ai_recommendation.get('recommended_instance') or self._recommend_ec2_instance(server.vcpu, server.ram)
             
             # Calculate costs using the recommended instance
             instance_cost = self.aws_pricing['ec2'].get(recommended_instance, {}).get('cost_per_hour', 0.0416)
             
-            # Calculate monthly cost (24/7 * 30 days)
-            monthly_cost = instance_cost * 24 * 30
+            # Calculate monthly cost from the server's uptime profile
+            running_hours = monthly_running_hours(server.uptime_pattern)
+            monthly_cost = instance_cost * running_hours
             
             # Add EBS storage cost
             storage_cost = server.disk_size * self.aws_pricing['ebs']['gp3']
@@ -93,6 +74,8 @@ class CostCalculator:
                 'server_id': server.server_id,
                 'current_specs': f"{server.vcpu} vCPU, {server.ram}GB RAM, {server.disk_size}GB Storage",
                 'recommended_instance': recommended_instance,
+                'uptime_pattern': server.uptime_pattern,
+                'monthly_running_hours': round(running_hours, 1),
                 'monthly_cost': monthly_cost,
                 'annual_cost': monthly_cost * 12,
                 'ai_reasoning': ai_recommendation.get('reasoning', 'Standard sizing recommendation'),
@@ -109,7 +92,7 @@ class CostCalculator:
     
     def calculate_database_costs(self):
         """Calculate costs for database migration with AI-powered recommendations"""
-        databases = self.Database.query.all()
+        databases = self.inventory.databases
         total_monthly_cost = 0
         db_recommendations = []
         
@@ -167,7 +150,7 @@ class CostCalculator:
     
     def calculate_storage_costs(self):
         """Calculate costs for file share migration with AI-powered recommendations"""
-        file_shares = self.FileShare.query.all()
+        file_shares = self.inventory.file_shares
         total_monthly_cost = 0
         storage_recommendations = []
         
@@ -222,7 +205,7 @@ class CostCalculator:
     
     def calculate_migration_service_costs(self):
         """Calculate professional services costs"""
-        resource_rates = self.ResourceRate.query.all()
+        resource_rates = self.inventory.resource_rates
         total_cost = 0
         resource_breakdown = []
         
@@ -277,24 +260,8 @@ class CostCalculator:
         }
     
     def _recommend_ec2_instance(self, vcpu, ram):
-        """Recommend appropriate EC2 instance type"""
-        # Simple logic - would be more sophisticated in production
-        if vcpu <= 2 and ram <= 2:
-            return 't3.small'
-        elif vcpu <= 2 and ram <= 4:
-            return 't3.medium'
-        elif vcpu <= 2 and ram <= 8:
-            return 't3.large'
-        elif vcpu <= 4 and ram <= 16:
-            return 't3.xlarge'
-        elif vcpu <= 8 and ram <= 32:
-            return 't3.2xlarge'
-        elif vcpu <= 4 and ram <= 16:
-            return 'm5.xlarge'
-        elif vcpu <= 8 and ram <= 32:
-            return 'm5.2xlarge'
-        else:
-            return 'm5.4xlarge'
+        """Recommend the cheapest EC2 instance type across families"""
+        return self.rightsizing.recommend_instance(vcpu, ram)
     
     def _recommend_rds_instance(self, size_gb, ha_required):
         """Recommend appropriate RDS instance type"""
@@ -313,9 +280,9 @@ class CostCalculator:
         """Get AI-powered comprehensive migration analysis"""
         try:
             # Gather infrastructure summary
-            servers = self.Server.query.all()
-            databases = self.Database.query.all()
-            file_shares = self.FileShare.query.all()
+            servers = self.inventory.servers
+            databases = self.inventory.databases
+            file_shares = self.inventory.file_shares
             
             infrastructure_summary = {
                 'servers': [
@@ -0,0 +1,198 @@
+import logging
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+
+from .pricing_catalog import HOURS_PER_MONTH, PRICING_MODELS, rule_based_ec2_hourly_rates
+
+HOURS_PER_WEEK = 168
+WEEKS_PER_MONTH = HOURS_PER_MONTH / HOURS_PER_WEEK
+
+
+def _weekly_profile(days, start_hour, end_hour, level=1.0):
+    """168-hour usage vector running `level` between start and end hour on the given weekdays"""
+    profile = np.zeros((7, 24))
+    for day in days:
+        if start_hour <= end_hour:
+            profile[day, start_hour:end_hour] = level
+        else:
+            # Window wraps past midnight into the next day
+            profile[day, start_hour:] = level
+            profile[(day + 1) % 7, :end_hour] = level
+    return profile.reshape(HOURS_PER_WEEK)
+
+
+WEEKDAYS = range(0, 5)
+ALL_DAYS = range(0, 7)
+
+# Hourly usage profiles (Monday 00:00 first). Values are the fraction of the
+# hour the instance is running.
+UPTIME_PROFILES = {
+    '24/7': np.ones(HOURS_PER_WEEK),
+    'business hours': _weekly_profile(WEEKDAYS, 8, 18),
+    'extended hours': _weekly_profile(range(0, 6), 6, 22),
+    'weekdays': _weekly_profile(WEEKDAYS, 0, 24),
+    'batch nightly': _weekly_profile(ALL_DAYS, 22, 4),
+    'variable': np.clip(_weekly_profile(WEEKDAYS, 7, 20) + 0.25, 0, 1)
+}
+
+_UPTIME_ALIASES = {
+    '24x7': '24/7',
+    'always on': '24/7',
+    'continuous': '24/7',
+    'business': 'business hours',
+    'business-hours': 'business hours',
+    'office hours': 'business hours',
+    'extended': 'extended hours',
+    'weekday': 'weekdays',
+    'batch': 'batch nightly',
+    'nightly': 'batch nightly',
+    'batch-nightly': 'batch nightly',
+    'on-demand': 'variable'
+}
+
+# Interruptible patterns that can run on spot capacity
+SPOT_ELIGIBLE_PATTERNS = {'batch nightly'}
+
+# Commitment options: committed options bill every hour of the week,
+# usage options bill only the hours in the profile.
+COMMITMENT_OPTIONS = ['on-demand', '1yr-ri', '3yr-ri', 'spot']
+_COMMITTED = {'1yr-ri', '3yr-ri'}
+
+
+def normalize_uptime_pattern(uptime_pattern: Optional[str]) -> str:
+    """Map an inventory uptime pattern onto a known profile (unknown patterns run 24/7)"""
+    key = str(uptime_pattern or '24/7').strip().lower()
+    key = _UPTIME_ALIASES.get(key, key)
+    return key if key in UPTIME_PROFILES else '24/7'
+
+
+def usage_profile(uptime_pattern: Optional[str]) -> np.ndarray:
+    """168-hour usage profile for an uptime pattern"""
+    return UPTIME_PROFILES[normalize_uptime_pattern(uptime_pattern)]
+
+
+def monthly_running_hours(uptime_pattern: Optional[str]) -> float:
+    """Average running hours per month for an uptime pattern"""
+    return float(usage_profile(uptime_pattern).sum() * WEEKS_PER_MONTH)
+
+
+class UptimeCostModel:
+    """Price servers from their hourly usage profiles and pick the cheapest commitment mix"""
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self.pattern_names = list(UPTIME_PROFILES)
+        self._pattern_index = {name: i for i, name in enumerate(self.pattern_names)}
+
+        # Pattern x hour usage matrix and option x hour billing-rate matrix
+        profiles = np.vstack([UPTIME_PROFILES[name] for name in self.pattern_names])
+        rate_factors = np.vstack([
+            np.full(HOURS_PER_WEEK, PRICING_MODELS[option]['compute_factor'])
+            for option in COMMITMENT_OPTIONS
+        ])
+        committed = np.array([option in _COMMITTED for option in COMMITMENT_OPTIONS])
+
+        # Rate-hours billed per week for each (pattern, option); committed
+        # options bill the full week regardless of the profile
+        billed = np.where(committed[None, :], np.ones_like(profiles) @ rate_factors.T, profiles @ rate_factors.T)
+
+        # Spot is only offered to interruptible patterns
+        available = np.ones(billed.shape, dtype=bool)
+        spot_column = COMMITMENT_OPTIONS.index('spot')
+        for name in self.pattern_names:
+            if name not in SPOT_ELIGIBLE_PATTERNS:
+                available[self._pattern_index[name], spot_column] = False
+
+        self.pattern_running_hours = profiles.sum(axis=1) * WEEKS_PER_MONTH
+        self.pattern_billed_hours = billed * WEEKS_PER_MONTH
+        self.pattern_option_available = available
+
+    def pattern_indices(self, uptime_patterns: List[Optional[str]]) -> np.ndarray:
+        """Encode uptime pattern strings as profile indices (normalizing each distinct value once)"""
+        raw = np.asarray([p or '' for p in uptime_patterns], dtype=object)
+        if raw.size == 0:
+            return np.zeros(0, dtype=np.intp)
+        distinct, inverse = np.unique(raw.astype(str), return_inverse=True)
+        codes = np.array([self._pattern_index[normalize_uptime_pattern(p)] for p in distinct], dtype=np.intp)
+        return codes[inverse]
+
+    def price_fleet(self, hourly_rates, uptime_patterns: List[Optional[str]]) -> Dict[str, np.ndarray]:
+        """Monthly cost per server for every commitment option (servers x options)"""
+        rates = np.asarray(hourly_rates, dtype=float).reshape(-1)
+        indices = self.pattern_indices(uptime_patterns)
+        costs = np.where(
+            self.pattern_option_available[indices],
+            rates[:, None] * self.pattern_billed_hours[indices],
+            np.inf
+        )
+        return {
+            'pattern_indices': indices,
+            'running_hours': self.pattern_running_hours[indices],
+            'option_costs': costs
+        }
+
+    def analyze_servers(self, servers: List[Dict[str, Any]], include_details: bool = True) -> Dict[str, Any]:
+        """Uptime-aware monthly cost and cheapest commitment recommendation for a server fleet"""
+        rates = self._hourly_rates(servers)
+        priced = self.price_fleet(rates, [s.get('uptime_pattern') for s in servers])
+        costs = priced['option_costs']
+
+        on_demand_column = COMMITMENT_OPTIONS.index('on-demand')
+        on_demand = costs[:, on_demand_column]
+        best_option = np.argmin(costs, axis=1)
+        best_cost = costs[np.arange(len(servers)), best_option]
+
+        on_demand_total = float(on_demand.sum())
+        optimized_total = float(best_cost.sum())
+        mix = {}
+        for column, option in enumerate(COMMITMENT_OPTIONS):
+            selected = best_option == column
+            mix[option] = {
+                'servers': int(selected.sum()),
+                'monthly_cost': round(float(best_cost[selected].sum()), 2)
+            }
+
+        result = {
+            'fleet_summary': {
+                'server_count': len(servers),
+                'total_running_hours_per_month': round(float(priced['running_hours'].sum()), 1),
+                'on_demand_monthly_cost': round(on_demand_total, 2),
+                'optimized_monthly_cost': round(optimized_total, 2),
+                'monthly_savings': round(on_demand_total - optimized_total, 2),
+                'savings_percent': round((1 - optimized_total / on_demand_total) * 100, 1) if on_demand_total else 0.0,
+                'commitment_mix': mix
+            }
+        }
+
+        if include_details:
+            result['servers'] = [
+                {
+                    'server_id': server.get('server_id'),
+                    'uptime_pattern': server.get('uptime_pattern'),
+                    'usage_profile': self.pattern_names[priced['pattern_indices'][i]],
+                    'monthly_running_hours': round(float(priced['running_hours'][i]), 1),
+                    'hourly_rate': float(rates[i]),
+                    'monthly_cost_by_option': {
+                        option: round(float(costs[i, column]), 2)
+                        for column, option in enumerate(COMMITMENT_OPTIONS)
+                        if np.isfinite(costs[i, column])
+                    },
+                    'recommended_commitment': COMMITMENT_OPTIONS[best_option[i]],
+                    'recommended_monthly_cost': round(float(best_cost[i]), 2)
+                }
+                for i, server in enumerate(servers)
+            ]
+
+        return result
+
+    @staticmethod
+    def _hourly_rates(servers: List[Dict[str, Any]]) -> np.ndarray:
+        """Explicit hourly rates where supplied, rule-engine sizing otherwise"""
+        vcpu = np.array([s.get('vcpu') or 0 for s in servers], dtype=float)
+        ram = np.array([s.get('ram') or 0 for s in servers], dtype=float)
+        rates = rule_based_ec2_hourly_rates(vcpu, ram)
+        for i, server in enumerate(servers):
+            if server.get('hourly_rate') is not None:
+                rates[i] = float(server['hourly_rate'])
+        return rates
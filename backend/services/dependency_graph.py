@@ -0,0 +1,319 @@
+import logging
+from collections import defaultdict
+from typing import Dict, List, Any, Optional, Tuple
+
+# Largest move group the planner builds unless told otherwise
+DEFAULT_MAX_GROUP_SIZE = 25
+
+
+def _field(item, name, default=None):
+    """Read a field from an inventory dict or model instance"""
+    value = item.get(name) if isinstance(item, dict) else getattr(item, name, None)
+    return default if value is None else value
+
+
+class UnionFind:
+    """Disjoint sets over integer node ids with path halving and union by size"""
+
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+        self.size = [1] * size
+
+    def find(self, node: int) -> int:
+        parent = self.parent
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    def union(self, a: int, b: int):
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size[b]
+
+
+def strongly_connected_components(node_count: int, adjacency: List[List[int]]) -> List[int]:
+    """Iterative Tarjan: SCC id per node, numbered in reverse topological order"""
+    index = [-1] * node_count
+    lowlink = [0] * node_count
+    on_stack = [False] * node_count
+    component = [-1] * node_count
+    stack = []
+    counter = 0
+    components = 0
+
+    for root in range(node_count):
+        if index[root] != -1:
+            continue
+        work = [(root, 0)]
+        index[root] = lowlink[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        while work:
+            node, edge = work[-1]
+            neighbours = adjacency[node]
+            if edge < len(neighbours):
+                work[-1] = (node, edge + 1)
+                nxt = neighbours[edge]
+                if index[nxt] == -1:
+                    index[nxt] = lowlink[nxt] = counter
+                    counter += 1
+                    stack.append(nxt)
+                    on_stack[nxt] = True
+                    work.append((nxt, 0))
+                elif on_stack[nxt] and index[nxt] < lowlink[node]:
+                    lowlink[node] = index[nxt]
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                if lowlink[node] < lowlink[parent]:
+                    lowlink[parent] = lowlink[node]
+            if lowlink[node] == index[node]:
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = False
+                    component[member] = components
+                    if member == node:
+                        break
+                components += 1
+    return component
+
+
+class AmbiguousReference(ValueError):
+    """A dependency names a database or share that several inventory rows share"""
+
+    def __init__(self, reference: str, matches: List[str]):
+        super().__init__(f"'{reference}' matches {len(matches)} components: {', '.join(matches)}")
+        self.reference = reference
+        self.matches = matches
+
+
+class DependencyGraph:
+    """Dependency graph over servers, databases and file shares, clustered into move groups"""
+
+    def __init__(self, servers: List[Any], databases: List[Any], file_shares: List[Any],
+                 dependencies: Optional[List[Dict[str, str]]] = None):
+        self.logger = logging.getLogger(__name__)
+        # (type, display name) per node; node keys are 'server:<server_id>' and
+        # 'database:<row id>' / 'file_share:<row id>', since names need not be unique
+        self.nodes: List[Tuple[str, str]] = []
+        self.node_keys: List[str] = []
+        self._node_ids: Dict[str, int] = {}
+        self._aliases: Dict[str, List[int]] = defaultdict(list)
+        self.host_of: Dict[int, Optional[str]] = {}
+
+        for node_type, items, key in (('server', servers, 'server_id'),
+                                      ('database', databases, 'db_name'),
+                                      ('file_share', file_shares, 'share_name')):
+            for position, item in enumerate(items):
+                name = str(_field(item, key))
+                if node_type == 'server':
+                    node = self._add_node(node_type, name, name)
+                else:
+                    # Rows without an id (plain dicts) are told apart by position
+                    node = self._add_node(node_type, str(_field(item, 'id', f'#{position}')), name)
+                    self.host_of[node] = _field(item, 'server_id')
+
+        # A database or share is anchored to the server hosting it and always
+        # moves with it; dependencies are tracked between anchors
+        self.anchor = list(range(len(self.nodes)))
+        self.hosting_links = 0
+        for node, host in self.host_of.items():
+            host_node = self._node_ids.get(f'server:{host}') if host else None
+            if host_node is not None:
+                self.anchor[node] = host_node
+                self.hosting_links += 1
+
+        # Directed edges point from a component to what it depends on
+        self.adjacency: List[List[int]] = [[] for _ in self.nodes]
+        self.unresolved_dependencies: List[Dict[str, str]] = []
+        self.ambiguous_dependencies: List[Dict[str, Any]] = []
+        self.edge_count = 0
+        for dependency in dependencies or []:
+            try:
+                source = self.resolve(dependency.get('source'))
+                target = self.resolve(dependency.get('target'))
+            except AmbiguousReference as e:
+                self.ambiguous_dependencies.append({**dependency, 'ambiguous': e.reference, 'matches': e.matches})
+                continue
+            if source is None or target is None:
+                self.unresolved_dependencies.append(dependency)
+                continue
+            self._add_edge(self.anchor[source], self.anchor[target])
+
+    def resolve(self, reference: Optional[str]) -> Optional[int]:
+        """Node id for a node key, a 'type:name' alias or a bare name (a server's id wins)
+
+        Raises AmbiguousReference when a name is shared by several databases
+        or shares; refer to those by 'database:<id>' / 'file_share:<id>'.
+        """
+        if reference is None:
+            return None
+        reference = str(reference)
+        if reference in self._node_ids:
+            return self._node_ids[reference]
+        matches = self._aliases.get(reference)
+        if not matches:
+            return None
+        if len(matches) == 1 or self.nodes[matches[0]][0] == 'server':
+            return matches[0]
+        raise AmbiguousReference(reference, [self.node_keys[node] for node in matches])
+
+    def move_groups(self, max_group_size: int = DEFAULT_MAX_GROUP_SIZE) -> Dict[str, Any]:
+        """Cluster components into bounded move groups, ordered into waves dependencies-first"""
+        if max_group_size < 1:
+            raise ValueError("max_group_size must be at least 1")
+        node_count = len(self.nodes)
+
+        union_find = UnionFind(node_count)
+        for node, neighbours in enumerate(self.adjacency):
+            union_find.union(node, self.anchor[node])
+            for nxt in neighbours:
+                union_find.union(node, nxt)
+        scc = strongly_connected_components(node_count, self.adjacency)
+        scc_count = max(scc) + 1 if node_count else 0
+
+        # Members per SCC (hosted items join their anchor's SCC); Tarjan
+        # numbers SCCs dependencies-first, which is the order they move in
+        scc_members = [[] for _ in range(scc_count)]
+        scc_anchors = [0] * scc_count
+        for node in range(node_count):
+            scc_members[scc[self.anchor[node]]].append(node)
+            if self.anchor[node] == node:
+                scc_anchors[scc[node]] += 1
+        component_sccs = defaultdict(list)
+        for scc_id in range(scc_count):
+            if scc_members[scc_id]:
+                component_sccs[union_find.find(scc_members[scc_id][0])].append(scc_id)
+
+        # Split oversized connected components along the SCC order; cycles stay
+        # together even when they exceed the bound. Each piece of a split
+        # component becomes its own group so group dependencies stay acyclic.
+        group_of = [-1] * node_count
+        groups: List[List[int]] = []
+        whole_components = []
+        for sccs in component_sccs.values():
+            members = [node for scc_id in sccs for node in scc_members[scc_id]]
+            if len(members) <= max_group_size:
+                whole_components.append(members)
+                continue
+            current = []
+            for scc_id in sccs:
+                if current and len(current) + len(scc_members[scc_id]) > max_group_size:
+                    groups.append(current)
+                    current = []
+                current.extend(scc_members[scc_id])
+            groups.append(current)
+
+        # Pack small independent components together, best-fit decreasing;
+        # open groups are bucketed by free room so each placement is O(bound)
+        open_by_room = defaultdict(list)
+        for members in sorted(whole_components, key=len, reverse=True):
+            room = next((r for r in range(len(members), max_group_size + 1) if open_by_room[r]), None)
+            if room is None:
+                slot, room = len(groups), max_group_size
+                groups.append([])
+            else:
+                slot = open_by_room[room].pop()
+            groups[slot].extend(members)
+            if room - len(members) > 0:
+                open_by_room[room - len(members)].append(slot)
+        for g, members in enumerate(groups):
+            for node in members:
+                group_of[node] = g
+
+        waves = self._group_waves(groups, group_of)
+        order = sorted(range(len(groups)), key=lambda g: (waves[g], g))
+        renumber = {g: i for i, g in enumerate(order)}
+
+        move_groups = []
+        for g in order:
+            depends_on = sorted({renumber[group_of[nxt]] + 1 for node in groups[g]
+                                 for nxt in self.adjacency[node] if group_of[nxt] != g})
+            move_groups.append({
+                'group_id': renumber[g] + 1,
+                'wave': waves[g] + 1,
+                'size': len(groups[g]),
+                'oversized': len(groups[g]) > max_group_size,
+                'depends_on_groups': depends_on,
+                'servers': [self.nodes[n][1] for n in groups[g] if self.nodes[n][0] == 'server'],
+                'databases': [self.nodes[n][1] for n in groups[g] if self.nodes[n][0] == 'database'],
+                'file_shares': [self.nodes[n][1] for n in groups[g] if self.nodes[n][0] == 'file_share']
+            })
+
+        wave_plan = []
+        for group in move_groups:
+            if not wave_plan or wave_plan[-1]['wave'] != group['wave']:
+                wave_plan.append({'wave': group['wave'], 'groups': [], 'servers': 0, 'databases': 0, 'file_shares': 0})
+            wave_plan[-1]['groups'].append(group['group_id'])
+            for key in ('servers', 'databases', 'file_shares'):
+                wave_plan[-1][key] += len(group[key])
+
+        cyclic = [len(scc_members[i]) for i in range(scc_count) if scc_anchors[i] > 1]
+        return {
+            'summary': {
+                'nodes': node_count,
+                'hosting_links': self.hosting_links,
+                'declared_dependencies': self.edge_count,
+                'connected_components': len(component_sccs),
+                'dependency_cycles': len(cyclic),
+                'largest_cycle': max(cyclic, default=0),
+                'move_groups': len(groups),
+                'waves': max(waves, default=-1) + 1,
+                'max_group_size': max_group_size,
+                'unresolved_dependencies': self.unresolved_dependencies,
+                'ambiguous_dependencies': self.ambiguous_dependencies
+            },
+            'waves': wave_plan,
+            'groups': move_groups
+        }
+
+    def _group_waves(self, groups: List[List[int]], group_of: List[int]) -> List[int]:
+        """Longest-path level of each group in the group dependency DAG (Kahn's algorithm)"""
+        depends = [set() for _ in groups]
+        for g, members in enumerate(groups):
+            for node in members:
+                for nxt in self.adjacency[node]:
+                    if group_of[nxt] != g:
+                        depends[g].add(group_of[nxt])
+
+        dependents = [[] for _ in groups]
+        remaining = [len(d) for d in depends]
+        for g, targets in enumerate(depends):
+            for target in targets:
+                dependents[target].append(g)
+
+        waves = [0] * len(groups)
+        ready = [g for g in range(len(groups)) if remaining[g] == 0]
+        while ready:
+            g = ready.pop()
+            for dependent in dependents[g]:
+                waves[dependent] = max(waves[dependent], waves[g] + 1)
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    ready.append(dependent)
+        return waves
+
+    def _add_node(self, node_type: str, identity: str, name: str) -> int:
+        key = f'{node_type}:{identity}'
+        if key in self._node_ids:
+            return self._node_ids[key]
+        node = len(self.nodes)
+        self.nodes.append((node_type, name))
+        self.node_keys.append(key)
+        self._node_ids[key] = node
+        if node_type != 'server':
+            self._aliases[f'{node_type}:{name}'].append(node)
+        self._aliases[name].append(node)
+        return node
+
+    def _add_edge(self, source: int, target: int):
+        if source != target:
+            self.adjacency[source].append(target)
+            self.edge_count += 1
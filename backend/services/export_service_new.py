@@ -9,13 +9,18 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib import colors
 from docx import Document
 from docx.shared import Inches
+from .inventory_snapshot import model_inventory
 
 class ExportService:
     """Export migration plans to various formats"""
     
-    def __init__(self, db, models=None):
+    def __init__(self, db, models=None, inventory=None):
         self.db = db
         self.models = models or {}
+        # Every section reads the same snapshot: one scan per table for the whole export
+        self.inventory = inventory or model_inventory(self.models)
+        # One instance serves one export request, so the inventory summary is computed once
+        self._summary_data = None
         self.output_dir = os.path.join(os.path.dirname(__file__), '..', 'exports')
         os.makedirs(self.output_dir, exist_ok=True)
     
@@ -110,7 +115,7 @@ class ExportService:
             story.append(Paragraph("SERVER INVENTORY", styles['Heading2']))
             Server = self.models.get('Server')
             if Server:
-                servers = Server.query.limit(20).all()
+                servers = self.inventory.servers[:20]
                 if servers:
                     server_data = [['Server ID', 'OS Type', 'vCPU', 'RAM (GB)', 'Disk (GB)', 'Hosting', 'Technology']]
                     for server in servers:
@@ -141,7 +146,7 @@ class ExportService:
             story.append(Paragraph("DATABASE INVENTORY", styles['Heading2']))
             Database = self.models.get('Database')
             if Database:
-                databases = Database.query.limit(15).all()
+                databases = self.inventory.databases[:15]
                 if databases:
                     db_data = [['Database Name', 'Type', 'Size (GB)', 'HA/DR', 'Performance Tier', 'Backup Freq']]
                     for db in databases:
@@ -426,7 +431,7 @@ class ExportService:
         # Get servers for analysis
         Server = self.models.get('Server')
         if Server:
-            servers = Server.query.all()
+            servers = self.inventory.servers
             
             # OS distribution
             os_counts = {}
@@ -461,7 +466,7 @@ class ExportService:
         # Database analysis
         Database = self.models.get('Database')
         if Database:
-            databases = Database.query.all()
+            databases = self.inventory.databases
             
             doc.add_heading('Database Environment', level=2)
             db_para = doc.add_paragraph()
@@ -477,7 +482,7 @@ class ExportService:
         doc.add_heading('Server Inventory', level=2)
         Server = self.models.get('Server')
         if Server:
-            servers = Server.query.limit(20).all()  # Limit for document readability
+            servers = self.inventory.servers[:20]  # Limit for document readability
             
             if servers:
                 server_table = doc.add_table(rows=len(servers) + 1, cols=6)
@@ -497,14 +502,15 @@ class ExportService:
                     server_table.rows[i].cells[4].text = str(getattr(server, 'disk_size', 0))
                     server_table.rows[i].cells[5].text = getattr(server, 'environment', 'Production')
                 
-                if len(Server.query.all()) > 20:
-                    doc.add_paragraph(f"Note: Showing first 20 servers. Total servers: {Server.query.count()}")
+                servers_count = self._get_summary_data()['servers_count']
+                if servers_count > 20:
+                    doc.add_paragraph(f"Note: Showing first 20 servers. Total servers: {servers_count}")
         
         # Database inventory
         doc.add_heading('Database Inventory', level=2)
         Database = self.models.get('Database')
         if Database:
-            databases = Database.query.limit(15).all()
+            databases = self.inventory.databases[:15]
             
             if databases:
                 db_table = doc.add_table(rows=len(databases) + 1, cols=5)
@@ -523,8 +529,9 @@ class ExportService:
                     db_table.rows[i].cells[3].text = str(getattr(db, 'size_gb', 0))
                     db_table.rows[i].cells[4].text = getattr(db, 'environment', 'Production')
                 
-                if len(Database.query.all()) > 15:
-                    doc.add_paragraph(f"Note: Showing first 15 databases. Total databases: {Database.query.count()}")
+                databases_count = self._get_summary_data()['databases_count']
+                if databases_count > 15:
+                    doc.add_paragraph(f"Note: Showing first 15 databases. Total databases: {databases_count}")
     
     def _add_cost_analysis_word(self, doc):
         """Add comprehensive cost analysis to Word document"""
@@ -745,7 +752,7 @@ class ExportService:
         # Get server data
         Server = self.models.get('Server')
         if Server:
-            servers = Server.query.all()
+            servers = self.inventory.servers
             for i, server in enumerate(servers, 2):
                 ws.cell(row=i, column=1, value=server.name)
                 ws.cell(row=i, column=2, value=server.environment)
@@ -765,7 +772,7 @@ class ExportService:
         
         Database = self.models.get('Database')
         if Database:
-            databases = Database.query.all()
+            databases = self.inventory.databases
             for i, db in enumerate(databases, 2):
                 ws.cell(row=i, column=1, value=db.name)
                 ws.cell(row=i, column=2, value=db.database_type)
@@ -784,7 +791,7 @@ class ExportService:
         
         FileShare = self.models.get('FileShare')
         if FileShare:
-            file_shares = FileShare.query.all()
+            file_shares = self.inventory.file_shares
             for i, fs in enumerate(file_shares, 2):
                 ws.cell(row=i, column=1, value=fs.name)
                 ws.cell(row=i, column=2, value=fs.share_path)
@@ -847,53 +854,19 @@ class ExportService:
     
     def _get_summary_data(self):
         """Get comprehensive summary data for reports"""
-        Server = self.models.get('Server')
-        Database = self.models.get('Database')
-        FileShare = self.models.get('FileShare')
-        
-        servers_count = Server.query.count() if Server else 0
-        databases_count = Database.query.count() if Database else 0
-        file_shares_count = FileShare.query.count() if FileShare else 0
-        
-        # Calculate totals from servers
-        total_vcpu = 0
-        total_ram_gb = 0
-        total_disk_gb = 0
-        
-        if Server:
-            try:
-                total_vcpu = self.db.session.query(self.db.func.sum(Server.vcpu)).scalar() or 0
-                total_ram_gb = self.db.session.query(self.db.func.sum(Server.ram)).scalar() or 0
-                total_disk_gb = self.db.session.query(self.db.func.sum(Server.disk_size)).scalar() or 0
-            except:
-                servers = Server.query.all()
-                for server in servers:
-                    total_vcpu += getattr(server, 'vcpu', 0) or 0
-                    total_ram_gb += getattr(server, 'ram', 0) or 0
-                    total_disk_gb += getattr(server, 'disk_size', 0) or 0
-        
-        # Calculate database sizes
-        total_db_size = 0
-        if Database:
-            try:
-                total_db_size = self.db.session.query(self.db.func.sum(Database.size_gb)).scalar() or 0
-            except:
-                databases = Database.query.all()
-                for db in databases:
-                    total_db_size += getattr(db, 'size_gb', 0) or 0
-                
-        # Calculate file share sizes
-        total_fs_size = 0
-        if FileShare:
-            try:
-                total_fs_size = self.db.session.query(self.db.func.sum(FileShare.total_size_gb)).scalar() or 0
-            except:
-                file_shares = FileShare.query.all()
-                for fs in file_shares:
-                    total_fs_size += getattr(fs, 'total_size_gb', 0) or 0
+        if self._summary_data is None:
+            self._summary_data = self._compute_summary_data()
+        return self._summary_data
+
+    def _compute_summary_data(self):
+        inventory_summary = self.inventory.summary()
+        servers_count = inventory_summary['servers_count']
+        databases_count = inventory_summary['databases_count']
+        file_shares_count = inventory_summary['file_shares_count']
+        total_db_size = inventory_summary['total_db_size']
+        total_fs_size = inventory_summary['total_fs_size']
         
         # Calculate complexity metrics
-        total_components = servers_count + databases_count + file_shares_count
         complexity_score = min(10, max(1, (servers_count + databases_count * 1.5 + file_shares_count * 0.5) / 5))
         complexity_level = "Low" if complexity_score < 3 else "Medium" if complexity_score < 7 else "High"
         
@@ -904,24 +877,16 @@ class ExportService:
         # Estimate timeline
         estimated_weeks = max(8, 4 + (servers_count * 1.5) + (databases_count * 2) + (file_shares_count * 0.5))
         
-        return {
-            'servers_count': servers_count,
-            'databases_count': databases_count,
-            'file_shares_count': file_shares_count,
-            'total_vcpu': total_vcpu,
-            'total_ram_gb': total_ram_gb,
-            'total_disk_gb': total_disk_gb,
-            'total_db_size': total_db_size,
-            'total_fs_size': total_fs_size,
-            'total_data_gb': total_disk_gb + total_db_size + total_fs_size,
-            'total_components': total_components,
-            'complexity_score': complexity_score,
-            'complexity_level': complexity_level,
-            'estimated_weeks': int(estimated_weeks),
-            'monthly_cost': monthly_cost,
-            'annual_cost': annual_cost,
-            'primary_strategy': 'Rehost (Lift & Shift)'
-        }
+        # Counts and size totals come straight from the snapshot
+        return dict(
+            inventory_summary,
+            complexity_score=complexity_score,
+            complexity_level=complexity_level,
+            estimated_weeks=int(estimated_weeks),
+            monthly_cost=monthly_cost,
+            annual_cost=annual_cost,
+            primary_strategy='Rehost (Lift & Shift)'
+        )
     
     def _get_cost_summary(self):
         """Get cost summary data"""
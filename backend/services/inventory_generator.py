@@ -0,0 +1,220 @@
+"""Seeded synthetic inventory (servers, databases, file shares) for benchmarking at scale"""
+
+import csv
+import os
+import sqlite3
+import time
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+# Column order of the generated rows; matches the servers / databases / file_shares tables
+COLUMNS = {
+    'servers': ('server_id', 'os_type', 'vcpu', 'ram', 'disk_size', 'disk_type', 'uptime_pattern',
+                'current_hosting', 'technology', 'technology_version', 'created_at', 'updated_at'),
+    'databases': ('db_name', 'db_type', 'size_gb', 'ha_dr_required', 'backup_frequency', 'licensing_model',
+                  'server_id', 'write_frequency', 'downtime_tolerance', 'real_time_sync', 'created_at', 'updated_at'),
+    'file_shares': ('share_name', 'total_size_gb', 'access_pattern', 'snapshot_required', 'retention_days',
+                    'server_id', 'write_frequency', 'downtime_tolerance', 'real_time_sync', 'created_at', 'updated_at'),
+}
+
+SCHEMA = {
+    'servers': '''
+        CREATE TABLE IF NOT EXISTS servers (
+            id INTEGER NOT NULL PRIMARY KEY,
+            server_id VARCHAR(100) NOT NULL UNIQUE,
+            os_type VARCHAR(50) NOT NULL,
+            vcpu INTEGER NOT NULL,
+            ram INTEGER NOT NULL,
+            disk_size INTEGER NOT NULL,
+            disk_type VARCHAR(20) NOT NULL,
+            uptime_pattern VARCHAR(50) NOT NULL,
+            current_hosting VARCHAR(100) NOT NULL,
+            technology VARCHAR(500),
+            technology_version VARCHAR(100),
+            created_at DATETIME,
+            updated_at DATETIME
+        )''',
+    'databases': '''
+        CREATE TABLE IF NOT EXISTS databases (
+            id INTEGER NOT NULL PRIMARY KEY,
+            db_name VARCHAR(100) NOT NULL,
+            db_type VARCHAR(50) NOT NULL,
+            size_gb INTEGER NOT NULL,
+            ha_dr_required BOOLEAN,
+            backup_frequency VARCHAR(50) NOT NULL,
+            licensing_model VARCHAR(50) NOT NULL,
+            server_id VARCHAR(100) REFERENCES servers (server_id),
+            write_frequency VARCHAR(20) NOT NULL,
+            downtime_tolerance VARCHAR(50) NOT NULL,
+            real_time_sync BOOLEAN,
+            created_at DATETIME,
+            updated_at DATETIME
+        )''',
+    'file_shares': '''
+        CREATE TABLE IF NOT EXISTS file_shares (
+            id INTEGER NOT NULL PRIMARY KEY,
+            share_name VARCHAR(100) NOT NULL,
+            total_size_gb INTEGER NOT NULL,
+            access_pattern VARCHAR(20) NOT NULL,
+            snapshot_required BOOLEAN,
+            retention_days INTEGER NOT NULL,
+            server_id VARCHAR(100) REFERENCES servers (server_id),
+            write_frequency VARCHAR(20) NOT NULL,
+            downtime_tolerance VARCHAR(50) NOT NULL,
+            real_time_sync BOOLEAN,
+            created_at DATETIME,
+            updated_at DATETIME
+        )''',
+}
+
+# (value, weight) tables; values are the ones the inventory forms offer
+WINDOWS_OS = (('Windows Server 2019', 0.5), ('Windows Server 2016', 0.35), ('Windows Server 2012 R2', 0.15))
+LINUX_OS = (('Ubuntu 20.04', 0.3), ('Ubuntu 18.04', 0.15), ('RHEL 8', 0.2), ('RHEL 7', 0.15),
+            ('CentOS 7', 0.12), ('CentOS 8', 0.08))
+WINDOWS_SHARE = 0.4
+WINDOWS_TECH = (('IIS', 0.3), ('.NET', 0.3), ('SQL Server', 0.2), ('SharePoint', 0.1), ('Exchange', 0.1))
+LINUX_TECH = (('Java', 0.25), ('Node.js', 0.15), ('Python', 0.15), ('Nginx', 0.12), ('Apache', 0.1),
+              ('PHP', 0.08), ('Oracle', 0.08), ('PostgreSQL', 0.07))
+TECH_VERSIONS = {
+    'IIS': '10.0', '.NET': '4.8', 'SQL Server': '2019', 'SharePoint': '2016', 'Exchange': '2016',
+    'Java': '11', 'Node.js': '18', 'Python': '3.9', 'Nginx': '1.20', 'Apache': '2.4', 'PHP': '7.4',
+    'Oracle': '19c', 'PostgreSQL': '13',
+}
+VCPU = ((2, 0.25), (4, 0.35), (8, 0.22), (16, 0.12), (32, 0.05), (64, 0.01))
+RAM_PER_VCPU = ((2, 0.3), (4, 0.45), (8, 0.25))
+DISK_TYPE = (('SSD', 0.6), ('HDD', 0.3), ('NVMe', 0.1))
+UPTIME = (('24x7', 0.6), ('Business Hours', 0.3), ('Variable', 0.1))
+HOSTING = (('On-Premise', 0.65), ('Colocation', 0.2), ('Hybrid Cloud', 0.1), ('Public Cloud', 0.05))
+
+DB_TYPE = (('MySQL', 0.25), ('PostgreSQL', 0.22), ('SQL Server', 0.25), ('Oracle', 0.13), ('MongoDB', 0.1),
+           ('Redis', 0.05))
+OPEN_SOURCE_DBS = ('MySQL', 'PostgreSQL', 'MongoDB', 'Redis')
+COMMERCIAL_LICENSES = (('Commercial', 0.4), ('Enterprise', 0.35), ('Per Core', 0.25))
+BACKUP = (('Hourly', 0.15), ('Daily', 0.6), ('Weekly', 0.2), ('Monthly', 0.05))
+LEVEL = (('High', 0.25), ('Medium', 0.45), ('Low', 0.3))
+RETENTION_DAYS = ((7, 0.15), (30, 0.35), (90, 0.25), (180, 0.15), (365, 0.1))
+
+# Log-normal size distributions: (median GB, sigma, floor GB)
+DISK_SIZE = (300, 0.8, 50)
+DB_SIZE = (120, 1.2, 1)
+SHARE_SIZE = (600, 1.3, 10)
+
+GENERATED_AT = '2025-01-01 00:00:00'
+
+
+def _choice(rng: np.random.Generator, table: Sequence[Tuple[Any, float]], size: int) -> np.ndarray:
+    values = np.array([value for value, _ in table])
+    weights = np.array([weight for _, weight in table], dtype=float)
+    return values[rng.choice(len(values), size=size, p=weights / weights.sum())]
+
+
+def _lognormal_gb(rng: np.random.Generator, spec: Tuple[float, float, float], size: int, step: int = 1) -> np.ndarray:
+    median, sigma, floor = spec
+    sizes = np.maximum(rng.lognormal(np.log(median), sigma, size), floor)
+    return (np.ceil(sizes / step) * step).astype(np.int64)
+
+
+def _ids(prefix: str, count: int) -> List[str]:
+    width = max(6, len(str(count)))
+    return [f'{prefix}-{i:0{width}d}' for i in range(1, count + 1)]
+
+
+def _rows(*columns) -> List[Tuple]:
+    return list(zip(*[column.tolist() if isinstance(column, np.ndarray) else column for column in columns]))
+
+
+def generate_inventory(n_servers: int, seed: int = 42, databases_per_server: float = 0.4,
+                       shares_per_server: float = 0.25) -> Dict[str, List[Tuple]]:
+    """Deterministic inventory of `n_servers` servers plus linked databases and file shares
+
+    Rows are tuples in COLUMNS order. Each table draws from its own child
+    seed, so changing one ratio leaves the other tables unchanged.
+    """
+    server_rng, db_rng, share_rng = (np.random.default_rng(s) for s in np.random.SeedSequence(seed).spawn(3))
+    n_databases = int(round(n_servers * databases_per_server))
+    n_shares = int(round(n_servers * shares_per_server))
+    stamps = [GENERATED_AT] * max(n_servers, n_databases, n_shares)
+
+    # Servers: OS family drives both the OS version and the technology stack
+    server_ids = _ids('SRV', n_servers)
+    windows = server_rng.random(n_servers) < WINDOWS_SHARE
+    os_type = np.where(windows, _choice(server_rng, WINDOWS_OS, n_servers), _choice(server_rng, LINUX_OS, n_servers))
+    technology = np.where(windows, _choice(server_rng, WINDOWS_TECH, n_servers),
+                          _choice(server_rng, LINUX_TECH, n_servers))
+    vcpu = _choice(server_rng, VCPU, n_servers)
+    ram = vcpu * _choice(server_rng, RAM_PER_VCPU, n_servers)
+    servers = _rows(server_ids, os_type, vcpu, ram, _lognormal_gb(server_rng, DISK_SIZE, n_servers, step=50),
+                    _choice(server_rng, DISK_TYPE, n_servers), _choice(server_rng, UPTIME, n_servers),
+                    _choice(server_rng, HOSTING, n_servers), technology,
+                    [TECH_VERSIONS[t] for t in technology.tolist()], stamps[:n_servers], stamps[:n_servers])
+
+    # Databases: licensing follows the engine, hosts are drawn from the generated servers
+    db_type = _choice(db_rng, DB_TYPE, n_databases)
+    licensing = np.where(np.isin(db_type, OPEN_SOURCE_DBS), 'Open Source',
+                         _choice(db_rng, COMMERCIAL_LICENSES, n_databases))
+    db_hosts = np.array(server_ids, dtype=object)[db_rng.integers(0, n_servers, n_databases)] \
+        if n_servers else np.full(n_databases, None, dtype=object)
+    databases = _rows(_ids('DB', n_databases), db_type, _lognormal_gb(db_rng, DB_SIZE, n_databases),
+                      db_rng.random(n_databases) < 0.4, _choice(db_rng, BACKUP, n_databases), licensing, db_hosts,
+                      _choice(db_rng, LEVEL, n_databases), _choice(db_rng, LEVEL, n_databases),
+                      db_rng.random(n_databases) < 0.3, stamps[:n_databases], stamps[:n_databases])
+
+    share_hosts = np.array(server_ids, dtype=object)[share_rng.integers(0, n_servers, n_shares)] \
+        if n_servers else np.full(n_shares, None, dtype=object)
+    file_shares = _rows(_ids('SHARE', n_shares), _lognormal_gb(share_rng, SHARE_SIZE, n_shares, step=10),
+                        _choice(share_rng, LEVEL, n_shares), share_rng.random(n_shares) < 0.6,
+                        _choice(share_rng, RETENTION_DAYS, n_shares), share_hosts,
+                        _choice(share_rng, LEVEL, n_shares), _choice(share_rng, LEVEL, n_shares),
+                        share_rng.random(n_shares) < 0.2, stamps[:n_shares], stamps[:n_shares])
+
+    return {'servers': servers, 'databases': databases, 'file_shares': file_shares}
+
+
+def load_into_sqlite(db_path: str, inventory: Dict[str, List[Tuple]], replace: bool = True) -> Dict[str, Any]:
+    """Bulk-load generated rows with executemany in one transaction; returns row counts and load time"""
+    start = time.time()
+    conn = sqlite3.connect(db_path)
+    try:
+        # Durability doesn't matter for a benchmark fixture; one fsync at commit is plenty
+        conn.execute('PRAGMA synchronous=OFF')
+        conn.execute('PRAGMA journal_mode=MEMORY')
+        with conn:
+            for table, ddl in SCHEMA.items():
+                conn.execute(ddl)
+                if replace:
+                    conn.execute(f'DELETE FROM {table}')
+                columns = COLUMNS[table]
+                conn.executemany(
+                    f'INSERT INTO {table} ({", ".join(columns)}) VALUES ({", ".join("?" * len(columns))})',
+                    inventory[table]
+                )
+    finally:
+        conn.close()
+    counts = {table: len(rows) for table, rows in inventory.items()}
+    counts['seconds'] = round(time.time() - start, 3)
+    return counts
+
+
+def write_files(out_dir: str, inventory: Dict[str, List[Tuple]], fmt: str = 'csv') -> List[str]:
+    """Write one CSV (or Parquet, which needs pyarrow) file per table; returns the paths"""
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for table, rows in inventory.items():
+        path = os.path.join(out_dir, f'{table}.{fmt}')
+        if fmt == 'csv':
+            with open(path, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(COLUMNS[table])
+                writer.writerows(rows)
+        elif fmt == 'parquet':
+            import pandas as pd
+            try:
+                pd.DataFrame(rows, columns=COLUMNS[table]).to_parquet(path, index=False)
+            except ImportError as e:
+                raise RuntimeError(f"Parquet output needs pyarrow installed: {e}")
+        else:
+            raise ValueError(f"Unsupported format: {fmt}")
+        paths.append(path)
+    return paths
+
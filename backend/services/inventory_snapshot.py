@@ -0,0 +1,211 @@
+"""One read per inventory table per request, shared by every service and report section that needs it"""
+
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from .columnar_inventory import ColumnarTable
+from .swr_cache import inventory_revision
+
+TABLES = ('servers', 'databases', 'file_shares', 'resource_rates')
+# SQLAlchemy model behind each table (models_new.init_models)
+MODEL_NAMES = {'servers': 'Server', 'databases': 'Database', 'file_shares': 'FileShare',
+               'resource_rates': 'ResourceRate'}
+# Tables linked by hosting relationships, loaded together on the SQLAlchemy path
+GRAPH_TABLES = ('servers', 'databases', 'file_shares')
+
+
+def field(row, name: str, default=None):
+    """Column value of a sqlite3-backed dict, a columnar row view or an ORM instance"""
+    if isinstance(row, dict):
+        return row.get(name, default)
+    return getattr(row, name, default)
+
+
+def row_dict(row) -> Dict[str, Any]:
+    if isinstance(row, dict):
+        return row
+    if hasattr(row, 'to_dict'):
+        return row.to_dict()
+    return {column.name: getattr(row, column.name) for column in row.__table__.columns}
+
+
+class InventorySnapshot:
+    """Inventory tables read at most once each, with the aggregates reports keep recomputing
+
+    Tables load on first access through `load_table(name)`, so a request
+    that only needs servers never reads the others. Tables are lists of
+    dicts (SQLite), ColumnarTables of row views (SQLite, columnar) or lists
+    of ORM instances (SQLAlchemy); rows may be shared, so treat them as read-only.
+    """
+
+    def __init__(self, load_table: Callable[[str], List[Any]]):
+        self._load_table = load_table
+        self._tables: Dict[str, List[Any]] = {}
+        self._derived: Dict[str, Any] = {}
+        # Snapshots reused across requests are read from several threads
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_rows(cls, **tables: List[Any]) -> 'InventorySnapshot':
+        """Snapshot over rows already in memory; tables not given are empty"""
+        return cls(lambda name: list(tables.get(name, [])))
+
+    @classmethod
+    def from_sqlite(cls, connect: Callable[[], Any], columnar: bool = False) -> 'InventorySnapshot':
+        """Snapshot read with `connect()` connections (row_factory=sqlite3.Row), optionally into ColumnarTables"""
+        def load_table(name):
+            conn = connect()
+            try:
+                if columnar:
+                    return ColumnarTable.from_sqlite(conn, name, exclude=())
+                return [dict(row) for row in conn.execute(f'SELECT * FROM {name} ORDER BY id')]
+            finally:
+                conn.close()
+        return cls(load_table)
+
+    @classmethod
+    def from_models(cls, models: Dict[str, Any]) -> 'InventorySnapshot':
+        """Snapshot of ORM instances, one query per table
+
+        Servers, databases and file shares are read together with their
+        hosting relationships linked (model_loader.load_server_graph), so
+        walking `server.databases` or `database.server` never queries again.
+        """
+        graph: Dict[str, List[Any]] = {}
+
+        def load_table(name):
+            if name in GRAPH_TABLES and all(MODEL_NAMES[table] in models for table in GRAPH_TABLES):
+                if not graph:
+                    from .model_loader import load_server_graph
+                    graph.update(zip(GRAPH_TABLES, load_server_graph(models)))
+                return graph[name]
+            return models[MODEL_NAMES[name]].query.all() if MODEL_NAMES[name] in models else []
+        return cls(load_table)
+
+    def table(self, name: str) -> List[Any]:
+        rows = self._tables.get(name)
+        if rows is None:
+            with self._lock:
+                rows = self._tables.get(name)
+                if rows is None:
+                    rows = self._tables[name] = self._load_table(name)
+        return rows
+
+    @property
+    def servers(self) -> List[Any]:
+        return self.table('servers')
+
+    @property
+    def databases(self) -> List[Any]:
+        return self.table('databases')
+
+    @property
+    def file_shares(self) -> List[Any]:
+        return self.table('file_shares')
+
+    @property
+    def resource_rates(self) -> List[Any]:
+        return self.table('resource_rates')
+
+    def _cached(self, key: str, compute: Callable[[], Any]) -> Any:
+        value = self._derived.get(key)
+        if value is None:
+            value = self._derived[key] = compute()
+        return value
+
+    def total(self, table: str, column: str) -> float:
+        """Sum of a numeric column, NULLs counted as zero"""
+        def compute():
+            rows = self.table(table)
+            if isinstance(rows, ColumnarTable):
+                return rows.sum(column)
+            return sum(field(row, column) or 0 for row in rows)
+        return self._cached(f'total:{table}.{column}', compute)
+
+    def summary(self) -> Dict[str, Any]:
+        """Counts and size totals used by the dashboard, timeline and report summaries"""
+        def compute():
+            disk_gb = self.total('servers', 'disk_size')
+            db_gb = self.total('databases', 'size_gb')
+            fs_gb = self.total('file_shares', 'total_size_gb')
+            return {
+                'servers_count': len(self.servers),
+                'databases_count': len(self.databases),
+                'file_shares_count': len(self.file_shares),
+                'total_vcpu': self.total('servers', 'vcpu'),
+                'total_ram_gb': self.total('servers', 'ram'),
+                'total_disk_gb': disk_gb,
+                'total_db_size': db_gb,
+                'total_fs_size': fs_gb,
+                'total_data_gb': disk_gb + db_gb + fs_gb,
+                'total_components': len(self.servers) + len(self.databases) + len(self.file_shares),
+            }
+        return dict(self._cached('summary', compute))
+
+    def infrastructure_data(self, include_resource_rates: bool = False) -> Dict[str, List[Dict[str, Any]]]:
+        """Rows as plain dicts in the shape the AI service and exporters take"""
+        names = ('servers', 'databases', 'file_shares') + (('resource_rates',) if include_resource_rates else ())
+        return {name: self._cached(f'dicts:{name}', lambda name=name: [row_dict(row) for row in self.table(name)])
+                for name in names}
+
+    def revision(self) -> str:
+        """Content hash of servers, databases and file shares (see swr_cache.inventory_revision)"""
+        return self._cached('revision', lambda: inventory_revision(self.infrastructure_data()))
+
+
+class InventorySnapshotLoader:
+    """Snapshots of a SQLite inventory file, optionally reused until the file changes
+
+    With reuse off (the default) every call reads afresh. With
+    INVENTORY_SNAPSHOT_REUSE=true the last snapshot is handed out again
+    while the database file's size and mtime (and its WAL's) are unchanged.
+    Tables are held columnar unless INVENTORY_COLUMNAR=false.
+    """
+
+    def __init__(self, db_path: str, connect: Callable[[], Any], reuse: Optional[bool] = None,
+                 columnar: Optional[bool] = None):
+        self.db_path = db_path
+        self.connect = connect
+        self.reuse = reuse if reuse is not None else os.getenv('INVENTORY_SNAPSHOT_REUSE', 'false').lower() == 'true'
+        self.columnar = columnar if columnar is not None else os.getenv('INVENTORY_COLUMNAR', 'true').lower() == 'true'
+        self._snapshot: Optional[InventorySnapshot] = None
+        self._version = None
+        self._lock = threading.Lock()
+
+    def file_version(self):
+        version = []
+        for path in (self.db_path, self.db_path + '-wal'):
+            try:
+                stat = os.stat(path)
+                version.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                version.append(None)
+        return tuple(version)
+
+    def load(self) -> InventorySnapshot:
+        if not self.reuse:
+            return InventorySnapshot.from_sqlite(self.connect, self.columnar)
+        version = self.file_version()
+        with self._lock:
+            if self._snapshot is None or self._version != version:
+                self._snapshot = InventorySnapshot.from_sqlite(self.connect, self.columnar)
+                self._version = version
+            return self._snapshot
+
+
+def request_inventory(load: Callable[[], InventorySnapshot]) -> InventorySnapshot:
+    """The current Flask request's snapshot, built with `load` on first use; outside a request, a fresh one"""
+    from flask import g, has_request_context
+
+    if not has_request_context():
+        return load()
+    snapshot = g.get('inventory_snapshot')
+    if snapshot is None:
+        snapshot = g.inventory_snapshot = load()
+    return snapshot
+
+
+def model_inventory(models: Dict[str, Any]) -> InventorySnapshot:
+    """The current request's snapshot of the SQLAlchemy inventory models"""
+    return request_inventory(lambda: InventorySnapshot.from_models(models))
@@ -0,0 +1,288 @@
+"""Prometheus-style metrics with per-thread recording and aggregation on scrape"""
+
+import bisect
+import threading
+import time
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+# Seconds; spans fast SQLite reads up to slow model calls and exports
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+ROW_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000, 1000000)
+STATEMENT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250, 1000)
+BYTE_BUCKETS = (1024, 10240, 102400, 1048576, 10485760, 104857600)
+
+# Shards of finished threads are folded into the retired totals once there are this many
+MAX_SHARDS = 256
+
+
+class _Metric:
+    def __init__(self, registry: 'MetricsRegistry', name: str, help_text: str, labelnames: Sequence[str]):
+        self.registry = registry
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple:
+        return (self.name,) + tuple(str(labels.get(label, '')) for label in self.labelnames)
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount: float = 1.0, **labels):
+        shard = self.registry._shard()
+        key = self._key(labels)
+        shard[key] = shard.get(key, 0.0) + amount
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, registry, name, help_text, labelnames, buckets: Sequence[float]):
+        super().__init__(registry, name, help_text, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels):
+        shard = self.registry._shard()
+        key = self._key(labels)
+        state = shard.get(key)
+        if state is None:
+            # Per-bucket (non-cumulative) counts plus +Inf, then sum and count
+            state = shard[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        state[0][bisect.bisect_left(self.buckets, value)] += 1
+        state[1] += value
+        state[2] += 1
+
+    def time(self, **labels):
+        """Context manager observing the elapsed seconds of its block"""
+        return _Timer(self, labels)
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram, labels: Dict[str, Any]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+        return False
+
+
+class MetricsRegistry:
+    """Counters and histograms recorded into per-thread shards
+
+    Recording only touches the calling thread's own dict, so the hot path
+    takes no lock. A scrape copies every shard and sums them; shards of
+    threads that have finished are folded into retired totals so
+    thread-per-request servers don't grow the shard list without bound.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards: List[Tuple[threading.Thread, Dict]] = []
+        self._retired: Dict = {}
+        self._metrics: Dict[str, _Metric] = {}
+        self._gauges: Dict[str, Tuple[str, Sequence[str], Callable[[], Dict[Tuple, float]]]] = {}
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(self, name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(self, name, help_text, labelnames, buckets))
+
+    def gauge_callback(self, name: str, help_text: str, labelnames: Sequence[str],
+                       read: Callable[[], Dict[Tuple, float]]):
+        """Gauge computed at scrape time; `read` maps label-value tuples to values"""
+        with self._lock:
+            self._gauges[name] = (help_text, tuple(labelnames), read)
+
+    def _register(self, metric: _Metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                # Modules re-imported (tests, reloads) get the metric they defined before
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def _shard(self) -> Dict:
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append((threading.current_thread(), shard))
+                if len(self._shards) > MAX_SHARDS:
+                    self._retire_finished()
+        return shard
+
+    def _retire_finished(self):
+        live = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                live.append((thread, shard))
+            else:
+                _merge(self._retired, shard.copy())
+        self._shards = live
+
+    def snapshot(self) -> Dict:
+        """Summed values of every series: counters as floats, histograms as [buckets, sum, count]"""
+        with self._lock:
+            self._retire_finished()
+            totals: Dict = {}
+            _merge(totals, self._retired)
+            shards = [shard for _, shard in self._shards]
+        for shard in shards:
+            # dict.copy() is atomic under the GIL, so the owner thread can keep recording
+            _merge(totals, shard.copy())
+        return totals
+
+    def value(self, name: str, **labels) -> Any:
+        """Current aggregated value of one series (0.0 / None when never recorded)"""
+        metric = self._metrics[name]
+        return self.snapshot().get(metric._key(labels), 0.0 if metric.kind == 'counter' else None)
+
+    def render(self) -> str:
+        """Prometheus text exposition format (0.0.4)"""
+        totals = self.snapshot()
+        by_metric: Dict[str, List[Tuple[Tuple, Any]]] = {}
+        for key, value in totals.items():
+            by_metric.setdefault(key[0], []).append((key[1:], value))
+
+        lines = []
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+            gauges = sorted(self._gauges.items())
+        for metric in metrics:
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for label_values, value in sorted(by_metric.get(metric.name, [])):
+                labels = list(zip(metric.labelnames, label_values))
+                if metric.kind == 'counter':
+                    lines.append(f'{metric.name}{_labels(labels)} {_number(value)}')
+                    continue
+                buckets, total, count = value
+                cumulative = 0
+                for bound, bucket_count in zip(metric.buckets + (float('inf'),), buckets):
+                    cumulative += bucket_count
+                    le = '+Inf' if bound == float('inf') else _number(bound)
+                    lines.append(f'{metric.name}_bucket{_labels(labels + [("le", le)])} {cumulative}')
+                lines.append(f'{metric.name}_sum{_labels(labels)} {_number(total)}')
+                lines.append(f'{metric.name}_count{_labels(labels)} {count}')
+        for name, (help_text, labelnames, read) in gauges:
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} gauge')
+            for label_values, value in sorted(read().items()):
+                lines.append(f'{name}{_labels(list(zip(labelnames, label_values)))} {_number(value)}')
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        """Drop every recorded value (tests)"""
+        with self._lock:
+            self._retired = {}
+            for _, shard in self._shards:
+                shard.clear()
+
+
+def _merge(totals: Dict, shard: Dict):
+    for key, value in shard.items():
+        if isinstance(value, list):
+            current = totals.get(key)
+            if current is None:
+                totals[key] = [list(value[0]), value[1], value[2]]
+            else:
+                current[0] = [a + b for a, b in zip(current[0], value[0])]
+                current[1] += value[1]
+                current[2] += value[2]
+        else:
+            totals[key] = totals.get(key, 0.0) + value
+
+
+def _labels(pairs) -> str:
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _number(value: float) -> str:
+    return repr(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+# Process-wide registry and the metrics shared across services
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    'http_request_duration_seconds', 'HTTP request latency by route', ('method', 'route', 'status'))
+BEDROCK_CALL_SECONDS = REGISTRY.histogram(
+    'bedrock_call_duration_seconds', 'Bedrock invoke_model latency', ('model', 'outcome'))
+BEDROCK_TOKENS = REGISTRY.counter(
+    'bedrock_tokens_total', 'Estimated Bedrock tokens by direction', ('model', 'direction'))
+BEDROCK_ERRORS = REGISTRY.counter(
+    'bedrock_errors_total', 'Failed Bedrock calls by error type', ('model', 'error'))
+SQLITE_QUERY_SECONDS = REGISTRY.histogram(
+    'sqlite_query_duration_seconds', 'SQLite statement execution time', ('statement',))
+SQLITE_ROWS = REGISTRY.histogram(
+    'sqlite_rows_per_statement', 'Rows fetched per SQLite statement', ('statement',), buckets=ROW_BUCKETS)
+SQL_STATEMENTS_PER_REQUEST = REGISTRY.histogram(
+    'sql_statements_per_request', 'SQL statements run by one request', ('route',), buckets=STATEMENT_BUCKETS)
+SQL_REPEATED_STATEMENTS = REGISTRY.counter(
+    'sql_repeated_statements_total', 'Extra executions of a statement already run in the same request',
+    ('route', 'statement', 'kind'))
+SQL_SLOW_STATEMENTS = REGISTRY.counter(
+    'sql_slow_statements_total', 'Statements over SQL_SLOW_QUERY_MS', ('statement',))
+EXPORT_RENDER_SECONDS = REGISTRY.histogram(
+    'export_render_duration_seconds', 'Report render time by format', ('format',))
+EXPORT_ARTIFACT_BYTES = REGISTRY.histogram(
+    'export_artifact_bytes', 'Rendered report size by format', ('format',), buckets=BYTE_BUCKETS)
+LOG_RECORDS_DROPPED = REGISTRY.counter(
+    'log_records_dropped_total', 'Log records dropped because the log writer queue was full', ('logger',))
+COMPUTE_TASK_SECONDS = REGISTRY.histogram(
+    'compute_pool_task_seconds', 'Time from submitting a process-pool task to its result', ('function', 'outcome'))
+SHARED_INVENTORY_BYTES = REGISTRY.histogram(
+    'shared_inventory_bytes', 'Size of inventory tables published to shared memory', ('table',),
+    buckets=BYTE_BUCKETS)
+CACHE_REQUESTS = REGISTRY.counter(
+    'cache_requests_total', 'Cache lookups by cache and result (hit, miss, stale)', ('cache', 'result'))
+
+
+def _cache_hit_ratios() -> Dict[Tuple, float]:
+    lookups: Dict[str, List[float]] = {}
+    for key, value in REGISTRY.snapshot().items():
+        if key[0] == CACHE_REQUESTS.name:
+            counts = lookups.setdefault(key[1], [0.0, 0.0])
+            counts[0] += value if key[2] == 'hit' else 0.0
+            counts[1] += value
+    return {(cache,): hits / total for cache, (hits, total) in lookups.items() if total}
+
+
+REGISTRY.gauge_callback('cache_hit_ratio', 'Share of cache lookups answered from the cache', ('cache',),
+                        _cache_hit_ratios)
+
+
+def install_request_metrics(app, path: str = '/metrics'):
+    """Time every request of a Flask app by route and serve the process registry at `path`"""
+    from flask import Response, g, request
+
+    @app.before_request
+    def _start_request_timer():
+        g.metrics_started = time.perf_counter()
+
+    @app.after_request
+    def _observe_request(response):
+        started = g.pop('metrics_started', None)
+        if started is not None:
+            # Route templates, not raw paths, keep label cardinality bounded
+            route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, method=request.method, route=route,
+                                         status=response.status_code)
+        return response
+
+    @app.route(path, methods=['GET'])
+    def metrics():
+        return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
@@ -1,24 +1,32 @@
-import json
-import boto3
+from collections import defaultdict
 from models_new import init_models
-from .ai_recommendations import AIRecommendationService
+from .ai_registry import get_ai_service
+from .rightsizing import get_rightsizing_optimizer
+from .columnar_inventory import ColumnarTable
+from .inventory_snapshot import model_inventory
+from .model_loader import get_many
 
 class MigrationAdvisor:
     """AI-powered migration strategy advisor using AWS Bedrock"""
     
-    def __init__(self, db, models, bedrock_client=None):
+    def __init__(self, db, models, bedrock_client=None, inventory=None):
         self.db = db
         self.models = models
         self.bedrock_client = bedrock_client
+        # Tables read once and shared with the other services of this request
+        self.inventory = inventory or model_inventory(models)
         
-        # Initialize AI service
-        self.ai_service = AIRecommendationService()
+        # Shared AI service
+        self.ai_service = get_ai_service()
+        self.rightsizing = get_rightsizing_optimizer()
         
         # Model references
         self.Server = models['Server']
         self.Database = models['Database']
         self.FileShare = models['FileShare']
         self.CloudPreference = models['CloudPreference']
+        self._cloud_pref = None
+        self._cloud_pref_loaded = False
         
         # Technology mapping for different cloud providers
         self.technology_mappings = {
@@ -42,15 +50,37 @@ class MigrationAdvisor:
     
     def generate_data_migration_strategy(self, component_id, component_type):
         """Generate AI-powered data migration strategy"""
+        return self.generate_data_migration_strategies([(component_id, component_type)])[0]
+    
+    def generate_data_migration_strategies(self, components):
+        """Data migration strategies for (component_id, component_type) pairs, in order
+        
+        Components are fetched with one query per type (get_many) rather than
+        one per component, whatever the number of components.
+        """
+        ids_by_type = defaultdict(list)
+        for component_id, component_type in components:
+            ids_by_type[component_type].append(component_id)
+        try:
+            found = {
+                'database': get_many(self.Database, ids_by_type['database']) if ids_by_type['database'] else {},
+                'file_share': get_many(self.FileShare, ids_by_type['file_share']) if ids_by_type['file_share'] else {}
+            }
+        except Exception as e:
+            return [{'error': f'Failed to generate migration strategy: {str(e)}'} for _ in components]
+        return [self._data_migration_strategy(component_id, component_type, found)
+                for component_id, component_type in components]
+    
+    def _data_migration_strategy(self, component_id, component_type, found):
         try:
             if component_type == 'database':
-                component = Database.query.get(component_id)
+                component = found['database'].get(component_id)
                 if not component:
                     return {'error': 'Database not found'}
                 
                 context = self._build_database_context(component)
             elif component_type == 'file_share':
-                component = FileShare.query.get(component_id)
+                component = found['file_share'].get(component_id)
                 if not component:
                     return {'error': 'File share not found'}
                 
@@ -83,8 +113,18 @@ class MigrationAdvisor:
     
     def generate_server_migration_strategy(self, server_id):
         """Generate comprehensive server migration strategy"""
+        return self.generate_server_migration_strategies([server_id])[0]
+    
+    def generate_server_migration_strategies(self, server_ids):
+        """Server migration strategies for the given server_ids, in order, from one query"""
+        try:
+            found = get_many(self.Server, server_ids, column='server_id')
+        except Exception as e:
+            return [{'error': f'Failed to generate server migration strategy: {str(e)}'} for _ in server_ids]
+        return [self._server_migration_strategy(server_id, found.get(server_id)) for server_id in server_ids]
+    
+    def _server_migration_strategy(self, server_id, server):
         try:
-            server = Server.query.filter_by(server_id=server_id).first()
             if not server:
                 return {'error': 'Server not found'}
             
@@ -121,9 +161,9 @@ class MigrationAdvisor:
         """Generate comprehensive migration strategy for all components"""
         try:
             # Gather all infrastructure data
-            servers = self.Server.query.all()
-            databases = self.Database.query.all()
-            file_shares = self.FileShare.query.all()
+            servers = self.inventory.servers
+            databases = self.inventory.databases
+            file_shares = self.inventory.file_shares
             
             # Generate overall migration approach
             migration_approach = self._determine_migration_approach(servers, databases, file_shares)
@@ -211,32 +251,46 @@ class MigrationAdvisor:
     
     def _generate_server_strategies(self, servers):
         """Generate migration strategies for servers"""
+        if isinstance(servers, ColumnarTable):
+            # Each distinct technology / OS string is classified once, not once per server
+            server_ids, os_types = servers.values('server_id'), servers.values('os_type')
+            vcpus, rams = servers.values('vcpu'), servers.values('ram')
+            legacy = (servers.map('technology', lambda t: 'Legacy' in (t or ''), dtype=bool)
+                      | servers.map('os_type', lambda o: 'Windows Server 2008' in (o or ''), dtype=bool))
+        else:
+            server_ids = [server.server_id for server in servers]
+            os_types = [server.os_type for server in servers]
+            vcpus, rams = [server.vcpu for server in servers], [server.ram for server in servers]
+            legacy = ['Legacy' in (server.technology or '') or 'Windows Server 2008' in (server.os_type or '')
+                      for server in servers]
+        # Instance types for the whole fleet in one pass
+        instance_types = self.rightsizing.recommend_instances([v or 0 for v in vcpus], [r or 0 for r in rams])
         strategies = []
         
-        for server in servers:
+        for i, server_id in enumerate(server_ids):
             # Determine migration type based on technology and age
-            if 'Legacy' in server.technology or 'Windows Server 2008' in server.os_type:
+            if legacy[i]:
                 migration_type = 'Replatform'
                 target_state = f'Modernized EC2 with updated OS'
                 complexity = 'High'
                 effort = '3-4 weeks'
                 rationale = 'Legacy system requires modernization during migration'
-            elif server.vcpu >= 8 or server.ram >= 32:
+            elif (vcpus[i] or 0) >= 8 or (rams[i] or 0) >= 32:
                 migration_type = 'Rehost'
-                target_state = f'EC2 {self._recommend_instance_type(server)}'
+                target_state = f'EC2 {instance_types[i]}'
                 complexity = 'Medium'
                 effort = '1-2 weeks'
                 rationale = 'High-performance server suitable for direct rehosting'
             else:
                 migration_type = 'Rehost'
-                target_state = f'EC2 {self._recommend_instance_type(server)}'
+                target_state = f'EC2 {instance_types[i]}'
                 complexity = 'Low'
                 effort = '1 week'
                 rationale = 'Standard server suitable for lift-and-shift'
             
             strategies.append({
-                'server_id': server.server_id,
-                'current_state': f'{server.os_type} - {server.vcpu}vCPU, {server.ram}GB RAM',
+                'server_id': server_id,
+                'current_state': f'{os_types[i]} - {vcpus[i]}vCPU, {rams[i]}GB RAM',
                 'target_state': target_state,
                 'migration_type': migration_type,
                 'rationale': rationale,
@@ -466,19 +520,19 @@ class MigrationAdvisor:
         }
     
     def _recommend_instance_type(self, server):
-        """Simple instance type recommendation"""
-        if server.vcpu <= 2 and server.ram <= 4:
-            return 't3.medium'
-        elif server.vcpu <= 4 and server.ram <= 16:
-            return 't3.xlarge'
-        elif server.vcpu <= 8 and server.ram <= 32:
-            return 't3.2xlarge'
-        else:
-            return 'm5.4xlarge'
+        """Cheapest instance type across families for a server"""
+        return self.rightsizing.recommend_instance(server.vcpu, server.ram)
+
+    def _cloud_preference(self):
+        """Target cloud preference, read once per advisor rather than once per component"""
+        if not self._cloud_pref_loaded:
+            self._cloud_pref = self.CloudPreference.query.first()
+            self._cloud_pref_loaded = True
+        return self._cloud_pref
 
     def _build_database_context(self, database):
         """Build context for database migration analysis"""
-        cloud_pref = CloudPreference.query.first()
+        cloud_pref = self._cloud_preference()
         
         return {
             'database_type': database.db_type,
@@ -494,7 +548,7 @@ class MigrationAdvisor:
     
     def _build_file_share_context(self, file_share):
         """Build context for file share migration analysis"""
-        cloud_pref = CloudPreference.query.first()
+        cloud_pref = self._cloud_preference()
         
         return {
             'size_gb': file_share.total_size_gb,
@@ -509,7 +563,7 @@ class MigrationAdvisor:
     
     def _build_server_context(self, server):
         """Build context for server migration analysis"""
-        cloud_pref = CloudPreference.query.first()
+        cloud_pref = self._cloud_preference()
         
         return {
             'os_type': server.os_type,
@@ -524,7 +578,7 @@ class MigrationAdvisor:
     
     def _get_ai_recommendation(self, context, migration_type):
         """Get AI-powered recommendation using AWS Bedrock"""
-        if not self.bedrock_client:
+        if not self.ai_service.ai_available():
             return self._get_fallback_recommendation(context, migration_type)
         
         try:
@@ -535,23 +589,8 @@ class MigrationAdvisor:
             else:
                 return "Invalid migration type"
             
-            # Call AWS Bedrock (using Claude or another model)
-            response = self.bedrock_client.invoke_model(
-                modelId='anthropic.claude-3-sonnet-20240229-v1:0',
-                body=json.dumps({
-                    'anthropic_version': 'bedrock-2023-05-31',
-                    'max_tokens': 1000,
-                    'messages': [
-                        {
-                            'role': 'user',
-                            'content': prompt
-                        }
-                    ]
-                })
-            )
-            
-            response_body = json.loads(response['body'].read())
-            return response_body['content'][0]['text']
+            # Call AWS Bedrock through the shared service and its configured model
+            return self.ai_service._call_bedrock(prompt, max_tokens=1000)
             
         except Exception as e:
             return self._get_fallback_recommendation(context, migration_type)
@@ -652,7 +691,7 @@ class MigrationAdvisor:
         if not technologies_str:
             return {}
         
-        cloud_pref = CloudPreference.query.first()
+        cloud_pref = self._cloud_preference()
         provider = cloud_pref.cloud_provider.lower() if cloud_pref else 'aws'
         
         mappings = {}
@@ -0,0 +1,139 @@
+"""Model cascade: answer with a small fast model, escalate to the large one when the answer is weak"""
+
+import os
+import threading
+from collections import Counter, deque
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+# USD per 1,000 tokens (input, output), Bedrock on-demand us-east-1
+MODEL_PRICING = {
+    'anthropic.claude-3-haiku-20240307-v1:0': (0.00025, 0.00125),
+    'anthropic.claude-3-sonnet-20240229-v1:0': (0.003, 0.015),
+    'anthropic.claude-3-5-sonnet-20240620-v1:0': (0.003, 0.015),
+    'amazon.titan-text-express-v1': (0.0002, 0.0006),
+    'amazon.titan-text-lite-v1': (0.00015, 0.0002),
+    'amazon.nova-micro-v1:0': (0.000035, 0.00014),
+    'amazon.nova-lite-v1:0': (0.00006, 0.00024),
+    'amazon.nova-pro-v1:0': (0.0008, 0.0032),
+}
+DEFAULT_PRICING = (0.003, 0.015)
+
+CONFIDENCE_WORDS = {'high': 0.9, 'medium': 0.6, 'low': 0.3}
+
+# Fields a component answer must carry to be usable
+REQUIRED_FIELDS = {
+    'server': ('recommended_instance',),
+    'database': ('recommended_instance',),
+    'storage': ('recommended_storage',),
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) used for cost tracking"""
+    return max(1, len(text or '') // 4)
+
+
+def confidence_score(value: Any) -> Optional[float]:
+    """Confidence as 0.0-1.0 from 'high/medium/low', a fraction or a percentage"""
+    if isinstance(value, str):
+        value = value.strip().lower()
+        if value in CONFIDENCE_WORDS:
+            return CONFIDENCE_WORDS[value]
+        try:
+            value = float(value.rstrip('%'))
+        except ValueError:
+            return None
+    if isinstance(value, (int, float)):
+        return value / 100.0 if value > 1 else float(value)
+    return None
+
+
+def is_complex_component(component_type: str, specs: Dict[str, Any]) -> bool:
+    """Components the small model should not be trusted with"""
+    if specs.get('complex'):
+        return True
+    if component_type == 'server':
+        return float(specs.get('vcpu') or 0) >= 32 or float(specs.get('ram') or 0) >= 256
+    if component_type == 'database':
+        ha = str(specs.get('ha_dr_required', '')).lower() in ('1', 'true', 'yes')
+        return float(specs.get('size_gb') or 0) >= 2000 or (ha and specs.get('performance_tier') == 'high')
+    if component_type == 'storage':
+        return float(specs.get('total_size_gb') or 0) >= 50000
+    return False
+
+
+class ModelUsageTracker:
+    """Per-model call counts, latency percentiles, estimated tokens and spend"""
+
+    def __init__(self, latency_window: int = 500):
+        self._lock = threading.Lock()
+        self._latency_window = latency_window
+        self._models: Dict[str, Dict[str, Any]] = {}
+        self.escalations = Counter()
+
+    def record(self, model_id: str, latency_seconds: float, prompt: str, completion: str = '', success: bool = True):
+        input_tokens = estimate_tokens(prompt)
+        output_tokens = estimate_tokens(completion) if success else 0
+        input_price, output_price = MODEL_PRICING.get(model_id, DEFAULT_PRICING)
+        with self._lock:
+            stats = self._models.setdefault(model_id, {
+                'calls': 0, 'failures': 0, 'input_tokens': 0, 'output_tokens': 0, 'cost_usd': 0.0,
+                'latencies': deque(maxlen=self._latency_window)
+            })
+            stats['calls'] += 1
+            stats['failures'] += 0 if success else 1
+            stats['input_tokens'] += input_tokens
+            stats['output_tokens'] += output_tokens
+            stats['cost_usd'] += (input_tokens * input_price + output_tokens * output_price) / 1000
+            stats['latencies'].append(latency_seconds)
+
+    def record_escalation(self, reason: str):
+        with self._lock:
+            self.escalations[reason] += 1
+
+    def summary(self) -> Dict[str, Any]:
+        """Snapshot for status endpoints and threshold tuning"""
+        with self._lock:
+            models = {}
+            for model_id, stats in self._models.items():
+                latencies = np.fromiter(stats['latencies'], dtype=float)
+                p50, p95 = np.percentile(latencies, [50, 95]) if latencies.size else (0.0, 0.0)
+                models[model_id] = {
+                    'calls': stats['calls'],
+                    'failures': stats['failures'],
+                    'input_tokens': stats['input_tokens'],
+                    'output_tokens': stats['output_tokens'],
+                    'cost_usd': round(stats['cost_usd'], 6),
+                    'p50_latency_seconds': round(float(p50), 3),
+                    'p95_latency_seconds': round(float(p95), 3)
+                }
+            return {
+                'models': models,
+                'escalations': dict(self.escalations),
+                'total_cost_usd': round(sum(m['cost_usd'] for m in models.values()), 6)
+            }
+
+
+class CascadePolicy:
+    """Decides whether a fast-model answer is good enough or must go to the strong model"""
+
+    def __init__(self, fast_model_id: Optional[str] = None, min_confidence: Optional[float] = None,
+                 enabled: Optional[bool] = None):
+        self.fast_model_id = fast_model_id or os.getenv('BEDROCK_FAST_MODEL_ID', 'anthropic.claude-3-haiku-20240307-v1:0')
+        self.min_confidence = min_confidence if min_confidence is not None else \
+            float(os.getenv('AI_CASCADE_MIN_CONFIDENCE', 0.6))
+        self.enabled = enabled if enabled is not None else \
+            os.getenv('AI_CASCADE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+
+    def escalation_reason(self, result: Dict[str, Any], component_type: str) -> Optional[str]:
+        """Why the fast answer can't be used, or None when it can"""
+        if not isinstance(result, dict) or 'error' in result:
+            return 'invalid_json'
+        if any(not result.get(field) for field in REQUIRED_FIELDS.get(component_type, ())):
+            return 'missing_fields'
+        confidence = confidence_score(result.get('confidence_level'))
+        if confidence is None or confidence < self.min_confidence:
+            return 'low_confidence'
+        return None
@@ -0,0 +1,58 @@
+"""Constant-query loading of the SQLAlchemy inventory: eager relationships and batched lookups by key"""
+
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+
+# Keys per IN (...) clause, under SQLite's default bound-parameter limit
+GET_MANY_CHUNK = 500
+
+
+def eager_query(model, *relationships: str):
+    """`model.query` with the named relationships (all of them by default) loaded by one SELECT ... IN each"""
+    names = relationships or tuple(inspect(model).relationships.keys())
+    return model.query.options(*(selectinload(getattr(model, name)) for name in names))
+
+
+def get_many(model, keys: Iterable[Any], column: str = 'id', eager: Sequence[str] = ()) -> Dict[Any, Any]:
+    """Instances whose `column` is in `keys`, by key, in one query per GET_MANY_CHUNK keys
+
+    Missing keys are absent from the result. Relationships named in `eager`
+    are loaded up front, so walking them doesn't fire a query per instance.
+    """
+    wanted = list(dict.fromkeys(key for key in keys if key is not None))
+    query = eager_query(model, *eager) if eager else model.query
+    attribute = getattr(model, column)
+    found = {}
+    for start in range(0, len(wanted), GET_MANY_CHUNK):
+        for instance in query.filter(attribute.in_(wanted[start:start + GET_MANY_CHUNK])).all():
+            found[getattr(instance, column)] = instance
+    return found
+
+
+def load_server_graph(models: Dict[str, Any]) -> Tuple[List[Any], List[Any], List[Any]]:
+    """Servers, databases and file shares, one query each, with hosting relationships already populated
+
+    `server.databases`, `server.file_shares` and `database.server` /
+    `file_share.server` are filled from the rows just read instead of by
+    per-instance lazy loads, so code walking the graph stays at three
+    queries however large the inventory is.
+    """
+    Server, Database, FileShare = models['Server'], models['Database'], models['FileShare']
+    servers = Server.query.order_by(Server.id).all()
+    databases = Database.query.order_by(Database.id).all()
+    file_shares = FileShare.query.order_by(FileShare.id).all()
+
+    by_server_id = {server.server_id: server for server in servers}
+    for relationship, children in (('databases', databases), ('file_shares', file_shares)):
+        hosted = defaultdict(list)
+        for child in children:
+            host = by_server_id.get(child.server_id)
+            hosted[child.server_id].append(child)
+            set_committed_value(child, 'server', host)
+        for server in servers:
+            set_committed_value(server, relationship, hosted.get(server.server_id, []))
+    return servers, databases, file_shares
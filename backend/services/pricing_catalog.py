@@ -0,0 +1,210 @@
+"""Static cloud pricing catalog shared by the cost services"""
+
+from typing import Dict, Any
+
+import numpy as np
+
+# Billable hours in an average month (8760 / 12)
+HOURS_PER_MONTH = 730
+
+# AWS Pricing (simplified - would typically use AWS Pricing API)
+EC2_PRICING = {
+    't3.nano': {'cpu': 2, 'ram': 0.5, 'cost_per_hour': 0.0052},
+    't3.micro': {'cpu': 2, 'ram': 1, 'cost_per_hour': 0.0104},
+    't3.small': {'cpu': 2, 'ram': 2, 'cost_per_hour': 0.0208},
+    't3.medium': {'cpu': 2, 'ram': 4, 'cost_per_hour': 0.0416},
+    't3.large': {'cpu': 2, 'ram': 8, 'cost_per_hour': 0.0832},
+    't3.xlarge': {'cpu': 4, 'ram': 16, 'cost_per_hour': 0.1664},
+    't3.2xlarge': {'cpu': 8, 'ram': 32, 'cost_per_hour': 0.3328},
+    'm5.large': {'cpu': 2, 'ram': 8, 'cost_per_hour': 0.096},
+    'm5.xlarge': {'cpu': 4, 'ram': 16, 'cost_per_hour': 0.192},
+    'm5.2xlarge': {'cpu': 8, 'ram': 32, 'cost_per_hour': 0.384},
+    'm5.4xlarge': {'cpu': 16, 'ram': 64, 'cost_per_hour': 0.768},
+    'm5.8xlarge': {'cpu': 32, 'ram': 128, 'cost_per_hour': 1.536},
+    'm5.12xlarge': {'cpu': 48, 'ram': 192, 'cost_per_hour': 2.304},
+    'c5.large': {'cpu': 2, 'ram': 4, 'cost_per_hour': 0.085},
+    'c5.xlarge': {'cpu': 4, 'ram': 8, 'cost_per_hour': 0.17},
+    'c5.2xlarge': {'cpu': 8, 'ram': 16, 'cost_per_hour': 0.34},
+    'c5.4xlarge': {'cpu': 16, 'ram': 32, 'cost_per_hour': 0.68},
+    'c5.9xlarge': {'cpu': 36, 'ram': 72, 'cost_per_hour': 1.53},
+    'r5.large': {'cpu': 2, 'ram': 16, 'cost_per_hour': 0.126},
+    'r5.xlarge': {'cpu': 4, 'ram': 32, 'cost_per_hour': 0.252},
+    'r5.2xlarge': {'cpu': 8, 'ram': 64, 'cost_per_hour': 0.504},
+    'r5.4xlarge': {'cpu': 16, 'ram': 128, 'cost_per_hour': 1.008},
+    'r5.8xlarge': {'cpu': 32, 'ram': 256, 'cost_per_hour': 2.016}
+}
+
+RDS_PRICING = {
+    'db.t3.micro': 0.017,
+    'db.t3.small': 0.034,
+    'db.t3.medium': 0.068,
+    'db.t3.large': 0.136,
+    'db.t3.xlarge': 0.272,
+    'db.m5.large': 0.180,
+    'db.m5.xlarge': 0.360,
+    'db.m5.2xlarge': 0.720
+}
+
+S3_PRICING = {
+    'standard': 0.023,  # per GB/month
+    'ia': 0.0125,       # Infrequent Access
+    'glacier': 0.004    # Glacier
+}
+
+EBS_PRICING = {
+    'gp3': 0.08,        # per GB/month
+    'io2': 0.125        # per GB/month
+}
+
+RDS_STORAGE_PER_GB = 0.115  # RDS storage cost per GB/month
+RDS_BACKUP_PER_GB = 0.095   # Backup storage cost per GB/month
+
+# Rule-engine sizing ladders (same thresholds as the AI service fallbacks)
+EC2_RULE_LADDER = [
+    (2, 2, 't3.small'),
+    (2, 4, 't3.medium'),
+    (2, 8, 't3.large'),
+    (4, 16, 't3.xlarge'),
+    (8, 32, 't3.2xlarge')
+]
+EC2_RULE_DEFAULT = 'm5.4xlarge'
+
+RDS_RULE_LADDER = [
+    (20, 'db.t3.micro'),
+    (100, 'db.t3.small'),
+    (500, 'db.t3.medium'),
+    (1000, 'db.t3.large')
+]
+
+# Price level of each provider relative to AWS list prices
+PROVIDER_PRICE_FACTORS = {
+    'AWS': 1.0,
+    'Azure': 1.04,
+    'GCP': 0.97
+}
+
+# Regional price level relative to the provider's cheapest US region
+REGION_PRICE_FACTORS = {
+    'AWS': {
+        'us-east-1': 1.0,
+        'us-east-2': 1.0,
+        'us-west-1': 1.16,
+        'us-west-2': 1.0,
+        'ca-central-1': 1.09,
+        'eu-west-1': 1.10,
+        'eu-west-2': 1.14,
+        'eu-central-1': 1.16,
+        'ap-south-1': 1.05,
+        'ap-southeast-1': 1.20,
+        'ap-southeast-2': 1.22,
+        'ap-northeast-1': 1.25,
+        'sa-east-1': 1.50
+    },
+    'Azure': {
+        'eastus': 1.0,
+        'eastus2': 1.0,
+        'westus2': 1.0,
+        'centralus': 1.05,
+        'northeurope': 1.09,
+        'westeurope': 1.13,
+        'uksouth': 1.12,
+        'southeastasia': 1.18,
+        'japaneast': 1.24,
+        'centralindia': 1.04,
+        'brazilsouth': 1.52
+    },
+    'GCP': {
+        'us-central1': 1.0,
+        'us-east1': 1.0,
+        'us-west1': 1.0,
+        'us-east4': 1.12,
+        'europe-west1': 1.10,
+        'europe-west2': 1.20,
+        'europe-west3': 1.20,
+        'asia-south1': 1.08,
+        'asia-southeast1': 1.23,
+        'asia-northeast1': 1.28,
+        'southamerica-east1': 1.58
+    }
+}
+
+# Effective rate multipliers per purchasing option. Managed databases have no
+# spot market, so spot scenarios keep on-demand database pricing.
+PRICING_MODELS = {
+    'on-demand': {'label': 'On-Demand', 'compute_factor': 1.0, 'database_factor': 1.0},
+    '1yr-ri': {'label': '1-Year Reserved', 'compute_factor': 0.62, 'database_factor': 0.66},
+    '3yr-ri': {'label': '3-Year Reserved', 'compute_factor': 0.40, 'database_factor': 0.45},
+    'spot': {'label': 'Spot', 'compute_factor': 0.30, 'database_factor': 1.0}
+}
+
+_PRICING_MODEL_ALIASES = {
+    'ondemand': 'on-demand',
+    'on_demand': 'on-demand',
+    '1yr': '1yr-ri',
+    '1yr_ri': '1yr-ri',
+    '1-year': '1yr-ri',
+    'reserved-1yr': '1yr-ri',
+    '3yr': '3yr-ri',
+    '3yr_ri': '3yr-ri',
+    '3-year': '3yr-ri',
+    'reserved-3yr': '3yr-ri'
+}
+
+
+def normalize_provider(cloud_provider: str) -> str:
+    """Map a user supplied provider name onto a catalog key"""
+    for provider in PROVIDER_PRICE_FACTORS:
+        if provider.lower() == str(cloud_provider or '').strip().lower():
+            return provider
+    raise ValueError(f"Unsupported cloud provider: {cloud_provider}")
+
+
+def normalize_pricing_model(pricing_model: str) -> str:
+    """Map a user supplied pricing model name onto a catalog key"""
+    key = str(pricing_model or 'on-demand').strip().lower().replace(' ', '-')
+    key = _PRICING_MODEL_ALIASES.get(key, key)
+    if key not in PRICING_MODELS:
+        raise ValueError(f"Unsupported pricing model: {pricing_model}")
+    return key
+
+
+def get_location_price_factor(cloud_provider: str, target_region: str) -> Dict[str, Any]:
+    """Combined provider and region price factor for a target location"""
+    provider = normalize_provider(cloud_provider)
+    regions = REGION_PRICE_FACTORS[provider]
+    region_known = target_region in regions
+    region_factor = regions.get(target_region, 1.0)
+    return {
+        'cloud_provider': provider,
+        'target_region': target_region,
+        'price_factor': PROVIDER_PRICE_FACTORS[provider] * region_factor,
+        'region_pricing_known': region_known
+    }
+
+
+def rule_based_ec2_instances(vcpu, ram):
+    """Vectorized rule-engine EC2 sizing, returning the instance type per server"""
+    vcpu = np.asarray(vcpu, dtype=float)
+    ram = np.asarray(ram, dtype=float)
+    conditions = [(vcpu <= cpu) & (ram <= mem) for cpu, mem, _ in EC2_RULE_LADDER]
+    instances = [instance for _, _, instance in EC2_RULE_LADDER]
+    return np.select(conditions, instances, default=EC2_RULE_DEFAULT)
+
+
+def rule_based_ec2_hourly_rates(vcpu, ram):
+    """Vectorized rule-engine EC2 sizing, returning the on-demand hourly rate per server"""
+    vcpu = np.asarray(vcpu, dtype=float)
+    ram = np.asarray(ram, dtype=float)
+    conditions = [(vcpu <= cpu) & (ram <= mem) for cpu, mem, _ in EC2_RULE_LADDER]
+    rates = [EC2_PRICING[instance]['cost_per_hour'] for _, _, instance in EC2_RULE_LADDER]
+    return np.select(conditions, rates, default=EC2_PRICING[EC2_RULE_DEFAULT]['cost_per_hour'])
+
+
+def rule_based_rds_hourly_rates(size_gb, ha_required):
+    """Vectorized rule-engine RDS sizing, returning the on-demand hourly rate per database"""
+    size_gb = np.asarray(size_gb, dtype=float)
+    ha_required = np.asarray(ha_required, dtype=bool)
+    conditions = [size_gb <= limit for limit, _ in RDS_RULE_LADDER]
+    rates = [RDS_PRICING[instance] for _, instance in RDS_RULE_LADDER]
+    large_rate = np.where(ha_required, RDS_PRICING['db.m5.xlarge'], RDS_PRICING['db.m5.large'])
+    return np.select(conditions, rates, default=large_rate)
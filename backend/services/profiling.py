@@ -0,0 +1,287 @@
+"""On-demand and sampled request profiling: cProfile, stack samples, tracemalloc peak and SQL statements"""
+
+import cProfile
+import hmac
+import io
+import json
+import logging
+import os
+import pstats
+import random
+import shutil
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from .sql_instrumentation import start_statement_log, stop_statement_log
+
+DEFAULT_PROFILE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'profiles')
+
+
+class StackSampler:
+    """Samples one thread's Python stack on a timer and counts identical stacks
+
+    Counts are kept as folded stacks ("outer;inner;leaf"), the input format
+    of flamegraph.pl, speedscope and most other flamegraph viewers.
+    """
+
+    def __init__(self, thread_id: int, interval_seconds: float = 0.005):
+        self.thread_id = thread_id
+        self.interval_seconds = interval_seconds
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+    def _run(self):
+        while not self._stop.wait(self.interval_seconds):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(stack))] += 1
+
+
+class _Capture:
+    """Everything being recorded for one profiled request"""
+
+    def __init__(self, reason: str, interval_seconds: float):
+        self.reason = reason
+        self.started = time.perf_counter()
+        self.profile = cProfile.Profile()
+        self.sampler = StackSampler(threading.get_ident(), interval_seconds)
+        self.started_tracemalloc = not tracemalloc.is_tracing()
+        if self.started_tracemalloc:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        self.memory_at_start = tracemalloc.get_traced_memory()[0]
+        self.sql_token = start_statement_log()
+        self.sampler.start()
+        self.profile.enable()
+
+    def finish(self) -> Dict[str, Any]:
+        self.profile.disable()
+        stacks = self.sampler.stop()
+        statements = stop_statement_log(self.sql_token)
+        _, peak = tracemalloc.get_traced_memory()
+        top_allocations = [
+            {'location': str(stat.traceback[0]), 'size_bytes': stat.size, 'count': stat.count}
+            for stat in tracemalloc.take_snapshot().statistics('lineno')[:15]
+        ]
+        if self.started_tracemalloc:
+            tracemalloc.stop()
+        return {
+            'duration_seconds': round(time.perf_counter() - self.started, 6),
+            'stacks': stacks,
+            'statements': statements,
+            # Tracing is process-wide, so concurrent requests share this peak
+            'peak_memory_bytes': max(peak - self.memory_at_start, 0),
+            'top_allocations': top_allocations,
+        }
+
+    def abandon(self):
+        self.profile.disable()
+        self.sampler.stop()
+        stop_statement_log(self.sql_token)
+        if self.started_tracemalloc:
+            tracemalloc.stop()
+
+
+class RequestProfiler:
+    """Profiles requests asked for with a header/query parameter, or a random sample of all requests
+
+    On-demand profiling needs `X-Profile-Token` to match PROFILE_TOKEN and is
+    off when no token is configured; the same token guards the debug
+    endpoints. Each capture is stored under `profile_dir/<id>/` as a pstats
+    dump, folded stacks and a JSON summary, keeping the newest `max_profiles`.
+    """
+
+    def __init__(self, profile_dir: Optional[str] = None, token: Optional[str] = None,
+                 sample_rate: Optional[float] = None, interval_ms: Optional[float] = None,
+                 max_profiles: Optional[int] = None):
+        self.profile_dir = profile_dir or os.getenv('PROFILE_DIR') or DEFAULT_PROFILE_DIR
+        self.token = token if token is not None else os.getenv('PROFILE_TOKEN', '')
+        self.sample_rate = sample_rate if sample_rate is not None else float(os.getenv('PROFILE_SAMPLE_RATE', 0))
+        self.interval_seconds = (interval_ms if interval_ms is not None else
+                                 float(os.getenv('PROFILE_SAMPLE_INTERVAL_MS', 5))) / 1000
+        self.max_profiles = max_profiles or int(os.getenv('PROFILE_MAX_ARTIFACTS', 50))
+        self.logger = logging.getLogger(__name__)
+        # cProfile and tracemalloc are process-wide enough that one capture at a time keeps numbers honest
+        self._active = threading.Semaphore(1)
+
+    def authorized(self, headers) -> bool:
+        supplied = headers.get('X-Profile-Token', '')
+        return bool(self.token) and hmac.compare_digest(supplied, self.token)
+
+    def reason_to_profile(self, headers, args) -> Optional[str]:
+        """'requested', 'sampled' or None"""
+        requested = headers.get('X-Profile') or args.get('profile')
+        if requested and requested not in ('0', 'false') and self.authorized(headers):
+            return 'requested'
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return 'sampled'
+        return None
+
+    def start(self, reason: str) -> Optional[_Capture]:
+        if not self._active.acquire(blocking=False):
+            return None
+        try:
+            return _Capture(reason, self.interval_seconds)
+        except Exception:
+            self._active.release()
+            raise
+
+    def finish(self, capture: _Capture, meta: Dict[str, Any]) -> str:
+        """Stop the capture, store its artifacts and return the profile id"""
+        try:
+            result = capture.finish()
+            # Sortable by creation time, which retention relies on
+            now = time.time()
+            stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(now))
+            profile_id = f"{stamp}.{int(now % 1 * 1e6):06d}-{uuid.uuid4().hex[:6]}"
+            path = os.path.join(self.profile_dir, profile_id)
+            os.makedirs(path, exist_ok=True)
+            capture.profile.dump_stats(os.path.join(path, 'profile.pstats'))
+            with open(os.path.join(path, 'stacks.folded'), 'w') as f:
+                for stack, count in result['stacks'].most_common():
+                    f.write(f'{stack} {count}\n')
+            summary = dict(meta, id=profile_id, reason=capture.reason, duration_seconds=result['duration_seconds'],
+                           samples=sum(result['stacks'].values()), peak_memory_bytes=result['peak_memory_bytes'],
+                           top_allocations=result['top_allocations'], sql_statements=result['statements'],
+                           sql_seconds=round(sum(s['seconds'] for s in result['statements']), 6))
+            with open(os.path.join(path, 'summary.json'), 'w') as f:
+                json.dump(summary, f, indent=1, default=str)
+            self._prune()
+            return profile_id
+        finally:
+            self._active.release()
+
+    def abandon(self, capture: _Capture):
+        try:
+            capture.abandon()
+        finally:
+            self._active.release()
+
+    def list_profiles(self) -> List[Dict[str, Any]]:
+        """Newest first, without the bulky per-statement and allocation lists"""
+        profiles = []
+        for profile_id in self._profile_ids()[::-1]:
+            summary = self.load_summary(profile_id)
+            if summary:
+                profiles.append({key: value for key, value in summary.items()
+                                 if key not in ('sql_statements', 'top_allocations')})
+        return profiles
+
+    def load_summary(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        path = self._artifact(profile_id, 'summary.json')
+        if path is None:
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def folded_stacks(self, profile_id: str) -> Optional[str]:
+        path = self._artifact(profile_id, 'stacks.folded')
+        if path is None:
+            return None
+        with open(path) as f:
+            return f.read()
+
+    def pstats_text(self, profile_id: str, limit: int = 60) -> Optional[str]:
+        path = self._artifact(profile_id, 'profile.pstats')
+        if path is None:
+            return None
+        out = io.StringIO()
+        pstats.Stats(path, stream=out).sort_stats('cumulative').print_stats(limit)
+        return out.getvalue()
+
+    def _artifact(self, profile_id: str, name: str) -> Optional[str]:
+        # Ids come from URLs; only accept ones we created
+        if profile_id not in self._profile_ids():
+            return None
+        path = os.path.join(self.profile_dir, profile_id, name)
+        return path if os.path.exists(path) else None
+
+    def _profile_ids(self) -> List[str]:
+        if not os.path.isdir(self.profile_dir):
+            return []
+        return sorted(name for name in os.listdir(self.profile_dir)
+                      if os.path.isdir(os.path.join(self.profile_dir, name)))
+
+    def _prune(self):
+        for profile_id in self._profile_ids()[:-self.max_profiles]:
+            shutil.rmtree(os.path.join(self.profile_dir, profile_id), ignore_errors=True)
+
+
+def install_request_profiling(app, profiler: Optional[RequestProfiler] = None) -> RequestProfiler:
+    """Profile selected requests of a Flask app and serve the captures under /api/debug/profiles"""
+    from flask import Response, abort, g, jsonify, request
+
+    profiler = profiler or RequestProfiler()
+
+    @app.before_request
+    def _start_profile():
+        if request.path.startswith('/api/debug/profiles'):
+            return
+        reason = profiler.reason_to_profile(request.headers, request.args)
+        if reason:
+            g.request_profile = profiler.start(reason)
+
+    @app.after_request
+    def _finish_profile(response):
+        capture = g.pop('request_profile', None)
+        if capture is not None:
+            profile_id = profiler.finish(capture, {
+                'method': request.method, 'path': request.path,
+                'route': request.url_rule.rule if request.url_rule is not None else None,
+                'status': response.status_code, 'created_at': time.strftime('%Y-%m-%dT%H:%M:%S')
+            })
+            response.headers['X-Profile-Id'] = profile_id
+        return response
+
+    @app.teardown_request
+    def _abandon_profile(exc=None):
+        # Only reached with a capture when after_request didn't run (unhandled error)
+        capture = g.pop('request_profile', None)
+        if capture is not None:
+            profiler.abandon(capture)
+
+    @app.route('/api/debug/profiles', methods=['GET'])
+    def list_request_profiles():
+        if not profiler.authorized(request.headers):
+            abort(403)
+        return jsonify({'profiles': profiler.list_profiles()})
+
+    @app.route('/api/debug/profiles/<profile_id>', methods=['GET'])
+    def get_request_profile(profile_id):
+        if not profiler.authorized(request.headers):
+            abort(403)
+        output = request.args.get('format', 'folded')
+        if output == 'folded':
+            body = profiler.folded_stacks(profile_id)
+        elif output == 'pstats':
+            body = profiler.pstats_text(profile_id)
+        elif output == 'json':
+            summary = profiler.load_summary(profile_id)
+            return jsonify(summary) if summary else abort(404)
+        else:
+            return jsonify({'error': "format must be folded, pstats or json"}), 400
+        if body is None:
+            abort(404)
+        return Response(body, mimetype='text/plain')
+
+    return profiler
@@ -0,0 +1,157 @@
+"""Nearest-neighbour reuse of validated AI recommendations for near-identical components"""
+
+import copy
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .metrics import CACHE_REQUESTS
+
+# How each component type is encoded: categorical fields partition the index
+# (they must match exactly), numeric fields are log2-scaled and weighted so a
+# distance of 1.0 means "twice as big" on a fully weighted dimension.
+COMPONENT_FEATURES = {
+    'server': {
+        'id': 'server_id',
+        'categorical': ('os_type', 'technology'),
+        'numeric': (('vcpu', 1.0), ('ram', 1.0), ('disk_size', 0.25)),
+    },
+    'database': {
+        'id': 'db_name',
+        'categorical': ('db_type', 'ha_dr_required', 'performance_tier'),
+        'numeric': (('size_gb', 0.5),),
+    },
+    'storage': {
+        'id': 'share_name',
+        'categorical': ('access_pattern', 'access_frequency', 'file_types'),
+        'numeric': (('total_size_gb', 0.25), ('file_count', 0.1)),
+    },
+}
+
+# Which field of a recommendation decides whether a re-check agrees with a reused answer
+DECISION_FIELDS = {'server': 'recommended_instance', 'database': 'recommended_instance', 'storage': 'recommended_storage'}
+
+
+def _categorical_key(specs: Dict[str, Any], fields) -> Tuple[str, ...]:
+    return tuple(str(specs.get(field) or '').strip().lower() for field in fields)
+
+
+def _numeric_vector(specs: Dict[str, Any], numeric) -> np.ndarray:
+    values = np.array([float(specs.get(field) or 0) for field, _ in numeric])
+    weights = np.array([weight for _, weight in numeric])
+    return np.log2(np.maximum(values, 0) + 1) * weights
+
+
+class RecommendationIndex:
+    """Per-type kNN index over past validated recommendations
+
+    A component whose categorical fields match and whose weighted log-scaled
+    specs are within `max_distance` of an indexed one reuses that answer
+    instead of calling the model. Every `audit_every`-th reuse is re-asked
+    anyway and compared, which gives the drift rate.
+    """
+
+    def __init__(self, max_distance: Optional[float] = None, audit_every: Optional[int] = None,
+                 max_per_partition: int = 2000):
+        self.max_distance = max_distance if max_distance is not None else \
+            float(os.getenv('RECOMMENDATION_REUSE_DISTANCE', 0.15))
+        self.audit_every = audit_every if audit_every is not None else \
+            int(os.getenv('RECOMMENDATION_REUSE_AUDIT_EVERY', 20))
+        self.max_per_partition = max_per_partition
+
+        self._lock = threading.Lock()
+        # (component_type, categorical key) -> [matrix of vectors, list of (id, recommendation)]
+        self._partitions: Dict[Tuple, List[Any]] = {}
+        self.lookups = 0
+        self.matches = 0
+        self.reuses = 0
+        self.audits = 0
+        self.audit_mismatches = 0
+
+    def lookup(self, component_type: str, specs: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Closest indexed recommendation within range as {'recommendation', 'distance', 'audit'}, or None"""
+        features = COMPONENT_FEATURES.get(component_type)
+        if features is None or self.max_distance <= 0:
+            return None
+        partition_key = (component_type, _categorical_key(specs, features['categorical']))
+        vector = _numeric_vector(specs, features['numeric'])
+
+        with self._lock:
+            self.lookups += 1
+            partition = self._partitions.get(partition_key)
+            if partition is None:
+                CACHE_REQUESTS.inc(cache='recommendation_index', result='miss')
+                return None
+            matrix, entries = partition
+            distances = np.sqrt(((matrix - vector) ** 2).sum(axis=1))
+            nearest = int(distances.argmin())
+            distance = float(distances[nearest])
+            if distance > self.max_distance:
+                CACHE_REQUESTS.inc(cache='recommendation_index', result='miss')
+                return None
+            self.matches += 1
+            audit = self.audit_every > 0 and self.matches % self.audit_every == 0
+            self.reuses += 0 if audit else 1
+            CACHE_REQUESTS.inc(cache='recommendation_index', result='miss' if audit else 'hit')
+            source_id, recommendation = entries[nearest]
+
+        reused = copy.deepcopy(recommendation)
+        reused['reused_from'] = source_id
+        reused['reuse_distance'] = round(distance, 4)
+        return {'recommendation': reused, 'distance': distance, 'audit': audit}
+
+    def add(self, component_type: str, specs: Dict[str, Any], recommendation: Dict[str, Any],
+            audited: Optional[Dict[str, Any]] = None):
+        """Index a validated recommendation; when it re-checks a reuse, record whether they agree"""
+        features = COMPONENT_FEATURES.get(component_type)
+        if features is None or recommendation.get('synthetic'):
+            return
+        if audited is not None:
+            field = DECISION_FIELDS[component_type]
+            agrees = str(audited['recommendation'].get(field)).lower() == str(recommendation.get(field)).lower()
+            with self._lock:
+                self.audits += 1
+                self.audit_mismatches += 0 if agrees else 1
+
+        partition_key = (component_type, _categorical_key(specs, features['categorical']))
+        vector = _numeric_vector(specs, features['numeric'])
+        entry = (specs.get(features['id']), copy.deepcopy(recommendation))
+        with self._lock:
+            partition = self._partitions.get(partition_key)
+            if partition is None:
+                self._partitions[partition_key] = [vector[np.newaxis, :], [entry]]
+                return
+            matrix, entries = partition
+            matrix = np.vstack([matrix, vector])
+            entries.append(entry)
+            if len(entries) > self.max_per_partition:
+                matrix = matrix[1:]
+                del entries[0]
+            partition[0] = matrix
+
+    def reuse_or_recommend(self, component_type: str, specs: Dict[str, Any],
+                           recommend: Callable[[Dict[str, Any]], Dict[str, Any]],
+                           is_valid: Callable[[Dict[str, Any]], bool]) -> Dict[str, Any]:
+        """Reuse a neighbour's answer when close enough, otherwise ask `recommend` and index valid answers"""
+        match = self.lookup(component_type, specs)
+        if match is not None and not match['audit']:
+            return match['recommendation']
+        result = recommend(specs)
+        if is_valid(result):
+            self.add(component_type, specs, result, audited=match)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Reuse rate and drift for status endpoints"""
+        with self._lock:
+            return {
+                'indexed': sum(len(entries) for _, entries in self._partitions.values()),
+                'lookups': self.lookups,
+                'reuses': self.reuses,
+                'reuse_rate': round(self.reuses / self.lookups, 3) if self.lookups else 0.0,
+                'audits': self.audits,
+                'drift_rate': round(self.audit_mismatches / self.audits, 3) if self.audits else 0.0,
+                'max_distance': self.max_distance
+            }
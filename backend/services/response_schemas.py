@@ -0,0 +1,317 @@
+"""Compact AI response schemas, output-token budgets, and joining model answers with local pricing"""
+
+import json
+import os
+from typing import Any, Dict, List
+
+from .cost_model import monthly_running_hours
+from .pricing_catalog import (EC2_PRICING, RDS_PRICING, S3_PRICING, EBS_PRICING, RDS_STORAGE_PER_GB,
+                              RDS_BACKUP_PER_GB, RDS_RULE_LADDER, HOURS_PER_MONTH, get_location_price_factor,
+                              rule_based_ec2_instances)
+
+# (base tokens, tokens per inventory component) the answer of each call type needs
+TOKEN_BUDGETS = {
+    'server': (300, 0),
+    'database': (300, 0),
+    'storage': (300, 0),
+    'cost_optimization': (1000, 0),
+    'analysis': (1500, 0),
+    'cost_estimation': (400, 45),
+    'migration_strategy': (1500, 70),
+}
+
+# Only what the inventory doesn't already say is sent to the model
+PROMPT_FIELDS = {
+    'servers': ('server_id', 'os_type', 'vcpu', 'ram', 'disk_size', 'uptime_pattern', 'technology'),
+    'databases': ('db_name', 'db_type', 'size_gb', 'ha_dr_required', 'backup_frequency'),
+    'file_shares': ('share_name', 'total_size_gb', 'access_pattern'),
+}
+
+COST_ESTIMATION_SCHEMA = """{
+    "servers": [{"id": "<server_id>", "instance": "<EC2 type>", "note": "<max 12 words>"}],
+    "databases": [{"id": "<db_name>", "instance": "<RDS type>", "note": "<max 12 words>"}],
+    "storage": [{"id": "<share_name>", "storage": "S3 Standard|S3 IA|S3 Glacier", "note": "<max 12 words>"}],
+    "confidence_level": <0.0-1.0>,
+    "savings_percentage": <number>,
+    "tips": ["<max 4, one line each>"],
+    "recommendations": ["<max 4, one line each>"]
+}"""
+
+MIGRATION_STRATEGY_SCHEMA = """{
+    "approach": {"overall_strategy": "", "estimated_duration": "", "complexity_level": "Low|Medium|High", "rationale": ""},
+    "servers": [{"id": "<server_id>", "migration_type": "", "target_state": "", "complexity": "", "effort": "", "rationale": ""}],
+    "databases": [{"id": "<db_name>", "target_engine": "", "migration_type": "", "approach": "", "complexity": "", "data_strategy": "", "downtime": ""}],
+    "storage": [{"id": "<share_name>", "target_type": "", "method": "", "sync_strategy": "", "cutover": ""}],
+    "phases": [{"phase": 1, "name": "", "duration": "", "components": [""], "dependencies": [""], "risks": [""], "success_criteria": [""]}],
+    "recommendations": {"quick_wins": [""], "cost_optimization": [""], "performance_improvements": [""], "modernization_opportunities": [""]},
+    "risks": {"high": [""], "medium": [""], "low": [""], "mitigations": {"<risk>": "<mitigation>"}},
+    "confidence_level": <0.0-1.0>,
+    "strategic_recommendations": [""]
+}"""
+
+
+# Per-component sizing answers: the pick plus a short note, no free-text reasoning or alternatives
+SERVER_SCHEMA = """{
+    "recommended_instance": "<EC2 type>",
+    "note": "<max 12 words>",
+    "tips": ["<max 2, one line each>"],
+    "confidence_level": <0.0-1.0>
+}"""
+
+DATABASE_SCHEMA = """{
+    "recommended_instance": "<RDS type>",
+    "engine_recommendation": "<engine>",
+    "storage_type": "gp3|io1|aurora",
+    "multi_az": true|false,
+    "migration_complexity": "low|medium|high",
+    "note": "<max 12 words>",
+    "tips": ["<max 2, one line each>"],
+    "confidence_level": <0.0-1.0>
+}"""
+
+STORAGE_SCHEMA = """{
+    "recommended_storage": "<one of the options>",
+    "storage_class": "<specific class>",
+    "lifecycle_policy": "<max 12 words>",
+    "note": "<max 12 words>",
+    "tips": ["<max 2, one line each>"],
+    "confidence_level": <0.0-1.0>
+}"""
+
+
+def expand_component_answer(answer: Dict[str, Any], component_type: str) -> Dict[str, Any]:
+    """A compact component answer under the field names the cost calculator and UI read"""
+    if not isinstance(answer, dict) or 'error' in answer:
+        return answer
+    result = dict(answer)
+    if 'note' in result:
+        result['reasoning'] = result.pop('note')
+    if 'tips' in result:
+        result['cost_optimization_tips'] = result.pop('tips') or []
+    if component_type == 'server' and result.get('recommended_instance') and not result.get('instance_family'):
+        result['instance_family'] = str(result['recommended_instance']).split('.')[0]
+    return result
+
+
+def component_count(infrastructure_data: Dict[str, Any]) -> int:
+    return sum(len(infrastructure_data.get(kind) or []) for kind in PROMPT_FIELDS)
+
+
+def output_token_budget(call_type: str, components: int = 0) -> int:
+    """max_tokens for a call type, growing with the number of rows the answer must cover"""
+    base, per_component = TOKEN_BUDGETS.get(call_type, (4000, 0))
+    return min(base + per_component * components, int(os.getenv('AI_MAX_OUTPUT_TOKENS', 4000)))
+
+
+def compact_inventory(infrastructure_data: Dict[str, Any]) -> str:
+    """Inventory rows trimmed to the fields the model reasons about, as compact JSON"""
+    return json.dumps({
+        kind: [{field: row.get(field) for field in fields if row.get(field) is not None}
+               for row in infrastructure_data.get(kind) or []]
+        for kind, fields in PROMPT_FIELDS.items()
+    }, separators=(',', ':'), default=str)
+
+
+def _by_id(rows) -> Dict[str, Dict[str, Any]]:
+    return {str(row.get('id')): row for row in rows or [] if isinstance(row, dict) and row.get('id') is not None}
+
+
+def _rule_rds_instance(size_gb: float, ha_required) -> str:
+    for limit, instance in RDS_RULE_LADDER:
+        if size_gb <= limit:
+            return instance
+    return 'db.m5.xlarge' if ha_required else 'db.m5.large'
+
+
+def _s3_class(recommended_storage: str) -> str:
+    recommended_storage = str(recommended_storage or '').lower()
+    if 'glacier' in recommended_storage:
+        return 'glacier'
+    if 'ia' in recommended_storage.split() or 'infrequent' in recommended_storage:
+        return 'ia'
+    return 'standard'
+
+
+def migration_services_cost(n_servers: int, n_databases: int) -> Dict[str, Any]:
+    """Professional services estimate: $1000 per server or database, split across two roles"""
+    migration_cost = (n_servers + n_databases) * 1000
+    return {
+        "total_professional_services_cost": migration_cost,
+        "resource_breakdown": [
+            {
+                "role": "Cloud Architect",
+                "rate_per_hour": 150,
+                "hours_per_week": 20,
+                "duration_weeks": 4,
+                "total_hours": 80,
+                "total_cost": migration_cost * 0.6
+            },
+            {
+                "role": "Migration Specialist",
+                "rate_per_hour": 125,
+                "hours_per_week": 20,
+                "duration_weeks": 4,
+                "total_hours": 80,
+                "total_cost": migration_cost * 0.4
+            }
+        ]
+    }
+
+
+def assemble_cost_estimation(answer: Dict[str, Any], infrastructure_data: Dict[str, Any],
+                             cloud_provider: str, target_region: str) -> Dict[str, Any]:
+    """Full cost-estimation response from the model's picks, priced and totalled locally"""
+    try:
+        price_factor = get_location_price_factor(cloud_provider, target_region)['price_factor']
+    except ValueError:
+        price_factor = 1.0
+    servers = infrastructure_data.get('servers') or []
+    databases = infrastructure_data.get('databases') or []
+    file_shares = infrastructure_data.get('file_shares') or []
+
+    server_picks = _by_id(answer.get('servers'))
+    rule_instances = rule_based_ec2_instances([s.get('vcpu') or 0 for s in servers], [s.get('ram') or 0 for s in servers])
+    server_rows = []
+    for server, rule_instance in zip(servers, rule_instances):
+        pick = server_picks.get(str(server.get('server_id')), {})
+        instance = pick.get('instance') if pick.get('instance') in EC2_PRICING else str(rule_instance)
+        monthly = (EC2_PRICING[instance]['cost_per_hour'] * monthly_running_hours(server.get('uptime_pattern'))
+                   + (server.get('disk_size') or 0) * EBS_PRICING['gp3']) * price_factor
+        server_rows.append({
+            "server_id": server.get('server_id'),
+            "current_specs": f"{server.get('vcpu')} vCPU, {server.get('ram')}GB RAM, {server.get('disk_size')}GB Storage",
+            "recommended_instance": instance,
+            "monthly_cost": round(monthly, 2),
+            "annual_cost": round(monthly * 12, 2),
+            "optimization_notes": pick.get('note') or "Sized by rule engine"
+        })
+
+    db_picks = _by_id(answer.get('databases'))
+    db_rows = []
+    for database in databases:
+        pick = db_picks.get(str(database.get('db_name')), {})
+        size_gb = database.get('size_gb') or 0
+        instance = pick.get('instance') if pick.get('instance') in RDS_PRICING else \
+            _rule_rds_instance(size_gb, database.get('ha_dr_required'))
+        monthly = RDS_PRICING[instance] * HOURS_PER_MONTH + size_gb * RDS_STORAGE_PER_GB
+        if str(database.get('backup_frequency') or '').lower() == 'daily':
+            monthly += size_gb * RDS_BACKUP_PER_GB
+        monthly *= price_factor
+        db_rows.append({
+            "db_name": database.get('db_name'),
+            "db_type": database.get('db_type'),
+            "recommended_instance": instance,
+            "size_gb": size_gb,
+            "monthly_cost": round(monthly, 2),
+            "annual_cost": round(monthly * 12, 2),
+            "optimization_notes": pick.get('note') or "Sized by rule engine"
+        })
+
+    share_picks = _by_id(answer.get('storage'))
+    share_rows = []
+    for share in file_shares:
+        pick = share_picks.get(str(share.get('share_name')), {})
+        storage = pick.get('storage') or 'S3 Standard'
+        monthly = (share.get('total_size_gb') or 0) * S3_PRICING[_s3_class(storage)] * price_factor
+        share_rows.append({
+            "share_name": share.get('share_name'),
+            "size_gb": share.get('total_size_gb'),
+            "recommended_storage": storage,
+            "access_pattern": share.get('access_pattern'),
+            "monthly_cost": round(monthly, 2),
+            "annual_cost": round(monthly * 12, 2),
+            "optimization_notes": pick.get('note') or "Placed by access pattern"
+        })
+
+    server_monthly = sum(row['monthly_cost'] for row in server_rows)
+    db_monthly = sum(row['monthly_cost'] for row in db_rows)
+    storage_monthly = sum(row['monthly_cost'] for row in share_rows)
+    total_monthly = server_monthly + db_monthly + storage_monthly
+    services = migration_services_cost(len(servers), len(databases))
+    one_time = services['total_professional_services_cost']
+    savings_percentage = float(answer.get('savings_percentage') or 0)
+
+    return {
+        "grand_total": {
+            "annual_cloud_cost": round(total_monthly * 12, 2),
+            "one_time_migration_cost": one_time,
+            "total_first_year_cost": round(total_monthly * 12 + one_time, 2)
+        },
+        "cloud_infrastructure": {
+            "servers": {"total_monthly_cost": round(server_monthly, 2), "total_annual_cost": round(server_monthly * 12, 2),
+                        "server_recommendations": server_rows},
+            "databases": {"total_monthly_cost": round(db_monthly, 2), "total_annual_cost": round(db_monthly * 12, 2),
+                          "database_recommendations": db_rows},
+            "storage": {"total_monthly_cost": round(storage_monthly, 2), "total_annual_cost": round(storage_monthly * 12, 2),
+                        "storage_recommendations": share_rows},
+            "total_monthly_cost": round(total_monthly, 2),
+            "total_annual_cost": round(total_monthly * 12, 2)
+        },
+        "migration_services": services,
+        "ai_insights": {
+            "confidence_level": answer.get('confidence_level'),
+            "cost_optimization_tips": answer.get('tips') or [],
+            "potential_savings": {
+                "percentage": savings_percentage,
+                "annual_amount": round(total_monthly * 12 * savings_percentage / 100, 2)
+            },
+            "recommendations": answer.get('recommendations') or []
+        }
+    }
+
+
+def assemble_migration_strategy(answer: Dict[str, Any], infrastructure_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Full migration-strategy response: the model's decisions joined with the inventory's current state"""
+    servers = {str(s.get('server_id')): s for s in infrastructure_data.get('servers') or []}
+    databases = {str(d.get('db_name')): d for d in infrastructure_data.get('databases') or []}
+    shares = {str(f.get('share_name')): f for f in infrastructure_data.get('file_shares') or []}
+
+    def rows(kind) -> List[Dict[str, Any]]:
+        return [row for row in answer.get(kind) or [] if isinstance(row, dict)]
+
+    risks = answer.get('risks') or {}
+    return {
+        "migration_approach": answer.get('approach') or {},
+        "component_strategies": {
+            "servers": [{
+                "server_id": row.get('id'),
+                "migration_type": row.get('migration_type'),
+                "current_state": "{os_type} server, {vcpu} vCPU / {ram}GB RAM".format(
+                    **{k: servers.get(str(row.get('id')), {}).get(k, '?') for k in ('os_type', 'vcpu', 'ram')}),
+                "target_state": row.get('target_state'),
+                "complexity": row.get('complexity'),
+                "estimated_effort": row.get('effort'),
+                "rationale": row.get('rationale')
+            } for row in rows('servers')],
+            "databases": [{
+                "db_name": row.get('id'),
+                "current_engine": databases.get(str(row.get('id')), {}).get('db_type'),
+                "target_engine": row.get('target_engine'),
+                "migration_type": row.get('migration_type'),
+                "approach": row.get('approach'),
+                "complexity": row.get('complexity'),
+                "data_migration_strategy": row.get('data_strategy'),
+                "downtime_estimate": row.get('downtime')
+            } for row in rows('databases')],
+            "storage": [{
+                "share_name": row.get('id'),
+                "current_type": f"File share ({shares.get(str(row.get('id')), {}).get('access_pattern', 'unknown')} access)",
+                "target_type": row.get('target_type'),
+                "migration_method": row.get('method'),
+                "sync_strategy": row.get('sync_strategy'),
+                "cutover_approach": row.get('cutover')
+            } for row in rows('storage')]
+        },
+        "migration_phases": answer.get('phases') or [],
+        "recommendations": answer.get('recommendations') or {},
+        "risk_assessment": {
+            "high_risks": risks.get('high') or [],
+            "medium_risks": risks.get('medium') or [],
+            "low_risks": risks.get('low') or [],
+            "mitigation_strategies": risks.get('mitigations') or {}
+        },
+        "ai_insights": {
+            "confidence_level": answer.get('confidence_level'),
+            "strategic_recommendations": answer.get('strategic_recommendations') or []
+        }
+    }
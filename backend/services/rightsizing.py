@@ -0,0 +1,321 @@
+import json
+import logging
+import os
+import threading
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+
+from .pricing_catalog import EC2_PRICING, EC2_RULE_DEFAULT, rule_based_ec2_instances
+from .cost_model import UptimeCostModel
+from .columnar_inventory import ColumnarTable
+
+# Families considered as consolidation hosts (burstable t3 is excluded)
+CONSOLIDATION_HOST_FAMILIES = ('m5', 'c5', 'r5')
+
+# General purpose families used for like-for-like rehosting of servers beyond the rule ladder
+REHOST_FAMILIES = ('m5',)
+
+# Servers at or below this size are candidates for consolidation
+DEFAULT_CONSOLIDATION_LIMITS = {'vcpu': 4, 'ram': 16}
+
+# Number of cheapest-per-capacity host types tried for each consolidation group
+HOST_CANDIDATES_PER_GROUP = 4
+
+CONSOLIDATION_MODES = ('none', 'greedy')
+
+
+def load_instance_catalog(path: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """Built-in EC2 catalog, extended with instances from a JSON file if one is configured
+
+    The file may hold a list of {"instance", "cpu", "ram", "cost_per_hour"}
+    objects or a mapping of instance name to {"cpu", "ram", "cost_per_hour"}.
+    """
+    catalog = {name: dict(spec) for name, spec in EC2_PRICING.items()}
+    path = path or os.getenv('INSTANCE_CATALOG_PATH')
+    if not path:
+        return catalog
+
+    with open(path) as f:
+        extra = json.load(f)
+    if isinstance(extra, list):
+        extra = {item['instance']: item for item in extra}
+    for name, spec in extra.items():
+        catalog[name] = {
+            'cpu': float(spec.get('cpu', spec.get('vcpu'))),
+            'ram': float(spec['ram']),
+            'cost_per_hour': float(spec['cost_per_hour'])
+        }
+    return catalog
+
+
+def _os_family(os_type: Optional[str]) -> str:
+    """Coarse OS family - only servers of the same family can share a host"""
+    os_type = (os_type or '').lower()
+    if 'windows' in os_type:
+        return 'windows'
+    if any(x in os_type for x in ['linux', 'ubuntu', 'centos', 'rhel', 'red hat', 'debian', 'suse', 'amazon']):
+        return 'linux'
+    return 'other'
+
+
+def _catalog_arrays(catalog: Dict[str, Dict[str, Any]]):
+    """Instance names, vCPUs, RAM and hourly prices of a catalog as parallel arrays"""
+    names = np.array(list(catalog))
+    return (names,
+            np.array([catalog[n]['cpu'] for n in names], dtype=float),
+            np.array([catalog[n]['ram'] for n in names], dtype=float),
+            np.array([catalog[n]['cost_per_hour'] for n in names], dtype=float))
+
+
+def _cheapest_of(names, cpu, ram, price, need_cpu: np.ndarray, need_ram: np.ndarray):
+    """Cheapest (instance, count, hourly cost) per server among the given types"""
+    counts = np.maximum(
+        np.ceil(need_cpu[:, None] / cpu[None, :]),
+        np.ceil(need_ram[:, None] / ram[None, :])
+    )
+    counts = np.maximum(counts, 1)
+    cost = counts * price[None, :]
+    # Split a server across instances only when no single type can hold it
+    fits_single = (counts == 1).any(axis=1)
+    best = np.argmin(np.where(fits_single[:, None] & (counts > 1), np.inf, cost), axis=1)
+    rows = np.arange(len(need_cpu))
+    return names[best], counts[rows, best].astype(int), cost[rows, best]
+
+
+class RightSizingOptimizer:
+    """Pick the cheapest instance per server across families and propose consolidations"""
+
+    def __init__(self, catalog: Optional[Dict[str, Dict[str, Any]]] = None, cpu_headroom: float = 0.0,
+                 ram_headroom: float = 0.0, families: Optional[List[str]] = None):
+        self.logger = logging.getLogger(__name__)
+        catalog = catalog or load_instance_catalog()
+        # The rehost baseline is what the servers cost moved as-is, whatever families the caller allows
+        rehost_catalog = {name: spec for name, spec in catalog.items() if name.split('.')[0] in REHOST_FAMILIES} or \
+            {name: spec for name, spec in EC2_PRICING.items() if name.split('.')[0] in REHOST_FAMILIES}
+        self.rehost_names, self.rehost_cpu, self.rehost_ram, self.rehost_price = _catalog_arrays(rehost_catalog)
+        if families:
+            catalog = {name: spec for name, spec in catalog.items() if name.split('.')[0] in families}
+        if not catalog:
+            raise ValueError("Instance catalog is empty")
+        if cpu_headroom < 0 or ram_headroom < 0:
+            raise ValueError("Headroom must be zero or positive")
+
+        self.cpu_headroom = cpu_headroom
+        self.ram_headroom = ram_headroom
+        self.cost_model = UptimeCostModel()
+
+        self.instance_names, self.instance_cpu, self.instance_ram, self.instance_price = _catalog_arrays(catalog)
+        self.instance_family = np.array([n.split('.')[0] for n in self.instance_names])
+
+    def recommend_instance(self, vcpu, ram) -> str:
+        """Cheapest instance type for one server (servers above the largest type need several)"""
+        names, _, _ = self._cheapest_instances(np.array([vcpu or 0], dtype=float), np.array([ram or 0], dtype=float))
+        return str(names[0])
+
+    def recommend_instances(self, vcpu, ram) -> List[str]:
+        """Cheapest instance type for each of many servers in one vectorized pass"""
+        vcpu = np.nan_to_num(np.asarray(vcpu, dtype=float))
+        ram = np.nan_to_num(np.asarray(ram, dtype=float))
+        names, _, _ = self._cheapest_instances(vcpu, ram)
+        return names.tolist()
+
+    def optimize(self, servers: List[Dict[str, Any]], mode: str = 'greedy',
+                 consolidation_limits: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+        """Right-size every server and, in greedy mode, bin-pack small servers onto shared hosts"""
+        if mode not in CONSOLIDATION_MODES:
+            raise ValueError(f"Unsupported consolidation mode: {mode}")
+        limits = {**DEFAULT_CONSOLIDATION_LIMITS, **(consolidation_limits or {})}
+
+        server_ids, vcpu, ram, pattern_indices, families = self._server_columns(servers)
+        hours = self.cost_model.pattern_running_hours[pattern_indices]
+
+        # 1:1 rehost baseline from the existing rule engine
+        rehost_instances, rehost_counts, rehost_hourly = self._rehost_instances(vcpu, ram)
+        rehost_monthly = rehost_hourly * hours
+
+        # Per-server cheapest instance across all families
+        best_names, best_counts, best_hourly = self._cheapest_instances(vcpu, ram)
+        rightsized_monthly = best_hourly * hours
+
+        consolidations = []
+        group_of = np.full(len(servers), -1)
+        if mode == 'greedy' and len(servers):
+            candidates = (vcpu <= limits['vcpu']) & (ram <= limits['ram'])
+            keys = np.char.add(np.char.add(families.astype(str), '|'), pattern_indices.astype(str))
+            for key in np.unique(keys[candidates]):
+                members = np.nonzero(candidates & (keys == key))[0]
+                if len(members) < 2:
+                    continue
+                proposal = self._consolidate_group(members, vcpu, ram, hours, rightsized_monthly)
+                if proposal is None:
+                    continue
+                proposal['group_id'] = len(consolidations) + 1
+                proposal['os_family'] = key.split('|')[0]
+                proposal['usage_profile'] = self.cost_model.pattern_names[pattern_indices[members[0]]]
+                proposal['servers'] = [server_ids[i] for i in members]
+                group_of[members] = proposal['group_id']
+                consolidations.append(proposal)
+
+        standalone = group_of < 0
+        optimized_total = float(rightsized_monthly[standalone].sum()) + sum(c['monthly_cost'] for c in consolidations)
+        rehost_total = float(rehost_monthly.sum())
+
+        return {
+            'summary': {
+                'server_count': len(servers),
+                'mode': mode,
+                'cpu_headroom': self.cpu_headroom,
+                'ram_headroom': self.ram_headroom,
+                'rehost_monthly_cost': round(rehost_total, 2),
+                'rightsized_monthly_cost': round(float(rightsized_monthly.sum()), 2),
+                'optimized_monthly_cost': round(optimized_total, 2),
+                'monthly_savings_vs_rehost': round(rehost_total - optimized_total, 2),
+                'savings_percent_vs_rehost': round((1 - optimized_total / rehost_total) * 100, 1) if rehost_total else 0.0,
+                'consolidation_groups': len(consolidations),
+                'servers_consolidated': int((~standalone).sum())
+            },
+            'servers': [
+                {
+                    'server_id': server_id,
+                    'vcpu': float(vcpu[i]),
+                    'ram': float(ram[i]),
+                    'rehost_instance': str(rehost_instances[i]),
+                    'rehost_instance_count': int(rehost_counts[i]),
+                    'rehost_monthly_cost': round(float(rehost_monthly[i]), 2),
+                    'recommended_instance': str(best_names[i]),
+                    'instance_count': int(best_counts[i]),
+                    'recommended_monthly_cost': round(float(rightsized_monthly[i]), 2),
+                    'consolidation_group': int(group_of[i]) if group_of[i] > 0 else None
+                }
+                for i, server_id in enumerate(server_ids)
+            ],
+            'consolidations': consolidations
+        }
+
+    def _server_columns(self, servers):
+        """Server ids, vcpu, ram, uptime-pattern indices and OS families as arrays"""
+        if isinstance(servers, ColumnarTable):
+            # Patterns and OS types are classified once per distinct value, not once per server
+            pattern_indices = servers.map('uptime_pattern', lambda p: self.cost_model.pattern_indices([p])[0],
+                                          dtype=np.intp)
+            return (servers.values('server_id'), servers.numeric('vcpu'), servers.numeric('ram'), pattern_indices,
+                    servers.map('os_type', _os_family, dtype=str))
+        return (
+            [s.get('server_id') for s in servers],
+            np.array([s.get('vcpu') or 0 for s in servers], dtype=float),
+            np.array([s.get('ram') or 0 for s in servers], dtype=float),
+            self.cost_model.pattern_indices([s.get('uptime_pattern') for s in servers]),
+            np.array([_os_family(s.get('os_type')) for s in servers])
+        )
+
+    def _cheapest_instances(self, vcpu: np.ndarray, ram: np.ndarray):
+        """Cheapest (instance, count) per server; oversized servers get several of one type"""
+        return _cheapest_of(self.instance_names, self.instance_cpu, self.instance_ram, self.instance_price,
+                            vcpu * (1 + self.cpu_headroom), ram * (1 + self.ram_headroom))
+
+    def _rehost_instances(self, vcpu: np.ndarray, ram: np.ndarray):
+        """1:1 rehost baseline: the rule-engine ladder, or like-for-like general purpose capacity beyond it"""
+        names = rule_based_ec2_instances(vcpu, ram).astype(object)
+        counts = np.ones(len(vcpu), dtype=int)
+        hourly = np.array([EC2_PRICING[name]['cost_per_hour'] for name in names], dtype=float)
+
+        default = EC2_PRICING[EC2_RULE_DEFAULT]
+        oversized = (vcpu > default['cpu']) | (ram > default['ram'])
+        if oversized.any():
+            big_names, big_counts, big_hourly = _cheapest_of(
+                self.rehost_names, self.rehost_cpu, self.rehost_ram, self.rehost_price, vcpu[oversized], ram[oversized]
+            )
+            names[oversized] = big_names
+            counts[oversized] = big_counts
+            hourly[oversized] = big_hourly
+        return names, counts, hourly
+
+    def _consolidate_group(self, members, vcpu, ram, hours, rightsized_monthly) -> Optional[Dict[str, Any]]:
+        """First-fit-decreasing packing of one group onto the cheapest host type, if it saves money"""
+        item_cpu = vcpu[members] * (1 + self.cpu_headroom)
+        item_ram = ram[members] * (1 + self.ram_headroom)
+        group_hours = hours[members[0]]
+        individual_cost = float(rightsized_monthly[members].sum())
+
+        # Host types that fit the largest member, ranked by price per unit of capacity
+        hosts = np.nonzero(
+            np.isin(self.instance_family, CONSOLIDATION_HOST_FAMILIES) &
+            (self.instance_cpu >= item_cpu.max()) & (self.instance_ram >= item_ram.max())
+        )[0]
+        if len(hosts) == 0:
+            return None
+        demand_ratio = item_ram.sum() / max(item_cpu.sum(), 1e-9)
+        unit_price = self.instance_price[hosts] / np.minimum(self.instance_cpu[hosts], self.instance_ram[hosts] / demand_ratio)
+        hosts = hosts[np.argsort(unit_price)[:HOST_CANDIDATES_PER_GROUP]]
+
+        best = None
+        for host in hosts:
+            bins = self._first_fit_decreasing(item_cpu, item_ram, self.instance_cpu[host], self.instance_ram[host])
+            cost = bins * self.instance_price[host] * group_hours
+            if best is None or cost < best[1]:
+                best = (host, cost, bins)
+
+        host, cost, bins = best
+        if cost >= individual_cost or bins >= len(members):
+            return None
+        return {
+            'host_instance': str(self.instance_names[host]),
+            'host_count': int(bins),
+            'server_count': len(members),
+            'monthly_cost': round(float(cost), 2),
+            'individual_monthly_cost': round(individual_cost, 2),
+            'monthly_savings': round(individual_cost - float(cost), 2)
+        }
+
+    @staticmethod
+    def _first_fit_decreasing(item_cpu, item_ram, bin_cpu, bin_ram) -> int:
+        """Number of bins used by 2-D first-fit-decreasing on the dominant resource share"""
+        order = np.argsort(-np.maximum(item_cpu / bin_cpu, item_ram / bin_ram), kind='stable')
+        free_cpu = np.empty(len(order))
+        free_ram = np.empty(len(order))
+        opened = 0
+        for i in order:
+            fits = (free_cpu[:opened] >= item_cpu[i]) & (free_ram[:opened] >= item_ram[i])
+            slot = int(np.argmax(fits)) if opened else 0
+            if not opened or not fits[slot]:
+                slot = opened
+                free_cpu[slot] = bin_cpu
+                free_ram[slot] = bin_ram
+                opened += 1
+            free_cpu[slot] -= item_cpu[i]
+            free_ram[slot] -= item_ram[i]
+        return opened
+
+
+# Per-process caches keyed by INSTANCE_CATALOG_PATH, so a changed path is read afresh
+_catalogs: Dict[Optional[str], Dict[str, Dict[str, Any]]] = {}
+_optimizers: Dict[Optional[str], RightSizingOptimizer] = {}
+_lock = threading.Lock()
+
+
+def get_instance_catalog() -> Dict[str, Dict[str, Any]]:
+    """Configured instance catalog, read once per catalog path; shared, so treat it as read-only"""
+    path = os.getenv('INSTANCE_CATALOG_PATH') or None
+    catalog = _catalogs.get(path)
+    if catalog is not None:
+        return catalog
+
+    with _lock:
+        if path not in _catalogs:
+            _catalogs[path] = load_instance_catalog(path)
+        return _catalogs[path]
+
+
+def get_rightsizing_optimizer() -> RightSizingOptimizer:
+    """Shared optimizer without headroom or family filters, created on first use"""
+    path = os.getenv('INSTANCE_CATALOG_PATH') or None
+    optimizer = _optimizers.get(path)
+    if optimizer is not None:
+        return optimizer
+
+    catalog = get_instance_catalog()
+    with _lock:
+        if path not in _optimizers:
+            _optimizers[path] = RightSizingOptimizer(catalog=catalog)
+        return _optimizers[path]
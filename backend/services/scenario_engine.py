@@ -0,0 +1,207 @@
+import itertools
+import logging
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+
+from .pricing_catalog import (
+    EBS_PRICING, S3_PRICING, RDS_STORAGE_PER_GB, RDS_BACKUP_PER_GB, HOURS_PER_MONTH, PRICING_MODELS,
+    normalize_pricing_model, get_location_price_factor,
+    rule_based_ec2_hourly_rates, rule_based_rds_hourly_rates
+)
+from .cost_model import UptimeCostModel, monthly_running_hours
+from .columnar_inventory import ColumnarTable
+from .compute_pool import ComputePool, get_compute_pool
+
+# Upper bound on scenarios priced in a single request
+MAX_SCENARIOS = 500
+
+# Servers priced per process-pool task when a large inventory is offloaded
+SERVER_CHUNK_ROWS = 100000
+
+# Worker-side engine, built once per process
+_worker_engine: Optional['ScenarioComparisonEngine'] = None
+
+
+def price_server_chunk(tables: Dict[str, ColumnarTable], start: int, stop: int) -> np.ndarray:
+    """Process-pool task: server price totals (see `_server_totals`) for rows `start:stop`"""
+    global _worker_engine
+    if _worker_engine is None:
+        _worker_engine = ScenarioComparisonEngine()
+    return _worker_engine._server_totals(tables['servers'][start:stop])
+
+
+class ScenarioComparisonEngine:
+    """Price an inventory against many provider/region/pricing/uptime scenarios at once"""
+
+    def __init__(self, pool: Optional[ComputePool] = None):
+        self.logger = logging.getLogger(__name__)
+        self.cost_model = UptimeCostModel()
+        # Large columnar server tables are priced in chunks on this (or the shared) process pool
+        self.pool = pool
+
+    @staticmethod
+    def build_scenarios(matrix: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Expand a scenario matrix (or explicit scenario list) into scenario dicts"""
+        if matrix.get('scenarios'):
+            scenarios = [dict(s) for s in matrix['scenarios']]
+        else:
+            providers = matrix.get('cloud_providers') or [matrix.get('cloud_provider', 'AWS')]
+            regions = matrix.get('target_regions') or [matrix.get('target_region', 'us-east-1')]
+            pricing_models = matrix.get('pricing_models') or ['on-demand']
+            uptime_patterns = matrix.get('uptime_patterns') or [None]
+            scenarios = [
+                {
+                    'cloud_provider': provider,
+                    'target_region': region,
+                    'pricing_model': pricing_model,
+                    'uptime_pattern': uptime_pattern
+                }
+                for provider, region, pricing_model, uptime_pattern
+                in itertools.product(providers, regions, pricing_models, uptime_patterns)
+            ]
+
+        if not scenarios:
+            raise ValueError("At least one scenario is required")
+        if len(scenarios) > MAX_SCENARIOS:
+            raise ValueError(f"Too many scenarios ({len(scenarios)}); the limit is {MAX_SCENARIOS}")
+        return scenarios
+
+    def compare(self, infrastructure_data: Dict[str, Any], scenarios: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Price the whole inventory against every scenario and rank the results"""
+        servers = infrastructure_data.get('servers', [])
+        databases = infrastructure_data.get('databases', [])
+        file_shares = infrastructure_data.get('file_shares', [])
+
+        # Resolve scenario parameters into one factor vector per dimension
+        resolved = []
+        for scenario in scenarios:
+            location = get_location_price_factor(
+                scenario.get('cloud_provider', 'AWS'),
+                scenario.get('target_region', 'us-east-1')
+            )
+            pricing_model = normalize_pricing_model(scenario.get('pricing_model'))
+            resolved.append({
+                **location,
+                'pricing_model': pricing_model,
+                'uptime_pattern': scenario.get('uptime_pattern')
+            })
+
+        location_factor = np.array([s['price_factor'] for s in resolved])
+        compute_factor = np.array([PRICING_MODELS[s['pricing_model']]['compute_factor'] for s in resolved])
+        database_factor = np.array([PRICING_MODELS[s['pricing_model']]['database_factor'] for s in resolved])
+
+        # Per-component base prices, computed once for all scenarios
+        hourly_total, own_hourly_total, server_storage = self._price_server_totals(servers)
+        db_monthly = self._price_databases(databases)
+        storage_monthly = self._price_file_shares(file_shares)
+
+        # Every server runs a scenario's uptime pattern, or its own when the scenario has none
+        compute_running = np.array([
+            monthly_running_hours(s['uptime_pattern']) * hourly_total if s['uptime_pattern'] else own_hourly_total
+            for s in resolved
+        ], dtype=float)
+
+        compute_monthly = compute_running * compute_factor * location_factor
+        compute_monthly += server_storage * location_factor
+        database_monthly = db_monthly.sum() * database_factor * location_factor
+        file_storage_monthly = storage_monthly.sum() * location_factor
+        total_monthly = compute_monthly + database_monthly + file_storage_monthly
+
+        order = np.argsort(total_monthly, kind='stable')
+        best = total_monthly[order[0]] if len(order) else 0.0
+
+        ranked = []
+        for rank, idx in enumerate(order, start=1):
+            scenario = resolved[idx]
+            monthly = float(total_monthly[idx])
+            ranked.append({
+                'rank': rank,
+                'scenario_index': int(idx),
+                'cloud_provider': scenario['cloud_provider'],
+                'target_region': scenario['target_region'],
+                'region_pricing_known': scenario['region_pricing_known'],
+                'pricing_model': scenario['pricing_model'],
+                'pricing_model_label': PRICING_MODELS[scenario['pricing_model']]['label'],
+                'uptime_pattern': scenario['uptime_pattern'] or 'as-is',
+                'monthly_cost': {
+                    'compute': round(float(compute_monthly[idx]), 2),
+                    'database': round(float(database_monthly[idx]), 2),
+                    'storage': round(float(file_storage_monthly[idx]), 2),
+                    'total': round(monthly, 2)
+                },
+                'annual_cost': round(monthly * 12, 2),
+                'difference_from_best_monthly': round(monthly - float(best), 2),
+                'percent_above_best': round((monthly / best - 1) * 100, 1) if best else 0.0
+            })
+
+        return {
+            'scenarios': ranked,
+            'scenario_count': len(ranked),
+            'best_scenario': ranked[0] if ranked else None,
+            'inventory_summary': {
+                'servers': len(servers),
+                'databases': len(databases),
+                'file_shares': len(file_shares)
+            },
+            'pricing_basis': 'rule-based sizing with catalog list prices'
+        }
+
+    def _price_server_totals(self, servers):
+        """Fleet hourly rate, rate weighted by each server's own monthly hours, and EBS cost
+
+        Scenario prices depend on servers only through these three sums, so
+        a large columnar table is split into row ranges summed on the process
+        pool; workers read the table from shared memory.
+        """
+        pool = self.pool or get_compute_pool()
+        if not isinstance(servers, ColumnarTable) or not pool.offload(len(servers)):
+            return tuple(self._server_totals(servers))
+        tasks = [(start, min(start + SERVER_CHUNK_ROWS, len(servers)))
+                 for start in range(0, len(servers), SERVER_CHUNK_ROWS)]
+        totals = np.zeros(3)
+        for _, chunk in pool.stream(price_server_chunk, {'servers': servers}, tasks):
+            totals += chunk
+        return tuple(totals)
+
+    def _server_totals(self, servers) -> np.ndarray:
+        hourly, storage, own_hours = self._price_servers(servers)
+        return np.array([hourly.sum(), own_hours @ hourly, storage.sum()], dtype=float)
+
+    def _price_servers(self, servers):
+        """Vectorized rule-engine sizing: hourly instance rate, EBS cost and own uptime hours"""
+        if isinstance(servers, ColumnarTable):
+            vcpu, ram, disk = servers.numeric('vcpu'), servers.numeric('ram'), servers.numeric('disk_size')
+            # Each distinct pattern is normalized once
+            pattern_indices = servers.map('uptime_pattern', lambda p: self.cost_model.pattern_indices([p])[0],
+                                          dtype=np.intp)
+        else:
+            vcpu = np.array([s.get('vcpu') or 0 for s in servers], dtype=float)
+            ram = np.array([s.get('ram') or 0 for s in servers], dtype=float)
+            disk = np.array([s.get('disk_size') or 0 for s in servers], dtype=float)
+            pattern_indices = self.cost_model.pattern_indices([s.get('uptime_pattern') for s in servers])
+
+        hourly = rule_based_ec2_hourly_rates(vcpu, ram)
+        storage = disk * EBS_PRICING['gp3']
+        own_hours = self.cost_model.pattern_running_hours[pattern_indices]
+        return hourly, storage, own_hours
+
+    def _price_databases(self, databases):
+        """Vectorized rule-engine sizing for RDS: monthly instance, storage and backup cost"""
+        size = np.array([d.get('size_gb') or 0 for d in databases], dtype=float)
+        ha = np.array([bool(d.get('ha_dr_required')) for d in databases], dtype=bool)
+        daily_backup = np.array([d.get('backup_frequency') == 'Daily' for d in databases], dtype=bool)
+
+        hourly = rule_based_rds_hourly_rates(size, ha)
+        return hourly * HOURS_PER_MONTH + size * RDS_STORAGE_PER_GB + np.where(daily_backup, size * RDS_BACKUP_PER_GB, 0.0)
+
+    def _price_file_shares(self, file_shares):
+        """Vectorized storage class mapping by access pattern"""
+        size = np.array([f.get('total_size_gb') or 0 for f in file_shares], dtype=float)
+        pattern = np.array([f.get('access_pattern') or '' for f in file_shares], dtype=object)
+        per_gb = np.select(
+            [pattern == 'Hot', pattern == 'Warm'],
+            [S3_PRICING['standard'], S3_PRICING['ia']],
+            default=S3_PRICING['glacier']
+        )
+        return size * per_gb
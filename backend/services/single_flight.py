@@ -0,0 +1,172 @@
+"""Single-flight coalescing: identical concurrent requests share one computation"""
+
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from .circuit_breaker import time_remaining
+from .metrics import CACHE_REQUESTS
+
+DEFAULT_LOCK_DB = os.path.join(tempfile.gettempdir(), 'migration_tool_single_flight.db')
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Run a computation once per key however many threads or workers ask for it
+
+    Within a process, duplicates wait on the leader thread's event. Across
+    processes (gunicorn workers), the leader claims the key in a small SQLite
+    table and publishes the JSON result there; other workers poll the row
+    until it is finished. A claim older than `lease_seconds` is taken over, so
+    a crashed worker never blocks a key for long. Finished results are kept
+    for `result_ttl` seconds so near-simultaneous stragglers still reuse them.
+    """
+
+    def __init__(self, lock_db: Optional[str] = None, lease_seconds: Optional[float] = None,
+                 result_ttl: Optional[float] = None, poll_seconds: float = 0.05):
+        self.lock_db = lock_db or os.getenv('SINGLE_FLIGHT_DB', DEFAULT_LOCK_DB)
+        self.lease_seconds = lease_seconds or float(os.getenv('SINGLE_FLIGHT_LEASE_SECONDS', 90))
+        self.result_ttl = result_ttl if result_ttl is not None else float(os.getenv('SINGLE_FLIGHT_RESULT_TTL', 5))
+        self.poll_seconds = poll_seconds
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._local = threading.local()
+        self.executed = 0
+        self.coalesced = 0
+        self._init_db()
+
+    def do(self, key: str, fn: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """Result of fn() for `key`, computed once for all concurrent callers"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            self.coalesced += 1
+            CACHE_REQUESTS.inc(cache='single_flight', result='hit')
+            if not call.done.wait(self._wait_budget()):
+                self.logger.warning(f"Timed out waiting on in-flight {key}; computing locally")
+                return fn()
+            if call.error is not None:
+                raise call.error
+            return dict(call.result)
+
+        try:
+            call.result = self._do_across_processes(key, fn)
+            return dict(call.result)
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for status endpoints"""
+        return {'executed': self.executed, 'coalesced': self.coalesced, 'in_flight': len(self._calls)}
+
+    def _do_across_processes(self, key: str, fn: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        owner = f"{os.getpid()}:{threading.get_ident()}"
+        give_up = time.monotonic() + self._wait_budget()
+        poll = self.poll_seconds
+        while True:
+            claimed, result = self._claim(key, owner)
+            if claimed:
+                break
+            if result is not None:
+                self.coalesced += 1
+                CACHE_REQUESTS.inc(cache='single_flight', result='hit')
+                return result
+            if time.monotonic() >= give_up:
+                self.logger.warning(f"Timed out waiting on {key} in another worker; computing locally")
+                break
+            time.sleep(poll)
+            poll = min(poll * 2, 0.5)
+
+        self.executed += 1
+        CACHE_REQUESTS.inc(cache='single_flight', result='miss')
+        try:
+            result = fn()
+        except Exception:
+            self._release(key, owner)
+            raise
+        self._publish(key, owner, result)
+        return result
+
+    def _wait_budget(self) -> float:
+        """How long a duplicate may wait: the lease, capped by the request deadline"""
+        remaining = time_remaining()
+        return self.lease_seconds if remaining is None else max(0.0, min(self.lease_seconds, remaining))
+
+    def _connect(self):
+        # Connections are per thread; sqlite3 objects must not cross threads
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.lock_db, timeout=10, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self):
+        conn = self._connect()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS flights (
+                key TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                started_at REAL NOT NULL,
+                finished_at REAL,
+                result TEXT
+            )
+        ''')
+
+    def _claim(self, key: str, owner: str):
+        """(True, None) when we now own the key, (False, result) when a finished result is shareable"""
+        conn = self._connect()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT started_at, finished_at, result FROM flights WHERE key = ?', (key,)).fetchone()
+            if row is not None:
+                started_at, finished_at, result = row
+                if finished_at is not None and now - finished_at < self.result_ttl:
+                    return False, json.loads(result)
+                if finished_at is None and now - started_at < self.lease_seconds:
+                    return False, None
+            conn.execute('REPLACE INTO flights (key, owner, started_at) VALUES (?, ?, ?)', (key, owner, now))
+            # Keep the table small: drop results nobody can reuse any more
+            conn.execute('DELETE FROM flights WHERE finished_at < ?', (now - self.result_ttl,))
+            return True, None
+        finally:
+            conn.execute('COMMIT')
+
+    def _publish(self, key: str, owner: str, result: Dict[str, Any]):
+        try:
+            self._connect().execute(
+                'UPDATE flights SET finished_at = ?, result = ? WHERE key = ? AND owner = ?',
+                (time.time(), json.dumps(result, default=str), key, owner)
+            )
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            self.logger.warning(f"Could not share result for {key}: {e}")
+            self._release(key, owner)
+
+    def _release(self, key: str, owner: str):
+        """Drop our claim so a waiting worker can take over"""
+        self._connect().execute('DELETE FROM flights WHERE key = ? AND owner = ? AND finished_at IS NULL', (key, owner))
@@ -0,0 +1,295 @@
+"""Local sizing model distilled from logged AI recommendations"""
+
+import glob
+import json
+import logging
+import os
+import re
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+DEFAULT_MODEL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sizing_models')
+
+DB_ENGINES = ('mysql', 'postgresql', 'sql server', 'oracle', 'mariadb', 'mongodb')
+PERFORMANCE_TIERS = {'low': 0, 'basic': 0, 'standard': 1, 'medium': 1, 'high': 2, 'premium': 2}
+
+
+def _flag(value) -> float:
+    return 1.0 if str(value).strip().lower() in ('1', 'true', 'yes') else 0.0
+
+
+def _engine_code(db_type) -> float:
+    db_type = str(db_type or '').lower()
+    for code, engine in enumerate(DB_ENGINES):
+        if engine in db_type:
+            return float(code)
+    return float(len(DB_ENGINES))
+
+
+# Numeric encodings of the specs the model sizes from; categorical fields become small codes
+FEATURES = {
+    'server': (
+        ('vcpu', lambda s: float(s.get('vcpu') or 0)),
+        ('ram', lambda s: float(s.get('ram') or 0)),
+        ('disk_size', lambda s: float(s.get('disk_size') or 0)),
+        ('windows', lambda s: 1.0 if 'windows' in str(s.get('os_type') or '').lower() else 0.0),
+    ),
+    'database': (
+        ('size_gb', lambda s: float(s.get('size_gb') or 0)),
+        ('ha_dr_required', lambda s: _flag(s.get('ha_dr_required'))),
+        ('performance_tier', lambda s: float(PERFORMANCE_TIERS.get(str(s.get('performance_tier') or '').lower(), 1))),
+        ('engine', lambda s: _engine_code(s.get('db_type'))),
+    ),
+}
+
+
+def encode(component_type: str, specs: Dict[str, Any]) -> List[float]:
+    return [encoder(specs) for _, encoder in FEATURES[component_type]]
+
+
+class DecisionTree:
+    """CART classifier (Gini) stored as flat node arrays so it serializes to JSON and predicts in microseconds"""
+
+    def __init__(self, max_depth: int = 8, min_samples_leaf: int = 2):
+        self.max_depth = max_depth
+        self.min_samples_leaf = min_samples_leaf
+        self.feature: List[int] = []
+        self.threshold: List[float] = []
+        self.left: List[int] = []
+        self.right: List[int] = []
+        self.counts: List[List[int]] = []
+
+    def fit(self, X: np.ndarray, y: np.ndarray, n_classes: int) -> 'DecisionTree':
+        self.feature, self.threshold, self.left, self.right, self.counts = [], [], [], [], []
+        root = self._new_node(np.bincount(y, minlength=n_classes))
+        stack = [(root, np.arange(len(y)), 0)]
+        while stack:
+            node, rows, depth = stack.pop()
+            if depth >= self.max_depth or len(rows) < 2 * self.min_samples_leaf or max(self.counts[node]) == len(rows):
+                continue
+            split = self._best_split(X[rows], y[rows], n_classes)
+            if split is None:
+                continue
+            feature, threshold = split
+            goes_left = X[rows, feature] <= threshold
+            left_rows, right_rows = rows[goes_left], rows[~goes_left]
+            self.feature[node], self.threshold[node] = feature, threshold
+            self.left[node] = self._new_node(np.bincount(y[left_rows], minlength=n_classes))
+            self.right[node] = self._new_node(np.bincount(y[right_rows], minlength=n_classes))
+            stack.append((self.left[node], left_rows, depth + 1))
+            stack.append((self.right[node], right_rows, depth + 1))
+        return self
+
+    def _new_node(self, counts: np.ndarray) -> int:
+        self.feature.append(-1)
+        self.threshold.append(0.0)
+        self.left.append(-1)
+        self.right.append(-1)
+        self.counts.append([int(c) for c in counts])
+        return len(self.counts) - 1
+
+    def _best_split(self, X: np.ndarray, y: np.ndarray, n_classes: int):
+        """Lowest weighted Gini split over every feature and threshold, scored in one pass per feature"""
+        n = len(y)
+        onehot = np.eye(n_classes)[y]
+        total = onehot.sum(axis=0)
+        left_n = np.arange(1, n)[:, np.newaxis]
+        right_n = n - left_n
+        parent_gini = 1 - ((total / n) ** 2).sum()
+        best_score, best = parent_gini - 1e-12, None
+        for feature in range(X.shape[1]):
+            order = np.argsort(X[:, feature], kind='mergesort')
+            values = X[order, feature]
+            left = np.cumsum(onehot[order], axis=0)[:-1]
+            right = total - left
+            gini_left = 1 - ((left / left_n) ** 2).sum(axis=1)
+            gini_right = 1 - ((right / right_n) ** 2).sum(axis=1)
+            score = (left_n[:, 0] * gini_left + right_n[:, 0] * gini_right) / n
+            valid = (values[1:] != values[:-1]) & (left_n[:, 0] >= self.min_samples_leaf) & \
+                (right_n[:, 0] >= self.min_samples_leaf)
+            if not valid.any():
+                continue
+            score[~valid] = np.inf
+            i = int(score.argmin())
+            if score[i] < best_score:
+                best_score, best = score[i], (feature, float((values[i] + values[i + 1]) / 2))
+        return best
+
+    def leaf_counts(self, x: List[float]) -> List[int]:
+        node = 0
+        feature, threshold, left, right = self.feature, self.threshold, self.left, self.right
+        while feature[node] >= 0:
+            node = left[node] if x[feature[node]] <= threshold[node] else right[node]
+        return self.counts[node]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'max_depth': self.max_depth, 'min_samples_leaf': self.min_samples_leaf, 'feature': self.feature,
+                'threshold': self.threshold, 'left': self.left, 'right': self.right, 'counts': self.counts}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'DecisionTree':
+        tree = cls(data['max_depth'], data['min_samples_leaf'])
+        tree.feature, tree.threshold = data['feature'], data['threshold']
+        tree.left, tree.right, tree.counts = data['left'], data['right'], data['counts']
+        return tree
+
+
+class SizingModel:
+    """Versioned per-component decision trees mapping specs to the instance type the AI would pick"""
+
+    def __init__(self, components: Dict[str, Dict[str, Any]], version: int = 0, trained_at: Optional[str] = None):
+        self.components = components
+        self.version = version
+        self.trained_at = trained_at or datetime.now().isoformat(timespec='seconds')
+        self._trees = {name: DecisionTree.from_dict(c['tree']) for name, c in components.items()}
+
+    def predict(self, component_type: str, specs: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Predicted instance with leaf confidence and support, or None when this type wasn't trained"""
+        tree = self._trees.get(component_type)
+        if tree is None:
+            return None
+        counts = tree.leaf_counts(encode(component_type, specs))
+        best = max(range(len(counts)), key=counts.__getitem__)
+        support = sum(counts)
+        return {
+            'recommended_instance': self.components[component_type]['labels'][best],
+            # Shrunk towards zero for small leaves so a 2-sample leaf can't claim certainty
+            'confidence': counts[best] / (support + 1),
+            'support': support
+        }
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'version': self.version,
+            'trained_at': self.trained_at,
+            'components': {name: {'samples': c['samples'], 'classes': len(c['labels']),
+                                  'holdout_accuracy': c['holdout_accuracy']}
+                           for name, c in self.components.items()}
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'version': self.version, 'trained_at': self.trained_at, 'components': self.components}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'SizingModel':
+        return cls(data['components'], data.get('version', 0), data.get('trained_at'))
+
+
+class RecommendationLog:
+    """Append-only JSONL log of (specs → AI recommendation) pairs used as training data"""
+
+    def __init__(self, path: Optional[str] = None, enabled: Optional[bool] = None):
+        self.path = path or os.getenv('SIZING_LOG_PATH', os.path.join(DEFAULT_MODEL_DIR, 'recommendations.jsonl'))
+        self.enabled = enabled if enabled is not None else \
+            os.getenv('SIZING_LOG_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def record(self, component_type: str, specs: Dict[str, Any], recommendation: Dict[str, Any]):
+        label = recommendation.get('recommended_instance')
+        if not self.enabled or component_type not in FEATURES or not label or recommendation.get('synthetic'):
+            return
+        line = json.dumps({
+            'component_type': component_type,
+            'features': encode(component_type, specs),
+            'label': label,
+            'model': recommendation.get('ai_model'),
+            'logged_at': datetime.now().isoformat(timespec='seconds')
+        })
+        try:
+            with self._lock:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                with open(self.path, 'a') as f:
+                    f.write(line + '\n')
+        except OSError as e:
+            self.logger.warning(f"Could not log recommendation for training: {e}")
+
+    def read(self) -> List[Dict[str, Any]]:
+        if not os.path.exists(self.path):
+            return []
+        records = []
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue  # a torn write from a crashed worker
+        return records
+
+
+def train_sizing_model(records: Iterable[Dict[str, Any]], max_depth: int = 8, min_samples_leaf: int = 2,
+                       min_samples: int = 20, holdout_fraction: float = 0.2, seed: int = 42) -> SizingModel:
+    """Fit one tree per component type that has at least `min_samples` logged answers"""
+    by_type: Dict[str, List[Dict[str, Any]]] = {}
+    for record in records:
+        if record.get('component_type') in FEATURES:
+            by_type.setdefault(record['component_type'], []).append(record)
+
+    rng = np.random.default_rng(seed)
+    components = {}
+    for component_type, rows in by_type.items():
+        if len(rows) < min_samples:
+            continue
+        X = np.array([row['features'] for row in rows], dtype=float)
+        labels = sorted({row['label'] for row in rows})
+        label_index = {label: i for i, label in enumerate(labels)}
+        y = np.array([label_index[row['label']] for row in rows])
+
+        # Held-out accuracy first, then the served tree is fit on everything
+        order = rng.permutation(len(y))
+        n_holdout = int(len(y) * holdout_fraction)
+        holdout, train = order[:n_holdout], order[n_holdout:]
+        accuracy = None
+        if n_holdout:
+            tree = DecisionTree(max_depth, min_samples_leaf).fit(X[train], y[train], len(labels))
+            predicted = [int(np.argmax(tree.leaf_counts(list(x)))) for x in X[holdout]]
+            accuracy = round(float(np.mean(np.array(predicted) == y[holdout])), 4)
+
+        tree = DecisionTree(max_depth, min_samples_leaf).fit(X, y, len(labels))
+        components[component_type] = {
+            'features': [name for name, _ in FEATURES[component_type]],
+            'labels': labels,
+            'samples': len(y),
+            'holdout_accuracy': accuracy,
+            'tree': tree.to_dict()
+        }
+    return SizingModel(components)
+
+
+def _versions(model_dir: str) -> List[int]:
+    paths = glob.glob(os.path.join(model_dir, 'sizing_model_v*.json'))
+    return sorted(int(m.group(1)) for m in (re.search(r'_v(\d+)\.json$', p) for p in paths) if m)
+
+
+def save_sizing_model(model: SizingModel, model_dir: Optional[str] = None) -> str:
+    """Write the model as the next version; earlier versions are kept for rollback"""
+    model_dir = model_dir or os.getenv('SIZING_MODEL_DIR', DEFAULT_MODEL_DIR)
+    os.makedirs(model_dir, exist_ok=True)
+    versions = _versions(model_dir)
+    model.version = (versions[-1] if versions else 0) + 1
+    path = os.path.join(model_dir, f'sizing_model_v{model.version}.json')
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(model.to_dict(), f)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_sizing_model(model_dir: Optional[str] = None, version: Optional[int] = None) -> Optional[SizingModel]:
+    """Load a given version, or the latest one; None when no model has been trained yet"""
+    model_dir = model_dir or os.getenv('SIZING_MODEL_DIR', DEFAULT_MODEL_DIR)
+    versions = _versions(model_dir)
+    if version is None:
+        if not versions:
+            return None
+        version = versions[-1]
+    path = os.path.join(model_dir, f'sizing_model_v{version}.json')
+    try:
+        with open(path) as f:
+            return SizingModel.from_dict(json.load(f))
+    except (OSError, ValueError, KeyError) as e:
+        logging.getLogger(__name__).warning(f"Could not load sizing model {path}: {e}")
+        return None
@@ -0,0 +1,312 @@
+"""Timed sqlite3 connections and SQLAlchemy engines: statement latency, rows per statement,
+slow-query plans and per-request statement counts with repeated statements flagged"""
+
+import contextlib
+import contextvars
+import logging
+import os
+import re
+import sqlite3
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional
+
+from .metrics import (SQLITE_QUERY_SECONDS, SQLITE_ROWS, SQL_STATEMENTS_PER_REQUEST, SQL_REPEATED_STATEMENTS,
+                      SQL_SLOW_STATEMENTS)
+
+logger = logging.getLogger(__name__)
+
+# Statements slower than this are logged with their EXPLAIN QUERY PLAN
+SLOW_QUERY_MS = float(os.getenv('SQL_SLOW_QUERY_MS', 200))
+# The same statement shape run this often in one request with different parameters looks like N+1
+N_PLUS_ONE_THRESHOLD = int(os.getenv('SQL_N_PLUS_ONE_THRESHOLD', 5))
+
+_VERB = re.compile(r'^\s*(\w+)', re.IGNORECASE)
+_TABLE = re.compile(r'\b(?:FROM|INTO|UPDATE|TABLE(?:\s+IF\s+(?:NOT\s+)?EXISTS)?)\s+["\'`\[]?(\w+)', re.IGNORECASE)
+
+
+# Statements of the current request, when something (e.g. a profiler) is collecting them
+_statement_log: contextvars.ContextVar = contextvars.ContextVar('sql_statement_log', default=None)
+
+
+def start_statement_log() -> contextvars.Token:
+    """Collect every statement run in the current context from now on; returns a token for stop"""
+    return _statement_log.set([])
+
+
+def stop_statement_log(token: contextvars.Token) -> List[Dict[str, Any]]:
+    """Statements collected since start_statement_log, as dicts of sql, label, seconds and rows"""
+    statements = _statement_log.get() or []
+    _statement_log.reset(token)
+    return statements
+
+
+def statement_label(sql: str) -> str:
+    """Low-cardinality label for a statement, e.g. 'SELECT servers'"""
+    verb = _VERB.match(sql)
+    table = _TABLE.search(sql)
+    label = verb.group(1).upper() if verb else 'UNKNOWN'
+    return f'{label} {table.group(1)}' if table else label
+
+
+class StatementTracker:
+    """Statement count and time of one request, plus statements it ran more than once
+
+    Running the same SQL with the same parameters twice is a redundant scan;
+    the same SQL with many different parameters is the N+1 pattern.
+    """
+
+    def __init__(self, n_plus_one_threshold: Optional[int] = None):
+        self.n_plus_one_threshold = n_plus_one_threshold or N_PLUS_ONE_THRESHOLD
+        self.count = 0
+        self.seconds = 0.0
+        self._labels: Dict[str, str] = {}
+        self._identical = Counter()
+        self._shapes = Counter()
+
+    def record(self, sql: str, label: str, parameters: Any, elapsed: float):
+        self.count += 1
+        self.seconds += elapsed
+        sql = ' '.join(sql.split())
+        self._labels[sql] = label
+        self._shapes[sql] += 1
+        # executemany passes None; one batched call is never a repeat of itself
+        self._identical[(sql, repr(parameters))] += 1
+
+    def repeated(self) -> List[Dict[str, Any]]:
+        """Identical statements (same SQL and parameters) run more than once"""
+        return [{'sql': sql, 'label': self._labels[sql], 'count': count}
+                for (sql, _), count in self._identical.most_common() if count > 1]
+
+    def n_plus_one(self) -> List[Dict[str, Any]]:
+        """Statement shapes run at least n_plus_one_threshold times with varying parameters"""
+        variants = Counter(sql for sql, _ in self._identical)
+        return [{'sql': sql, 'label': self._labels[sql], 'count': count, 'distinct_parameters': variants[sql]}
+                for sql, count in self._shapes.most_common()
+                if count >= self.n_plus_one_threshold and variants[sql] > 1]
+
+    def summary(self) -> Dict[str, Any]:
+        return {'statements': self.count, 'seconds': round(self.seconds, 6),
+                'repeated': self.repeated(), 'n_plus_one': self.n_plus_one()}
+
+
+_tracker: contextvars.ContextVar = contextvars.ContextVar('sql_statement_tracker', default=None)
+
+
+def start_statement_tracking(n_plus_one_threshold: Optional[int] = None) -> contextvars.Token:
+    """Count statements run in the current context from now on; returns a token for stop"""
+    return _tracker.set(StatementTracker(n_plus_one_threshold))
+
+
+def stop_statement_tracking(token: contextvars.Token) -> StatementTracker:
+    tracker = _tracker.get()
+    _tracker.reset(token)
+    return tracker
+
+
+@contextlib.contextmanager
+def track_statements(n_plus_one_threshold: Optional[int] = None):
+    """`with track_statements() as tracker:` counts the statements of the block"""
+    token = start_statement_tracking(n_plus_one_threshold)
+    try:
+        yield _tracker.get()
+    finally:
+        stop_statement_tracking(token)
+
+
+def record_statement(sql: str, parameters: Any, elapsed: float,
+                     explain: Optional[Callable[[], List[Any]]] = None) -> Optional[Dict[str, Any]]:
+    """Time one executed statement and hand it to whatever is tracking the current context
+
+    `explain` returns EXPLAIN QUERY PLAN rows and is only called for slow
+    statements. Returns the statement log entry when a log is collecting.
+    """
+    label = statement_label(sql)
+    SQLITE_QUERY_SECONDS.observe(elapsed, statement=label)
+    tracker = _tracker.get()
+    if tracker is not None:
+        tracker.record(sql, label, parameters, elapsed)
+    if elapsed * 1000 >= SLOW_QUERY_MS:
+        _log_slow_statement(sql, label, elapsed, explain)
+    log = _statement_log.get()
+    if log is None:
+        return None
+    entry = {'sql': ' '.join(sql.split()), 'label': label, 'seconds': round(elapsed, 6), 'rows': None}
+    log.append(entry)
+    return entry
+
+
+def _log_slow_statement(sql: str, label: str, elapsed: float, explain: Optional[Callable[[], List[Any]]]):
+    SQL_SLOW_STATEMENTS.inc(statement=label)
+    plan = 'n/a'
+    if explain is not None and label.split(' ', 1)[0] in ('SELECT', 'WITH'):
+        try:
+            # Rows are (id, parent, notused, detail); detail reads e.g. "SCAN servers"
+            plan = '; '.join(str(row[-1]) for row in explain())
+        except Exception as e:
+            plan = f'unavailable ({e})'
+    logger.warning(f"Slow SQL ({elapsed * 1000:.1f}ms, {label}): {' '.join(sql.split())} | plan: {plan}")
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that times each execute and counts the rows it yields"""
+
+    _label = None
+    _rows = 0
+    _logged: Optional[Dict[str, Any]] = None
+
+    def execute(self, sql, parameters=()):
+        self._flush()
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._begin(sql, parameters, time.perf_counter() - started)
+
+    def executemany(self, sql, seq_of_parameters):
+        self._flush()
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._begin(sql, None, time.perf_counter() - started)
+
+    def fetchone(self):
+        row = super().fetchone()
+        if row is None:
+            self._flush()
+        else:
+            self._rows += 1
+        return row
+
+    def fetchmany(self, size=None):
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._rows += len(rows)
+        if not rows:
+            self._flush()
+        return rows
+
+    def fetchall(self):
+        rows = super().fetchall()
+        self._rows += len(rows)
+        self._flush()
+        return rows
+
+    def __next__(self):
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._flush()
+            raise
+        self._rows += 1
+        return row
+
+    def close(self):
+        self._flush()
+        super().close()
+
+    def __del__(self):
+        self._flush()
+
+    def _begin(self, sql, parameters, elapsed):
+        connection = self.connection
+
+        def explain():
+            # The base class execute, so the plan query isn't itself recorded
+            return sqlite3.Connection.execute(connection, f'EXPLAIN QUERY PLAN {sql}', parameters).fetchall()
+
+        self._label = statement_label(sql)
+        # Writes report affected rows; reads count as they are fetched
+        self._rows = max(self.rowcount, 0) if self.description is None else 0
+        self._logged = record_statement(sql, parameters, elapsed, explain)
+        if self._logged is not None:
+            self._logged['rows'] = self._rows
+
+    def _flush(self):
+        if self._label is not None:
+            SQLITE_ROWS.observe(self._rows, statement=self._label)
+            if self._logged is not None:
+                self._logged['rows'] = self._rows
+                self._logged = None
+            self._label = None
+            self._rows = 0
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Use as `sqlite3.connect(path, factory=InstrumentedConnection)`"""
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    # The C shortcuts build a plain cursor, so route them through ours
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def instrument_sqlalchemy(engine=None):
+    """Time every statement of `engine` (default: all SQLAlchemy engines) like InstrumentedConnection does
+
+    Rows aren't counted here; SQLAlchemy fetches them after the cursor events.
+    """
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    target = engine if engine is not None else Engine
+    if event.contains(target, 'before_cursor_execute', _before_cursor_execute):
+        return
+    event.listen(target, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(target, 'after_cursor_execute', _after_cursor_execute)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('sql_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['sql_started'].pop()
+    explain = None
+    if conn.dialect.name == 'sqlite' and not executemany:
+        def explain():
+            return cursor.connection.execute(f'EXPLAIN QUERY PLAN {statement}', parameters).fetchall()
+    entry = record_statement(statement, None if executemany else parameters, elapsed, explain)
+    if entry is not None and cursor.description is None:
+        entry['rows'] = max(cursor.rowcount, 0)
+
+
+def install_sql_tracking(app):
+    """Count each request's SQL statements by route and warn about statements it repeats
+
+    Adds X-SQL-Statements and X-SQL-Time-Ms response headers so redundant
+    scans are visible from any client.
+    """
+    from flask import g, request
+
+    @app.before_request
+    def _start_sql_tracking():
+        g.sql_tracking = start_statement_tracking()
+
+    @app.after_request
+    def _finish_sql_tracking(response):
+        token = g.pop('sql_tracking', None)
+        if token is None:
+            return response
+        tracker = stop_statement_tracking(token)
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        SQL_STATEMENTS_PER_REQUEST.observe(tracker.count, route=route)
+        for kind, statements in (('identical', tracker.repeated()), ('n_plus_one', tracker.n_plus_one())):
+            for statement in statements:
+                SQL_REPEATED_STATEMENTS.inc(statement['count'] - 1, route=route, statement=statement['label'],
+                                            kind=kind)
+                logger.warning(f"{route} ran {kind} SQL {statement['count']} times: {statement['sql'][:200]}")
+        response.headers['X-SQL-Statements'] = str(tracker.count)
+        response.headers['X-SQL-Time-Ms'] = f'{tracker.seconds * 1000:.2f}'
+        return response
+
+    @app.teardown_request
+    def _abandon_sql_tracking(exc=None):
+        token = g.pop('sql_tracking', None)
+        if token is not None:
+            stop_statement_tracking(token)
@@ -0,0 +1,179 @@
+"""Structured logging written by a background thread: JSON records with request ids and durations,
+plus sampled and truncated payload logging"""
+
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+import uuid
+from typing import Any, Optional
+
+from .metrics import LOG_RECORDS_DROPPED
+
+# Attributes every LogRecord has; anything else on a record came in through `extra`
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_request_id: contextvars.ContextVar = contextvars.ContextVar('log_request_id', default=None)
+
+
+def current_request_id() -> Optional[str]:
+    return _request_id.get()
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamps each record with the id of the request being handled when it was logged"""
+
+    def filter(self, record):
+        if not hasattr(record, 'request_id'):
+            record.request_id = _request_id.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, request id and any `extra` fields"""
+
+    def format(self, record):
+        entry = {
+            'ts': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created)) + f'.{int(record.msecs):03d}Z',
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and value is not None:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops (and counts) records instead of blocking when the writer falls behind
+
+    Only the message is resolved on the calling thread; JSON encoding and
+    the write happen on the listener thread.
+    """
+
+    def prepare(self, record):
+        # Args may be mutable objects that change after this call returns
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            # Tracebacks pin whole frames; render them now and let the frames go
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc(logger=record.name)
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def configure_logging(level: Optional[str] = None, log_format: Optional[str] = None,
+                      queue_size: Optional[int] = None, stream=None) -> logging.handlers.QueueListener:
+    """Route the root logger through a bounded queue to a writer thread
+
+    LOG_LEVEL (default INFO), LOG_FORMAT (json or text) and LOG_QUEUE_SIZE
+    configure it. Calling again replaces the previous setup.
+    """
+    global _listener
+    level = (level or os.getenv('LOG_LEVEL', 'INFO')).upper()
+    log_format = log_format or os.getenv('LOG_FORMAT', 'json')
+    queue_size = queue_size or int(os.getenv('LOG_QUEUE_SIZE', 10000))
+
+    writer = logging.StreamHandler(stream or sys.stderr)
+    if log_format == 'json':
+        writer.setFormatter(JsonFormatter())
+    else:
+        writer.setFormatter(logging.Formatter('%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s'))
+
+    shutdown_logging()
+    handler = NonBlockingQueueHandler(queue.Queue(queue_size))
+    handler.addFilter(RequestIdFilter())
+    root = logging.getLogger()
+    for existing in [h for h in root.handlers if isinstance(h, NonBlockingQueueHandler)]:
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(handler.queue, writer, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def shutdown_logging():
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
+
+
+def log_payload(logger: logging.Logger, label: str, payload: Any, level: int = logging.DEBUG,
+                sample_rate: Optional[float] = None, max_chars: Optional[int] = None):
+    """Log a request/response payload for a sample of calls, truncated to a bounded size
+
+    Nothing is serialized unless the level is enabled and the call is
+    sampled. LOG_PAYLOAD_SAMPLE_RATE (default 0.01) and
+    LOG_PAYLOAD_MAX_CHARS (default 2000) are the defaults.
+    """
+    if not logger.isEnabledFor(level):
+        return
+    if sample_rate is None:
+        sample_rate = float(os.getenv('LOG_PAYLOAD_SAMPLE_RATE', 0.01))
+    if sample_rate < 1 and random.random() >= sample_rate:
+        return
+    max_chars = max_chars or int(os.getenv('LOG_PAYLOAD_MAX_CHARS', 2000))
+    text = json.dumps(payload, default=str)
+    logger.log(level, '%s', label, extra={'payload': text[:max_chars], 'payload_chars': len(text),
+                                          'payload_truncated': len(text) > max_chars})
+
+
+def install_request_logging(app, logger_name: str = 'http.access'):
+    """Give every request of a Flask app an id (X-Request-Id) and log one access record with its duration"""
+    from flask import g, request
+
+    access_log = logging.getLogger(logger_name)
+
+    @app.before_request
+    def _start_request_log():
+        # Honour an id set by a proxy so logs line up across hops
+        request_id = request.headers.get('X-Request-Id') or uuid.uuid4().hex[:16]
+        g.request_log = (_request_id.set(request_id[:64]), time.perf_counter())
+
+    @app.after_request
+    def _log_request(response):
+        state = g.get('request_log')
+        if state is None:
+            return response
+        response.headers['X-Request-Id'] = _request_id.get()
+        if access_log.isEnabledFor(logging.INFO):
+            access_log.info('%s %s %s', request.method, request.path, response.status_code, extra={
+                'method': request.method,
+                'route': request.url_rule.rule if request.url_rule is not None else None,
+                'status': response.status_code,
+                'duration_ms': round((time.perf_counter() - state[1]) * 1000, 2),
+            })
+        return response
+
+    @app.teardown_request
+    def _finish_request_log(exc=None):
+        state = g.pop('request_log', None)
+        if state is not None:
+            _request_id.reset(state[0])
@@ -0,0 +1,145 @@
+"""Stale-while-revalidate cache: answer instantly, upgrade with AI in the background"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from .metrics import CACHE_REQUESTS
+
+FRESH = 'fresh'
+STALE = 'stale'
+FALLBACK = 'fallback'
+
+
+def inventory_revision(infrastructure_data: Dict[str, Any]) -> str:
+    """Content hash of an inventory snapshot; changes whenever any row changes"""
+    payload = json.dumps(infrastructure_data, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def cache_key(endpoint: str, params: Dict[str, Any], revision: str) -> str:
+    """Stable key for (endpoint, parameters, inventory revision)"""
+    payload = json.dumps([endpoint, params, revision], sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:20]
+
+
+class _Entry:
+    __slots__ = ('result', 'source', 'computed_at', 'refreshing', 'version', 'error')
+
+    def __init__(self, result, source):
+        self.result = result
+        self.source = source
+        self.computed_at = time.time()
+        self.refreshing = False
+        self.version = 1
+        self.error = None
+
+
+class StaleWhileRevalidateCache:
+    """Serve the last AI answer or an instant rule-based one, refreshing with AI in the background"""
+
+    def __init__(self, ttl_seconds: Optional[float] = None, max_entries: Optional[int] = None,
+                 refresh_workers: Optional[int] = None):
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(os.getenv('SWR_TTL_SECONDS', 900))
+        self.max_entries = max_entries or int(os.getenv('SWR_MAX_ENTRIES', 256))
+        self.logger = logging.getLogger(__name__)
+        self._entries: 'OrderedDict[str, _Entry]' = OrderedDict()
+        self._changed = threading.Condition()
+        self._executor = ThreadPoolExecutor(
+            max_workers=refresh_workers or int(os.getenv('SWR_REFRESH_WORKERS', 2)),
+            thread_name_prefix='swr-refresh'
+        )
+
+    def get_or_refresh(self, key: str, fallback: Callable[[], Dict[str, Any]],
+                       refresh: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """Immediate answer for `key`; schedules `refresh` when the answer is a fallback or stale"""
+        with self._changed:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        if entry is None:
+            CACHE_REQUESTS.inc(cache='swr', result='miss')
+            # Rule-based answers are cheap and deterministic; compute outside the lock
+            entry = _Entry(fallback(), FALLBACK)
+            with self._changed:
+                entry = self._entries.setdefault(key, entry)
+                self._evict()
+        else:
+            CACHE_REQUESTS.inc(cache='swr', result='hit' if self._status(entry) == FRESH else 'stale')
+
+        self._schedule_refresh(key, entry, refresh)
+        return self._respond(key, entry)
+
+    def get(self, key: str, wait_seconds: float = 0, known_version: int = 0) -> Optional[Dict[str, Any]]:
+        """Current answer for `key`, optionally waiting until it is newer than `known_version`"""
+        deadline = time.monotonic() + max(0.0, wait_seconds)
+        with self._changed:
+            while True:
+                entry = self._entries.get(key)
+                if entry is None:
+                    return None
+                remaining = deadline - time.monotonic()
+                if entry.version > known_version or not entry.refreshing or remaining <= 0:
+                    return self._respond(key, entry)
+                self._changed.wait(remaining)
+
+    def _schedule_refresh(self, key: str, entry: _Entry, refresh: Callable[[], Dict[str, Any]]):
+        """Start one background refresh per key when the entry needs upgrading"""
+        with self._changed:
+            if entry.refreshing or self._status(entry) == FRESH:
+                return
+            entry.refreshing = True
+        self._executor.submit(self._run_refresh, key, entry, refresh)
+
+    def _run_refresh(self, key: str, entry: _Entry, refresh: Callable[[], Dict[str, Any]]):
+        try:
+            result = refresh()
+            # A refresh that itself fell back is no better than what we have
+            ai_used = not result.get('ai_insights', {}).get('fallback_used', True)
+            error = None
+        except Exception as e:
+            self.logger.warning(f"Background refresh failed for {key}: {e}")
+            result, ai_used, error = None, False, str(e)
+
+        with self._changed:
+            entry.refreshing = False
+            entry.error = error
+            if ai_used:
+                entry.result = result
+                entry.source = 'ai'
+                entry.computed_at = time.time()
+            elif entry.source == FALLBACK:
+                # Retry on the next read instead of spinning
+                entry.computed_at = time.time()
+            entry.version += 1
+            self._changed.notify_all()
+
+    def _status(self, entry: _Entry) -> str:
+        if entry.source == FALLBACK:
+            return FALLBACK
+        return FRESH if time.time() - entry.computed_at < self.ttl_seconds else STALE
+
+    def _respond(self, key: str, entry: _Entry) -> Dict[str, Any]:
+        response = dict(entry.result)
+        response['freshness'] = {
+            'status': self._status(entry),
+            'source': entry.source,
+            'result_key': key,
+            'version': entry.version,
+            'computed_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(entry.computed_at)),
+            'age_seconds': round(time.time() - entry.computed_at, 1),
+            'refreshing': entry.refreshing,
+            'last_refresh_error': entry.error
+        }
+        return response
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
@@ -1,28 +1,36 @@
 from datetime import datetime, timedelta
 from typing import Dict, List, Any
-from services.ai_recommendations import AIRecommendationService
+from services.ai_registry import get_ai_service
+from services.transfer_planner import TransferPlanner, transfer_weeks
+from services.inventory_snapshot import model_inventory
 import logging
 
 class TimelineGenerator:
     """Generate comprehensive migration timeline with AI insights"""
     
-    def __init__(self, db, models):
+    def __init__(self, db, models, inventory=None):
         self.db = db
         self.models = models
-        self.ai_service = AIRecommendationService()
+        # Tables read once and shared with the other services of this request
+        self.inventory = inventory or model_inventory(models)
+        self.ai_service = get_ai_service()
+        self.transfer_planner = TransferPlanner()
         self.logger = logging.getLogger(__name__)
     
     def generate_migration_timeline(self) -> Dict[str, Any]:
         """Generate complete migration timeline with AI-powered insights"""
         try:
             # Get all inventory
-            servers = self.models['Server'].query.all()
-            databases = self.models['Database'].query.all()
-            file_shares = self.models['FileShare'].query.all()
+            servers = self.inventory.servers
+            databases = self.inventory.databases
+            file_shares = self.inventory.file_shares
             constraints = self.models['BusinessConstraint'].query.first()
             
+            # Estimate how long the data takes to move across the link
+            transfer_plan = self.transfer_planner.plan(servers, databases, file_shares)
+            
             # Calculate phases with AI optimization
-            phases = self._calculate_migration_phases(servers, databases, file_shares)
+            phases = self._calculate_migration_phases(servers, databases, file_shares, transfer_plan)
             
             # Get AI insights for timeline optimization
             ai_insights = self._get_ai_timeline_insights(servers, databases, file_shares)
@@ -42,10 +50,15 @@ class TimelineGenerator:
             # Calculate critical path
             critical_path = self._identify_critical_path(phases)
             
+            # Cutover window sized by the final delta syncs
+            cutover_schedule = self._generate_cutover_schedule(transfer_plan)
+            
             return {
                 'project_overview': project_overview,
                 'phases': phases,
                 'critical_path': critical_path,
+                'data_transfer': transfer_plan['summary'],
+                'cutover_schedule': cutover_schedule,
                 'resource_allocation': resource_allocation,
                 'risk_mitigation': risk_mitigation,
                 'success_criteria': success_criteria,
@@ -56,10 +69,11 @@ class TimelineGenerator:
             self.logger.error(f"Timeline generation failed: {e}")
             return {'error': f'Failed to generate timeline: {str(e)}'}
     
-    def _calculate_migration_phases(self, servers, databases, file_shares) -> List[Dict[str, Any]]:
+    def _calculate_migration_phases(self, servers, databases, file_shares, transfer_plan=None) -> List[Dict[str, Any]]:
         """Calculate migration phases with realistic timelines"""
         phases = []
         current_week = 1
+        waves = transfer_plan['waves'] if transfer_plan else {}
         
         # Phase 1: Assessment and Planning
         phase1 = {
@@ -110,6 +124,7 @@ class TimelineGenerator:
         # Phase 3: Database Migration
         if databases:
             db_duration = max(3, len(databases) * 2)  # Minimum 3 weeks, 2 weeks per DB
+            db_duration = max(db_duration, transfer_weeks(waves.get('databases')))
             phase3 = {
                 'phase': 3,
                 'title': 'Database Migration',
@@ -125,6 +140,7 @@ class TimelineGenerator:
                     'Backup/recovery tested'
                 ],
                 'components': [db.db_name for db in databases],
+                'data_transfer': waves.get('databases'),
                 'risks': ['Data corruption', 'Extended downtime', 'Performance issues'],
                 'resources_required': ['Database Specialist', 'Migration Engineer'],
                 'status': 'pending'
@@ -135,6 +151,7 @@ class TimelineGenerator:
         # Phase 4: Application Migration
         if servers:
             app_duration = max(4, len(servers) * 1.5)  # Minimum 4 weeks, 1.5 weeks per server
+            app_duration = max(app_duration, transfer_weeks(waves.get('servers')))
             phase4 = {
                 'phase': 4,
                 'title': 'Application Migration',
@@ -150,6 +167,7 @@ class TimelineGenerator:
                     'Performance benchmarks met'
                 ],
                 'components': [server.server_id for server in servers],
+                'data_transfer': waves.get('servers'),
                 'risks': ['Application compatibility', 'Integration failures'],
                 'resources_required': ['Migration Engineer', 'Application Specialist'],
                 'status': 'pending'
@@ -160,6 +178,7 @@ class TimelineGenerator:
         # Phase 5: Data Storage Migration
         if file_shares:
             storage_duration = max(2, len(file_shares) * 1)  # Minimum 2 weeks, 1 week per share
+            storage_duration = max(storage_duration, transfer_weeks(waves.get('file_shares')))
             phase5 = {
                 'phase': 5,
                 'title': 'Data Storage Migration',
@@ -175,6 +194,7 @@ class TimelineGenerator:
                     'Performance validated'
                 ],
                 'components': [share.share_name for share in file_shares],
+                'data_transfer': waves.get('file_shares'),
                 'risks': ['Data transfer failures', 'Access issues'],
                 'resources_required': ['Migration Engineer', 'Storage Specialist'],
                 'status': 'pending'
@@ -428,7 +448,7 @@ class TimelineGenerator:
     
     def _generate_resource_timeline(self, phases):
         """Generate resource allocation timeline"""
-        resource_rates = ResourceRate.query.all()
+        resource_rates = self.inventory.resource_rates
         resource_timeline = []
         
         # Map roles to phases
@@ -541,9 +561,10 @@ class TimelineGenerator:
     
     def _calculate_risk_buffer(self):
         """Calculate recommended risk buffer"""
-        servers = Server.query.count()
-        databases = Database.query.count()
-        file_shares = FileShare.query.count()
+        summary = self.inventory.summary()
+        servers = summary['servers_count']
+        databases = summary['databases_count']
+        file_shares = summary['file_shares_count']
         
         # Calculate complexity score
         complexity_score = (servers * 0.5) + (databases * 1.0) + (file_shares * 0.3)
@@ -567,27 +588,29 @@ class TimelineGenerator:
         risk_factors = []
         
         # Check for high-risk scenarios
-        large_databases = Database.query.filter(Database.size_gb > 1000).count()
+        databases = self.inventory.databases
+        large_databases = sum(1 for db in databases if (db.size_gb or 0) > 1000)
         if large_databases > 0:
             risk_factors.append(f"{large_databases} large databases (>1TB) may require extended migration time")
         
-        zero_downtime_dbs = Database.query.filter(Database.downtime_tolerance == 'Zero').count()
+        zero_downtime_dbs = sum(1 for db in databases if db.downtime_tolerance == 'Zero')
         if zero_downtime_dbs > 0:
             risk_factors.append(f"{zero_downtime_dbs} databases require zero downtime migration")
         
-        realtime_sync = Database.query.filter(Database.real_time_sync == True).count()
+        realtime_sync = sum(1 for db in databases if db.real_time_sync)
         if realtime_sync > 0:
             risk_factors.append(f"{realtime_sync} components require real-time synchronization")
         
-        total_servers = Server.query.count()
+        total_servers = len(self.inventory.servers)
         if total_servers > 20:
             risk_factors.append(f"Large number of servers ({total_servers}) increases coordination complexity")
         
         return risk_factors
     
-    def _generate_cutover_schedule(self):
+    def _generate_cutover_schedule(self, transfer_plan=None):
         """Generate detailed cutover schedule"""
-        constraints = BusinessConstraint.query.first()
+        constraints = self.models['BusinessConstraint'].query.first()
+        final_sync_hours = transfer_plan['summary']['cutover_sync_hours'] if transfer_plan else 1
         migration_window = constraints.migration_window if constraints else 'Weekends'
         
         cutover_tasks = [
@@ -605,7 +628,7 @@ class TimelineGenerator:
             },
             {
                 'task': 'Final data synchronization',
-                'duration_hours': 1,
+                'duration_hours': round(max(final_sync_hours, 0.25), 2),
                 'responsible': 'DBA',
                 'description': 'Complete final data sync to target'
             },
@@ -642,6 +665,7 @@ class TimelineGenerator:
             'total_cutover_duration_hours': total_cutover_hours,
             'cutover_tasks': cutover_tasks,
             'rollback_time_limit': 4,  # hours
+            'items_exceeding_downtime_tolerance': transfer_plan['summary']['items_exceeding_downtime_tolerance'] if transfer_plan else 0,
             'communication_plan': {
                 'stakeholder_notification': '24 hours before cutover',
                 'progress_updates': 'Every 30 minutes during cutover',
@@ -787,7 +811,7 @@ class TimelineGenerator:
     
     def _get_ai_timeline_insights(self, servers, databases, file_shares) -> Dict[str, List[str]]:
         """Get AI-powered timeline insights"""
-        if not self.ai_service.bedrock_client:
+        if not self.ai_service.ai_available():
             return self._get_fallback_insights()
         
         try:
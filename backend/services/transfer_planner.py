@@ -0,0 +1,256 @@
+import heapq
+import logging
+import math
+import os
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+
+# Usable share of the nominal link after protocol overhead and contention
+DEFAULT_LINK_EFFICIENCY = 0.8
+
+# Fraction of an item's data rewritten per day, by write frequency
+DAILY_CHANGE_RATES = {
+    'high': 0.10,
+    'medium': 0.03,
+    'low': 0.01
+}
+DEFAULT_DAILY_CHANGE_RATE = 0.03
+SERVER_DAILY_CHANGE_RATE = 0.02
+
+# Acceptable cutover downtime per tolerance level (minutes)
+DOWNTIME_TOLERANCE_MINUTES = {
+    'none': 0,
+    'zero': 0,
+    'very low': 5,
+    'low': 15,
+    'medium': 60,
+    'high': 240,
+    'very high': 480
+}
+DEFAULT_DOWNTIME_TOLERANCE_MINUTES = 60
+
+# Continuous replication only needs to drain its lag at cutover
+REPLICATION_CUTOVER_MINUTES = 5
+
+# Delta passes stop once the remaining delta transfers within this window
+DELTA_TARGET_MINUTES = 15
+MAX_DELTA_PASSES = 5
+
+# Transfer waves, in the order the timeline migrates them
+TRANSFER_WAVES = ('databases', 'servers', 'file_shares')
+
+HOURS_PER_WEEK = 168
+
+# Cutover steps around the final sync: verification, stopping sources, DNS, restart, smoke tests, go/no-go
+CUTOVER_OVERHEAD_HOURS = 6.5
+MIN_FINAL_SYNC_HOURS = 0.25
+
+
+def _field(item, name, default=None):
+    """Read a field from an inventory dict or model instance"""
+    value = item.get(name) if isinstance(item, dict) else getattr(item, name, None)
+    return default if value is None else value
+
+
+def _is_true(value) -> bool:
+    """Interpret booleans stored as ints or strings in the inventory"""
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes', 'y')
+    return bool(value)
+
+
+def gb_per_hour(mbps: float) -> float:
+    """Convert a link rate in Mbit/s to GB/hour"""
+    return mbps * 3600 / 8000
+
+
+def transfer_weeks(wave) -> int:
+    """Whole weeks needed to move a wave's data, plus a week to validate it"""
+    if not wave or not wave['transfer_hours']:
+        return 0
+    return math.ceil(wave['transfer_hours'] / HOURS_PER_WEEK) + 1
+
+
+def timeline_sizing(plan: Dict[str, Any]) -> Dict[str, Any]:
+    """Minimum phase lengths and the cutover window a transfer plan calls for"""
+    waves = plan['waves']
+    summary = plan['summary']
+    final_sync_hours = round(max(summary['cutover_sync_hours'], MIN_FINAL_SYNC_HOURS), 2)
+    return {
+        'infrastructure_weeks': transfer_weeks(waves.get('servers')),
+        'data_migration_weeks': transfer_weeks(waves.get('databases')) + transfer_weeks(waves.get('file_shares')),
+        'cutover_window': {
+            'final_sync_hours': final_sync_hours,
+            'total_hours': round(CUTOVER_OVERHEAD_HOURS + final_sync_hours, 2),
+            'items_exceeding_downtime_tolerance': summary['items_exceeding_downtime_tolerance'],
+            'items_not_converging': summary['items_not_converging']
+        },
+        'data_transfer': summary
+    }
+
+
+class TransferPlanner:
+    """Estimate sync durations and schedule data transfers across the migration link"""
+
+    def __init__(self, bandwidth_mbps: Optional[float] = None, max_concurrent_transfers: Optional[int] = None,
+                 per_stream_mbps: Optional[float] = None, link_efficiency: float = DEFAULT_LINK_EFFICIENCY):
+        self.logger = logging.getLogger(__name__)
+        if bandwidth_mbps is None:
+            bandwidth_mbps = os.getenv('TRANSFER_BANDWIDTH_MBPS', 1000)
+        if max_concurrent_transfers is None:
+            max_concurrent_transfers = os.getenv('TRANSFER_MAX_CONCURRENCY', 4)
+        self.bandwidth_mbps = float(bandwidth_mbps)
+        self.max_concurrent_transfers = int(max_concurrent_transfers)
+        self.per_stream_mbps = float(per_stream_mbps) if per_stream_mbps else None
+        self.link_efficiency = link_efficiency
+        if self.bandwidth_mbps <= 0 or self.max_concurrent_transfers < 1 or not 0 < link_efficiency <= 1:
+            raise ValueError("Bandwidth, concurrency and link efficiency must be positive")
+
+        # Every concurrent stream gets an equal share of the usable link, capped per stream
+        stream_mbps = self.bandwidth_mbps * link_efficiency / self.max_concurrent_transfers
+        if self.per_stream_mbps:
+            stream_mbps = min(stream_mbps, self.per_stream_mbps)
+        self.stream_mbps = stream_mbps
+        self.stream_gb_per_hour = gb_per_hour(stream_mbps)
+
+    def plan(self, servers: List[Any], databases: List[Any], file_shares: List[Any]) -> Dict[str, Any]:
+        """Per-item sync durations plus a per-wave transfer schedule and the cutover sync window"""
+        items = self._collect_items(servers, databases, file_shares)
+        durations = self._sync_durations(items)
+
+        waves = {}
+        for wave in TRANSFER_WAVES:
+            indices = [i for i, item in enumerate(items) if item['wave'] == wave]
+            # Initial and delta passes run back to back on the same stream before cutover
+            busy = durations['initial_sync_hours'][indices] + durations['delta_sync_hours'][indices]
+            starts, makespan = self._schedule(busy)
+            for offset, i in enumerate(indices):
+                items[i]['start_hour'] = round(float(starts[offset]), 2)
+                items[i]['finish_hour'] = round(float(starts[offset] + busy[offset]), 2)
+            waves[wave] = {
+                'items': len(indices),
+                'total_gb': round(float(sum(items[i]['size_gb'] for i in indices)), 1),
+                'transfer_hours': round(makespan, 2),
+                'transfer_weeks': round(makespan / HOURS_PER_WEEK, 2)
+            }
+
+        # All final deltas run inside the cutover window, sharing the link
+        _, cutover_hours = self._schedule(durations['cutover_downtime_minutes'] / 60)
+
+        for i, item in enumerate(items):
+            item['daily_change_gb'] = round(float(durations['daily_change_gb'][i]), 2)
+            item['initial_sync_hours'] = round(float(durations['initial_sync_hours'][i]), 2)
+            item['delta_sync_hours'] = round(float(durations['delta_sync_hours'][i]), 2)
+            item['delta_passes'] = int(durations['delta_passes'][i])
+            item['cutover_downtime_minutes'] = round(float(durations['cutover_downtime_minutes'][i]), 1)
+            item['within_downtime_tolerance'] = bool(durations['within_tolerance'][i])
+            item['converges'] = bool(durations['converges'][i])
+
+        return {
+            'link': {
+                'bandwidth_mbps': self.bandwidth_mbps,
+                'link_efficiency': self.link_efficiency,
+                'max_concurrent_transfers': self.max_concurrent_transfers,
+                'stream_mbps': round(self.stream_mbps, 1),
+                'stream_gb_per_hour': round(self.stream_gb_per_hour, 2)
+            },
+            'summary': {
+                'total_items': len(items),
+                'total_gb': round(float(sum(item['size_gb'] for item in items)), 1),
+                'total_transfer_hours': round(sum(w['transfer_hours'] for w in waves.values()), 2),
+                'cutover_sync_hours': round(cutover_hours, 2),
+                'items_exceeding_downtime_tolerance': int((~durations['within_tolerance']).sum()),
+                'items_not_converging': int((~durations['converges']).sum())
+            },
+            'waves': waves,
+            'items': items
+        }
+
+    def _collect_items(self, servers, databases, file_shares) -> List[Dict[str, Any]]:
+        """Flatten the inventory into transfer items with size, change rate and sync needs"""
+        items = []
+        for db in databases:
+            items.append({
+                'wave': 'databases',
+                'name': _field(db, 'db_name'),
+                'size_gb': float(_field(db, 'size_gb', 0)),
+                'write_frequency': _field(db, 'write_frequency', 'Medium'),
+                'real_time_sync': _is_true(_field(db, 'real_time_sync', False)),
+                'downtime_tolerance': _field(db, 'downtime_tolerance', 'Medium')
+            })
+        for server in servers:
+            items.append({
+                'wave': 'servers',
+                'name': _field(server, 'server_id'),
+                'size_gb': float(_field(server, 'disk_size', 0)),
+                'write_frequency': None,
+                'real_time_sync': False,
+                'downtime_tolerance': _field(server, 'downtime_tolerance', 'Medium')
+            })
+        for share in file_shares:
+            items.append({
+                'wave': 'file_shares',
+                'name': _field(share, 'share_name'),
+                'size_gb': float(_field(share, 'total_size_gb', 0)),
+                'write_frequency': _field(share, 'write_frequency', 'Medium'),
+                'real_time_sync': _is_true(_field(share, 'real_time_sync', False)),
+                'downtime_tolerance': _field(share, 'downtime_tolerance', 'Medium')
+            })
+        return items
+
+    def _sync_durations(self, items: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+        """Vectorized initial sync, iterative delta passes and final cutover delta per item"""
+        rate = self.stream_gb_per_hour
+        size = np.array([item['size_gb'] for item in items], dtype=float)
+        daily_change = np.array([
+            SERVER_DAILY_CHANGE_RATE if item['wave'] == 'servers'
+            else DAILY_CHANGE_RATES.get(str(item['write_frequency']).strip().lower(), DEFAULT_DAILY_CHANGE_RATE)
+            for item in items
+        ], dtype=float) * size
+        change_per_hour = daily_change / 24
+        replicated = np.array([item['real_time_sync'] for item in items], dtype=bool)
+        tolerance = np.array([
+            DOWNTIME_TOLERANCE_MINUTES.get(str(item['downtime_tolerance']).strip().lower(), DEFAULT_DOWNTIME_TOLERANCE_MINUTES)
+            for item in items
+        ], dtype=float)
+
+        initial = size / rate
+        # Each delta pass ships what changed while the previous pass ran; passes
+        # shrink only while the item changes slower than the stream can copy
+        converges = change_per_hour < rate
+        delta_total = np.zeros(len(items))
+        passes = np.zeros(len(items), dtype=int)
+        pending = change_per_hour * initial / rate
+        # Passes on an item that outpaces its stream only grow; it is flagged instead of scheduled for them
+        active = ~replicated & converges
+        for _ in range(MAX_DELTA_PASSES):
+            active &= pending * 60 > DELTA_TARGET_MINUTES
+            if not active.any():
+                break
+            delta_total += np.where(active, pending, 0)
+            passes += active
+            pending = np.where(active, change_per_hour * pending / rate, pending)
+
+        downtime = np.where(replicated, REPLICATION_CUTOVER_MINUTES, pending * 60)
+        downtime = np.where(size > 0, downtime, 0)
+        return {
+            'daily_change_gb': daily_change,
+            'initial_sync_hours': initial,
+            'delta_sync_hours': delta_total,
+            'delta_passes': passes,
+            'cutover_downtime_minutes': downtime,
+            'within_tolerance': converges & (downtime <= tolerance),
+            'converges': converges
+        }
+
+    def _schedule(self, durations: np.ndarray):
+        """Longest-first greedy assignment of transfers to concurrent streams"""
+        durations = np.asarray(durations, dtype=float)
+        starts = np.zeros(len(durations))
+        streams = [0.0] * min(self.max_concurrent_transfers, max(len(durations), 1))
+        for i in np.argsort(-durations, kind='stable'):
+            free_at = heapq.heappop(streams)
+            starts[i] = free_at
+            heapq.heappush(streams, free_at + durations[i])
+        return starts, max(streams)
@@ -3,7 +3,6 @@ import sqlite3
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
-import pandas as pd
 import json
 from datetime import datetime, timedelta
 
@@ -17,25 +16,33 @@ except ImportError:
 except Exception as e:
     print(f"⚠️  Error loading .env file: {e}")
 
-# Import AI service (with error handling)
+# The AI service (boto3 client, model probing) is built on first use so startup stays fast
 ai_service = None
 ai_service_error = None
-try:
-    print("🚀 Loading AI service...")
-    from services.ai_recommendations import AIRecommendationService
-    print("🤖 Initializing AI service...")
-    ai_service = AIRecommendationService()
-    print("✅ AI service initialized successfully")
-except Exception as e:
-    ai_service_error = str(e)
-    print(f"❌ Warning: AI service initialization failed: {e}")
-    print(f"   Error type: {type(e)}")
-    print("   🔧 Application will continue without AI features")
-    ai_service = None
+
+def load_ai_service():
+    """Shared AI service, or None when it can't be initialized (the app runs without AI features)"""
+    global ai_service, ai_service_error
+    if ai_service is None and ai_service_error is None:
+        try:
+            print("🤖 Initializing AI service...")
+            from services.ai_registry import get_ai_service
+            ai_service = get_ai_service()
+            print("✅ AI service initialized successfully")
+        except Exception as e:
+            ai_service_error = str(e)
+            print(f"❌ Warning: AI service initialization failed: {e}")
+            print(f"   Error type: {type(e)}")
+            print("   🔧 Application will continue without AI features")
+    return ai_service
 
 app = Flask(__name__)
 CORS(app)
 
+# Per-request deadline that AI calls check before going out
+from services.circuit_breaker import install_request_deadline
+install_request_deadline(app)
+
 # Database configuration
 basedir = os.path.abspath(os.path.dirname(__file__))
 app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{os.path.join(basedir, "migration_tool.db")}'
@@ -44,6 +51,11 @@ app.config['SECRET_KEY'] = 'dev-secret-key'
 
 db = SQLAlchemy(app)
 
+# Statements per request, slow-query plans and repeated statements (SQL_SLOW_QUERY_MS)
+from services.sql_instrumentation import install_sql_tracking, instrument_sqlalchemy
+instrument_sqlalchemy()
+install_sql_tracking(app)
+
 # Initialize models
 from models_new import init_models
 models = init_models(db)
@@ -55,13 +67,15 @@ BusinessConstraint = models['BusinessConstraint']
 ResourceRate = models['ResourceRate']
 MigrationPlan = models['MigrationPlan']
 
-# Import export service
-try:
-    from services.export_service_new import ExportService
-    print("✅ Export service loaded successfully")
-except Exception as e:
-    print(f"⚠️  Warning: Export service failed to load: {e}")
-    ExportService = None
+# Export libraries (reportlab, python-docx, openpyxl, pandas) load with the first export
+def load_export_service():
+    """ExportService class, or None when the export libraries aren't available"""
+    try:
+        from services.export_service_new import ExportService
+        return ExportService
+    except Exception as e:
+        print(f"⚠️  Warning: Export service failed to load: {e}")
+        return None
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
@@ -910,6 +924,7 @@ def delete_resource_rate(rate_id):
 @app.route('/api/cost-estimation', methods=['GET'])
 def get_cost_estimation():
     """Get cost estimation analysis"""
+    ai_service = load_ai_service()
     try:
         # Get data from database using SQLAlchemy
         servers_count = Server.query.count()
@@ -1050,6 +1065,7 @@ def get_cost_estimation():
 @app.route('/api/ai-status', methods=['GET'])
 def get_ai_status():
     """Get AI service status"""
+    ai_service = load_ai_service()
     ai_available = False
     status_message = "AI service not initialized"
     provider = "Rule-based fallback system"
@@ -1084,6 +1100,7 @@ def get_ai_status():
 @app.route('/api/migration-strategy', methods=['GET', 'POST'])
 def get_migration_strategy():
     """Get migration strategy analysis with AI-powered server recommendations"""
+    ai_service = load_ai_service()
     try:
         # Get data from database using SQLAlchemy
         servers = Server.query.all()
@@ -1357,6 +1374,7 @@ def get_timeline():
 @app.route('/api/debug-ai', methods=['GET'])
 def debug_ai():
     """Debug AI service for troubleshooting"""
+    ai_service = load_ai_service()
     debug_info = {
         "ai_service_exists": ai_service is not None,
         "bedrock_client_exists": False,
@@ -1395,6 +1413,7 @@ def debug_ai():
 def export_report():
     """Export migration plan to various formats"""
     try:
+        ExportService = load_export_service()
         if not ExportService:
             return jsonify({'error': 'Export service not available'}), 500
             
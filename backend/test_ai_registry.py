@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Test the process-wide AI service and Bedrock client registry"""
+
+import sys
+import os
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services import ai_registry
+from services.ai_registry import get_ai_service, get_bedrock_client, bedrock_client_config, reset_registry
+
+
+def test_client_config():
+    """Clients get bounded timeouts, adaptive retries and a pool sized from the environment"""
+    os.environ['BEDROCK_MAX_POOL_CONNECTIONS'] = '32'
+    try:
+        config = bedrock_client_config()
+    finally:
+        del os.environ['BEDROCK_MAX_POOL_CONNECTIONS']
+    assert config.max_pool_connections == 32
+    assert config.retries['mode'] == 'adaptive'
+    assert config.connect_timeout == 5
+    print(f"✅ Client config: pool {config.max_pool_connections}, read timeout {config.read_timeout}s")
+
+
+def test_shared_client_and_service():
+    """Services share one client per region and one service per process"""
+    reset_registry()
+    client = get_bedrock_client('us-east-1')
+    assert get_bedrock_client('us-east-1') is client
+    assert get_bedrock_client('eu-west-1') is not client
+
+    service = get_ai_service()
+    assert get_ai_service() is service
+    assert service.bedrock_client is get_bedrock_client(service.region_name)
+    print("✅ Client and service shared across callers")
+
+
+def test_concurrent_initialization():
+    """Concurrent first use builds exactly one service"""
+    reset_registry()
+    services = []
+    threads = [threading.Thread(target=lambda: services.append(get_ai_service())) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(set(map(id, services))) == 1
+    assert len(ai_registry._clients) == 1
+    print("✅ 16 concurrent callers got the same service")
+
+
+def test_repeat_lookup_is_cheap():
+    """After warm-up, looking the service up costs no client construction"""
+    get_ai_service()
+    start = time.perf_counter()
+    for _ in range(10000):
+        get_ai_service()
+    elapsed = time.perf_counter() - start
+    assert elapsed < 0.1
+    print(f"✅ 10,000 lookups in {elapsed * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    test_client_config()
+    test_shared_client_and_service()
+    test_concurrent_initialization()
+    test_repeat_lookup_is_cheap()
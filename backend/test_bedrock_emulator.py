@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""Test the local Bedrock emulator: request/response shapes, record/replay, fault injection and streaming"""
+
+import sys
+import os
+import io
+import json
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from botocore.exceptions import ClientError
+from services import ai_registry
+from services.ai_recommendations import AIRecommendationService
+from services.bedrock_emulator import BedrockEmulator, recording_key
+from services.circuit_breaker import CircuitBreaker
+from services.model_cascade import CascadePolicy
+from services.recommendation_index import RecommendationIndex
+from services.sizing_model import RecommendationLog
+
+SONNET = 'anthropic.claude-3-5-sonnet-20240620-v1:0'
+TITAN = 'amazon.titan-text-express-v1'
+NOVA = 'amazon.nova-pro-v1:0'
+SERVER = {'server_id': 'web-01', 'vcpu': 4, 'ram': 16, 'disk_size': 200, 'os_type': 'Linux', 'technology': 'nginx'}
+
+
+class RealClientDouble:
+    """Stands in for the real bedrock-runtime client in record mode"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def invoke_model(self, modelId, body):
+        self.calls += 1
+        text = json.dumps({'recommended_instance': 'c5.xlarge', 'confidence_level': 'high'})
+        return {'body': io.BytesIO(json.dumps({'content': [{'text': text}]}).encode())}
+
+
+def make_service(client, model_id=SONNET):
+    service = AIRecommendationService()
+    service.model_id = model_id
+    service.bedrock_client = client
+    service.circuit_breaker = CircuitBreaker()
+    service.cascade = CascadePolicy(enabled=False)
+    service.recommendation_index = RecommendationIndex(max_distance=0)
+    service.sizing_log = RecommendationLog(enabled=False)
+    service.sizing_model = None
+    return service
+
+
+def test_model_families():
+    """The service parses emulated Anthropic, Titan and Nova responses"""
+    path = os.path.join(tempfile.mkdtemp(), 'recordings.json')
+    emulator = BedrockEmulator(recordings_path=path, seed=1)
+    for model_id in (SONNET, TITAN, NOVA):
+        result = make_service(emulator, model_id).get_server_recommendation(SERVER)
+        assert result['recommended_instance'] == 'm5.large', (model_id, result)
+    assert emulator.stats['synthesized'] == 3
+    print("✅ Anthropic, Titan and Nova shapes round-trip through the service")
+
+
+def test_record_then_replay():
+    """Record mode captures real answers; replay serves them by prompt hash without the real client"""
+    path = os.path.join(tempfile.mkdtemp(), 'recordings.json')
+    real = RealClientDouble()
+    recorder = BedrockEmulator(mode='record', recordings_path=path, client=real)
+    recorded = make_service(recorder).get_server_recommendation(SERVER)
+    assert real.calls == 1 and recorded['recommended_instance'] == 'c5.xlarge'
+
+    with open(path) as f:
+        recordings = json.load(f)
+    assert len(recordings) == 1 and next(iter(recordings.values()))['model_id'] == SONNET
+
+    replayer = BedrockEmulator(recordings_path=path)
+    replayed = make_service(replayer).get_server_recommendation(SERVER)
+    assert replayed['recommended_instance'] == 'c5.xlarge'
+    assert replayer.stats['replayed'] == 1 and replayer.stats['synthesized'] == 0
+    assert recording_key(SONNET, 'a') != recording_key(TITAN, 'a')
+    print("✅ Recorded answers replay offline, keyed by model and prompt")
+
+
+def test_synthetic_answers_not_learned():
+    """Synthesized answers are served but never logged for training or reused for similar components"""
+    directory = tempfile.mkdtemp()
+    emulator = BedrockEmulator(recordings_path=os.path.join(directory, 'recordings.json'))
+    service = make_service(emulator)
+    service.cascade = CascadePolicy(fast_model_id='anthropic.claude-3-haiku-20240307-v1:0', enabled=True)
+    service.recommendation_index = RecommendationIndex()
+    service.sizing_log = RecommendationLog(path=os.path.join(directory, 'log.jsonl'), enabled=True)
+
+    for _ in range(2):
+        result = service.get_server_recommendation(SERVER)
+        assert result['synthetic'] and 'reused_from' not in result
+    assert emulator.stats['synthesized'] == 2
+    assert service.sizing_log.read() == [] and service.recommendation_index.stats()['indexed'] == 0
+
+    # Recorded answers from the real model are still learned from
+    recorder = BedrockEmulator(mode='record', recordings_path=os.path.join(directory, 'recordings.json'),
+                               client=RealClientDouble())
+    service.bedrock_client = recorder
+    service.cascade = CascadePolicy(enabled=False)
+    service.get_server_recommendation(SERVER)
+    assert [r['label'] for r in service.sizing_log.read()] == ['c5.xlarge']
+    print("✅ Synthetic emulator answers stay out of the training log and the similarity index")
+
+
+def test_fault_injection():
+    """Throttling surfaces as ThrottlingException and the service falls back"""
+    emulator = BedrockEmulator(throttle_rate=1.0, recordings_path=os.path.join(tempfile.mkdtemp(), 'r.json'))
+    try:
+        emulator.invoke_model(modelId=SONNET, body=json.dumps({'messages': [{'role': 'user', 'content': 'x'}]}))
+        assert False, "expected throttling"
+    except ClientError as e:
+        assert e.response['Error']['Code'] == 'ThrottlingException'
+
+    result = make_service(emulator).get_server_recommendation(SERVER)
+    assert result.get('fallback_used') is True, result
+    assert emulator.stats['throttled'] == 2
+    print("✅ Injected throttling triggers the rule-based fallback")
+
+
+def test_reproducible_latency():
+    """Same seed, same latency sequence; shorter answers finish sooner"""
+    def delays(seed, text):
+        slept = []
+        emulator = BedrockEmulator(latency_ms=300, latency_sigma=0.5, tokens_per_second=100, seed=seed,
+                                   synthesize=lambda m, p: text, sleep=slept.append,
+                                   recordings_path=os.path.join(tempfile.mkdtemp(), 'r.json'))
+        for _ in range(20):
+            emulator.invoke_model(modelId=SONNET, body={'max_tokens': 4000, 'messages': [{'content': 'x'}]})
+        return slept
+
+    long_text, short_text = 'x' * 4000, 'x' * 400
+    first, second = delays(7, long_text), delays(7, long_text)
+    assert first == second
+    assert delays(8, long_text) != first
+    # 1000 output tokens at 100/s is 10s on top of the ~0.3s first token; 100 tokens is 1s
+    assert min(first) > 10 and max(delays(7, short_text)) < 4
+    print(f"✅ Latency is seeded (median {sorted(first)[10]:.2f}s) and scales with output length")
+
+
+def test_streaming():
+    """Streamed chunks reassemble into the same text for every model family"""
+    text = json.dumps({'recommended_instance': 'r5.large', 'reasoning': 'y' * 300})
+    emulator = BedrockEmulator(synthesize=lambda m, p: text, recordings_path=os.path.join(tempfile.mkdtemp(), 'r.json'))
+    bodies = {
+        SONNET: {'messages': [{'role': 'user', 'content': 'x'}]},
+        TITAN: {'inputText': 'x'},
+        NOVA: {'messages': [{'role': 'user', 'content': [{'text': 'x'}]}]},
+    }
+    for model_id, body in bodies.items():
+        response = emulator.invoke_model_with_response_stream(modelId=model_id, body=json.dumps(body))
+        pieces = []
+        for event in response['body']:
+            payload = json.loads(event['chunk']['bytes'])
+            if 'outputText' in payload:
+                pieces.append(payload['outputText'])
+            elif 'contentBlockDelta' in payload:
+                pieces.append(payload['contentBlockDelta']['delta']['text'])
+            elif payload.get('type') == 'content_block_delta':
+                pieces.append(payload['delta']['text'])
+        assert ''.join(pieces) == text and len(pieces) > 1, model_id
+    print("✅ Streaming reassembles for Anthropic, Titan and Nova")
+
+
+def test_registry_configuration():
+    """BEDROCK_EMULATOR swaps the shared client for the emulator"""
+    names = ('BEDROCK_EMULATOR', 'BEDROCK_EMULATOR_RECORDINGS', 'BEDROCK_EMULATOR_THROTTLE_RATE')
+    saved = {name: os.environ.get(name) for name in names}
+    os.environ['BEDROCK_EMULATOR'] = 'replay'
+    os.environ['BEDROCK_EMULATOR_RECORDINGS'] = os.path.join(tempfile.mkdtemp(), 'r.json')
+    os.environ['BEDROCK_EMULATOR_THROTTLE_RATE'] = '0.5'
+    try:
+        ai_registry.reset_registry()
+        client = ai_registry.get_bedrock_client('us-east-1')
+        assert isinstance(client, BedrockEmulator) and client.throttle_rate == 0.5
+        assert isinstance(ai_registry.get_ai_service().bedrock_client, BedrockEmulator)
+    finally:
+        # Put back what the rest of the process runs with, e.g. the replay emulator other tests set up
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        ai_registry.reset_registry()
+    print("✅ Emulator plugs in through the client registry")
+
+
+def test_performance():
+    """Zero-latency replay is fast enough to benchmark the service itself"""
+    emulator = BedrockEmulator(recordings_path=os.path.join(tempfile.mkdtemp(), 'r.json'))
+    service = make_service(emulator)
+    start = time.time()
+    for i in range(200):
+        service.get_server_recommendation(dict(SERVER, server_id=f'web-{i}', vcpu=2 + i % 30))
+    elapsed = time.time() - start
+    assert elapsed < 5.0, f"200 emulated recommendations took {elapsed:.2f}s"
+    print(f"✅ 200 emulated recommendations in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    print("🧪 Testing Bedrock emulator...")
+    test_model_families()
+    test_record_then_replay()
+    test_synthetic_answers_not_learned()
+    test_fault_injection()
+    test_reproducible_latency()
+    test_streaming()
+    test_registry_configuration()
+    test_performance()
+    print("\n🎉 All Bedrock emulator tests passed!")
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Test the API benchmark harness: statistics, baseline comparison and a small end-to-end run"""
+
+import sys
+import os
+import argparse
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from benchmark_api import (ENDPOINTS, STARTUP_BUDGET_MS, compare_to_baseline, measure_startup, run_scale,
+                           summarize_latencies, top_imports)
+
+
+def make_results(p95_ms, rss_mb=100.0, errors=0):
+    return {'scales': {'100': {'servers': {'p95_ms': p95_ms, 'peak_rss_mb': rss_mb, 'errors': errors}}}}
+
+
+def test_latency_summary():
+    """Percentiles and throughput from raw timings"""
+    stats = summarize_latencies([0.01] * 19 + [0.1], wall_seconds=0.29)
+    assert stats['requests'] == 20 and stats['p50_ms'] == 10.0 and stats['max_ms'] == 100.0
+    assert 10.0 < stats['p95_ms'] < 100.0 and round(stats['throughput_rps']) == 69
+    print("✅ Latency percentiles and throughput are computed")
+
+
+def test_baseline_comparison():
+    """Regressions are flagged beyond the tolerance and the absolute slack only"""
+    baseline = make_results(40.0)
+    assert compare_to_baseline(make_results(48.0), baseline, 0.25, 5.0) == []
+    assert len(compare_to_baseline(make_results(60.0), baseline, 0.25, 5.0)) == 1
+    # Tiny endpoints: 1ms -> 4ms is noise, not a regression
+    assert compare_to_baseline(make_results(4.0), make_results(1.0), 0.25, 5.0) == []
+    assert 'peak RSS' in compare_to_baseline(make_results(40.0, rss_mb=200.0), baseline, 0.25, 5.0)[0]
+    assert 'errors' in compare_to_baseline(make_results(40.0, errors=2), baseline, 0.25, 5.0)[0]
+    # Scales or endpoints missing from the baseline are not compared
+    assert compare_to_baseline({'scales': {'1000': {'servers': {'p95_ms': 999.0}}}}, baseline, 0.25, 5.0) == []
+    print("✅ Baseline comparison flags errors, latency and memory regressions")
+
+
+def test_importtime_breakdown():
+    """Only the backend's direct imports are reported, slowest first"""
+    log = """import time: self [us] | cumulative | imported package
+import time:       100 |        100 |     markupsafe
+import time:      2000 |       5000 |   flask
+import time:       300 |        300 |   dotenv
+import time:        50 |       9000 | app
+import time:       400 |        400 | other
+"""
+    assert top_imports(log, 'app') == [{'module': 'flask', 'cumulative_ms': 5.0},
+                                       {'module': 'dotenv', 'cumulative_ms': 0.3}]
+    assert top_imports(log, 'missing') == []
+
+    baseline = {'scales': {}, 'startup': {'app': {'time_to_first_request_ms': 200.0}}}
+    slower = {'scales': {}, 'startup': {'app': {'time_to_first_request_ms': 400.0}}}
+    assert 'app startup' in compare_to_baseline(slower, baseline, 0.25, 5.0)[0]
+    print("✅ Import breakdown is parsed and startup regressions are flagged")
+
+
+def test_cold_start():
+    """The SQLAlchemy backend serves its first inventory request without importing export or AI libraries
+
+    Startup time depends on the machine, so it is reported here and enforced
+    by `benchmark_api.py --startup-budget-ms` against a baseline instead.
+    """
+    stats = measure_startup('app', '/api/servers', repeats=2)
+    assert stats['status'] == 200
+    assert not {'pandas', 'boto3', 'reportlab', 'docx', 'openpyxl'} & set(stats['heavy_modules']), stats
+    assert stats['top_imports'], stats
+    within = 'within' if stats['time_to_first_request_ms'] <= STARTUP_BUDGET_MS else 'over'
+    print(f"✅ app.py served its first request {stats['time_to_first_request_ms']}ms after import started "
+          f"({within} the {STARTUP_BUDGET_MS:.0f}ms budget; slowest import {stats['top_imports'][0]['module']})")
+
+
+def test_end_to_end():
+    """A small scale boots the app on the emulator and measures every endpoint without errors"""
+    args = argparse.Namespace(seed=42, iterations=2, warmup=1, concurrency=2, endpoints=None, recordings=None,
+                              timeout=300)
+    start = time.time()
+    results = run_scale(100, args)
+    elapsed = time.time() - start
+    assert set(results) == {name for name, _, _, _ in ENDPOINTS}
+    for name, stats in results.items():
+        assert stats['errors'] == 0, (name, stats)
+        assert stats['requests'] == 2 and stats['p95_ms'] > 0 and stats['throughput_rps'] > 0
+    exports_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'exports')
+    assert not os.path.isdir(exports_dir) or not any(f.startswith('migration_report_') for f in os.listdir(exports_dir))
+    assert elapsed < 60.0, f"100-server benchmark took {elapsed:.2f}s"
+    print(f"✅ All {len(results)} endpoints benchmarked at 100 servers in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    print("🧪 Testing API benchmark harness...")
+    test_latency_summary()
+    test_baseline_comparison()
+    test_importtime_breakdown()
+    test_cold_start()
+    test_end_to_end()
+    print("\n🎉 All benchmark harness tests passed!")
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""Test the Bedrock circuit breaker and per-request deadlines"""
+
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.circuit_breaker import CircuitBreaker, request_deadline, time_remaining, CLOSED, OPEN, HALF_OPEN
+from services.ai_recommendations import AIRecommendationService
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class UnreachableBedrock:
+    """Client double that fails like an unreachable endpoint after a delay"""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.calls = 0
+
+    def invoke_model(self, **kwargs):
+        self.calls += 1
+        time.sleep(self.delay)
+        raise ConnectionError("Could not connect to the endpoint URL")
+
+
+def test_breaker_state_machine():
+    """Failures open the breaker, the cool-down half-opens it, a good trial closes it"""
+    clock = FakeClock()
+    breaker = CircuitBreaker(window_size=10, minimum_calls=4, failure_rate_threshold=0.5, open_seconds=30, clock=clock)
+    for success in (True, False, True, False):
+        assert breaker.allow_request()
+        breaker.record(success)
+    assert breaker.state == OPEN
+    assert not breaker.allow_request()
+
+    clock.now += 31
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow_request()
+    assert not breaker.allow_request()  # only one trial at a time
+    breaker.record(True)
+    assert breaker.state == CLOSED
+
+    # A released trial lets the next call through while still half-open
+    for _ in range(4):
+        breaker.record(False)
+    clock.now += 31
+    assert breaker.allow_request()
+    breaker.release()
+    assert breaker.state == HALF_OPEN and breaker.allow_request()
+    breaker.record(True)
+    assert breaker.state == CLOSED
+    print(f"✅ Breaker cycled closed → open → half-open → closed ({breaker.rejected_calls} rejected)")
+
+
+def test_slow_calls_and_failed_trial():
+    """Slow calls count as failures and a failed trial re-opens the breaker"""
+    clock = FakeClock()
+    breaker = CircuitBreaker(minimum_calls=3, slow_call_seconds=5, open_seconds=10, clock=clock)
+    for _ in range(3):
+        breaker.record(True, latency_seconds=8)
+    assert breaker.state == OPEN
+    clock.now += 11
+    assert breaker.allow_request()
+    breaker.record(False)
+    assert breaker.state == OPEN
+    print("✅ Slow calls trip the breaker and failed trials re-open it")
+
+
+def test_request_deadline():
+    """Deadlines are scoped to the request context"""
+    assert time_remaining() is None
+    with request_deadline(10):
+        assert 9 < time_remaining() <= 10
+    assert time_remaining() is None
+    print("✅ Request deadline scoped correctly")
+
+
+def test_service_falls_back_fast():
+    """Once the breaker opens or the deadline is short, the service skips Bedrock entirely"""
+    service = AIRecommendationService()
+    service.bedrock_client = UnreachableBedrock()
+    service.circuit_breaker = CircuitBreaker(minimum_calls=3, open_seconds=60)
+    server = {'server_id': 'SRV-001', 'vcpu': 4, 'ram': 16}
+
+    for _ in range(3):
+        assert service.get_server_recommendation(server)['fallback_used']
+    assert service.circuit_breaker.state == OPEN
+
+    start = time.perf_counter()
+    for _ in range(300):
+        result = service.get_server_recommendation(server)
+    elapsed = time.perf_counter() - start
+    assert result['fallback_used']
+    assert service.bedrock_client.calls == 3
+    assert elapsed < 0.5
+
+    # Deadline too short to attempt a call at all
+    service.circuit_breaker = CircuitBreaker()
+    with request_deadline(service.min_call_seconds / 2):
+        service.get_server_recommendation(server)
+    assert service.bedrock_client.calls == 3
+    print(f"✅ 300 calls with an open breaker fell back in {elapsed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    test_breaker_state_machine()
+    test_slow_calls_and_failed_trial()
+    test_request_deadline()
+    test_service_falls_back_fast()
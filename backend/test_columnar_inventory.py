@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""Test the columnar inventory: typed columns, dictionary-encoded categoricals, row views and filters"""
+
+import sys
+import os
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault('BEDROCK_EMULATOR', 'replay')
+os.environ.setdefault('SIZING_LOG_ENABLED', 'false')
+
+import numpy as np
+
+from services.columnar_inventory import CategoricalColumn, ColumnarTable, RowView
+from services.inventory_generator import generate_inventory, load_into_sqlite
+from services.inventory_snapshot import InventorySnapshot
+
+
+def make_inventory_db(n_servers, seed=5):
+    path = os.path.join(tempfile.mkdtemp(), 'inventory.db')
+    load_into_sqlite(path, generate_inventory(n_servers, seed=seed))
+    return path
+
+
+def connector(path):
+    def connect():
+        conn = sqlite3.connect(path)
+        conn.row_factory = sqlite3.Row
+        return conn
+    return connect
+
+
+def test_types_and_row_views():
+    """Columns get their declared types, NULLs survive and rows read like dicts or objects"""
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE servers (id INTEGER, server_id TEXT, os_type TEXT, vcpu INTEGER, ram INTEGER, '
+                 'disk_size INTEGER, technology TEXT, note TEXT)')
+    conn.executemany('INSERT INTO servers VALUES (?, ?, ?, ?, ?, ?, ?, ?)', [
+        (1, 'SRV-1', 'Ubuntu 22.04', 4, 16, 100, 'Nginx', 'first'),
+        (2, 'SRV-2', 'Windows Server 2019', 8, 32, None, None, None),
+        (3, 'SRV-3', 'Ubuntu 22.04', 2, 4.5, 50, 'Nginx', 'thïrd'),
+    ])
+    table = ColumnarTable.from_sqlite(conn, 'servers')
+
+    assert isinstance(table.column('os_type'), CategoricalColumn) and table.column('os_type').categories == [
+        'Ubuntu 22.04', 'Windows Server 2019']
+    assert table.column('os_type').codes.dtype == np.int8 and table.column('vcpu').dtype == np.int32
+    # A REAL stored in an INTEGER column isn't truncated
+    assert table.column('ram').dtype == np.float64 and table[2].ram == 4.5
+    assert table[1].disk_size is None and table[1].technology is None and table[1]['note'] is None
+    assert table[2].note == 'thïrd' and table.sum('disk_size') == 150
+
+    row = table[0]
+    assert isinstance(row, RowView) and not hasattr(row, '__dict__')
+    assert row.vcpu == 4 and type(row.vcpu) is int and row['server_id'] == 'SRV-1' and row.get('missing', 7) == 7
+    assert row.to_dict() == {'id': 1, 'server_id': 'SRV-1', 'os_type': 'Ubuntu 22.04', 'vcpu': 4, 'ram': 16.0,
+                             'disk_size': 100, 'technology': 'Nginx', 'note': 'first'}
+    assert [r.server_id for r in table[1:]] == ['SRV-2', 'SRV-3'] and table[-1].server_id == 'SRV-3'
+    print("✅ Typed columns, NULL masks and slotted row views")
+
+
+def test_untidy_values():
+    """Text flags are coerced and text in numeric columns degrades that column instead of failing the table"""
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE databases (id INTEGER, db_name TEXT, size_gb INTEGER, ha_dr_required TEXT, '
+                 'real_time_sync TEXT)')
+    conn.executemany('INSERT INTO databases VALUES (?, ?, ?, ?, ?)', [
+        (1, 'orders', 100, 'No', 'maybe'),
+        (2, 'billing', 'n/a', 'Yes', 'true'),
+        (3, 'audit', None, '0', None),
+        (4, 'hr', 25, 1, 'false'),
+    ])
+    table = ColumnarTable.from_sqlite(conn, 'databases')
+
+    assert table.values('ha_dr_required') == [False, True, False, True]
+    # Unrecognised text keeps a flag column as text
+    assert table.values('real_time_sync') == ['maybe', 'true', None, 'false']
+    assert table.values('size_gb') == ['100', 'n/a', None, '25']
+    assert table.numeric('size_gb').tolist() == [100.0, 0.0, 0.0, 25.0] and table.sum('size_gb') == 125
+
+    conn.execute("UPDATE databases SET size_gb = '40.5' WHERE id = 2")
+    table = ColumnarTable.from_sqlite(conn, 'databases')
+    assert table.values('size_gb') == [100, 40.5, None, 25] and table.column('size_gb').dtype == np.float64
+    print("✅ Text flags and numbers stored as text load without failing the table")
+
+
+def test_vectorized_filters():
+    """Masks over typed and categorical columns match row-by-row filtering"""
+    path = make_inventory_db(2000)
+    conn = sqlite3.connect(path)
+    table = ColumnarTable.from_sqlite(conn, 'servers')
+    conn.row_factory = sqlite3.Row
+    rows = [dict(row) for row in conn.execute('SELECT * FROM servers ORDER BY id')]
+    conn.close()
+
+    mask = (table.column('vcpu') >= 8) & table.column('os_type').contains('Windows')
+    expected = [r['server_id'] for r in rows if r['vcpu'] >= 8 and 'Windows' in r['os_type']]
+    assert table.where(mask).values('server_id') == expected and expected
+
+    ssd = table.column('disk_type').eq('SSD')
+    assert int(ssd.sum()) == sum(r['disk_type'] == 'SSD' for r in rows)
+    counts = table.column('technology').value_counts()
+    assert sum(counts.values()) == 2000 and counts['IIS'] == sum(r['technology'] == 'IIS' for r in rows)
+    assert table.where(ssd).column('disk_type').categories is table.column('disk_type').categories
+    print(f"✅ Vectorized filters agree with row filters ({len(expected)} large Windows servers)")
+
+
+def test_snapshot_and_services():
+    """A columnar snapshot gives the same summaries, dicts and service results as the dict one"""
+    from services.migration_advisor import MigrationAdvisor
+    from services.rightsizing import RightSizingOptimizer
+
+    path = make_inventory_db(500)
+    rows = InventorySnapshot.from_sqlite(connector(path))
+    columnar = InventorySnapshot.from_sqlite(connector(path), columnar=True)
+    assert isinstance(columnar.servers, ColumnarTable)
+    assert columnar.summary() == rows.summary()
+    assert columnar.infrastructure_data() == rows.infrastructure_data()
+
+    optimizer = RightSizingOptimizer()
+    assert optimizer.optimize(columnar.servers) == optimizer.optimize(rows.servers)
+
+    models = {'Server': None, 'Database': None, 'FileShare': None, 'CloudPreference': None}
+    advisor = MigrationAdvisor(None, models, inventory=columnar)
+    by_columns = advisor._generate_server_strategies(columnar.servers)
+    # Row views stand in for ORM instances on the per-row path
+    assert by_columns == advisor._generate_server_strategies(list(columnar.servers))
+    first = rows.servers[0]
+    assert by_columns[0]['target_state'] == f"EC2 {optimizer.recommend_instance(first['vcpu'], first['ram'])}"
+    print("✅ Snapshot aggregates and service results match the dict representation")
+
+
+def test_performance():
+    """100k servers fit in a few MB and filter in well under a millisecond per column"""
+    path = make_inventory_db(100000, seed=1)
+    conn = sqlite3.connect(path)
+
+    start = time.perf_counter()
+    ColumnarTable.from_sqlite(conn, 'servers')
+    columnar_seconds = time.perf_counter() - start
+    tracemalloc.start()
+    table = ColumnarTable.from_sqlite(conn, 'servers')
+    columnar_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    conn.row_factory = sqlite3.Row
+    tracemalloc.start()
+    rows = [dict(row) for row in conn.execute('SELECT * FROM servers')]
+    dict_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    conn.close()
+
+    start = time.perf_counter()
+    for _ in range(100):
+        mask = (table.column('vcpu') >= 8) & table.column('os_type').contains('Windows')
+    vectorized = (time.perf_counter() - start) / 100
+    start = time.perf_counter()
+    expected = [r for r in rows if r['vcpu'] >= 8 and 'Windows' in r['os_type']]
+    row_loop = time.perf_counter() - start
+
+    assert int(mask.sum()) == len(expected)
+    assert table.nbytes < 5e6, f"{table.nbytes / 1e6:.1f} MB"
+    assert columnar_bytes * 10 < dict_bytes, f"{columnar_bytes / 1e6:.1f} MB vs {dict_bytes / 1e6:.1f} MB"
+    assert vectorized * 20 < row_loop, f"{vectorized * 1e3:.2f}ms vs {row_loop * 1e3:.2f}ms"
+    print(f"✅ 100k servers: {table.nbytes / 1e6:.1f} MB columnar vs {dict_bytes / 1e6:.0f} MB of dicts, "
+          f"built in {columnar_seconds:.2f}s; filter {vectorized * 1e3:.2f}ms vs {row_loop * 1e3:.1f}ms row by row")
+
+
+if __name__ == "__main__":
+    print("🧪 Testing columnar inventory...")
+    test_types_and_row_views()
+    test_untidy_values()
+    test_vectorized_filters()
+    test_snapshot_and_services()
+    test_performance()
+    print("\n🎉 All columnar inventory tests passed!")
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Test the uptime-pattern-aware cost model"""
+
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.cost_model import (
+    UptimeCostModel, usage_profile, monthly_running_hours, normalize_uptime_pattern, HOURS_PER_WEEK
+)
+from services.pricing_catalog import HOURS_PER_MONTH
+
+
+def test_profiles():
+    """Uptime patterns map onto 168-hour profiles with sensible running hours"""
+    assert usage_profile('24/7').shape == (HOURS_PER_WEEK,)
+    assert normalize_uptime_pattern('24x7') == '24/7'
+    assert normalize_uptime_pattern('Business Hours') == 'business hours'
+    assert normalize_uptime_pattern('something odd') == '24/7'
+    assert abs(monthly_running_hours('24/7') - HOURS_PER_MONTH) < 1e-6
+    assert monthly_running_hours('Business Hours') < monthly_running_hours('Variable') < monthly_running_hours('24/7')
+    # Nightly batch wraps past midnight: 6 hours every day
+    assert usage_profile('batch nightly').sum() == 42
+    print(f"✅ Business hours: {monthly_running_hours('Business Hours'):.0f} h/month, batch: {monthly_running_hours('batch nightly'):.0f} h/month")
+
+
+def test_commitment_recommendation():
+    """Always-on servers reserve, part-time servers stay on-demand, batch servers go spot"""
+    model = UptimeCostModel()
+    result = model.analyze_servers([
+        {'server_id': 'always-on', 'vcpu': 4, 'ram': 16, 'uptime_pattern': '24/7'},
+        {'server_id': 'office', 'vcpu': 4, 'ram': 16, 'uptime_pattern': 'Business Hours'},
+        {'server_id': 'batch', 'vcpu': 4, 'ram': 16, 'uptime_pattern': 'batch nightly'}
+    ])
+    recommended = {s['server_id']: s['recommended_commitment'] for s in result['servers']}
+    assert recommended == {'always-on': '3yr-ri', 'office': 'on-demand', 'batch': 'spot'}
+    assert 'spot' not in result['servers'][0]['monthly_cost_by_option']
+
+    summary = result['fleet_summary']
+    assert summary['optimized_monthly_cost'] < summary['on_demand_monthly_cost']
+    assert sum(m['servers'] for m in summary['commitment_mix'].values()) == 3
+    print(f"✅ Commitment mix saves {summary['savings_percent']}% vs on-demand")
+
+
+def test_explicit_rates():
+    """Explicit hourly rates override rule-engine sizing, including zero-cost servers"""
+    model = UptimeCostModel()
+    result = model.analyze_servers([
+        {'server_id': 'free', 'hourly_rate': 0.0, 'uptime_pattern': 'Business Hours'},
+        {'server_id': 'priced', 'hourly_rate': 1.0, 'uptime_pattern': '24/7'}
+    ])
+    assert result['servers'][0]['recommended_monthly_cost'] == 0.0
+    assert result['servers'][1]['monthly_cost_by_option']['on-demand'] == HOURS_PER_MONTH
+    print("✅ Explicit hourly rates honoured")
+
+
+def test_fleet_performance():
+    """50k servers are priced with a commitment mix in under a second"""
+    patterns = ['24/7', '24x7', 'Business Hours', 'Variable', 'batch nightly', 'weekdays']
+    servers = [
+        {'server_id': f'SRV-{i}', 'vcpu': 2 + (i % 8), 'ram': 4 * (1 + i % 16), 'uptime_pattern': patterns[i % len(patterns)]}
+        for i in range(50000)
+    ]
+    model = UptimeCostModel()
+    start = time.perf_counter()
+    result = model.analyze_servers(servers, include_details=False)
+    elapsed = time.perf_counter() - start
+    assert result['fleet_summary']['server_count'] == 50000
+    assert elapsed < 1.0
+    print(f"✅ Priced 50,000 servers in {elapsed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    test_profiles()
+    test_commitment_recommendation()
+    test_explicit_rates()
+    test_fleet_performance()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""Test the multi-scenario cost comparison engine"""
+
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.scenario_engine import ScenarioComparisonEngine, MAX_SCENARIOS
+
+INVENTORY = {
+    'servers': [
+        {'server_id': 'SRV-001', 'vcpu': 2, 'ram': 4, 'disk_size': 100, 'uptime_pattern': '24/7'},
+        {'server_id': 'SRV-002', 'vcpu': 8, 'ram': 32, 'disk_size': 500, 'uptime_pattern': 'Business Hours'},
+        {'server_id': 'SRV-003', 'vcpu': 16, 'ram': 128, 'disk_size': 1000, 'uptime_pattern': 'Variable'}
+    ],
+    'databases': [
+        {'db_name': 'AppDB', 'size_gb': 100, 'ha_dr_required': False, 'backup_frequency': 'Daily'},
+        {'db_name': 'FinanceDB', 'size_gb': 2000, 'ha_dr_required': True, 'backup_frequency': 'Weekly'}
+    ],
+    'file_shares': [
+        {'share_name': 'Docs', 'total_size_gb': 500, 'access_pattern': 'Hot'},
+        {'share_name': 'Archive', 'total_size_gb': 5000, 'access_pattern': 'Cold'}
+    ]
+}
+
+
+def test_matrix_expansion():
+    """Matrix fields expand into the cartesian product of scenarios"""
+    scenarios = ScenarioComparisonEngine.build_scenarios({
+        'cloud_providers': ['AWS', 'Azure'],
+        'target_regions': ['us-east-1', 'eu-west-1'],
+        'pricing_models': ['on-demand', '3yr-ri', 'spot']
+    })
+    assert len(scenarios) == 12
+    print(f"✅ Matrix expanded to {len(scenarios)} scenarios")
+
+
+def test_ranking_and_pricing_models():
+    """Scenarios are ranked cheapest first and discounts apply in the expected order"""
+    engine = ScenarioComparisonEngine()
+    scenarios = engine.build_scenarios({
+        'target_regions': ['us-east-1', 'sa-east-1'],
+        'pricing_models': ['on-demand', '1yr-ri', '3yr-ri', 'spot']
+    })
+    result = engine.compare(INVENTORY, scenarios)
+
+    totals = [s['monthly_cost']['total'] for s in result['scenarios']]
+    assert totals == sorted(totals)
+    assert result['best_scenario']['rank'] == 1
+
+    by_key = {(s['target_region'], s['pricing_model']): s['monthly_cost'] for s in result['scenarios']}
+    assert by_key[('us-east-1', 'on-demand')]['total'] > by_key[('us-east-1', '1yr-ri')]['total'] > by_key[('us-east-1', '3yr-ri')]['total']
+    assert by_key[('sa-east-1', 'on-demand')]['total'] > by_key[('us-east-1', 'on-demand')]['total']
+    # Spot discounts compute only; databases stay at on-demand rates
+    assert by_key[('us-east-1', 'spot')]['database'] == by_key[('us-east-1', 'on-demand')]['database']
+    print(f"✅ Best scenario: {result['best_scenario']['target_region']} / {result['best_scenario']['pricing_model']}")
+
+
+def test_uptime_override():
+    """An explicit uptime pattern overrides each server's own pattern"""
+    engine = ScenarioComparisonEngine()
+    result = engine.compare(INVENTORY, [
+        {'cloud_provider': 'AWS', 'target_region': 'us-east-1', 'pricing_model': 'on-demand', 'uptime_pattern': '24/7'},
+        {'cloud_provider': 'AWS', 'target_region': 'us-east-1', 'pricing_model': 'on-demand', 'uptime_pattern': None}
+    ])
+    by_uptime = {s['uptime_pattern']: s['monthly_cost']['compute'] for s in result['scenarios']}
+    assert by_uptime['24/7'] > by_uptime['as-is']
+    print("✅ Uptime override priced correctly")
+
+
+def test_invalid_scenarios():
+    """Unknown providers and oversized matrices are rejected"""
+    engine = ScenarioComparisonEngine()
+    for bad in ({'cloud_provider': 'Oracle Cloud'}, {'pricing_model': 'lease'}):
+        try:
+            engine.compare(INVENTORY, [bad])
+            assert False, f"Expected ValueError for {bad}"
+        except ValueError:
+            pass
+    try:
+        engine.build_scenarios({'scenarios': [{}] * (MAX_SCENARIOS + 1)})
+        assert False, "Expected ValueError for too many scenarios"
+    except ValueError:
+        pass
+    print("✅ Invalid scenarios rejected")
+
+
+def test_large_inventory_performance():
+    """A 20k-server inventory against 48 scenarios prices in well under a second"""
+    servers = [
+        {'vcpu': 2 + (i % 8), 'ram': 4 * (1 + i % 16), 'disk_size': 100, 'uptime_pattern': ['24/7', 'Business Hours'][i % 2]}
+        for i in range(20000)
+    ]
+    engine = ScenarioComparisonEngine()
+    scenarios = engine.build_scenarios({
+        'cloud_providers': ['AWS'],
+        'target_regions': ['us-east-1', 'us-west-2', 'eu-west-1', 'ap-south-1'],
+        'pricing_models': ['on-demand', '1yr-ri', '3yr-ri', 'spot'],
+        'uptime_patterns': [None, '24/7', 'Business Hours']
+    })
+    start = time.perf_counter()
+    result = engine.compare({'servers': servers}, scenarios)
+    elapsed = time.perf_counter() - start
+    assert result['scenario_count'] == 48
+    assert elapsed < 1.0
+    print(f"✅ Priced 20,000 servers x 48 scenarios in {elapsed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    test_matrix_expansion()
+    test_ranking_and_pricing_models()
+    test_uptime_override()
+    test_invalid_scenarios()
+    test_large_inventory_performance()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""Test the dependency graph and move-group clustering"""
+
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.dependency_graph import DependencyGraph, UnionFind, strongly_connected_components
+
+SERVERS = [{'server_id': f'SRV-00{i}'} for i in range(1, 6)]
+DATABASES = [
+    {'db_name': 'AppDB', 'server_id': 'SRV-001'},
+    {'db_name': 'FinanceDB', 'server_id': 'SRV-002'}
+]
+FILE_SHARES = [
+    {'share_name': 'Docs', 'server_id': 'SRV-001'},
+    {'share_name': 'Orphan', 'server_id': None}
+]
+
+
+def test_union_find_and_tarjan():
+    """Union-find merges sets; Tarjan finds cycles and numbers dependencies first"""
+    union_find = UnionFind(4)
+    union_find.union(0, 1)
+    union_find.union(2, 3)
+    assert union_find.find(0) == union_find.find(1) != union_find.find(2)
+
+    # 0 -> 1 -> 2 -> 1, 3 isolated
+    scc = strongly_connected_components(4, [[1], [2], [1], []])
+    assert scc[1] == scc[2] != scc[0]
+    assert scc[1] < scc[0]
+    print("✅ Union-find and Tarjan SCC work")
+
+
+def test_hosting_links_group_components():
+    """Databases and shares move with their host server"""
+    result = DependencyGraph(SERVERS, DATABASES, FILE_SHARES).move_groups(max_group_size=3)
+    groups = result['groups']
+    with_appdb = next(g for g in groups if 'AppDB' in g['databases'])
+    assert with_appdb['servers'] == ['SRV-001'] and with_appdb['file_shares'] == ['Docs']
+    assert all(g['size'] <= 3 for g in groups)
+    assert sum(g['size'] for g in groups) == result['summary']['nodes'] == 9
+    assert result['summary']['connected_components'] == 6
+    print(f"✅ {result['summary']['nodes']} components clustered into {result['summary']['move_groups']} move groups")
+
+
+def test_declared_dependencies_order_waves():
+    """Declared dependencies put providers in earlier waves and cycles in one group"""
+    dependencies = [
+        {'source': 'SRV-003', 'target': 'database:FinanceDB'},
+        {'source': 'SRV-004', 'target': 'SRV-005'},
+        {'source': 'SRV-005', 'target': 'SRV-004'},
+        {'source': 'SRV-999', 'target': 'SRV-001'}
+    ]
+    result = DependencyGraph(SERVERS, DATABASES, FILE_SHARES, dependencies).move_groups(max_group_size=2)
+    by_server = {s: g for g in result['groups'] for s in g['servers']}
+    assert by_server['SRV-004'] is by_server['SRV-005']
+    assert by_server['SRV-003']['wave'] > by_server['SRV-002']['wave']
+    assert by_server['SRV-002']['group_id'] in by_server['SRV-003']['depends_on_groups']
+    assert result['summary']['dependency_cycles'] >= 1
+    assert result['summary']['unresolved_dependencies'] == [{'source': 'SRV-999', 'target': 'SRV-001'}]
+    print(f"✅ {result['summary']['waves']} waves respect declared dependencies")
+
+
+def test_duplicate_names_stay_separate():
+    """Shares with the same name on different servers keep their own hosting links"""
+    servers = [{'server_id': 'SRV-001'}, {'server_id': 'SRV-002'}]
+    file_shares = [
+        {'id': 1, 'share_name': 'TestShare', 'server_id': 'SRV-002'},
+        {'id': 4, 'share_name': 'TestShare', 'server_id': 'SRV-001'}
+    ]
+    dependencies = [
+        {'source': 'SRV-001', 'target': 'TestShare'},
+        {'source': 'SRV-001', 'target': 'file_share:TestShare'},
+        {'source': 'SRV-001', 'target': 'file_share:1'}
+    ]
+    graph = DependencyGraph(servers, [], file_shares, dependencies)
+    result = graph.move_groups(max_group_size=2)
+    summary = result['summary']
+    assert summary['nodes'] == 4 and summary['hosting_links'] == 2
+    assert [d['ambiguous'] for d in summary['ambiguous_dependencies']] == ['TestShare', 'file_share:TestShare']
+    assert summary['ambiguous_dependencies'][0]['matches'] == ['file_share:1', 'file_share:4']
+    assert summary['declared_dependencies'] == 1 and summary['unresolved_dependencies'] == []
+
+    by_server = {s: g for g in result['groups'] for s in g['servers']}
+    assert by_server['SRV-001']['file_shares'] == by_server['SRV-002']['file_shares'] == ['TestShare']
+    assert by_server['SRV-001'] is not by_server['SRV-002']
+    assert by_server['SRV-002']['group_id'] in by_server['SRV-001']['depends_on_groups']
+    print("✅ Same-named shares stay separate nodes; bare-name references to them are reported as ambiguous")
+
+
+def test_oversized_cycle_kept_together():
+    """A dependency cycle larger than the bound stays one (flagged) group"""
+    servers = [{'server_id': f'S{i}'} for i in range(6)]
+    dependencies = [{'source': f'S{i}', 'target': f'S{(i + 1) % 6}'} for i in range(6)]
+    result = DependencyGraph(servers, [], [], dependencies).move_groups(max_group_size=4)
+    assert len(result['groups']) == 1 and result['groups'][0]['oversized']
+    print("✅ Oversized dependency cycle kept together")
+
+
+def test_large_graph_performance():
+    """100k nodes with dependency chains cluster in linear time"""
+    servers = [{'server_id': f'SRV-{i}'} for i in range(60000)]
+    databases = [{'db_name': f'DB-{i}', 'server_id': f'SRV-{i}'} for i in range(30000)]
+    file_shares = [{'share_name': f'FS-{i}', 'server_id': f'SRV-{i * 3}'} for i in range(10000)]
+    dependencies = [{'source': f'SRV-{i}', 'target': f'SRV-{i - 1}'} for i in range(1, 60000) if i % 50]
+    start = time.perf_counter()
+    result = DependencyGraph(servers, databases, file_shares, dependencies).move_groups(max_group_size=25)
+    elapsed = time.perf_counter() - start
+    assert result['summary']['nodes'] == 100000
+    assert all(g['size'] <= 25 for g in result['groups'])
+    assert elapsed < 10.0
+    print(f"✅ Clustered 100,000 nodes into {result['summary']['move_groups']} groups in {elapsed:.2f} s")
+
+
+if __name__ == "__main__":
+    test_union_find_and_tarjan()
+    test_hosting_links_group_components()
+    test_declared_dependencies_order_waves()
+    test_duplicate_names_stay_separate()
+    test_oversized_cycle_kept_together()
+    test_large_graph_performance()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Test the seeded synthetic inventory generator and its bulk loaders"""
+
+import sys
+import os
+import csv
+import sqlite3
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.inventory_generator import COLUMNS, generate_inventory, load_into_sqlite, write_files
+
+
+def test_deterministic():
+    """Same seed gives the same rows; the database ratio doesn't disturb servers"""
+    first = generate_inventory(500, seed=7)
+    assert first == generate_inventory(500, seed=7)
+    assert first['servers'] != generate_inventory(500, seed=8)['servers']
+    assert first['servers'] == generate_inventory(500, seed=7, databases_per_server=1.0)['servers']
+    assert len(first['databases']) == 200 and len(first['file_shares']) == 125
+    print("✅ Generation is deterministic per seed")
+
+
+def test_distributions():
+    """Links, technology mix and sizes look like a real estate"""
+    inventory = generate_inventory(5000, seed=1)
+    server_ids = {row[0] for row in inventory['servers']}
+    assert len(server_ids) == 5000
+    host = COLUMNS['databases'].index('server_id')
+    assert all(row[host] in server_ids for row in inventory['databases'])
+    assert all(row[COLUMNS['file_shares'].index('server_id')] in server_ids for row in inventory['file_shares'])
+
+    os_col, tech_col = COLUMNS['servers'].index('os_type'), COLUMNS['servers'].index('technology')
+    windows = [row for row in inventory['servers'] if row[os_col].startswith('Windows')]
+    assert 0.35 < len(windows) / 5000 < 0.45
+    assert all(row[tech_col] in ('IIS', '.NET', 'SQL Server', 'SharePoint', 'Exchange') for row in windows)
+
+    db_type, licensing = COLUMNS['databases'].index('db_type'), COLUMNS['databases'].index('licensing_model')
+    assert all((row[licensing] == 'Open Source') == (row[db_type] in ('MySQL', 'PostgreSQL', 'MongoDB', 'Redis'))
+               for row in inventory['databases'])
+
+    ram_col, vcpu_col = COLUMNS['servers'].index('ram'), COLUMNS['servers'].index('vcpu')
+    assert all(row[ram_col] % row[vcpu_col] == 0 for row in inventory['servers'])
+    disks = sorted(row[COLUMNS['servers'].index('disk_size')] for row in inventory['servers'])
+    assert 200 <= disks[2500] <= 400 and disks[0] >= 50 and all(d % 50 == 0 for d in disks)
+    print(f"✅ Links and distributions hold (median disk {disks[2500]} GB)")
+
+
+def test_sqlite_load():
+    """Rows land in the tables the backend reads"""
+    db_path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    inventory = generate_inventory(1000, seed=3)
+    counts = load_into_sqlite(db_path, inventory)
+    load_into_sqlite(db_path, inventory)  # replaces rather than duplicates
+    conn = sqlite3.connect(db_path)
+    assert conn.execute('SELECT COUNT(*) FROM servers').fetchone()[0] == 1000 == counts['servers']
+    assert conn.execute('SELECT COUNT(*) FROM databases').fetchone()[0] == 400
+    orphans = conn.execute('SELECT COUNT(*) FROM file_shares f LEFT JOIN servers s ON s.server_id = f.server_id '
+                           'WHERE s.id IS NULL').fetchone()[0]
+    assert orphans == 0
+    conn.close()
+    print("✅ SQLite load replaces tables with linked rows")
+
+
+def test_csv_output():
+    """CSV files carry a header and every row"""
+    out_dir = tempfile.mkdtemp()
+    inventory = generate_inventory(100, seed=3)
+    paths = write_files(out_dir, inventory)
+    with open(os.path.join(out_dir, 'servers.csv')) as f:
+        rows = list(csv.reader(f))
+    assert len(paths) == 3 and tuple(rows[0]) == COLUMNS['servers'] and len(rows) == 101
+    print("✅ CSV export writes one file per table")
+
+
+def test_performance():
+    """A million-row estate generates and loads in seconds"""
+    db_path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    start = time.time()
+    inventory = generate_inventory(600000, seed=42, databases_per_server=0.4, shares_per_server=0.27)
+    generated = time.time() - start
+    counts = load_into_sqlite(db_path, inventory)
+    total = counts['servers'] + counts['databases'] + counts['file_shares']
+    elapsed = time.time() - start
+    assert total >= 1000000
+    assert elapsed < 30.0, f"{total} rows took {elapsed:.2f}s"
+    print(f"✅ {total:,} rows generated in {generated:.2f}s, loaded in {counts['seconds']:.2f}s")
+
+
+if __name__ == "__main__":
+    print("🧪 Testing synthetic inventory generator...")
+    test_deterministic()
+    test_distributions()
+    test_sqlite_load()
+    test_csv_output()
+    test_performance()
+    print("\n🎉 All inventory generator tests passed!")
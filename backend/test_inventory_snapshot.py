@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""Test the shared inventory snapshot: one scan per table per request, across every service"""
+
+import sys
+import os
+import sqlite3
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault('BEDROCK_EMULATOR', 'replay')
+os.environ.setdefault('SIZING_LOG_ENABLED', 'false')
+
+from services.inventory_snapshot import InventorySnapshot, InventorySnapshotLoader
+from services.sql_instrumentation import InstrumentedConnection, track_statements
+
+
+def make_inventory_file(servers=3):
+    path = os.path.join(tempfile.mkdtemp(), 'inventory.db')
+    conn = sqlite3.connect(path)
+    conn.executescript('''
+        CREATE TABLE servers (id INTEGER PRIMARY KEY, server_id TEXT, vcpu INTEGER, ram INTEGER, disk_size INTEGER);
+        CREATE TABLE databases (id INTEGER PRIMARY KEY, db_name TEXT, size_gb REAL);
+        CREATE TABLE file_shares (id INTEGER PRIMARY KEY, share_name TEXT, total_size_gb REAL);
+        CREATE TABLE resource_rates (id INTEGER PRIMARY KEY, role TEXT);
+    ''')
+    conn.executemany('INSERT INTO servers (server_id, vcpu, ram, disk_size) VALUES (?, ?, ?, ?)',
+                     [(f'SRV-{i}', 4, 16, None if i == 0 else 100) for i in range(servers)])
+    conn.execute("INSERT INTO databases (db_name, size_gb) VALUES ('orders', 50)")
+    conn.commit()
+    conn.close()
+    return path
+
+
+def connector(path):
+    def connect():
+        conn = sqlite3.connect(path, factory=InstrumentedConnection)
+        conn.row_factory = sqlite3.Row
+        return conn
+    return connect
+
+
+def test_lazy_tables_and_summary():
+    """Tables load once, on first use; aggregates treat NULLs as zero"""
+    path = make_inventory_file()
+    snapshot = InventorySnapshot.from_sqlite(connector(path))
+    with track_statements() as tracker:
+        assert len(snapshot.servers) == 3
+        summary = snapshot.summary()
+        snapshot.infrastructure_data()
+        snapshot.revision()
+    assert tracker.count == 3, tracker.summary()
+    assert summary['servers_count'] == 3 and summary['total_disk_gb'] == 200 and summary['total_db_size'] == 50
+    assert summary['total_data_gb'] == 250 and summary['total_components'] == 4
+    assert snapshot.infrastructure_data()['servers'] is snapshot.infrastructure_data()['servers']
+    print("✅ Each table is read once and aggregates are derived from the same rows")
+
+
+def test_reuse_by_revision():
+    """Reused snapshots are handed out until the database file changes"""
+    path = make_inventory_file()
+    fresh = InventorySnapshotLoader(path, connector(path), reuse=False)
+    assert fresh.load() is not fresh.load()
+
+    loader = InventorySnapshotLoader(path, connector(path), reuse=True)
+    first = loader.load()
+    assert loader.load() is first and len(first.servers) == 3
+
+    conn = sqlite3.connect(path)
+    conn.execute("INSERT INTO servers (server_id, vcpu, ram, disk_size) VALUES ('SRV-new', 2, 4, 10)")
+    conn.commit()
+    conn.close()
+    second = loader.load()
+    assert second is not first and len(second.servers) == 4 and second.revision() != first.revision()
+    print("✅ Reused snapshots are invalidated when the file changes")
+
+
+def test_export_scans_each_table_once():
+    """A full export reads each inventory table once, however many sections it generates"""
+    import real_data_backend
+
+    client = real_data_backend.app.test_client()
+    response = client.post('/api/export', json={
+        'format': 'word', 'types': ['cost_estimation', 'migration_strategy', 'timeline']
+    })
+    assert response.status_code == 200, response.get_json()
+    os.remove(response.get_json()['filepath'])
+    assert response.headers['X-SQL-Statements'] == '4'
+
+    response = client.post('/api/timeline', json={})
+    assert response.status_code == 200 and response.headers['X-SQL-Statements'] == '3'
+    print("✅ /api/export runs one scan per table for every report section")
+
+
+def test_sqlalchemy_services_share_snapshot():
+    """Cost, strategy, timeline and export services built in one request share a single read"""
+    from flask import Flask, jsonify
+    from flask_sqlalchemy import SQLAlchemy
+    from models_new import init_models
+    from services.sql_instrumentation import install_sql_tracking, instrument_sqlalchemy
+    from services.cost_calculator import CostCalculator
+    from services.migration_advisor import MigrationAdvisor
+    from services.timeline_generator import TimelineGenerator
+    from services.export_service_new import ExportService
+
+    app = Flask('inventory_snapshot')
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db = SQLAlchemy(app)
+    models = init_models(db)
+    instrument_sqlalchemy()
+    install_sql_tracking(app)
+
+    @app.route('/report')
+    def report():
+        costs = CostCalculator(db, models)
+        strategy = MigrationAdvisor(db, models).generate_comprehensive_migration_strategy()
+        timeline = TimelineGenerator(db, models)
+        exporter = ExportService(db, models)
+        return jsonify({
+            'monthly': costs.calculate_server_costs()['total_monthly_cost'] + costs.calculate_database_costs()[
+                'total_monthly_cost'] + costs.calculate_storage_costs()['total_monthly_cost'],
+            'services': costs.calculate_migration_service_costs()['total_professional_services_cost'],
+            'strategy': 'error' not in strategy,
+            'risk': timeline._calculate_risk_buffer()['complexity_score'],
+            'summary': exporter._get_summary_data()['total_components'],
+            'shared': costs.inventory is exporter.inventory is timeline.inventory,
+        })
+
+    Server, Database = models['Server'], models['Database']
+    with app.app_context():
+        db.create_all()
+        for i in range(10):
+            db.session.add(Server(server_id=f'SRV-{i:03d}', os_type='Linux', vcpu=4, ram=16, disk_size=100,
+                                  disk_type='SSD', uptime_pattern='24/7', current_hosting='On-premises',
+                                  technology='nginx'))
+        db.session.add(Database(db_name='orders', db_type='PostgreSQL', size_gb=50, backup_frequency='Daily',
+                                licensing_model='Open Source', server_id='SRV-000', write_frequency='Low',
+                                downtime_tolerance='Zero'))
+        db.session.commit()
+
+    response = app.test_client().get('/report')
+    body = response.get_json()
+    assert response.status_code == 200 and body['shared'] and body['summary'] == 11 and body['strategy'], body
+    assert body['risk'] == 6.0
+    # servers, databases, file_shares and resource_rates, once each
+    assert response.headers['X-SQL-Statements'] == '4', response.headers['X-SQL-Statements']
+    print("✅ SQLAlchemy services in one request share one scan per table")
+
+
+def test_performance():
+    """Later sections pay nothing for data an earlier section already loaded"""
+    path = make_inventory_file(servers=5000)
+    connect = connector(path)
+
+    start = time.perf_counter()
+    for _ in range(5):
+        conn = connect()
+        for table in ('servers', 'databases', 'file_shares'):
+            conn.execute(f'SELECT * FROM {table}').fetchall()
+            conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()
+        conn.close()
+    per_section = (time.perf_counter() - start) / 5
+
+    snapshot = InventorySnapshot.from_sqlite(connect)
+    start = time.perf_counter()
+    snapshot.summary()
+    first = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(1000):
+        snapshot.summary()
+        snapshot.infrastructure_data()
+    shared = (time.perf_counter() - start) / 1000
+    assert shared < per_section / 100, f"{shared * 1e6:.1f}us per shared section vs {per_section * 1e3:.2f}ms"
+    print(f"✅ {first * 1e3:.2f}ms first load, {shared * 1e6:.1f}us per later section "
+          f"(vs {per_section * 1e3:.2f}ms re-reading)")
+
+
+if __name__ == "__main__":
+    print("🧪 Testing inventory snapshots...")
+    test_lazy_tables_and_summary()
+    test_reuse_by_revision()
+    test_export_scans_each_table_once()
+    test_sqlalchemy_services_share_snapshot()
+    test_performance()
+    print("\n🎉 All inventory snapshot tests passed!")
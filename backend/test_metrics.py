@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""Test the metrics registry, SQLite instrumentation and the /metrics endpoint"""
+
+import sys
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import pytest
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault('BEDROCK_EMULATOR', 'replay')
+os.environ.setdefault('SIZING_LOG_ENABLED', 'false')
+
+from services import metrics
+from services.metrics import REGISTRY, MetricsRegistry
+from services.sql_instrumentation import InstrumentedConnection, statement_label
+
+
+@pytest.fixture(autouse=True)
+def fresh_registry():
+    """Each test reads only what it recorded itself, whatever ran earlier in the process"""
+    REGISTRY.reset()
+    yield
+    REGISTRY.reset()
+
+
+def test_thread_shards():
+    """Per-thread recording adds up on scrape, including threads that have finished"""
+    registry = MetricsRegistry()
+    hits = registry.counter('hits_total', 'Hits', ('kind',))
+    latency = registry.histogram('op_seconds', 'Op latency', buckets=(0.1, 1.0))
+
+    def work():
+        for _ in range(1000):
+            hits.inc(kind='a')
+        latency.observe(0.05)
+        latency.observe(5.0)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    hits.inc(2, kind='b')
+
+    assert registry.value('hits_total', kind='a') == 8000
+    buckets, total, count = registry.value('op_seconds')
+    assert buckets == [8, 0, 8] and count == 16 and abs(total - 40.4) < 1e-9
+    # Finished threads were folded into the retired totals without losing anything
+    assert len(registry._shards) == 1 and registry.value('hits_total', kind='b') == 2
+    print("✅ Per-thread shards aggregate on scrape")
+
+
+def test_exposition_format():
+    """Text output follows the Prometheus exposition format"""
+    registry = MetricsRegistry()
+    registry.counter('jobs_total', 'Jobs', ('queue',)).inc(3, queue='a"b')
+    registry.histogram('render_seconds', 'Render', ('format',), buckets=(0.5, 1.0)).observe(0.7, format='pdf')
+    registry.gauge_callback('ratio', 'Ratio', ('cache',), lambda: {('swr',): 0.25})
+    text = registry.render()
+    assert '# TYPE jobs_total counter' in text and 'jobs_total{queue="a\\"b"} 3' in text
+    assert 'render_seconds_bucket{format="pdf",le="0.5"} 0' in text
+    assert 'render_seconds_bucket{format="pdf",le="1"} 1' in text
+    assert 'render_seconds_bucket{format="pdf",le="+Inf"} 1' in text
+    assert 'render_seconds_count{format="pdf"} 1' in text and 'ratio{cache="swr"} 0.25' in text
+    print("✅ Exposition format renders counters, histograms and gauges")
+
+
+def test_sqlite_instrumentation():
+    """Statements are timed and rows counted per statement"""
+    REGISTRY.reset()
+    conn = sqlite3.connect(':memory:', factory=InstrumentedConnection)
+    conn.execute('CREATE TABLE servers (server_id TEXT)')
+    conn.executemany('INSERT INTO servers VALUES (?)', [(f'SRV-{i}',) for i in range(25)])
+    cursor = conn.cursor()
+    cursor.execute('SELECT * FROM servers')
+    assert len(cursor.fetchall()) == 25
+    assert conn.execute('SELECT COUNT(*) FROM servers').fetchone()[0] == 25
+    for _ in conn.execute('SELECT server_id FROM servers WHERE server_id > ?', ('SRV-5',)):
+        pass
+    conn.close()
+
+    assert statement_label('SELECT COUNT(*) FROM "databases"') == 'SELECT databases'
+    assert statement_label('  insert into file_shares (a) values (?)') == 'INSERT file_shares'
+    _, rows_sum, statements = REGISTRY.value('sqlite_rows_per_statement', statement='SELECT servers')
+    assert statements == 3 and rows_sum == 25 + 1 + 4, (statements, rows_sum)
+    assert REGISTRY.value('sqlite_rows_per_statement', statement='INSERT servers')[1] == 25
+    assert REGISTRY.value('sqlite_query_duration_seconds', statement='SELECT servers')[2] == 3
+    print("✅ SQLite statements are timed with rows per statement")
+
+
+def test_metrics_endpoint():
+    """Requests, SQL, Bedrock calls, exports and caches all show up at /metrics"""
+    import logging
+    import real_data_backend
+
+    from services.bedrock_emulator import BedrockEmulator
+    from services.circuit_breaker import CircuitBreaker
+
+    REGISTRY.reset()
+    client = real_data_backend.app.test_client()
+    # A result another process shared in the last few seconds would skip the Bedrock call
+    result_ttl, real_data_backend.single_flight.result_ttl = real_data_backend.single_flight.result_ttl, 0
+    # So would a breaker opened, or a real client left behind, by earlier tests in the process
+    service = real_data_backend.ai_service
+    bedrock_client, breaker = service.bedrock_client, service.circuit_breaker
+    service.bedrock_client = BedrockEmulator(recordings_path=os.path.join(tempfile.mkdtemp(), 'r.json'))
+    service.circuit_breaker = CircuitBreaker()
+    disabled = logging.root.manager.disable
+    logging.disable(logging.CRITICAL)
+    try:
+        assert client.get('/api/servers').status_code == 200
+        assert client.post('/api/cost-estimation', json={}).status_code == 200
+        exported = client.post('/api/export', json={'format': 'pdf', 'types': ['timeline']})
+        assert exported.status_code == 200
+        os.remove(exported.get_json()['filepath'])
+    finally:
+        logging.disable(disabled)
+        real_data_backend.single_flight.result_ttl = result_ttl
+        service.bedrock_client, service.circuit_breaker = bedrock_client, breaker
+
+    response = client.get('/metrics')
+    text = response.get_data(as_text=True)
+    assert response.status_code == 200 and response.mimetype == 'text/plain'
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/servers",status="200"} 1' in text
+    assert 'sqlite_query_duration_seconds_count{statement="SELECT servers"}' in text
+    assert 'bedrock_call_duration_seconds_count{model=' in text and 'bedrock_tokens_total{' in text
+    assert 'export_render_duration_seconds_count{format="pdf"} 1' in text
+    assert 'export_artifact_bytes_count{format="pdf"} 1' in text
+    assert 'cache_requests_total{cache="single_flight",result="miss"}' in text
+    print("✅ /metrics exposes route, SQL, Bedrock, export and cache metrics")
+
+
+def test_performance():
+    """Recording stays cheap on the hot path"""
+    counter = metrics.CACHE_REQUESTS
+    histogram = metrics.HTTP_REQUEST_SECONDS
+    start = time.perf_counter()
+    for _ in range(100000):
+        counter.inc(cache='bench', result='hit')
+        histogram.observe(0.003, method='GET', route='/bench', status=200)
+    per_call = (time.perf_counter() - start) / 200000
+    assert per_call < 10e-6, f"{per_call * 1e6:.2f}us per recording"
+    start = time.perf_counter()
+    REGISTRY.render()
+    scrape = time.perf_counter() - start
+    assert scrape < 0.1, f"scrape took {scrape:.3f}s"
+    print(f"✅ {per_call * 1e6:.2f}us per recording, scrape in {scrape * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    print("🧪 Testing metrics...")
+    test_thread_shards()
+    test_exposition_format()
+    test_sqlite_instrumentation()
+    test_metrics_endpoint()
+    test_performance()
+    print("\n🎉 All metrics tests passed!")
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""Test the fast-model-first cascade and per-model usage tracking"""
+
+import sys
+import os
+import io
+import json
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from botocore.exceptions import ClientError, EndpointConnectionError, ReadTimeoutError
+from services.ai_recommendations import AIRecommendationService
+from services.circuit_breaker import CLOSED, HALF_OPEN, CircuitBreaker, request_deadline
+from services.model_cascade import CascadePolicy, ModelUsageTracker, confidence_score, is_complex_component
+from services.recommendation_index import RecommendationIndex
+from services.sizing_model import RecommendationLog
+
+FAST = 'anthropic.claude-3-haiku-20240307-v1:0'
+STRONG = 'anthropic.claude-3-5-sonnet-20240620-v1:0'
+
+
+class ScriptedBedrock:
+    """Client double answering in the Anthropic format with per-model latency"""
+
+    def __init__(self, fast_answers, latency={FAST: 0.005, STRONG: 0.03}):
+        self.fast_answers = list(fast_answers)
+        self.latency = latency
+        self.calls = []
+
+    def invoke_model(self, modelId, body):
+        self.calls.append(modelId)
+        time.sleep(self.latency[modelId])
+        if modelId == FAST:
+            text = self.fast_answers.pop(0)
+            if isinstance(text, Exception):
+                raise text
+            if isinstance(text, bytes):
+                return {'body': io.BytesIO(text)}
+        else:
+            text = json.dumps({'recommended_instance': 'm5.xlarge', 'confidence_level': 'high'})
+        return {'body': io.BytesIO(json.dumps({'content': [{'text': text}]}).encode())}
+
+
+def make_service(fast_answers):
+    service = AIRecommendationService()
+    service.model_id = STRONG
+    service.bedrock_client = ScriptedBedrock(fast_answers)
+    service.circuit_breaker = CircuitBreaker()
+    service.cascade = CascadePolicy(fast_model_id=FAST, min_confidence=0.6, enabled=True)
+    service.model_usage = ModelUsageTracker()
+    # Every call here should reach the model
+    service.recommendation_index = RecommendationIndex(max_distance=0)
+    service.sizing_log = RecommendationLog(enabled=False)
+    service.sizing_model = None
+    return service
+
+
+def test_policy():
+    """Confidence parsing, validation and complexity flags"""
+    assert confidence_score('High') == 0.9 and confidence_score(85) == 0.85 and confidence_score('n/a') is None
+    policy = CascadePolicy(fast_model_id=FAST, min_confidence=0.6, enabled=True)
+    assert policy.escalation_reason({'recommended_instance': 't3.large', 'confidence_level': 'medium'}, 'server') is None
+    assert policy.escalation_reason({'recommended_instance': 't3.large', 'confidence_level': 'low'}, 'server') == 'low_confidence'
+    assert policy.escalation_reason({'confidence_level': 'high'}, 'server') == 'missing_fields'
+    assert policy.escalation_reason({'error': 'Failed to parse AI response'}, 'server') == 'invalid_json'
+    assert is_complex_component('server', {'vcpu': 64, 'ram': 512})
+    assert not is_complex_component('server', {'vcpu': 4, 'ram': 16})
+    print("✅ Cascade policy escalates on low confidence, bad JSON and missing fields")
+
+
+def test_escalation_paths():
+    """Good fast answers are kept; weak ones and complex components go to the strong model"""
+    good = json.dumps({'recommended_instance': 't3.large', 'confidence_level': 'high'})
+    low = json.dumps({'recommended_instance': 't3.large', 'confidence_level': 'low'})
+    service = make_service([good, low, 'not json at all'])
+
+    assert service.get_server_recommendation({'vcpu': 2, 'ram': 8})['ai_model'] == FAST
+    assert service.get_server_recommendation({'vcpu': 2, 'ram': 8})['ai_model'] == STRONG
+    assert service.get_server_recommendation({'vcpu': 2, 'ram': 8})['ai_model'] == STRONG
+    assert service.get_server_recommendation({'vcpu': 64, 'ram': 512})['ai_model'] == STRONG
+    assert service.bedrock_client.calls == [FAST, FAST, STRONG, FAST, STRONG, STRONG]
+
+    usage = service.model_usage.summary()
+    assert usage['escalations'] == {'low_confidence': 1, 'invalid_json': 1, 'complex_component': 1}
+    assert usage['models'][FAST]['calls'] == 3 and usage['models'][STRONG]['calls'] == 3
+    assert usage['models'][FAST]['cost_usd'] < usage['models'][STRONG]['cost_usd']
+    print(f"✅ Escalations tracked: {usage['escalations']}")
+
+
+def test_fast_model_not_enabled():
+    """A rejected fast-model call escalates without counting against the breaker"""
+    denied = ClientError({'Error': {'Code': 'AccessDeniedException', 'Message': 'model not enabled'}}, 'InvokeModel')
+    service = make_service([denied] * 10)
+    for _ in range(10):
+        assert service.get_server_recommendation({'vcpu': 2, 'ram': 8})['ai_model'] == STRONG
+    assert service.circuit_breaker.status()['recent_failure_rate'] == 0.0
+    assert service.model_usage.summary()['models'][FAST]['failures'] == 10
+    print("✅ Fast model not enabled: every call escalates and the breaker stays closed")
+
+
+def test_half_open_trial_reaches_main_model():
+    """An uncounted fast-model rejection during the half-open trial hands the trial to the main model"""
+    now = [0.0]
+    denied = ClientError({'Error': {'Code': 'AccessDeniedException', 'Message': 'model not enabled'}}, 'InvokeModel')
+    service = make_service([denied])
+    service.circuit_breaker = CircuitBreaker(minimum_calls=1, open_seconds=30, clock=lambda: now[0])
+    service.circuit_breaker.record(False)
+    now[0] += 31
+    assert service.circuit_breaker.state == HALF_OPEN
+
+    assert service.get_server_recommendation({'vcpu': 2, 'ram': 8})['ai_model'] == STRONG
+    assert service.bedrock_client.calls == [FAST, STRONG]
+    assert service.circuit_breaker.state == CLOSED
+    print("✅ Half-open trial survives a fast-model rejection and closes the breaker on the main model")
+
+
+def test_fast_model_failures_escalate():
+    """Timeouts, dropped connections and malformed bodies from the fast model still get a main-model answer"""
+    timeout = ReadTimeoutError(endpoint_url='https://bedrock-runtime.us-east-1.amazonaws.com')
+    refused = EndpointConnectionError(endpoint_url='https://bedrock-runtime.us-east-1.amazonaws.com')
+    service = make_service([timeout, refused, b'{"no_content": true}', b'<html>bad gateway</html>'])
+    service.circuit_breaker = CircuitBreaker(failure_rate_threshold=0.9)
+    for _ in range(4):
+        assert service.get_server_recommendation({'vcpu': 2, 'ram': 8})['ai_model'] == STRONG
+    assert service.bedrock_client.calls == [FAST, STRONG] * 4
+    assert service.model_usage.summary()['escalations'] == {'fast_model_error': 4}
+
+    # Escalation still honours the breaker the fast failures opened...
+    service = make_service([timeout] * 5)
+    service.circuit_breaker = CircuitBreaker(minimum_calls=1, failure_rate_threshold=0.5)
+    result = service.get_server_recommendation({'vcpu': 2, 'ram': 8})
+    assert result['fallback_used'] and service.bedrock_client.calls == [FAST]
+
+    # ...and the request's deadline
+    service = make_service([timeout])
+    service.bedrock_client.latency = {FAST: 0.05, STRONG: 0.03}
+    service.min_call_seconds = 0.03
+    with request_deadline(0.06):
+        result = service.get_server_recommendation({'vcpu': 2, 'ram': 8})
+    assert result['fallback_used'] and service.bedrock_client.calls == [FAST]
+    print("✅ Fast-model transport and parse failures escalate within the breaker and deadline")
+
+
+def test_latency_and_spend_drop():
+    """With most fast answers confident, median latency and spend fall well below strong-only"""
+    good = json.dumps({'recommended_instance': 't3.large', 'confidence_level': 'high'})
+    low = json.dumps({'recommended_instance': 't3.large', 'confidence_level': 'low'})
+    answers = [good] * 16 + [low] * 4
+    servers = [{'vcpu': 2, 'ram': 8}] * 20
+
+    cascade = make_service(answers)
+    strong_only = make_service([])
+    strong_only.cascade.enabled = False
+
+    def run(service):
+        latencies = []
+        for server in servers:
+            start = time.perf_counter()
+            service.get_server_recommendation(server)
+            latencies.append(time.perf_counter() - start)
+        return sorted(latencies)[len(latencies) // 2], service.model_usage.summary()['total_cost_usd']
+
+    cascade_p50, cascade_cost = run(cascade)
+    strong_p50, strong_cost = run(strong_only)
+    assert cascade_p50 < strong_p50 / 2
+    assert cascade_cost < strong_cost / 2
+    print(f"✅ Median latency {strong_p50 * 1000:.0f} → {cascade_p50 * 1000:.0f} ms, "
+          f"spend ${strong_cost:.5f} → ${cascade_cost:.5f}")
+
+
+if __name__ == "__main__":
+    test_policy()
+    test_escalation_paths()
+    test_fast_model_not_enabled()
+    test_half_open_trial_reaches_main_model()
+    test_fast_model_failures_escalate()
+    test_latency_and_spend_drop()
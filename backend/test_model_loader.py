@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""Test constant-query loading on the SQLAlchemy path: linked relationships and batched strategy lookups"""
+
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault('BEDROCK_EMULATOR', 'replay')
+os.environ.setdefault('SIZING_LOG_ENABLED', 'false')
+
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+from services.model_loader import eager_query, get_many, load_server_graph
+from services.sql_instrumentation import instrument_sqlalchemy, track_statements
+
+
+def make_app(n_servers):
+    """In-memory SQLAlchemy app with the real models; each server hosts one database and one share"""
+    app = Flask(f'model_loader_{n_servers}')
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db = SQLAlchemy(app)
+    from models_new import init_models
+    models = init_models(db)
+    instrument_sqlalchemy()
+
+    Server, Database, FileShare = models['Server'], models['Database'], models['FileShare']
+    with app.app_context():
+        db.create_all()
+        for i in range(n_servers):
+            db.session.add(Server(server_id=f'SRV-{i:04d}', os_type='Linux', vcpu=4, ram=16, disk_size=100,
+                                  disk_type='SSD', uptime_pattern='24/7', current_hosting='On-premises',
+                                  technology='nginx'))
+            db.session.add(Database(db_name=f'db{i}', db_type='PostgreSQL', size_gb=50 + i,
+                                    backup_frequency='Daily', licensing_model='Open Source',
+                                    server_id=f'SRV-{i:04d}', write_frequency='Low', downtime_tolerance='Low'))
+            db.session.add(FileShare(share_name=f'share{i}', total_size_gb=100, access_pattern='Hot',
+                                     retention_days=30, server_id=f'SRV-{i:04d}', write_frequency='Low',
+                                     downtime_tolerance='Low'))
+        # Unhosted components still appear in the graph
+        db.session.add(Database(db_name='orphan', db_type='MySQL', size_gb=5, backup_frequency='Weekly',
+                                licensing_model='Open Source', server_id=None, write_frequency='Low',
+                                downtime_tolerance='High'))
+        db.session.commit()
+    return app, db, models
+
+
+def walk(servers):
+    return sum(len(server.databases) + len(server.file_shares) for server in servers)
+
+
+def test_graph_walk_is_constant():
+    """Walking servers' databases and shares costs the same queries for 10 or 200 servers"""
+    counts = []
+    for n in (10, 200):
+        app, db, models = make_app(n)
+        with app.app_context():
+            with track_statements() as lazy:
+                assert walk(models['Server'].query.all()) == 2 * n
+            db.session.expunge_all()
+
+            with track_statements() as linked:
+                servers, databases, file_shares = load_server_graph(models)
+                assert walk(servers) == 2 * n and len(databases) == n + 1 and len(file_shares) == n
+                assert databases[0].server is servers[0] and databases[-1].server is None
+            db.session.expunge_all()
+
+            with track_statements() as eager:
+                assert walk(eager_query(models['Server']).all()) == 2 * n
+        assert lazy.count == 1 + 2 * n
+        counts.append((linked.count, eager.count))
+    assert counts == [(3, 3), (3, 3)], counts
+    print(f"✅ Graph walk: 3 queries for any size instead of {lazy.count} lazy loads")
+
+
+def test_snapshot_links_relationships():
+    """Services sharing the ORM snapshot walk hosting links without further queries"""
+    from services.inventory_snapshot import InventorySnapshot
+
+    app, _, models = make_app(50)
+    with app.app_context():
+        with track_statements() as tracker:
+            snapshot = InventorySnapshot.from_models(models)
+            assert walk(snapshot.servers) == 100
+            assert snapshot.summary()['total_components'] == 151
+            assert snapshot.databases[0].server.server_id == 'SRV-0000'
+        assert tracker.count == 3 and tracker.repeated() == [], tracker.summary()
+    print("✅ ORM snapshot links servers, databases and shares in 3 queries")
+
+
+def test_batched_strategies():
+    """Per-component strategies fetch their components in one query per type, whatever the count"""
+    from services.migration_advisor import MigrationAdvisor
+
+    counts = []
+    for n in (5, 100):
+        app, db, models = make_app(n)
+        with app.app_context():
+            advisor = MigrationAdvisor(db, models)
+            ids = [db_.id for db_ in models['Database'].query.all()]
+            share_ids = [share.id for share in models['FileShare'].query.all()]
+            components = ([(i, 'database') for i in ids] + [(i, 'file_share') for i in share_ids]
+                          + [(99999, 'database'), (1, 'queue')])
+            with track_statements() as tracker:
+                strategies = advisor.generate_data_migration_strategies(components)
+                servers = advisor.generate_server_migration_strategies(['SRV-0001', 'missing'])
+            counts.append(tracker.count)
+
+            assert len(strategies) == len(components)
+            assert [s['component_id'] for s in strategies[:len(ids)]] == ids
+            assert all('error' not in s for s in strategies[:-2]), strategies[0]
+            assert strategies[-2] == {'error': 'Database not found'}
+            assert strategies[-1] == {'error': 'Invalid component type'}
+            assert servers[0]['server_id'] == 'SRV-0001' and servers[1] == {'error': 'Server not found'}
+            # The single-component API returns what the batch does
+            assert advisor.generate_data_migration_strategy(ids[0], 'database') == strategies[0]
+            with track_statements() as empty:
+                assert get_many(models['Server'], []) == {}
+            assert empty.count == 0
+    # Databases, file shares, servers and the cloud preference
+    assert counts == [4, 4], counts
+    print(f"✅ {len(components)} component strategies from {counts[-1]} queries")
+
+
+def test_performance():
+    """Linked loading beats lazy loads by a wide margin on a large inventory"""
+    app, db, models = make_app(2000)
+    with app.app_context():
+        start = time.perf_counter()
+        walk(models['Server'].query.all())
+        lazy = time.perf_counter() - start
+        db.session.expunge_all()
+
+        start = time.perf_counter()
+        walk(load_server_graph(models)[0])
+        linked = time.perf_counter() - start
+    assert linked * 3 < lazy, f"{linked * 1e3:.0f}ms linked vs {lazy * 1e3:.0f}ms lazy"
+    print(f"✅ 2000 servers: {linked * 1e3:.0f}ms linked vs {lazy * 1e3:.0f}ms with lazy loads")
+
+
+if __name__ == "__main__":
+    print("🧪 Testing model loader...")
+    test_graph_walk_is_constant()
+    test_snapshot_links_relationships()
+    test_batched_strategies()
+    test_performance()
+    print("\n🎉 All model loader tests passed!")
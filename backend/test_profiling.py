@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""Test on-demand and sampled request profiling and the debug endpoints"""
+
+import sys
+import os
+import json
+import tempfile
+import logging
+import time
+import pytest
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault('BEDROCK_EMULATOR', 'replay')
+os.environ.setdefault('SIZING_LOG_ENABLED', 'false')
+
+from flask import Flask
+from services.profiling import RequestProfiler, StackSampler, install_request_profiling
+
+TOKEN = 'test-token'
+
+
+@pytest.fixture(autouse=True)
+def restore_logging():
+    """make_app() silences logging; give other suites in the process their logging back"""
+    disabled = logging.root.manager.disable
+    yield
+    logging.disable(disabled)
+
+
+def make_app(**options):
+    logging.disable(logging.CRITICAL)
+    import real_data_backend
+
+    # A second app over the same routes, so each test gets its own profiler settings
+    app = Flask('profiled')
+    for rule in real_data_backend.app.url_map.iter_rules():
+        if rule.endpoint != 'static' and not rule.rule.startswith('/api/debug/profiles'):
+            app.add_url_rule(rule.rule, rule.endpoint, real_data_backend.app.view_functions[rule.endpoint],
+                             methods=rule.methods)
+    profiler = install_request_profiling(app, RequestProfiler(profile_dir=tempfile.mkdtemp(), token=TOKEN, **options))
+    return app.test_client(), profiler
+
+
+def test_sampler():
+    """Folded stacks name the busy function"""
+    import threading
+
+    def busy():
+        end = time.time() + 0.2
+        while time.time() < end:
+            sum(range(1000))
+
+    worker = threading.Thread(target=busy)
+    worker.start()
+    sampler = StackSampler(worker.ident, interval_seconds=0.002)
+    sampler.start()
+    worker.join()
+    stacks = sampler.stop()
+    assert sum(stacks.values()) > 10 and any('busy (test_profiling.py' in stack for stack in stacks)
+    print(f"✅ Sampler collected {sum(stacks.values())} samples")
+
+
+def test_on_demand_profile():
+    """An authorized request is profiled with stacks, pstats, memory peak and its SQL statements"""
+    client, profiler = make_app(sample_rate=0)
+    response = client.post('/api/timeline', json={}, headers={'X-Profile': '1', 'X-Profile-Token': TOKEN})
+    assert response.status_code == 200
+    profile_id = response.headers['X-Profile-Id']
+
+    headers = {'X-Profile-Token': TOKEN}
+    summary = client.get(f'/api/debug/profiles/{profile_id}?format=json', headers=headers).get_json()
+    assert summary['route'] == '/api/timeline' and summary['reason'] == 'requested' and summary['status'] == 200
+    assert summary['peak_memory_bytes'] > 0 and summary['top_allocations']
+    labels = [statement['label'] for statement in summary['sql_statements']]
+    assert 'SELECT servers' in labels and all('rows' in s for s in summary['sql_statements'])
+
+    pstats_text = client.get(f'/api/debug/profiles/{profile_id}?format=pstats', headers=headers).get_data(as_text=True)
+    assert 'generate_timeline' in pstats_text
+    folded = client.get(f'/api/debug/profiles/{profile_id}', headers=headers).get_data(as_text=True)
+    assert all(line.rsplit(' ', 1)[1].isdigit() for line in folded.splitlines())
+
+    listing = client.get('/api/debug/profiles', headers=headers).get_json()['profiles']
+    assert [p['id'] for p in listing] == [profile_id] and 'sql_statements' not in listing[0]
+    print(f"✅ On-demand profile captured {len(labels)} statements and {summary['samples']} samples")
+
+
+def test_access_control():
+    """Profiling and the debug endpoints need the token; unknown ids are not served"""
+    client, profiler = make_app(sample_rate=0)
+    response = client.get('/api/servers?profile=1')
+    assert 'X-Profile-Id' not in response.headers
+    response = client.get('/api/servers', headers={'X-Profile': '1', 'X-Profile-Token': 'wrong'})
+    assert 'X-Profile-Id' not in response.headers
+    assert client.get('/api/debug/profiles').status_code == 403
+    headers = {'X-Profile-Token': TOKEN}
+    assert client.get('/api/debug/profiles/../../etc', headers=headers).status_code == 404
+    assert client.get('/api/debug/profiles/nope', headers=headers).status_code == 404
+
+    no_token = RequestProfiler(profile_dir=tempfile.mkdtemp(), token='', sample_rate=0)
+    assert not no_token.authorized({'X-Profile-Token': ''})
+    print("✅ Profiling is admin-only")
+
+
+def test_sampling_and_retention():
+    """Sampled requests are profiled without a token, keeping only the newest captures"""
+    client, profiler = make_app(sample_rate=1.0, max_profiles=3)
+    ids = [client.get('/api/dashboard').headers['X-Profile-Id'] for _ in range(5)]
+    kept = profiler._profile_ids()
+    assert kept == ids[-3:]
+    with open(os.path.join(profiler.profile_dir, kept[-1], 'summary.json')) as f:
+        assert json.load(f)['reason'] == 'sampled'
+    print("✅ Sampled profiles are stored and pruned")
+
+
+def test_performance():
+    """Requests that aren't profiled pay almost nothing"""
+    client, _ = make_app(sample_rate=0)
+    client.get('/health')
+    start = time.perf_counter()
+    for _ in range(200):
+        client.get('/health')
+    per_request = (time.perf_counter() - start) / 200
+    assert per_request < 0.01, f"{per_request * 1000:.2f}ms per unprofiled request"
+    print(f"✅ Unprofiled request in {per_request * 1000:.2f}ms")
+
+
+if __name__ == "__main__":
+    print("🧪 Testing request profiling...")
+    test_sampler()
+    test_on_demand_profile()
+    test_access_control()
+    test_sampling_and_retention()
+    test_performance()
+    print("\n🎉 All profiling tests passed!")
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""Test nearest-neighbour reuse of past AI recommendations"""
+
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.ai_recommendations import AIRecommendationService
+from services.recommendation_index import RecommendationIndex
+
+
+def server(server_id, vcpu, ram, os_type='Linux', technology='Java', disk_size=100):
+    return {'server_id': server_id, 'vcpu': vcpu, 'ram': ram, 'disk_size': disk_size,
+            'os_type': os_type, 'technology': technology}
+
+
+def sizing_model(calls):
+    """Stand-in for the model: sizes by RAM, always confident"""
+    def recommend(specs):
+        calls.append(specs['server_id'])
+        instance = 'm5.xlarge' if specs['ram'] <= 16 else 'r5.xlarge'
+        return {'recommended_instance': instance, 'confidence_level': 'high', 'fallback_used': False}
+    return recommend
+
+
+def always_valid(result):
+    return not result.get('fallback_used')
+
+
+def test_near_duplicates_reuse():
+    """4 vCPU/15 GB reuses 4 vCPU/16 GB on the same stack; different stacks or sizes don't"""
+    index = RecommendationIndex(max_distance=0.15, audit_every=0)
+    calls = []
+    recommend = sizing_model(calls)
+
+    first = index.reuse_or_recommend('server', server('SRV-001', 4, 16), recommend, always_valid)
+    reused = index.reuse_or_recommend('server', server('SRV-002', 4, 15), recommend, always_valid)
+    assert reused['recommended_instance'] == first['recommended_instance']
+    assert reused['reused_from'] == 'SRV-001' and reused['reuse_distance'] < 0.15
+    assert 'reused_from' not in first
+
+    index.reuse_or_recommend('server', server('SRV-003', 4, 16, os_type='Windows'), recommend, always_valid)
+    index.reuse_or_recommend('server', server('SRV-004', 4, 32), recommend, always_valid)
+    assert calls == ['SRV-001', 'SRV-003', 'SRV-004']
+    print(f"✅ Near-duplicate reused, different OS/size asked the model ({index.stats()['reuse_rate']:.0%} reuse)")
+
+
+def test_invalid_answers_not_indexed():
+    """Rule-based fallbacks are never reused"""
+    index = RecommendationIndex(max_distance=0.15, audit_every=0)
+    fallback = lambda specs: {'recommended_instance': 't3.xlarge', 'fallback_used': True}
+    index.reuse_or_recommend('server', server('SRV-001', 4, 16), fallback, always_valid)
+    assert index.lookup('server', server('SRV-002', 4, 16)) is None
+
+    # The service's own rule-based answers are flagged as such for every component type
+    service = AIRecommendationService()
+    service.bedrock_client = None
+    database = {'db_name': 'orders', 'db_type': 'MySQL', 'size_gb': 50}
+    share = {'share_name': 'docs', 'access_pattern': 'Warm', 'total_size_gb': 500}
+    service.get_database_recommendation(database)
+    service.get_storage_recommendation(share)
+    assert service.recommendation_index.lookup('database', database) is None
+    assert service.recommendation_index.lookup('storage', share) is None
+    print("✅ Fallback answers stay out of the index")
+
+
+def test_audits_measure_drift():
+    """Every Nth match is re-asked; disagreements show up as drift"""
+    index = RecommendationIndex(max_distance=0.5, audit_every=2)
+    calls = []
+    recommend = sizing_model(calls)
+    index.reuse_or_recommend('server', server('SRV-000', 4, 16), recommend, always_valid)
+    # 16 → 19 GB is within range but the model would now pick r5 (ram > 16)
+    for i in range(1, 5):
+        index.reuse_or_recommend('server', server(f'SRV-00{i}', 4, 19), recommend, always_valid)
+    stats = index.stats()
+    assert stats['audits'] == 2
+    assert stats['drift_rate'] > 0
+    print(f"✅ Audits re-ask every 2nd match: drift {stats['drift_rate']:.0%} over {stats['audits']} audits")
+
+
+def test_service_reuse_and_speed():
+    """The service reuses indexed answers before touching Bedrock; lookups stay cheap at scale"""
+    service = AIRecommendationService()
+    service.recommendation_index = RecommendationIndex(max_distance=0.15, audit_every=0)
+    calls = []
+    service._ai_server_recommendation = sizing_model(calls)
+
+    fleet = [server(f'SRV-{i:04d}', 2 ** (i % 5), 4 * 2 ** (i % 6) - (i % 2), technology=f'stack{i % 8}')
+             for i in range(2000)]
+    start = time.perf_counter()
+    for specs in fleet:
+        service.get_server_recommendation(specs)
+    elapsed = time.perf_counter() - start
+    stats = service.recommendation_index.stats()
+    assert len(calls) < 300
+    assert stats['reuse_rate'] > 0.85
+    assert elapsed < 2.0
+    print(f"✅ 2,000 servers → {len(calls)} model calls ({stats['reuse_rate']:.0%} reuse) in {elapsed * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    test_near_duplicates_reuse()
+    test_invalid_answers_not_indexed()
+    test_audits_measure_drift()
+    test_service_reuse_and_speed()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""Test compact AI response schemas, output budgets and local joins"""
+
+import sys
+import os
+import io
+import json
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.ai_recommendations import AIRecommendationService
+from services.circuit_breaker import CircuitBreaker
+from services.model_cascade import estimate_tokens
+from services.response_schemas import (output_token_budget, compact_inventory, assemble_cost_estimation,
+                                       assemble_migration_strategy, expand_component_answer)
+
+
+def inventory(n):
+    return {
+        'servers': [{'id': i, 'server_id': f'SRV-{i:03d}', 'os_type': 'Linux', 'vcpu': 4, 'ram': 16, 'disk_size': 200,
+                     'uptime_pattern': '24/7', 'technology': 'Java', 'created_at': '2024-01-01 00:00:00'}
+                    for i in range(n)],
+        'databases': [{'id': 1, 'db_name': 'orders', 'db_type': 'MySQL', 'size_gb': 250, 'ha_dr_required': 1,
+                       'backup_frequency': 'Daily'}],
+        'file_shares': [{'id': 1, 'share_name': 'docs', 'total_size_gb': 1000, 'access_pattern': 'Warm'}]
+    }
+
+
+def slim_answer(data):
+    return {
+        'servers': [{'id': s['server_id'], 'instance': 'm5.xlarge', 'note': 'Steady 24/7 load; consider 1yr RI'}
+                    for s in data['servers']],
+        'databases': [{'id': 'orders', 'instance': 'db.m5.large', 'note': 'Multi-AZ for HA'}],
+        'storage': [{'id': 'docs', 'storage': 'S3 IA', 'note': 'Warm access fits IA'}],
+        'confidence_level': 0.85, 'savings_percentage': 20,
+        'tips': ['Buy 1-year RIs for steady servers'], 'recommendations': ['Migrate docs share with DataSync']
+    }
+
+
+def verbose_answer(data):
+    """The old schema's per-row echo of specs and costs, for size comparison"""
+    return {'cloud_infrastructure': {'servers': {'server_recommendations': [
+        {'server_id': s['server_id'], 'current_specs': '4 vCPU, 16GB RAM, 200GB Storage',
+         'recommended_instance': 'm5.xlarge', 'monthly_cost': 156.16, 'annual_cost': 1873.92,
+         'optimization_notes': 'This server runs a steady 24/7 Java workload, so a 1-year reserved instance '
+                               'of the same size would reduce cost without affecting performance.'}
+        for s in data['servers']]}}}
+
+
+class RecordingBedrock:
+    """Client double that records max_tokens and answers with a slim cost estimate"""
+
+    def __init__(self, answer):
+        self.answer = answer
+        self.max_tokens = []
+        self.bodies = []
+
+    def invoke_model(self, modelId, body):
+        self.max_tokens.append(json.loads(body)['max_tokens'])
+        self.bodies.append(body)
+        text = json.dumps(self.answer)
+        return {'body': io.BytesIO(json.dumps({'content': [{'text': text}]}).encode())}
+
+
+def test_budgets_scale_with_inventory():
+    """Budgets grow with component count and stay under the cap"""
+    assert output_token_budget('server') == 300
+    assert output_token_budget('cost_estimation', 10) < output_token_budget('cost_estimation', 40)
+    assert output_token_budget('cost_estimation', 10000) == 4000
+    print(f"✅ Cost-estimation budget: {output_token_budget('cost_estimation', 10)} tokens for 10 rows, "
+          f"{output_token_budget('cost_estimation', 40)} for 40")
+
+
+def test_service_joins_local_fields():
+    """The service asks for picks only and returns the full response shape with local pricing"""
+    data = inventory(12)
+    service = AIRecommendationService()
+    service.bedrock_client = RecordingBedrock(slim_answer(data))
+    service.circuit_breaker = CircuitBreaker()
+    result = service.get_ai_cost_estimation(data, 'AWS', 'us-east-1')
+
+    assert service.bedrock_client.max_tokens == [output_token_budget('cost_estimation', 14)]
+    servers = result['cloud_infrastructure']['servers']
+    row = servers['server_recommendations'][0]
+    assert row['current_specs'] == '4 vCPU, 16GB RAM, 200GB Storage'
+    assert row['recommended_instance'] == 'm5.xlarge' and row['optimization_notes'].startswith('Steady')
+    assert abs(row['monthly_cost'] - (0.192 * 730 + 200 * 0.08)) < 0.5
+    assert abs(servers['total_monthly_cost'] - 12 * row['monthly_cost']) < 0.1
+    share = result['cloud_infrastructure']['storage']['storage_recommendations'][0]
+    assert share['monthly_cost'] == 12.5
+    assert not result['ai_insights']['fallback_used']
+    assert set(result) == set(service._fallback_cost_estimation(data, 'AWS', 'us-east-1'))
+    print(f"✅ Slim answer joined into the full response (${result['grand_total']['annual_cloud_cost']:,.0f}/yr)")
+
+
+def test_component_answers_are_compact():
+    """Component prompts ask for a pick and a short note; the answer comes back under the usual field names"""
+    answer = {'recommended_instance': 'm5.xlarge', 'note': 'Steady 24/7 Java load', 'tips': ['Buy a 1-year RI'],
+              'confidence_level': 0.85}
+    service = AIRecommendationService()
+    service.bedrock_client = RecordingBedrock(answer)
+    service.circuit_breaker = CircuitBreaker()
+    service.cascade.enabled = False
+    service.sizing_model = None
+    service.sizing_log.enabled = False
+    result = service.get_server_recommendation({'server_id': 'SRV-001', 'vcpu': 4, 'ram': 16})
+
+    assert service.bedrock_client.max_tokens == [output_token_budget('server')]
+    prompt = service.bedrock_client.bodies[0]
+    assert 'alternative_options' not in prompt and 'detailed explanation' not in prompt
+    assert result['recommended_instance'] == 'm5.xlarge' and result['instance_family'] == 'm5'
+    assert result['reasoning'] == 'Steady 24/7 Java load' and result['cost_optimization_tips'] == ['Buy a 1-year RI']
+    assert expand_component_answer({'error': 'Failed to parse AI response'}, 'server') == \
+        {'error': 'Failed to parse AI response'}
+    print(f"✅ Component answer in ~{estimate_tokens(json.dumps(answer))} tokens, "
+          f"budget {output_token_budget('server')}")
+
+
+def test_unknown_picks_fall_back_to_rules():
+    """Rows the model skipped or sized with unknown types are sized by the rule engine"""
+    data = inventory(2)
+    result = assemble_cost_estimation({'servers': [{'id': 'SRV-000', 'instance': 'x9.huge'}]}, data, 'AWS', 'us-east-1')
+    rows = result['cloud_infrastructure']['servers']['server_recommendations']
+    assert [r['recommended_instance'] for r in rows] == ['t3.xlarge', 't3.xlarge']
+    assert result['cloud_infrastructure']['databases']['database_recommendations'][0]['recommended_instance'] == 'db.t3.medium'
+    print("✅ Missing or unknown picks sized by the rule engine")
+
+
+def test_strategy_join():
+    """Strategy rows get current state from the inventory, decisions from the model"""
+    data = inventory(1)
+    answer = {
+        'approach': {'overall_strategy': 'Rehost first', 'estimated_duration': '10 weeks'},
+        'servers': [{'id': 'SRV-000', 'migration_type': 'Rehost', 'target_state': 'EC2 m5.xlarge'}],
+        'databases': [{'id': 'orders', 'target_engine': 'Aurora MySQL', 'downtime': '15 minutes'}],
+        'risks': {'high': ['Cutover window'], 'mitigations': {'Cutover window': 'Rehearse twice'}},
+        'confidence_level': 0.8
+    }
+    result = assemble_migration_strategy(answer, data)
+    server = result['component_strategies']['servers'][0]
+    database = result['component_strategies']['databases'][0]
+    assert server['current_state'] == 'Linux server, 4 vCPU / 16GB RAM'
+    assert database['current_engine'] == 'MySQL' and database['downtime_estimate'] == '15 minutes'
+    assert result['risk_assessment']['high_risks'] == ['Cutover window']
+    print("✅ Strategy decisions joined with inventory state")
+
+
+def test_tokens_fall():
+    """Slim inputs and outputs are a fraction of the verbose ones"""
+    data = inventory(50)
+    slim_out = estimate_tokens(json.dumps(slim_answer(data)))
+    verbose_out = estimate_tokens(json.dumps(verbose_answer(data)))
+    slim_in = estimate_tokens(compact_inventory(data))
+    verbose_in = estimate_tokens(json.dumps(data, indent=2))
+    assert slim_out < verbose_out * 0.5
+    assert slim_in < verbose_in * 0.5
+    print(f"✅ 50 servers: output ~{verbose_out} → {slim_out} tokens, inventory ~{verbose_in} → {slim_in} tokens")
+
+
+if __name__ == "__main__":
+    test_budgets_scale_with_inventory()
+    test_service_joins_local_fields()
+    test_component_answers_are_compact()
+    test_unknown_picks_fall_back_to_rules()
+    test_strategy_join()
+    test_tokens_fall()
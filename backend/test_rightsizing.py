@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""Test the right-sizing and consolidation optimizer"""
+
+import sys
+import os
+import json
+import math
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.rightsizing import (RightSizingOptimizer, get_instance_catalog, get_rightsizing_optimizer,
+                                 load_instance_catalog)
+
+
+def test_cheapest_instance_across_families():
+    """Compute-heavy and memory-heavy servers land on c5 and r5 instead of the t3 ladder"""
+    optimizer = RightSizingOptimizer()
+    assert optimizer.recommend_instance(2, 2) == 't3.small'
+    assert optimizer.recommend_instance(16, 32) == 'c5.4xlarge'
+    assert optimizer.recommend_instance(4, 32) == 'r5.xlarge'
+    assert optimizer.recommend_instance(None, None) == 't3.nano'
+    print("✅ Cheapest instance picked across t3/m5/c5/r5")
+
+
+def test_headroom_and_families():
+    """Headroom pushes sizing up and the family filter restricts the catalog"""
+    assert RightSizingOptimizer(cpu_headroom=0.25).recommend_instance(4, 8) != 'c5.xlarge'
+    assert RightSizingOptimizer(families=['m5']).recommend_instance(2, 2) == 'm5.large'
+    try:
+        RightSizingOptimizer(families=['x1'])
+        assert False, "Expected ValueError for empty catalog"
+    except ValueError:
+        pass
+    print("✅ Headroom and family filters applied")
+
+
+def test_catalog_file():
+    """Instances loaded from a catalog file take part in sizing"""
+    with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as f:
+        json.dump([{'instance': 'custom.small', 'cpu': 2, 'ram': 4, 'cost_per_hour': 0.001}], f)
+    try:
+        catalog = load_instance_catalog(f.name)
+        assert 'custom.small' in catalog and 'm5.large' in catalog
+        assert RightSizingOptimizer(catalog=catalog).recommend_instance(2, 4) == 'custom.small'
+    finally:
+        os.unlink(f.name)
+    print("✅ Catalog file merged into the built-in catalog")
+
+
+def test_shared_optimizer():
+    """Services share one optimizer and catalog per catalog path instead of re-reading the file"""
+    with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as f:
+        json.dump([{'instance': 'custom.tiny', 'cpu': 1, 'ram': 1, 'cost_per_hour': 0.0001}], f)
+    previous = os.environ.get('INSTANCE_CATALOG_PATH')
+    os.environ['INSTANCE_CATALOG_PATH'] = f.name
+    try:
+        optimizer = get_rightsizing_optimizer()
+        assert optimizer is get_rightsizing_optimizer() and get_instance_catalog() is get_instance_catalog()
+        os.unlink(f.name)
+        # Served from the cache once the file is gone
+        assert get_rightsizing_optimizer().recommend_instance(1, 1) == 'custom.tiny'
+    finally:
+        if previous is None:
+            os.environ.pop('INSTANCE_CATALOG_PATH')
+        else:
+            os.environ['INSTANCE_CATALOG_PATH'] = previous
+    assert 'custom.tiny' not in get_instance_catalog()
+    assert get_rightsizing_optimizer() is not optimizer
+    print("✅ One optimizer and catalog shared per catalog path")
+
+
+def test_consolidation_saves_against_rehost():
+    """Small servers sharing an OS and uptime profile are packed onto fewer hosts"""
+    servers = [
+        {'server_id': f'WEB-{i}', 'os_type': 'Linux', 'vcpu': 1, 'ram': 5, 'uptime_pattern': '24/7'}
+        for i in range(12)
+    ] + [
+        {'server_id': 'WIN-1', 'os_type': 'Windows Server 2019', 'vcpu': 2, 'ram': 4, 'uptime_pattern': '24/7'},
+        {'server_id': 'BIG-1', 'os_type': 'Linux', 'vcpu': 32, 'ram': 256, 'uptime_pattern': 'Business Hours'}
+    ]
+    result = RightSizingOptimizer().optimize(servers)
+    summary = result['summary']
+    assert summary['optimized_monthly_cost'] <= summary['rightsized_monthly_cost'] <= summary['rehost_monthly_cost']
+    assert summary['monthly_savings_vs_rehost'] > 0
+    assert summary['consolidation_groups'] == 1
+
+    by_id = {s['server_id']: s for s in result['servers']}
+    assert by_id['WIN-1']['consolidation_group'] is None
+    assert by_id['BIG-1']['consolidation_group'] is None
+    for group in result['consolidations']:
+        assert group['host_count'] < group['server_count']
+        assert group['monthly_cost'] < group['individual_monthly_cost']
+
+    no_packing = RightSizingOptimizer().optimize(servers, mode='none')['summary']
+    assert no_packing['consolidation_groups'] == 0
+    assert no_packing['optimized_monthly_cost'] == no_packing['rightsized_monthly_cost']
+    print(f"✅ Saves {summary['savings_percent_vs_rehost']}% vs 1:1 rehost ({summary['consolidation_groups']} groups)")
+
+
+def test_rehost_baseline_without_general_purpose():
+    """Filtering out m5 still prices oversized servers' rehost baseline on m5, never as infinite"""
+    servers = [
+        {'server_id': 'SRV-004', 'os_type': 'Linux', 'vcpu': 16, 'ram': 256, 'uptime_pattern': '24/7'},
+        {'server_id': 'SRV-001', 'os_type': 'Linux', 'vcpu': 2, 'ram': 4, 'uptime_pattern': '24/7'}
+    ]
+    unfiltered = {s['server_id']: s for s in RightSizingOptimizer().optimize(servers)['servers']}
+    result = RightSizingOptimizer(families=['c5', 'r5']).optimize(servers)
+    big = {s['server_id']: s for s in result['servers']}['SRV-004']
+    assert big['rehost_instance'].startswith('m5.') and big['rehost_instance_count'] >= 1
+    assert big['rehost_monthly_cost'] == unfiltered['SRV-004']['rehost_monthly_cost']
+    assert big['recommended_instance'].split('.')[0] in ('c5', 'r5')
+    summary = result['summary']
+    assert all(math.isfinite(value) for value in summary.values() if isinstance(value, float))
+    assert summary['savings_percent_vs_rehost'] < 100
+    json.dumps(result, allow_nan=False)
+    print(f"✅ Rehost baseline for SRV-004 stays {big['rehost_instance']} x{big['rehost_instance_count']} "
+          f"with families c5/r5")
+
+
+def test_large_fleet_performance():
+    """20k servers are right-sized and consolidated within a few seconds"""
+    os_types = ['Linux', 'Windows Server 2019', 'Ubuntu 20.04']
+    patterns = ['24/7', 'Business Hours', 'Variable', 'batch nightly']
+    servers = [
+        {'server_id': f'SRV-{i}', 'os_type': os_types[i % 3], 'vcpu': 1 + (i % 12), 'ram': 2 * (1 + i % 24),
+         'uptime_pattern': patterns[i % 4]}
+        for i in range(20000)
+    ]
+    start = time.perf_counter()
+    result = RightSizingOptimizer(cpu_headroom=0.1, ram_headroom=0.1).optimize(servers)
+    elapsed = time.perf_counter() - start
+    assert result['summary']['server_count'] == 20000
+    assert elapsed < 5.0
+    print(f"✅ Optimized 20,000 servers in {elapsed:.2f} s")
+
+
+if __name__ == "__main__":
+    test_cheapest_instance_across_families()
+    test_headroom_and_families()
+    test_catalog_file()
+    test_shared_optimizer()
+    test_consolidation_saves_against_rehost()
+    test_rehost_baseline_without_general_purpose()
+    test_large_fleet_performance()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""Test single-flight coalescing of identical AI requests"""
+
+import sys
+import os
+import tempfile
+import threading
+import time
+from multiprocessing import get_context
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.single_flight import SingleFlight
+
+
+def slow_estimate(calls, delay=0.3):
+    def estimate():
+        calls.append(1)
+        time.sleep(delay)
+        return {'total_monthly_cost': 1234.5, 'ai_insights': {'fallback_used': False}}
+    return estimate
+
+
+def worker_process(lock_db, counter_path, results):
+    """One 'gunicorn worker': asks for the same key and logs whether it computed"""
+    flight = SingleFlight(lock_db=lock_db)
+
+    def estimate():
+        with open(counter_path, 'a') as f:
+            f.write('x')
+        time.sleep(0.5)
+        return {'total_monthly_cost': 1234.5}
+
+    results.put(flight.do('cost-estimation:abc', estimate)['total_monthly_cost'])
+
+
+def test_threads_share_one_call():
+    """Concurrent duplicates in one process wait on the leader"""
+    with tempfile.TemporaryDirectory() as tmp:
+        flight = SingleFlight(lock_db=os.path.join(tmp, 'flights.db'))
+        calls, results = [], []
+        threads = [threading.Thread(target=lambda: results.append(flight.do('k', slow_estimate(calls))))
+                   for _ in range(16)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        assert len(calls) == 1
+        assert len(results) == 16 and all(r['total_monthly_cost'] == 1234.5 for r in results)
+        # Callers get their own copies, so handlers can decorate them safely
+        results[0]['move_groups'] = []
+        assert 'move_groups' not in results[1]
+        assert elapsed < 1.0
+        print(f"✅ 16 concurrent requests → 1 computation in {elapsed * 1000:.0f} ms ({flight.stats()})")
+
+
+def test_processes_share_one_call():
+    """Duplicates in other worker processes reuse the leader's published result"""
+    with tempfile.TemporaryDirectory() as tmp:
+        lock_db = os.path.join(tmp, 'flights.db')
+        counter_path = os.path.join(tmp, 'calls')
+        SingleFlight(lock_db=lock_db)
+        ctx = get_context('spawn')
+        results = ctx.Queue()
+        workers = [ctx.Process(target=worker_process, args=(lock_db, counter_path, results)) for _ in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(30)
+        values = [results.get(timeout=5) for _ in workers]
+        with open(counter_path) as f:
+            computations = len(f.read())
+        assert values == [1234.5] * 4
+        assert computations == 1, computations
+        print(f"✅ 4 worker processes → {computations} computation")
+
+
+def test_errors_and_abandoned_claims():
+    """Failures reach every waiter and free the key; abandoned claims are taken over"""
+    with tempfile.TemporaryDirectory() as tmp:
+        lock_db = os.path.join(tmp, 'flights.db')
+        flight = SingleFlight(lock_db=lock_db, lease_seconds=0.2)
+
+        def broken():
+            raise ConnectionError("Could not connect to the endpoint URL")
+        try:
+            flight.do('k', broken)
+            assert False, "error should propagate"
+        except ConnectionError:
+            pass
+        calls = []
+        assert flight.do('k', slow_estimate(calls, 0))['total_monthly_cost'] == 1234.5
+
+        # A worker that died mid-call leaves an unfinished claim behind
+        flight._claim('orphan', 'dead-worker')
+        start = time.perf_counter()
+        flight.do('orphan', slow_estimate(calls, 0))
+        assert time.perf_counter() - start < 1.0
+        assert len(calls) == 2
+        print("✅ Errors propagate and abandoned claims are taken over after the lease")
+
+
+if __name__ == "__main__":
+    test_threads_share_one_call()
+    test_processes_share_one_call()
+    test_errors_and_abandoned_claims()
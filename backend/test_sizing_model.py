@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Test the local sizing model distilled from logged AI recommendations"""
+
+import sys
+import os
+import tempfile
+import time
+import numpy as np
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.ai_recommendations import AIRecommendationService
+from services.sizing_model import (RecommendationLog, train_sizing_model, save_sizing_model,
+                                   load_sizing_model)
+from services.recommendation_index import RecommendationIndex
+
+
+def teacher(specs):
+    """Stand-in for Bedrock's answers: family by memory ratio, size by vCPU"""
+    vcpu, ram = specs['vcpu'], specs['ram']
+    family = 'r5' if ram / vcpu >= 8 else 'c5' if ram / vcpu <= 2 else 'm5'
+    size = {2: 'large', 4: 'xlarge', 8: '2xlarge', 16: '4xlarge'}[vcpu]
+    return {'recommended_instance': f'{family}.{size}', 'ai_model': 'teacher', 'confidence_level': 'high'}
+
+
+def fleet(n, seed=0):
+    rng = np.random.default_rng(seed)
+    vcpus = rng.choice([2, 4, 8, 16], n)
+    ratios = rng.choice([2, 4, 8], n)
+    return [{'server_id': f'SRV-{i:04d}', 'vcpu': int(v), 'ram': int(v * r) - int(rng.integers(0, 2)),
+             'disk_size': int(rng.integers(50, 500)), 'os_type': rng.choice(['Linux', 'Windows'])}
+            for i, (v, r) in enumerate(zip(vcpus, ratios))]
+
+
+def teacher_log(directory, n=600):
+    """A recommendation log holding the teacher's answers for `n` servers"""
+    log = RecommendationLog(path=os.path.join(directory, 'log.jsonl'), enabled=True)
+    for specs in fleet(n):
+        log.record('server', specs, teacher(specs))
+    return log
+
+
+def test_train_version_and_serve():
+    """Logged answers train a tree that matches the teacher, saved as increasing versions"""
+    with tempfile.TemporaryDirectory() as tmp:
+        log = teacher_log(tmp)
+        with open(log.path, 'a') as f:
+            f.write('{"torn": ')  # a half-written line must not break training
+
+        model = train_sizing_model(log.read())
+        assert model.components['server']['holdout_accuracy'] >= 0.95
+        save_sizing_model(model, tmp)
+        save_sizing_model(train_sizing_model(log.read()), tmp)
+        latest = load_sizing_model(tmp)
+        assert latest.version == 2 and load_sizing_model(tmp, version=1).version == 1
+
+        unseen = fleet(300, seed=1)
+        correct = sum(latest.predict('server', s)['recommended_instance'] == teacher(s)['recommended_instance']
+                      for s in unseen)
+        assert correct / len(unseen) >= 0.95
+
+        start = time.perf_counter()
+        for s in unseen * 10:
+            latest.predict('server', s)
+        per_call = (time.perf_counter() - start) / (len(unseen) * 10)
+        assert per_call < 50e-6
+        print(f"✅ v{latest.version}: {correct / len(unseen):.1%} agreement on unseen servers, "
+              f"{per_call * 1e6:.1f} µs per prediction")
+
+
+def test_service_uses_local_model():
+    """The fallback uses the local model; confident predictions can skip Bedrock"""
+    with tempfile.TemporaryDirectory() as tmp:
+        model = train_sizing_model(teacher_log(tmp).read())
+    service = AIRecommendationService()
+    service.recommendation_index = RecommendationIndex(max_distance=0)
+    service.bedrock_client = None
+    service.sizing_model = model
+    specs = {'server_id': 'SRV-X', 'vcpu': 4, 'ram': 32, 'disk_size': 100, 'os_type': 'Linux'}
+
+    fallback = service.get_server_recommendation(specs)
+    assert fallback['recommended_instance'] == 'r5.xlarge'
+    assert fallback['fallback_used'] and fallback['ai_model'].startswith('local-sizing-model')
+
+    service.sizing_primary_confidence = 0.9
+    primary = service._ai_server_recommendation(specs)
+    assert primary['recommended_instance'] == 'r5.xlarge' and not primary['fallback_used']
+
+    # Without a model the rule ladder still answers
+    service.sizing_model = None
+    assert service.get_server_recommendation(specs)['recommended_instance'] == 't3.2xlarge'
+    print("✅ Local model backs the fallback and serves confident cases as primary")
+
+
+def test_too_little_data():
+    """Component types with too few logged answers are not trained"""
+    records = [{'component_type': 'database', 'features': [10, 0, 1, 0], 'label': 'db.t3.small'}] * 5
+    assert train_sizing_model(records, min_samples=20).components == {}
+    print("✅ Nothing trained from 5 samples")
+
+
+if __name__ == "__main__":
+    test_train_version_and_serve()
+    test_service_uses_local_model()
+    test_too_little_data()
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""Test per-request SQL statement tracking, slow-query plans and repeated-statement detection"""
+
+import sys
+import os
+import logging
+import sqlite3
+import time
+from contextlib import contextmanager
+import pytest
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask, jsonify
+from flask_sqlalchemy import SQLAlchemy
+from services import sql_instrumentation
+from services.metrics import REGISTRY
+from services.sql_instrumentation import (InstrumentedConnection, install_sql_tracking, instrument_sqlalchemy,
+                                          track_statements)
+
+
+def make_sqlalchemy_app():
+    """In-memory SQLAlchemy app with the real models and a small inventory"""
+    app = Flask('sql_tracking')
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db = SQLAlchemy(app)
+    from models_new import init_models
+    models = init_models(db)
+    instrument_sqlalchemy()
+    install_sql_tracking(app)
+
+    Server, Database = models['Server'], models['Database']
+
+    @app.route('/servers/twice')
+    def servers_twice():
+        first = Server.query.all()
+        return jsonify({'servers': len(first), 'again': len(Server.query.all())})
+
+    @app.route('/servers/databases')
+    def databases_per_server():
+        # The N+1 shape: one query for the servers, then one per server
+        return jsonify({server.server_id: len(Database.query.filter_by(server_id=server.server_id).all())
+                        for server in Server.query.all()})
+
+    with app.app_context():
+        db.create_all()
+        for i in range(25):
+            db.session.add(Server(server_id=f'SRV-{i:03d}', os_type='Linux', vcpu=4, ram=16, disk_size=100,
+                                  disk_type='SSD', uptime_pattern='24/7', current_hosting='On-premises'))
+        for i in range(3):
+            db.session.add(Database(db_name=f'db{i}', db_type='PostgreSQL', size_gb=50, backup_frequency='Daily',
+                                    licensing_model='Open Source', server_id=f'SRV-{i:03d}', write_frequency='Low',
+                                    downtime_tolerance='Low'))
+        db.session.commit()
+    return app, db, models
+
+
+def test_tracker_flags_repeats():
+    """Identical statements and N+1 shapes are told apart"""
+    conn = sqlite3.connect(':memory:', factory=InstrumentedConnection)
+    conn.execute('CREATE TABLE servers (server_id TEXT)')
+    conn.executemany('INSERT INTO servers VALUES (?)', [(f'SRV-{i}',) for i in range(10)])
+    with track_statements(n_plus_one_threshold=5) as tracker:
+        conn.execute('SELECT COUNT(*) FROM servers').fetchone()
+        conn.execute('SELECT  COUNT(*)\n FROM servers').fetchone()
+        for i in range(6):
+            conn.execute('SELECT * FROM servers WHERE server_id = ?', (f'SRV-{i}',)).fetchall()
+    conn.close()
+
+    assert tracker.count == 8
+    assert tracker.repeated() == [{'sql': 'SELECT COUNT(*) FROM servers', 'label': 'SELECT servers', 'count': 2}]
+    n_plus_one = tracker.n_plus_one()
+    assert len(n_plus_one) == 1 and n_plus_one[0]['count'] == 6 and n_plus_one[0]['distinct_parameters'] == 6
+    print("✅ Repeated statements and N+1 shapes are flagged")
+
+
+@contextmanager
+def capture_slow_queries():
+    """Treat every statement as slow and collect the slow-query records, whatever logging other tests set up"""
+    records = []
+    handler = logging.Handler(logging.WARNING)
+    handler.emit = records.append
+    sql_logger = logging.getLogger('services.sql_instrumentation')
+    state = (sql_instrumentation.SLOW_QUERY_MS, sql_logger.level, sql_logger.disabled, logging.root.manager.disable)
+    sql_instrumentation.SLOW_QUERY_MS = 0
+    sql_logger.setLevel(logging.WARNING)
+    sql_logger.disabled = False
+    logging.disable(logging.NOTSET)
+    sql_logger.addHandler(handler)
+    REGISTRY.reset()
+    try:
+        yield records
+    finally:
+        sql_logger.removeHandler(handler)
+        sql_instrumentation.SLOW_QUERY_MS, level, sql_logger.disabled, disabled = state
+        sql_logger.setLevel(level)
+        logging.disable(disabled)
+
+
+@pytest.fixture
+def slow_query_log():
+    with capture_slow_queries() as records:
+        yield records
+
+
+def test_slow_query_plan(slow_query_log):
+    """Statements over the threshold are logged with their query plan"""
+    records = slow_query_log
+    conn = sqlite3.connect(':memory:', factory=InstrumentedConnection)
+    conn.execute('CREATE TABLE servers (server_id TEXT, vcpu INTEGER)')
+    conn.execute('SELECT * FROM servers WHERE vcpu > ?', (2,)).fetchall()
+    conn.close()
+
+    messages = [record.getMessage() for record in records]
+    select = [message for message in messages if 'SELECT servers' in message]
+    assert select and 'plan: SCAN servers' in select[0], messages
+    # Only reads are explained, and the plan query isn't recorded as a statement of its own
+    assert all('EXPLAIN' not in message for message in messages)
+    assert REGISTRY.value('sql_slow_statements_total', statement='SELECT servers') == 1
+    print("✅ Slow statements are logged with EXPLAIN QUERY PLAN")
+
+
+def test_request_tracking():
+    """Each SQLAlchemy request reports its statement count; redundant scans show up in the metrics"""
+    REGISTRY.reset()
+    app, _, _ = make_sqlalchemy_app()
+    client = app.test_client()
+
+    response = client.get('/servers/twice')
+    assert response.status_code == 200 and response.headers['X-SQL-Statements'] == '2'
+    assert REGISTRY.value('sql_repeated_statements_total', route='/servers/twice', statement='SELECT servers',
+                          kind='identical') == 1
+    assert REGISTRY.value('sql_statements_per_request', route='/servers/twice')[1] == 2
+
+    response = client.get('/servers/databases')
+    assert response.headers['X-SQL-Statements'] == '26'
+    assert REGISTRY.value('sql_repeated_statements_total', route='/servers/databases',
+                          statement='SELECT databases', kind='n_plus_one') == 24
+    print("✅ Requests report statement counts, repeats and N+1 patterns")
+
+
+def test_export_summary_computed_once():
+    """Export sections share one inventory snapshot instead of re-running counts and sums"""
+    from services.export_service_new import ExportService
+
+    app, db, models = make_sqlalchemy_app()
+    with app.app_context():
+        exporter = ExportService(db, models)
+        with track_statements() as tracker:
+            exporter._get_summary_data()
+            exporter._get_cost_summary()
+            exporter._get_timeline_summary()
+        # One scan each of servers, databases and file shares
+        assert tracker.repeated() == [] and tracker.count == 3, tracker.summary()
+
+        from docx import Document
+        doc = Document()
+        exporter = ExportService(db, models)
+        with track_statements() as tracker:
+            exporter._add_executive_summary_word(doc)
+            exporter._add_infrastructure_overview_word(doc)
+            exporter._add_cost_analysis_word(doc)
+            exporter._add_timeline_word(doc)
+        assert tracker.repeated() == [] and tracker.count == 3, tracker.summary()
+
+        # Recomputing the summary reads nothing new
+        with track_statements() as again:
+            exporter._compute_summary_data()
+        assert again.count == 0
+    print(f"✅ Report sections share {tracker.count} table scans instead of repeating counts and sums")
+
+
+def test_performance():
+    """Tracking adds little to each statement"""
+    conn = sqlite3.connect(':memory:', factory=InstrumentedConnection)
+    conn.execute('CREATE TABLE servers (server_id TEXT)')
+    conn.execute("INSERT INTO servers VALUES ('SRV-1')")
+
+    def run():
+        start = time.perf_counter()
+        for i in range(5000):
+            conn.execute('SELECT server_id FROM servers WHERE server_id = ?', (f'SRV-{i}',)).fetchall()
+        return (time.perf_counter() - start) / 5000
+
+    untracked = run()
+    with track_statements():
+        tracked = run()
+    conn.close()
+    overhead = tracked - untracked
+    assert overhead < 20e-6, f"{overhead * 1e6:.1f}us tracking overhead per statement"
+    print(f"✅ {tracked * 1e6:.1f}us per tracked statement ({overhead * 1e6:+.1f}us for tracking)")
+
+
+if __name__ == "__main__":
+    print("🧪 Testing SQL statement tracking...")
+    test_tracker_flags_repeats()
+    with capture_slow_queries() as records:
+        test_slow_query_plan(records)
+    test_request_tracking()
+    test_export_summary_computed_once()
+    test_performance()
+    print("\n🎉 All SQL instrumentation tests passed!")
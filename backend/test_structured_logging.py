@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""Test queued JSON logging, request ids and payload sampling"""
+
+import sys
+import os
+import io
+import json
+import logging
+import queue
+import time
+import pytest
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault('BEDROCK_EMULATOR', 'replay')
+os.environ.setdefault('SIZING_LOG_ENABLED', 'false')
+
+from services.metrics import REGISTRY
+from services.structured_logging import (JsonFormatter, NonBlockingQueueHandler, configure_logging, log_payload,
+                                         shutdown_logging)
+
+
+@pytest.fixture(autouse=True)
+def restore_logging():
+    """Put back the root handlers, level and logging.disable state each test's configure_logging() replaces"""
+    root = logging.getLogger()
+    handlers, level, disabled = list(root.handlers), root.level, logging.root.manager.disable
+    yield
+    shutdown_logging()
+    root.handlers[:] = handlers
+    root.setLevel(level)
+    logging.disable(disabled)
+
+
+def records(stream):
+    shutdown_logging()
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_json_records():
+    """Records are written by the listener as JSON with extras and rendered exceptions"""
+    stream = io.StringIO()
+    configure_logging(level='INFO', log_format='json', stream=stream)
+    log = logging.getLogger('test.json')
+    items = ['a']
+    log.info('Loaded %s items', items, extra={'duration_ms': 1.5})
+    items.append('b')
+    log.debug('hidden')
+    try:
+        1 / 0
+    except ZeroDivisionError:
+        log.exception('failed')
+
+    written = records(stream)
+    assert [r['message'] for r in written] == ["Loaded ['a'] items", 'failed']
+    assert written[0]['duration_ms'] == 1.5 and written[0]['level'] == 'INFO' and written[0]['logger'] == 'test.json'
+    assert 'ZeroDivisionError' in written[1]['exc'] and written[0]['ts'].endswith('Z')
+    print("✅ JSON records keep the message as it was at log time")
+
+
+def test_queue_full_drops():
+    """A full queue drops and counts records instead of blocking the request"""
+    REGISTRY.reset()
+    handler = NonBlockingQueueHandler(queue.Queue(1))
+    handler.setFormatter(JsonFormatter())
+    log = logging.getLogger('test.drops')
+    log.propagate = False
+    log.addHandler(handler)
+    for i in range(3):
+        log.warning('record %s', i)
+    log.removeHandler(handler)
+    assert handler.queue.qsize() == 1
+    assert REGISTRY.value('log_records_dropped_total', logger='test.drops') == 2
+    print("✅ Records beyond the queue size are dropped and counted")
+
+
+def test_payload_sampling():
+    """Payloads are skipped when the level is off or the call isn't sampled, and truncated otherwise"""
+    stream = io.StringIO()
+    configure_logging(level='DEBUG', log_format='json', stream=stream)
+    log = logging.getLogger('test.payload')
+
+    class Unserializable:
+        def __str__(self):
+            raise AssertionError('payload serialized although it was not logged')
+
+    log_payload(log, 'skipped', Unserializable(), sample_rate=0)
+    log_payload(log, 'big', {'servers': ['x' * 100] * 100}, sample_rate=1, max_chars=50)
+    log.setLevel(logging.INFO)
+    log_payload(log, 'level off', Unserializable(), sample_rate=1)
+    log.setLevel(logging.NOTSET)
+
+    written = records(stream)
+    assert [r['message'] for r in written] == ['big']
+    assert len(written[0]['payload']) == 50 and written[0]['payload_truncated'] and written[0]['payload_chars'] > 10000
+    print("✅ Payloads are sampled, level-guarded and truncated")
+
+
+def test_request_ids():
+    """Every record logged during a request carries its id; one access record holds the duration"""
+    logging.disable(logging.NOTSET)
+    import real_data_backend
+
+    stream = io.StringIO()
+    configure_logging(level='INFO', log_format='json', stream=stream)
+    client = real_data_backend.app.test_client()
+    response = client.get('/api/servers', headers={'X-Request-Id': 'req-123'})
+    assert response.status_code == 200 and response.headers['X-Request-Id'] == 'req-123'
+    generated = client.get('/api/databases').headers['X-Request-Id']
+
+    written = records(stream)
+    for_request = [r for r in written if r.get('request_id') == 'req-123']
+    assert any(r['message'].startswith('Retrieved') for r in for_request)
+    access = [r for r in for_request if r['logger'] == 'http.access']
+    assert len(access) == 1 and access[0]['route'] == '/api/servers' and access[0]['status'] == 200
+    assert access[0]['duration_ms'] >= 0
+    assert len(generated) == 16 and any(r.get('request_id') == generated for r in written)
+    print("✅ Records and access logs carry the request id")
+
+
+def test_performance():
+    """Disabled payload logs cost a level check; enabled records pay for the enqueue (timings reported)"""
+    stream = io.StringIO()
+    configure_logging(level='INFO', log_format='json', stream=stream)
+    log = logging.getLogger('test.perf')
+    payload = {'servers': [{'server_id': f'SRV-{i}', 'vcpu': 4} for i in range(1000)]}
+
+    start = time.perf_counter()
+    for _ in range(10000):
+        log_payload(log, 'Dashboard data', payload)
+    disabled = (time.perf_counter() - start) / 10000
+
+    start = time.perf_counter()
+    for i in range(5000):
+        log.info('Retrieved %s servers from database', i)
+    enabled = (time.perf_counter() - start) / 5000
+    written = records(stream)
+    # Wall-clock costs depend on the machine; only the ordering and the output are checked
+    assert len(written) == 5000 and disabled < enabled
+    print(f"✅ {disabled * 1e6:.2f}us per disabled payload log, {enabled * 1e6:.2f}us per queued record")
+
+
+if __name__ == "__main__":
+    print("🧪 Testing structured logging...")
+    test_json_records()
+    test_queue_full_drops()
+    test_payload_sampling()
+    test_request_ids()
+    test_performance()
+    print("\n🎉 All structured logging tests passed!")
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Test stale-while-revalidate answers for the AI endpoints"""
+
+import sys
+import os
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.swr_cache import StaleWhileRevalidateCache, inventory_revision, cache_key, FRESH, STALE, FALLBACK
+
+
+def rule_based():
+    return {'total_monthly_cost': 100, 'ai_insights': {'fallback_used': True}}
+
+
+def slow_ai(gate, calls):
+    def refresh():
+        calls.append(1)
+        gate.wait(5)
+        return {'total_monthly_cost': 90, 'ai_insights': {'fallback_used': False}}
+    return refresh
+
+
+def test_keys_follow_inventory():
+    """Keys change with the inventory and the parameters, not with dict ordering"""
+    inventory = {'servers': [{'server_id': 'SRV-001', 'vcpu': 4}], 'databases': []}
+    reordered = {'databases': [], 'servers': [{'vcpu': 4, 'server_id': 'SRV-001'}]}
+    assert inventory_revision(inventory) == inventory_revision(reordered)
+    changed = {'servers': [{'server_id': 'SRV-001', 'vcpu': 8}], 'databases': []}
+    assert inventory_revision(inventory) != inventory_revision(changed)
+    revision = inventory_revision(inventory)
+    assert cache_key('cost-estimation', {'region': 'us-east-1'}, revision) != \
+        cache_key('cost-estimation', {'region': 'eu-west-1'}, revision)
+    print("✅ Cache keys track inventory revision and parameters")
+
+
+def test_fallback_then_upgrade():
+    """First answer is the rule-based one; the background refresh upgrades it once"""
+    cache = StaleWhileRevalidateCache(ttl_seconds=60)
+    gate, calls = threading.Event(), []
+
+    start = time.perf_counter()
+    first = cache.get_or_refresh('k', rule_based, slow_ai(gate, calls))
+    elapsed = time.perf_counter() - start
+    assert first['freshness']['status'] == FALLBACK
+    assert first['freshness']['refreshing']
+    assert elapsed < 0.05
+
+    # Repeated reads while the refresh is in flight don't start another one
+    for _ in range(10):
+        cache.get_or_refresh('k', rule_based, slow_ai(gate, calls))
+    gate.set()
+    upgraded = cache.get('k', wait_seconds=5, known_version=first['freshness']['version'])
+    assert upgraded['freshness']['status'] == FRESH
+    assert upgraded['total_monthly_cost'] == 90
+    assert len(calls) == 1
+    print(f"✅ Fallback served in {elapsed * 1000:.2f} ms, upgraded by a single background refresh")
+
+
+def test_stale_answer_served_while_refreshing():
+    """Expired AI answers are still served, marked stale, while a refresh runs"""
+    cache = StaleWhileRevalidateCache(ttl_seconds=0)
+    gate, calls = threading.Event(), []
+    gate.set()
+    first = cache.get_or_refresh('k', rule_based, slow_ai(gate, calls))
+    cache.get('k', wait_seconds=5, known_version=first['freshness']['version'])
+
+    gate.clear()
+    stale = cache.get_or_refresh('k', rule_based, slow_ai(gate, calls))
+    assert stale['freshness']['status'] == STALE
+    assert stale['freshness']['source'] == 'ai'
+    assert stale['total_monthly_cost'] == 90
+    gate.set()
+    print("✅ Stale AI answer served while revalidating")
+
+
+def test_failed_refresh_keeps_answer():
+    """A refresh that errors or falls back leaves the current answer in place"""
+    cache = StaleWhileRevalidateCache(ttl_seconds=60)
+
+    def broken():
+        raise ConnectionError("Could not connect to the endpoint URL")
+
+    first = cache.get_or_refresh('k', rule_based, broken)
+    result = cache.get('k', wait_seconds=5, known_version=first['freshness']['version'])
+    assert result['freshness']['status'] == FALLBACK
+    assert not result['freshness']['refreshing']
+    assert 'Could not connect' in result['freshness']['last_refresh_error']
+    assert result['total_monthly_cost'] == 100
+    assert cache.get('missing') is None
+    print("✅ Failed refresh keeps the rule-based answer and reports the error")
+
+
+if __name__ == "__main__":
+    test_keys_follow_inventory()
+    test_fallback_then_upgrade()
+    test_stale_answer_served_while_refreshing()
+    test_failed_refresh_keeps_answer()
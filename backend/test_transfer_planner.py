@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""Test the data-transfer duration and bandwidth planner"""
+
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.transfer_planner import (TransferPlanner, CUTOVER_OVERHEAD_HOURS, HOURS_PER_WEEK,
+                                       REPLICATION_CUTOVER_MINUTES, gb_per_hour, timeline_sizing)
+
+SERVERS = [
+    {'server_id': 'SRV-001', 'disk_size': 500},
+    {'server_id': 'SRV-002', 'disk_size': 800}
+]
+DATABASES = [
+    {'db_name': 'AppDB', 'size_gb': 100, 'write_frequency': 'Low', 'downtime_tolerance': 'Low', 'real_time_sync': 0},
+    {'db_name': 'FinanceDB', 'size_gb': 2000, 'write_frequency': 'High', 'downtime_tolerance': 'Very Low', 'real_time_sync': 1}
+]
+FILE_SHARES = [
+    {'share_name': 'Docs', 'total_size_gb': 1500, 'write_frequency': 'High', 'downtime_tolerance': 'Medium', 'real_time_sync': False}
+]
+
+
+def test_link_rates():
+    """Concurrent streams share the usable link and respect the per-stream cap"""
+    planner = TransferPlanner(bandwidth_mbps=1000, max_concurrent_transfers=4)
+    assert planner.stream_mbps == 200
+    assert abs(planner.stream_gb_per_hour - gb_per_hour(200)) < 1e-9
+    assert TransferPlanner(bandwidth_mbps=1000, max_concurrent_transfers=2, per_stream_mbps=100).stream_mbps == 100
+    try:
+        TransferPlanner(bandwidth_mbps=0)
+        assert False, "Expected ValueError for zero bandwidth"
+    except ValueError:
+        pass
+    print(f"✅ 1 Gbps over 4 streams: {planner.stream_gb_per_hour:.0f} GB/hour per stream")
+
+
+def test_sync_durations():
+    """Initial sync scales with size, replicated items cut over after draining their lag"""
+    plan = TransferPlanner(bandwidth_mbps=500, max_concurrent_transfers=2).plan(SERVERS, DATABASES, FILE_SHARES)
+    items = {item['name']: item for item in plan['items']}
+
+    assert items['FinanceDB']['initial_sync_hours'] > items['AppDB']['initial_sync_hours']
+    assert items['FinanceDB']['cutover_downtime_minutes'] == REPLICATION_CUTOVER_MINUTES
+    assert items['FinanceDB']['delta_sync_hours'] == 0
+    # A busy share needs delta passes before its final cutover delta is small
+    assert items['Docs']['delta_passes'] >= 1
+    assert items['Docs']['within_downtime_tolerance']
+    assert plan['summary']['total_gb'] == 4900
+    print(f"✅ FinanceDB initial sync {items['FinanceDB']['initial_sync_hours']} h, Docs {items['Docs']['delta_passes']} delta passes")
+
+
+def test_slow_link_flags_items():
+    """Items changing faster than their stream can copy never converge"""
+    plan = TransferPlanner(bandwidth_mbps=10, max_concurrent_transfers=4).plan([], DATABASES, [])
+    items = {item['name']: item for item in plan['items']}
+    assert not items['FinanceDB']['converges']
+    assert not items['FinanceDB']['within_downtime_tolerance']
+    assert plan['summary']['items_not_converging'] >= 1
+    print("✅ Non-converging replication flagged on a slow link")
+
+
+def test_schedule_respects_concurrency():
+    """No more transfers than streams run at once, and waves finish at the makespan"""
+    servers = [{'server_id': f'SRV-{i}', 'disk_size': 100 * (1 + i % 7)} for i in range(50)]
+    plan = TransferPlanner(bandwidth_mbps=1000, max_concurrent_transfers=3).plan(servers, [], [])
+    items = plan['items']
+    for item in items:
+        running = sum(1 for other in items if other['start_hour'] <= item['start_hour'] < other['finish_hour'])
+        assert running <= 3
+    assert abs(max(item['finish_hour'] for item in items) - plan['waves']['servers']['transfer_hours']) < 0.01
+    serial_hours = sum(item['initial_sync_hours'] + item['delta_sync_hours'] for item in items)
+    assert plan['waves']['servers']['transfer_hours'] < serial_hours / 2
+    print(f"✅ 50 servers over 3 streams in {plan['waves']['servers']['transfer_hours']} h")
+
+
+def test_timeline_sizing():
+    """Phase minimums cover each wave's makespan plus validation; the cutover window covers the final deltas"""
+    plan = TransferPlanner(bandwidth_mbps=50, max_concurrent_transfers=2).plan(SERVERS, DATABASES, FILE_SHARES)
+    sizing = timeline_sizing(plan)
+    waves = plan['waves']
+    assert sizing['infrastructure_weeks'] * HOURS_PER_WEEK >= waves['servers']['transfer_hours'] + HOURS_PER_WEEK
+    assert sizing['data_migration_weeks'] * HOURS_PER_WEEK >= \
+        waves['databases']['transfer_hours'] + waves['file_shares']['transfer_hours'] + 2 * HOURS_PER_WEEK
+    window = sizing['cutover_window']
+    assert window['final_sync_hours'] >= plan['summary']['cutover_sync_hours']
+    assert window['total_hours'] == round(CUTOVER_OVERHEAD_HOURS + window['final_sync_hours'], 2)
+    assert timeline_sizing(TransferPlanner().plan([], [], []))['data_migration_weeks'] == 0
+    print(f"✅ 50 Mbps: data migration needs {sizing['data_migration_weeks']} weeks, "
+          f"cutover window {window['total_hours']} h")
+
+
+def test_timeline_endpoints_follow_transfer_plan():
+    """Both /api/timeline implementations stretch data migration when the link is slow"""
+    import real_data_backend
+    from app import app
+
+    def phases(client, **body):
+        timeline = client.post('/api/timeline', json=body).get_json()
+        return timeline, {phase.get('name') or phase.get('title'): phase for phase in timeline['phases']}
+
+    client = real_data_backend.app.test_client()
+    fast, fast_phases = phases(client)
+    slow, slow_phases = phases(client, bandwidth_mbps=20)
+    assert slow_phases['Data Migration']['duration_weeks'] > fast_phases['Data Migration']['duration_weeks']
+    assert slow['project_overview']['total_duration_weeks'] == sum(p['duration_weeks'] for p in slow['phases'])
+    assert slow['phases'][-1]['end_week'] == slow['project_overview']['total_duration_weeks']
+    assert slow['cutover_window']['final_sync_hours'] >= fast['cutover_window']['final_sync_hours']
+
+    client = app.test_client()
+    fast, fast_phases = phases(client)
+    slow, slow_phases = phases(client, bandwidth_mbps=20)
+    assert slow_phases['Data Migration']['duration_weeks'] > fast_phases['Data Migration']['duration_weeks']
+    assert slow['project_overview']['total_duration_weeks'] > fast['project_overview']['total_duration_weeks']
+    assert 'cutover_window' in slow
+    print(f"✅ 20 Mbps link stretches data migration to {slow_phases['Data Migration']['duration_weeks']} weeks")
+
+
+def test_large_inventory_performance():
+    """Planning 50k transfer items takes well under a few seconds"""
+    servers = [{'server_id': f'SRV-{i}', 'disk_size': 50 + i % 900} for i in range(30000)]
+    databases = [
+        {'db_name': f'DB-{i}', 'size_gb': 10 + i % 2000, 'write_frequency': ['Low', 'Medium', 'High'][i % 3],
+         'downtime_tolerance': 'Low', 'real_time_sync': i % 2}
+        for i in range(20000)
+    ]
+    start = time.perf_counter()
+    plan = TransferPlanner(bandwidth_mbps=10000, max_concurrent_transfers=32).plan(servers, databases, [])
+    elapsed = time.perf_counter() - start
+    assert plan['summary']['total_items'] == 50000
+    assert elapsed < 5.0
+    print(f"✅ Planned 50,000 transfers in {elapsed:.2f} s")
+
+
+if __name__ == "__main__":
+    test_link_rates()
+    test_sync_durations()
+    test_slow_link_flags_items()
+    test_schedule_respects_concurrency()
+    test_timeline_sizing()
+    test_timeline_endpoints_follow_transfer_plan()
+    test_large_inventory_performance()